@@ -0,0 +1,106 @@
+"""Startup-time benchmark for the command line.
+
+Times fresh interpreter runs of the lightweight subcommands against
+``STARTUP_BUDGET_S`` and checks that they leave pyomo and idaes unimported.
+Also reports the import-time breakdown of the modelling stack.
+
+Run from repository root:
+    python benchmarks/cli_startup.py [REPEATS]
+"""
+
+from pathlib import Path
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asa_cm_control.asa_cli import (
+    IMPORT_TIMES,
+    STARTUP_BUDGET_S,
+    load_modelling_stack,
+)
+
+
+LAUNCHER = REPO_ROOT / "run_asa.py"
+
+HEAVY_MODULES = ("pyomo", "idaes")
+
+# Prints whether a heavy module is loaded after the command ran in-process
+PROBE = (
+    "import sys; sys.path.insert(0, {src!r}); "
+    "from asa_cm_control.asa_cli import main; "
+    "main({argv!r}); "
+    "print(sorted(m for m in {heavy!r} if m in sys.modules))"
+)
+
+
+def _time_command(argv, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(LAUNCHER), *argv],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _heavy_imports(argv):
+    code = PROBE.format(src=str(SRC_DIR), argv=argv, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    ).stdout.strip().splitlines()
+    return out[-1] if out else "?"
+
+
+def run(repeats=5):
+    with tempfile.TemporaryDirectory() as tmp:
+        case_file = Path(tmp) / "case.json"
+        case_file.write_text(json.dumps({"temperature": 330.0, "volume": 0.5}))
+        commands = {
+            "--help": ["--help"],
+            "validate": ["validate", str(case_file)],
+            "benchmark (list)": ["benchmark"],
+        }
+        rows = []
+        for label, argv in commands.items():
+            median_s = _time_command(argv, repeats)
+            rows.append(
+                {
+                    "command": label,
+                    "median_s": median_s,
+                    "within_budget": median_s <= STARTUP_BUDGET_S,
+                    "heavy_imports": "-" if label == "--help" else _heavy_imports(argv),
+                }
+            )
+    
+    load_modelling_stack()
+    return rows, dict(IMPORT_TIMES)
+
+
+def report(result):
+    rows, import_times = result
+    print(f"Startup budget: {STARTUP_BUDGET_S:.2f} s")
+    print(f"{'command':>18} {'median s':>9} {'budget':>7}  heavy modules loaded")
+    for row in rows:
+        print(
+            f"{row['command']:>18} {row['median_s']:>9.3f} "
+            f"{'ok' if row['within_budget'] else 'OVER':>7}  {row['heavy_imports']}"
+        )
+    print()
+    print(f"{'deferred import (in order)':<52} {'s':>7}")
+    for name, seconds in import_times.items():
+        print(f"{name:<52} {seconds:>7.3f}")
+
+
+if __name__ == "__main__":
+    report(run(*(int(arg) for arg in sys.argv[1:2])))
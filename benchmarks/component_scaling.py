@@ -0,0 +1,127 @@
+"""Benchmark of the thermo package and NRTL build against the component count.
+
+Extends the six ASA components with inert impurities (constants copied from
+aspirin) up to N = 30 and builds the CSTR flowsheet with two NRTL tables:
+- ``sparse``: the ASA pairs plus interactions of each impurity with aspirin,
+  acetic acid and water, as available data usually allows;
+- ``dense``: every off-diagonal pair listed.
+For each it reports build time, the traced memory peak of the build, the
+size of the NRTL expressions of one state block (nodes, not descending into
+named sub-expressions) and the initialize-and-solve time.
+
+Run from repository root:
+    python benchmarks/component_scaling.py
+"""
+
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import Expression
+
+from asa_cm_control.asa_process_flowsheet import (
+    DEFAULT_FEED_MOLE_FRAC,
+    build_flowsheet,
+    initialize_model,
+    set_operating_conditions,
+    solve_model,
+)
+from asa_cm_control.props.asa_thermo_property_package import ASA_COMPONENTS, ASA_NRTL
+
+
+COMPONENT_COUNTS = [6, 10, 14, 20, 30]
+
+# Components every impurity interacts with in the sparse table
+IMPURITY_PARTNERS = ("aspirin", "acetic_acid", "water")
+
+IMPURITY_MOLE_FRAC = 2e-3
+
+
+def component_tables(n_components, dense=False):
+    """Return component and NRTL tables with ``n_components - 6`` impurities."""
+    impurities = [f"impurity_{k}" for k in range(n_components - len(ASA_COMPONENTS))]
+    components = {**ASA_COMPONENTS, **{name: dict(ASA_COMPONENTS["aspirin"]) for name in impurities}}
+    nrtl = dict(ASA_NRTL)
+    if dense:
+        pairs = [(i, j) for i in components for j in components if i != j]
+    else:
+        pairs = [(i, j) for i in impurities for j in IMPURITY_PARTNERS]
+        pairs += [(j, i) for i, j in pairs]
+    for i, j in pairs:
+        nrtl.setdefault((i, j), {"tau": 0.3})
+    return components, nrtl
+
+
+def _own_nodes(expr):
+    if not (hasattr(expr, "is_expression_type") and expr.is_expression_type()):
+        return 1
+    if expr.is_named_expression_type():
+        return 1
+    return 1 + sum(_own_nodes(arg) for arg in expr.args)
+
+
+def nrtl_nodes(state):
+    """Count the expression nodes of the NRTL sub-expressions of a state block."""
+    state.act_coeff_liq_comp
+    return sum(
+        _own_nodes(data.expr)
+        for component in state.component_objects(Expression, descend_into=False)
+        if component.local_name.endswith("_nrtl") or component.local_name == "log_gamma_liq_comp"
+        for data in component.values()
+    )
+
+
+def run(counts=COMPONENT_COUNTS):
+    rows = []
+    for n_components in counts:
+        for dense in (False, True):
+            components, nrtl = component_tables(n_components, dense)
+            tracemalloc.start()
+            start = time.perf_counter()
+            model = build_flowsheet(components=components, nrtl=nrtl)
+            build_s = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            feed = {**DEFAULT_FEED_MOLE_FRAC, **{j: IMPURITY_MOLE_FRAC for j in components if j not in ASA_COMPONENTS}}
+            set_operating_conditions(model, mole_frac_comp=feed)
+            start = time.perf_counter()
+            initialize_model(model)
+            results = solve_model(model, tee=False)
+            solve_s = time.perf_counter() - start
+            rows.append(
+                {
+                    "n": n_components,
+                    "table": "dense" if dense else "sparse",
+                    "pairs": len(nrtl),
+                    "build_s": build_s,
+                    "build_mb": peak / 1e6,
+                    "nrtl_nodes": nrtl_nodes(model.fs.cstr.control_volume.properties_out[0]),
+                    "solve_s": solve_s,
+                    "status": str(results.solver.termination_condition),
+                }
+            )
+    return rows
+
+
+def report(rows):
+    print(
+        f"{'N':>3} {'table':>6} {'pairs':>6} {'build s':>8} {'build MB':>9} "
+        f"{'NRTL nodes':>10} {'init+solve s':>12}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['n']:>3} {row['table']:>6} {row['pairs']:>6} {row['build_s']:>8.3f} "
+            f"{row['build_mb']:>9.2f} {row['nrtl_nodes']:>10} {row['solve_s']:>12.3f}  {row['status']}"
+        )
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,122 @@
+"""Benchmark of the moment-based crystallizer against the reactor alone.
+
+For a range of crystallizer temperatures, builds, initializes and solves the
+CSTR flowsheet with and without ``fs.crystallizer`` on its outlet, and reports
+NLP size, initialization and solve times next to the crystal yield and sizes.
+
+Run from repository root:
+    python benchmarks/crystallizer_cost.py
+"""
+
+from pathlib import Path
+import statistics
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import value
+from idaes.core.util.model_statistics import number_activated_equalities
+
+from asa_cm_control.asa_crystallizer import (
+    build_crystallization_flowsheet,
+    initialize_crystallization_flowsheet,
+    set_crystallizer_conditions,
+)
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    initialize_model,
+    set_operating_conditions,
+    solve_model,
+)
+
+
+CRYSTALLIZER_TEMPERATURES = [290.0, 300.0, 310.0, 320.0]
+
+
+def _reactor_only():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    start = time.perf_counter()
+    initialize_model(model)
+    return model, time.perf_counter() - start
+
+
+def _with_crystallizer(temperature):
+    model = build_crystallization_flowsheet()
+    set_operating_conditions(model)
+    set_crystallizer_conditions(model, temperature=temperature)
+    start = time.perf_counter()
+    initialize_crystallization_flowsheet(model)
+    return model, time.perf_counter() - start
+
+
+def _timed_solve(model, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = solve_model(model, tee=False)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), str(results.solver.termination_condition)
+
+
+def run(temperatures=CRYSTALLIZER_TEMPERATURES, repeats=3):
+    model, init_s = _reactor_only()
+    solve_s, status = _timed_solve(model, repeats)
+    rows = [
+        {
+            "case": "cstr",
+            "equations": number_activated_equalities(model),
+            "init_s": init_s,
+            "solve_s": solve_s,
+            "status": status,
+        }
+    ]
+    for temperature in temperatures:
+        model, init_s = _with_crystallizer(temperature)
+        solve_s, status = _timed_solve(model, repeats)
+        crystallizer = model.fs.crystallizer
+        rows.append(
+            {
+                "case": f"cstr+cryst {temperature:.0f} K",
+                "equations": number_activated_equalities(model),
+                "init_s": init_s,
+                "solve_s": solve_s,
+                "status": status,
+                "yield": value(crystallizer.crystal_yield(0)),
+                "mean_um": 1e6 * value(crystallizer.mean_size(0)),
+                "sauter_um": 1e6 * value(crystallizer.sauter_mean_size(0)),
+                "supersaturation": value(crystallizer.supersaturation_ratio[0]),
+            }
+        )
+    return rows
+
+
+def report(rows):
+    print(
+        f"{'case':>18} {'eqs':>5} {'init s':>7} {'solve s':>8} {'yield':>6} "
+        f"{'L10 um':>7} {'L32 um':>7} {'S':>6}  status"
+    )
+    for row in rows:
+        if "yield" in row:
+            extra = (
+                f"{row['yield']:>6.3f} {row['mean_um']:>7.1f} {row['sauter_um']:>7.1f} "
+                f"{row['supersaturation']:>6.3f}"
+            )
+        else:
+            extra = f"{'-':>6} {'-':>7} {'-':>7} {'-':>6}"
+        print(
+            f"{row['case']:>18} {row['equations']:>5} {row['init_s']:>7.3f} "
+            f"{row['solve_s']:>8.3f} {extra}  {row['status']}"
+        )
+    base = rows[0]["solve_s"]
+    worst = max(row["solve_s"] for row in rows[1:])
+    print(f"\nslowest flowsheet solve with crystallizer: {worst / base:.2f}x the reactor alone")
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,87 @@
+"""Scaling benchmark for the CSTR-in-series train builder.
+
+Measures build, sequential initialization and simultaneous solve time, and
+model size, for increasing numbers of units.
+
+Run from repository root:
+    python benchmarks/cstr_train_scaling.py [N ...]
+"""
+
+from pathlib import Path
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import numpy as np
+from idaes.core.util.model_statistics import (
+    degrees_of_freedom,
+    number_variables,
+    number_total_constraints,
+)
+
+from asa_cm_control.asa_process_flowsheet import solve_model
+from asa_cm_control.asa_cstr_train import (
+    build_cstr_train,
+    initialize_cstr_train,
+    set_train_operating_conditions,
+)
+
+
+DEFAULT_SIZES = (1, 5, 10, 25, 50)
+
+
+def run(sizes=DEFAULT_SIZES):
+    rows = []
+    for n in sizes:
+        start = time.perf_counter()
+        model = build_cstr_train(n)
+        set_train_operating_conditions(model)
+        built = time.perf_counter()
+        assert degrees_of_freedom(model) == 0
+        initialize_cstr_train(model)
+        initialized = time.perf_counter()
+        results = solve_model(model, tee=False)
+        solved = time.perf_counter()
+        rows.append(
+            {
+                "n_units": n,
+                "variables": number_variables(model),
+                "constraints": number_total_constraints(model),
+                "build_s": built - start,
+                "init_s": initialized - built,
+                "solve_s": solved - initialized,
+                "status": str(results.solver.termination_condition),
+            }
+        )
+    return rows
+
+
+def report(rows):
+    print(
+        f"{'N':>4} {'vars':>7} {'cons':>7} {'build s':>9} {'init s':>9} "
+        f"{'solve s':>9}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['n_units']:>4} {row['variables']:>7} {row['constraints']:>7} "
+            f"{row['build_s']:>9.3f} {row['init_s']:>9.3f} {row['solve_s']:>9.3f}  "
+            f"{row['status']}"
+        )
+    
+    # Per-unit slopes from a linear fit; roughly constant slopes across the
+    # range indicate linear growth
+    n = np.array([row["n_units"] for row in rows], dtype=float)
+    if len(n) > 1:
+        for key in ("build_s", "init_s", "solve_s"):
+            slope, intercept = np.polyfit(n, [row[key] for row in rows], 1)
+            print(f"{key}: {slope * 1e3:.1f} ms/unit + {intercept:.3f} s")
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    report(run(sizes))
@@ -0,0 +1,114 @@
+"""Benchmark of block-triangular decomposition against sequential initialization.
+
+For a set of CSTR operating points, times the IDAES sequential initialization
+and ``initialize_by_decomposition`` (each followed by the full IPOPT solve)
+against the full solve without initialization, and reports the block
+structure found by the decomposition with the share of equations solved
+without IPOPT.
+
+Run from repository root:
+    python benchmarks/decomposition_initialization.py
+"""
+
+from pathlib import Path
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import value
+from idaes.core.util.exceptions import InitializationError
+
+from asa_cm_control.asa_decomposition import (
+    initialize_by_decomposition,
+    report_decomposition,
+    seed_outlet_from_inlet,
+)
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    set_operating_conditions,
+    solve_model,
+)
+
+
+OPERATING_POINTS = [
+    {"temperature": 310.0, "volume": 1.0},
+    {"temperature": 325.0, "volume": 1.0},
+    {"temperature": 340.0, "volume": 1.0},
+    {"temperature": 310.0, "volume": 0.01},
+    {"temperature": 325.0, "volume": 0.01},
+    {"temperature": 340.0, "volume": 0.01},
+]
+
+
+def _no_initialization(model):
+    pass
+
+
+def _sequential(model):
+    model.fs.cstr.initialize()
+
+
+def _decomposition(model):
+    seed_outlet_from_inlet(model.fs.cstr.control_volume)
+    return initialize_by_decomposition(model.fs)
+
+
+def run(points=OPERATING_POINTS):
+    rows = []
+    structure = None
+    for conditions in points:
+        for method, initialize in (
+            ("none", _no_initialization),
+            ("sequential", _sequential),
+            ("decomposition", _decomposition),
+        ):
+            model = build_flowsheet()
+            set_operating_conditions(model, **conditions)
+            start = time.perf_counter()
+            try:
+                stats = initialize(model)
+                status = "ok"
+            except InitializationError:
+                stats, status = None, "init failed"
+            init_s = time.perf_counter() - start
+            start = time.perf_counter()
+            results = solve_model(model, tee=False)
+            rows.append(
+                {
+                    **conditions,
+                    "method": method,
+                    "init_s": init_s,
+                    "solve_s": time.perf_counter() - start,
+                    "status": f"{status}/{results.solver.termination_condition}",
+                    "x_aspirin": value(model.fs.cstr.outlet.mole_frac_comp[0, "aspirin"]),
+                }
+            )
+            if stats is not None and structure is None:
+                structure = stats
+    return rows, structure
+
+
+def report(result):
+    rows, structure = result
+    if structure is not None:
+        report_decomposition(structure)
+        print()
+    print(
+        f"{'T K':>6} {'V m3':>6} {'method':>14} {'init s':>7} {'solve s':>8} "
+        f"{'total s':>8} {'x_aspirin':>10}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['temperature']:>6.1f} {row['volume']:>6.2f} {row['method']:>14} "
+            f"{row['init_s']:>7.3f} {row['solve_s']:>8.3f} {row['init_s'] + row['solve_s']:>8.3f} "
+            f"{row['x_aspirin']:>10.5f}  {row['status']}"
+        )
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,141 @@
+"""Benchmark of the H+ activity models of the reaction package.
+
+Compares, over a set of feed temperatures, the ``gamma x`` approximation, the
+algebraic speciation constraints and the grey-box speciation block solved by
+each available method (``compact``, ``substitution``, and ``simultaneous``
+when cyipopt and the PyNumero ASL library are installed). Reports build
+time, initialization and solve time, size of the NLP handed to IPOPT, proton
+activity and aspirin outlet fraction. Also times one evaluation of the
+grey-box output and Jacobian.
+
+Run from repository root:
+    python benchmarks/hplus_speciation.py
+"""
+
+from pathlib import Path
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import value
+from pyomo.opt import check_optimal_termination
+from idaes.core.util.model_statistics import (
+    number_activated_constraints,
+    number_variables_in_activated_constraints,
+)
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    set_operating_conditions,
+    solve_model,
+)
+from asa_cm_control.asa_speciation import (
+    compact_speciation,
+    fixed_hplus_activity,
+    initialize_speciated_model,
+    simultaneous_available,
+    solve_speciated_model,
+)
+from asa_cm_control.props.asa_electrolyte_speciation import SulfuricAcidSpeciation
+
+
+TEMPERATURES = (310.0, 325.0, 340.0)
+
+
+def _a_hplus(model):
+    block = model.fs.cstr.control_volume.reactions[0]
+    if hasattr(block, "a_hplus_speciation"):
+        return value(block.a_hplus_speciation)
+    state = model.fs.cstr.control_volume.properties_out[0]
+    return value(state.act_coeff_liq_comp["sulfuric_acid"] * state.mole_frac_comp["sulfuric_acid"])
+
+
+def _nlp_size(model, method):
+    if method == "compact":
+        with compact_speciation(model):
+            return _nlp_size(model, None)
+    if method is not None:
+        with fixed_hplus_activity(model):
+            return _nlp_size(model, None)
+    return number_variables_in_activated_constraints(model), number_activated_constraints(model)
+
+
+def _solve(mode, temperature):
+    hplus_activity, _, method = mode.partition("/")
+    start = time.perf_counter()
+    model = build_flowsheet(hplus_activity=hplus_activity)
+    set_operating_conditions(model, temperature=temperature)
+    built = time.perf_counter()
+    if hplus_activity == "greybox":
+        initialize_speciated_model(model)
+        initialized = time.perf_counter()
+        stats = solve_speciated_model(model, method=method)
+        status = stats["status"] if stats["converged"] else "failed"
+        solves = stats["iterations"]
+    else:
+        model.fs.cstr.initialize()
+        initialized = time.perf_counter()
+        results = solve_model(model, tee=False)
+        status = str(results.solver.termination_condition) if check_optimal_termination(results) else "failed"
+        solves = 1
+        method = None
+    solved = time.perf_counter()
+    n_variables, n_constraints = _nlp_size(model, method)
+    return {
+        "mode": mode,
+        "temperature": temperature,
+        "build_s": built - start,
+        "init_s": initialized - built,
+        "solve_s": solved - initialized,
+        "solves": solves,
+        "n_variables": n_variables,
+        "n_constraints": n_constraints,
+        "a_hplus": _a_hplus(model),
+        "x_aspirin": value(model.fs.cstr.outlet.mole_frac_comp[0, "aspirin"]),
+        "status": status,
+    }
+
+
+def _evaluation_cost(n=2000):
+    model = SulfuricAcidSpeciation(1e-3, 1e-6, -2.0e4, -2.2e4)
+    start = time.perf_counter()
+    for k in range(n):
+        model.set_input_values([325.0 + 1e-3 * k, 0.01, 0.9])
+        model.evaluate_outputs()
+        model.evaluate_jacobian_outputs()
+    return (time.perf_counter() - start) / n, model.newton_iterations / model.n_evaluations
+
+
+def run(temperatures=TEMPERATURES):
+    modes = ["approximate", "speciation", "greybox/compact", "greybox/substitution"]
+    if simultaneous_available():
+        modes.append("greybox/simultaneous")
+    rows = [_solve(mode, temperature) for temperature in temperatures for mode in modes]
+    return rows, _evaluation_cost()
+
+
+def report(result):
+    rows, (eval_s, newton_iterations) = result
+    print(
+        f"{'T K':>6} {'mode':>20} {'build s':>8} {'init s':>7} {'solve s':>8} {'solves':>6} "
+        f"{'vars':>5} {'cons':>5} {'a_hplus':>10} {'x_aspirin':>10}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['temperature']:>6.1f} {row['mode']:>20} {row['build_s']:>8.3f} {row['init_s']:>7.3f} "
+            f"{row['solve_s']:>8.3f} {row['solves']:>6} {row['n_variables']:>5} {row['n_constraints']:>5} "
+            f"{row['a_hplus']:>10.3e} {row['x_aspirin']:>10.6f}  {row['status']}"
+        )
+    print(
+        f"\nGrey-box output + Jacobian evaluation: {1e6 * eval_s:.1f} us "
+        f"({newton_iterations:.1f} Newton iterations on average)"
+    )
+
+
+if __name__ == "__main__":
+    report(run())
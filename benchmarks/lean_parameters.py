@@ -0,0 +1,111 @@
+"""Benchmark of the lean (mutable Param) parameter representation.
+
+Builds the CSTR flowsheet with package constants declared as fixed Vars
+(default) and as mutable Params with only the catalytic pre-exponential
+factors kept estimable, then reports the build memory peak, the number of
+Vars on the model, the time of ``degrees_of_freedom`` and
+``number_variables`` calls, the NL write time and the solve result. Both
+representations must give the same solution.
+
+Run from repository root:
+    python benchmarks/lean_parameters.py
+"""
+
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import value
+from idaes.core.util.model_statistics import degrees_of_freedom, number_variables
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    initialize_model,
+    set_operating_conditions,
+    solve_model,
+)
+
+
+CASES = [
+    ("var", {}),
+    ("lean", {"lean_parameters": True, "estimable_parameters": ("Acat",)}),
+]
+
+
+def _median_time(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _write_nl(model):
+    with tempfile.TemporaryDirectory() as tmp:
+        model.write(str(Path(tmp) / "model.nl"), format="nl")
+
+
+def run(cases=CASES, repeats=5):
+    rows = []
+    for label, options in cases:
+        tracemalloc.start()
+        start = time.perf_counter()
+        model = build_flowsheet(**options)
+        build_s = time.perf_counter() - start
+        _, build_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        set_operating_conditions(model)
+        initialize_model(model)
+        results = solve_model(model, tee=False)
+        outlet = model.fs.cstr.outlet
+        rows.append(
+            {
+                "case": label,
+                "build_s": build_s,
+                "build_mb": build_peak / 1e6,
+                "variables": number_variables(model),
+                "stats_s": _median_time(
+                    lambda: (degrees_of_freedom(model), number_variables(model)), repeats
+                ),
+                "nl_write_s": _median_time(lambda: _write_nl(model), repeats),
+                "status": str(results.solver.termination_condition),
+                "x_aspirin": value(outlet.mole_frac_comp[0, "aspirin"]),
+                "temperature": value(outlet.temperature[0]),
+            }
+        )
+    return rows
+
+
+def report(rows):
+    print(
+        f"{'case':>5} {'build s':>8} {'build MB':>9} {'vars':>5} {'stats ms':>9} "
+        f"{'nl write s':>10} {'x_aspirin':>10} {'T K':>8}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['case']:>5} {row['build_s']:>8.3f} {row['build_mb']:>9.2f} "
+            f"{row['variables']:>5} {1e3 * row['stats_s']:>9.2f} {row['nl_write_s']:>10.3f} "
+            f"{row['x_aspirin']:>10.6f} {row['temperature']:>8.3f}  {row['status']}"
+        )
+    base, lean = rows[0], rows[-1]
+    print(
+        f"\nlean vs var: {lean['variables'] - base['variables']:+d} Vars, "
+        f"NL write {lean['nl_write_s'] / base['nl_write_s']:.2f}x, "
+        f"statistics {lean['stats_s'] / base['stats_s']:.2f}x, "
+        f"same solution: {abs(lean['x_aspirin'] - base['x_aspirin']) < 1e-8}"
+    )
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,132 @@
+"""Benchmark of the fail-fast pre-solve model checks.
+
+Times ``check_model`` on the specified CSTR flowsheet from a cold cache and a
+warm one, then on mis-specified variants of the same case, next to the time
+IPOPT needs to give up on each variant:
+- ``extra closure``: inlet composition fixed plus an extra sum-to-one equation
+- ``free inlet``: one inlet mole fraction left unfixed
+- ``bad sum``: fixed inlet mole fractions that do not sum to one
+- ``out of bounds``: inlet temperature fixed below its lower bound
+
+Run from repository root:
+    python benchmarks/model_checks.py
+"""
+
+from pathlib import Path
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import Constraint
+
+from asa_cm_control.asa_model_checks import check_model
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    initialize_model,
+    set_operating_conditions,
+    solve_model,
+)
+
+
+def _extra_closure(model):
+    inlet = model.fs.cstr.inlet
+    model.extra_closure = Constraint(
+        expr=sum(inlet.mole_frac_comp[0, j] for j in model.fs.thermo_params.component_list) == 1
+    )
+
+
+def _free_inlet(model):
+    model.fs.cstr.inlet.mole_frac_comp[0, "water"].unfix()
+
+
+def _bad_sum(model):
+    model.fs.cstr.inlet.mole_frac_comp[0, "water"].fix(0.2)
+
+
+def _out_of_bounds(model):
+    temperature = model.fs.cstr.inlet.temperature[0]
+    temperature.fix(temperature.lb - 10)
+
+
+MISSPECIFICATIONS = {
+    "extra closure": _extra_closure,
+    "free inlet": _free_inlet,
+    "bad sum": _bad_sum,
+    "out of bounds": _out_of_bounds,
+}
+
+
+def _specified_model():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    return model
+
+
+def _timed(func):
+    start = time.perf_counter()
+    try:
+        outcome = func()
+    except Exception as err:
+        outcome = err
+    return time.perf_counter() - start, outcome
+
+
+def run(misspecifications=MISSPECIFICATIONS):
+    model = _specified_model()
+    cold_s, _ = _timed(lambda: check_model(model))
+    warm_s, report = _timed(lambda: check_model(model))
+    initialize_model(model)
+    solve_s, results = _timed(lambda: solve_model(model, tee=False, check=False))
+    rows = [
+        {
+            "case": "specified",
+            "check_s": cold_s,
+            "cached_s": warm_s,
+            "ipopt_s": solve_s,
+            "ipopt": str(results.solver.termination_condition),
+            "diagnostic": f"ok, {len(report['warnings'])} warning(s)",
+        }
+    ]
+    
+    for label, misspecify in misspecifications.items():
+        model = _specified_model()
+        misspecify(model)
+        check_s, report = _timed(lambda: check_model(model, raise_on_error=False))
+        cached_s, _ = _timed(lambda: check_model(model, raise_on_error=False))
+        ipopt_s, outcome = _timed(lambda: solve_model(model, tee=False, check=False))
+        if isinstance(outcome, Exception):
+            ipopt = type(outcome).__name__
+        else:
+            ipopt = str(outcome.solver.termination_condition)
+        rows.append(
+            {
+                "case": label,
+                "check_s": check_s,
+                "cached_s": cached_s,
+                "ipopt_s": ipopt_s,
+                "ipopt": ipopt,
+                "diagnostic": "; ".join(report["errors"]) or "not detected",
+            }
+        )
+    return rows
+
+
+def report(rows):
+    print(f"{'case':>14} {'check ms':>9} {'cached ms':>10} {'IPOPT s':>8}  IPOPT outcome")
+    for row in rows:
+        print(
+            f"{row['case']:>14} {1e3 * row['check_s']:>9.1f} {1e3 * row['cached_s']:>10.1f} "
+            f"{row['ipopt_s']:>8.3f}  {row['ipopt']}"
+        )
+    print()
+    for row in rows:
+        print(f"{row['case']}: {row['diagnostic']}")
+
+
+if __name__ == "__main__":
+    report(run())
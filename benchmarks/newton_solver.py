@@ -0,0 +1,175 @@
+"""Benchmark of the direct Newton solver against IPOPT on small perturbations.
+
+Walks the CSTR inlet flow and temperature through a sequence of small random
+steps and re-solves after each one, warm-started from the previous solution,
+with ``solve_model`` (IPOPT) and with ``NewtonSolver`` for each installed
+evaluator.
+Reports setup time, per-solve latency, factorization and fallback counts, and
+the largest outlet deviation from the IPOPT solutions (over cases both
+converged). Last, both jump between far-off inlet conditions, once more with
+Newton capped at a few iterations to exercise the IPOPT fallback.
+
+The PyNumero and CasADi rows are skipped when the PyNumero ASL library or
+CasADi is not installed; the far-off runs use the first installed evaluator. The Pyomo evaluator is no faster than IPOPT.
+
+Run from repository root:
+    python benchmarks/newton_solver.py
+"""
+
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import value
+from pyomo.opt import check_optimal_termination
+
+from asa_cm_control.asa_newton import NewtonSolver, casadi_available, pynumero_available
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions, solve_model
+
+
+N_STEPS = 40
+
+# Standard deviations of the random-walk steps
+FLOW_STEP = 0.01
+TEMPERATURE_STEP = 0.5
+
+# Newton iterations of the capped far-jump run
+CAPPED_ITER = 3
+
+FAR_CASES = [
+    {"flow_mol": 0.5, "temperature": 325.0},
+    {"flow_mol": 0.05, "temperature": 360.0},
+    {"flow_mol": 2.0, "temperature": 300.0},
+    {"flow_mol": 0.5, "temperature": 325.0},
+]
+
+
+def perturbations(n_steps=N_STEPS, seed=0):
+    """Return a random walk of inlet conditions around the nominal case."""
+    rng = np.random.default_rng(seed)
+    flow, temperature = 0.5, 325.0
+    cases = []
+    for _ in range(n_steps):
+        flow = float(np.clip(flow + FLOW_STEP * rng.standard_normal(), 0.3, 0.8))
+        temperature = float(np.clip(temperature + TEMPERATURE_STEP * rng.standard_normal(), 315.0, 335.0))
+        cases.append({"flow_mol": flow, "temperature": temperature})
+    return cases
+
+
+def _initialized_model():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    solve_model(model, tee=False)
+    return model
+
+
+def _outputs(model):
+    outlet = model.fs.cstr.outlet
+    return np.array(
+        [value(outlet.temperature[0])]
+        + [value(outlet.mole_frac_comp[0, j]) for j in model.fs.thermo_params.component_list]
+    )
+
+
+def _ipopt_solve(model):
+    results = solve_model(model, tee=False)
+    return {"converged": check_optimal_termination(results), "factorizations": 0, "method": "ipopt"}
+
+
+def _sweep(label, cases, evaluator=None, **newton_options):
+    model = _initialized_model()
+    start = time.perf_counter()
+    if evaluator is None:
+        solve = _ipopt_solve
+    else:
+        solve = NewtonSolver(model, evaluator=evaluator, **newton_options).solve
+    setup_s = time.perf_counter() - start
+    
+    times, outputs, stats = [], [], []
+    for case in cases:
+        set_operating_conditions(model, **case)
+        start = time.perf_counter()
+        stats.append(solve(model) if evaluator is None else solve())
+        times.append(time.perf_counter() - start)
+        outputs.append(_outputs(model))
+    return {
+        "case": label,
+        "setup_s": setup_s,
+        "times": np.array(times),
+        "outputs": np.array(outputs),
+        "converged": np.array([row["converged"] for row in stats]),
+        "failed": sum(not row["converged"] for row in stats),
+        "fallback": sum(row["method"] == "newton>ipopt" for row in stats),
+        "factorizations": sum(row["factorizations"] for row in stats),
+    }
+
+
+def _deviation(row, baseline):
+    both = row["converged"] & baseline["converged"]
+    if not both.any():
+        return None
+    return np.max(np.abs(row["outputs"][both] - baseline["outputs"][both]), axis=0)
+
+
+def installed_evaluators():
+    """Return the installed Newton evaluators, fastest expected first."""
+    available = {"pynumero": pynumero_available(), "casadi": casadi_available, "pyomo": True}
+    return tuple(evaluator for evaluator, ok in available.items() if ok)
+
+
+def run(n_steps=N_STEPS):
+    cases = perturbations(n_steps)
+    evaluators = installed_evaluators()
+    near = [_sweep("ipopt", cases)] + [
+        _sweep(f"newton {evaluator}", cases, evaluator) for evaluator in evaluators
+    ]
+    far = [
+        _sweep("far ipopt", FAR_CASES),
+        _sweep("far newton", FAR_CASES, evaluators[0]),
+        _sweep("far capped", FAR_CASES, evaluators[0], max_iter=CAPPED_ITER),
+    ]
+    for rows in (near, far):
+        rows[0]["deviation"] = None
+        for row in rows[1:]:
+            row["deviation"] = _deviation(row, rows[0])
+    return near + far
+
+
+def report(rows):
+    print(
+        f"{'case':>14} {'setup s':>8} {'median ms':>10} {'mean ms':>8} {'max ms':>8} "
+        f"{'factor':>7} {'fallback':>9} {'failed':>7} {'max dT K':>9} {'max dx':>9}"
+    )
+    for row in rows:
+        times = 1e3 * row["times"]
+        if row["deviation"] is None:
+            deviation = f"{'-':>9} {'-':>9}"
+        else:
+            deviation = f"{row['deviation'][0]:>9.1e} {np.max(row['deviation'][1:]):>9.1e}"
+        print(
+            f"{row['case']:>14} {row['setup_s']:>8.3f} {np.median(times):>10.2f} "
+            f"{np.mean(times):>8.2f} {np.max(times):>8.2f} {row['factorizations']:>7} "
+            f"{row['fallback']:>9} {row['failed']:>7} {deviation}"
+        )
+    skipped = sorted({"pynumero", "casadi"} - set(installed_evaluators()))
+    if skipped:
+        print(f"\nNot installed, rows skipped: {', '.join(f'newton {name}' for name in skipped)}")
+    ipopt = np.median(rows[0]["times"])
+    print()
+    for row in rows[1:]:
+        if row["case"].startswith("newton"):
+            speedup = ipopt / np.median(row["times"])
+            print(f"median latency, {row['case']} vs ipopt: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,139 @@
+"""Discretization benchmark for the collocated PFR.
+
+Measures build time, peak Python memory during build, initialization and
+simultaneous solve time, model size, and the outlet aspirin mole fraction
+error against the finest marched grid, for a range of finite element and
+collocation point counts.
+
+Each grid is solved after three initializations:
+- ``march``: ``initialize_pfr``, one element at a time, so its cost grows
+  linearly with the number of elements.
+- ``idaes``: the PFR's own ``initialize()``, one solve of the whole tube.
+- ``cold``: none; IPOPT starts from the build defaults.
+
+Uses the default PFR volume, at which conversion stays partial and the axial
+profile spans the whole tube.
+
+Run from repository root:
+    python benchmarks/pfr_discretization.py [NFE ...]
+"""
+
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import value
+from idaes.core.util.exceptions import InitializationError
+from idaes.core.util.model_statistics import (
+    degrees_of_freedom,
+    number_variables,
+    number_total_constraints,
+)
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    initialize_pfr,
+    set_operating_conditions,
+    solve_model,
+)
+
+
+DEFAULT_ELEMENTS = (5, 10, 20, 40)
+DEFAULT_COLLOCATION_POINTS = (1, 3)
+
+INIT_METHODS = ("march", "idaes", "cold")
+
+
+def _initialize(model, init):
+    if init == "march":
+        initialize_pfr(model)
+    elif init == "idaes":
+        model.fs.pfr.initialize()
+
+
+def run(
+    elements=DEFAULT_ELEMENTS,
+    collocation_points=DEFAULT_COLLOCATION_POINTS,
+    init_methods=INIT_METHODS,
+):
+    rows = []
+    for ncp in collocation_points:
+        for nfe in elements:
+            for init in init_methods:
+                rows.append(_run_grid(nfe, ncp, init))
+    return rows
+
+
+def _run_grid(nfe, ncp, init):
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = build_flowsheet("pfr", finite_elements=nfe, collocation_points=ncp)
+    set_operating_conditions(model)
+    built = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert degrees_of_freedom(model) == 0
+    initialized = None
+    ready = time.perf_counter()
+    try:
+        _initialize(model, init)
+        initialized = time.perf_counter()
+        status = str(solve_model(model, tee=False).solver.termination_condition)
+    except (ValueError, RuntimeError, InitializationError) as err:
+        status = f"error: {err.__class__.__name__}"
+    solved = time.perf_counter()
+    if initialized is None:
+        initialized = solved
+    return {
+        "nfe": nfe,
+        "ncp": ncp,
+        "init": init,
+        "variables": number_variables(model),
+        "constraints": number_total_constraints(model),
+        "build_s": built - start,
+        "peak_mb": peak / 2**20,
+        "init_s": initialized - ready,
+        "solve_s": solved - initialized,
+        "x_aspirin": value(model.fs.pfr.outlet.mole_frac_comp[0, "aspirin"]),
+        "status": status,
+    }
+
+
+def report(rows):
+    # The finest grid of the first initialization serves as the reference
+    first = [row for row in rows if row["init"] == rows[0]["init"]]
+    reference = max(first, key=lambda row: row["nfe"] * row["ncp"])["x_aspirin"]
+    print(
+        f"{'nfe':>4} {'ncp':>4} {'init':>6} {'vars':>7} {'cons':>7} {'build s':>9} "
+        f"{'peak MB':>8} {'init s':>9} {'solve s':>9} {'total s':>9} {'|err|':>9}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['nfe']:>4} {row['ncp']:>4} {row['init']:>6} {row['variables']:>7} "
+            f"{row['constraints']:>7} {row['build_s']:>9.3f} {row['peak_mb']:>8.1f} "
+            f"{row['init_s']:>9.3f} {row['solve_s']:>9.3f} "
+            f"{row['init_s'] + row['solve_s']:>9.3f} "
+            f"{abs(row['x_aspirin'] - reference):>9.2e}  {row['status']}"
+        )
+    
+    # Initialize-plus-solve time of the baselines relative to the march
+    marched = {(row["nfe"], row["ncp"]): row for row in rows if row["init"] == "march"}
+    print()
+    for row in rows:
+        march = marched.get((row["nfe"], row["ncp"]))
+        if row["init"] == "march" or march is None:
+            continue
+        ratio = (row["init_s"] + row["solve_s"]) / (march["init_s"] + march["solve_s"])
+        print(f"nfe={row['nfe']:<3} ncp={row['ncp']}: {row['init']} takes {ratio:.2f}x the march")
+
+
+if __name__ == "__main__":
+    elements = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_ELEMENTS
+    report(run(elements))
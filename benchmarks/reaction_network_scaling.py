@@ -0,0 +1,134 @@
+"""Benchmark of the table-driven reaction package on synthetic networks.
+
+Generates random liquid-phase networks over the ASA components with N
+reactions and k participants per reaction, builds the CSTR flowsheet with
+``ASAReactionParameterBlock(reactions=...)``, and reports build time, the
+number of non-zero stoichiometric entries and rate orders, the Jacobian
+non-zeros of the square model and the solve status. At equal N, networks
+with more participants per reaction show that model size follows the
+non-zero entries rather than the dense reaction x phase x component count.
+
+Run from repository root:
+    python benchmarks/reaction_network_scaling.py
+"""
+
+from pathlib import Path
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import numpy as np
+from pyomo.contrib.incidence_analysis import IncidenceGraphInterface
+from pyomo.environ import ConcreteModel
+from idaes.core import FlowsheetBlock
+from idaes.models.unit_models import CSTR
+
+from asa_cm_control.asa_process_flowsheet import set_operating_conditions, solve_model
+from asa_cm_control.props.asa_reaction_property_package import ASA_REACTIONS, ASAReactionParameterBlock
+from asa_cm_control.props.asa_thermo_property_package import ThermoParameterBlock
+
+
+# (reactions, participants per reaction)
+NETWORKS = [(3, 3), (10, 3), (25, 3), (50, 3), (50, 6)]
+
+COMPONENTS = (
+    "salicylic_acid",
+    "acetic_anhydride",
+    "sulfuric_acid",
+    "aspirin",
+    "acetic_acid",
+    "water",
+)
+
+
+def synthetic_reaction_table(n_reactions, participants, seed=0):
+    """Return a random reaction table with slow uncatalysed kinetics.
+
+    Each reaction consumes ``participants // 2`` components (first order in
+    each) and produces the remaining ``participants - participants // 2``.
+    """
+    rng = np.random.default_rng(seed)
+    n_reactants = participants // 2
+    table = {}
+    for k in range(n_reactions):
+        chosen = rng.choice(COMPONENTS, size=participants, replace=False)
+        reactants, products = chosen[:n_reactants], chosen[n_reactants:]
+        table[f"s{k}"] = {
+            "stoichiometry": {**{j: -1 for j in reactants}, **{j: 1 for j in products}},
+            "orders": {j: 1.0 for j in reactants},
+            "A0": float(10 ** rng.uniform(2, 4)),
+            "Ea0": float(rng.uniform(4e4, 6e4)),
+            "Acat": 0.0,
+            "Ea_cat": 0.0,
+        }
+    return table
+
+
+def _build(table):
+    model = ConcreteModel()
+    model.fs = FlowsheetBlock(dynamic=False)
+    model.fs.thermo_params = ThermoParameterBlock()
+    model.fs.reaction_params = ASAReactionParameterBlock(
+        property_package=model.fs.thermo_params, reactions=table
+    )
+    model.fs.cstr = CSTR(
+        property_package=model.fs.thermo_params,
+        reaction_package=model.fs.reaction_params,
+    )
+    return model
+
+
+def run(networks=NETWORKS):
+    rows = []
+    cases = [("asa", ASA_REACTIONS)] + [
+        (f"N={n} k={k}", synthetic_reaction_table(n, k)) for n, k in networks
+    ]
+    for label, table in cases:
+        start = time.perf_counter()
+        model = _build(table)
+        build_s = time.perf_counter() - start
+        set_operating_conditions(model)
+        
+        start = time.perf_counter()
+        model.fs.cstr.initialize()
+        results = solve_model(model, tee=False)
+        solve_s = time.perf_counter() - start
+        
+        params = model.fs.reaction_params
+        rows.append(
+            {
+                "case": label,
+                "reactions": len(params.rate_reaction_idx),
+                "stoich_nz": len(params.rate_reaction_stoichiometry),
+                "dense": len(params.rate_reaction_idx) * len(model.fs.thermo_params.phase_list)
+                * len(model.fs.thermo_params.component_list),
+                "orders": len(params.reaction_order_idx),
+                "jacobian_nz": IncidenceGraphInterface(model).incidence_matrix.nnz,
+                "build_s": build_s,
+                "solve_s": solve_s,
+                "status": str(results.solver.termination_condition),
+            }
+        )
+    return rows
+
+
+def report(rows):
+    print(
+        f"{'case':>10} {'rxns':>5} {'stoich nz':>9} {'dense':>6} {'orders':>6} "
+        f"{'jac nz':>7} {'build s':>8} {'solve s':>8}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['case']:>10} {row['reactions']:>5} {row['stoich_nz']:>9} {row['dense']:>6} "
+            f"{row['orders']:>6} {row['jacobian_nz']:>7} {row['build_s']:>8.3f} "
+            f"{row['solve_s']:>8.3f}  {row['status']}"
+        )
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,59 @@
+"""Tear-stream convergence benchmark for the recycle flowsheet.
+
+Compares the default simultaneous solve from the reaction-free tear guess
+against sequential initialization with each tear method followed by the same
+simultaneous solve.
+
+Run from repository root:
+    python benchmarks/recycle_tear_convergence.py
+"""
+
+from pathlib import Path
+import sys
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.environ import value
+
+from asa_cm_control.asa_recycle_flowsheet import (
+    TEAR_METHODS,
+    build_recycle_flowsheet,
+    set_recycle_operating_conditions,
+    solve_recycle_flowsheet,
+)
+
+
+def _product_aspirin(model):
+    return value(model.fs.separator.product.mole_frac_comp[0, "aspirin"])
+
+
+def run(tear_methods=TEAR_METHODS):
+    rows = []
+    for method in (None,) + tuple(tear_methods):
+        model = build_recycle_flowsheet()
+        set_recycle_operating_conditions(model)
+        stats = solve_recycle_flowsheet(model, tear_method=method)
+        stats["x_aspirin"] = _product_aspirin(model)
+        rows.append(stats)
+    return rows
+
+
+def report(rows):
+    print(
+        f"{'method':>9} {'passes':>7} {'tear res':>9} {'seq s':>8} "
+        f"{'EO s':>8} {'total s':>8} {'x_aspirin':>10}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['tear_method'] or 'EO':>9} {row['passes']:>7} {row['residual']:>9.1e} "
+            f"{row['time_s']:>8.2f} {row['solve_s']:>8.2f} {row['total_s']:>8.2f} "
+            f"{row['x_aspirin']:>10.5f}  {row['status']}"
+        )
+
+
+if __name__ == "__main__":
+    report(run())
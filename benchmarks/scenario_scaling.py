@@ -0,0 +1,67 @@
+"""Scaling benchmark for the multi-scenario robust design.
+
+For an increasing number of feed water scenarios S, compares the direct
+solve of the stacked NLP with progressive hedging over a process pool and
+reports the expected objective and first-stage design of each.
+
+Run from repository root:
+    python benchmarks/scenario_scaling.py
+"""
+
+from pathlib import Path
+import sys
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asa_cm_control.asa_scenarios import (
+    progressive_hedging,
+    solve_robust_design,
+    water_scenarios,
+)
+
+
+def run(scenario_counts=(2, 4, 8, 16), n_workers=None):
+    rows = []
+    for n_scenarios in scenario_counts:
+        scenarios = water_scenarios(n_scenarios)
+        direct = solve_robust_design(scenarios)
+        hedging = progressive_hedging(scenarios, n_workers=n_workers)
+        rows.append(
+            {
+                "scenarios": n_scenarios,
+                "build_s": direct["build_s"],
+                "direct_s": direct["solve_s"],
+                "direct_objective": direct["objective"],
+                "direct_volume": direct["volume"],
+                "status": direct["status"],
+                "ph_s": hedging["time_s"],
+                "ph_iterations": hedging["iterations"],
+                "ph_objective": hedging["objective"],
+                "ph_volume": hedging["volume"],
+                "ph_converged": hedging["converged"],
+            }
+        )
+    return rows
+
+
+def report(rows):
+    print(
+        f"{'S':>3} {'build s':>8} {'direct s':>9} {'obj $/h':>9} {'V m3':>7} "
+        f"{'PH s':>8} {'iters':>6} {'PH obj':>9} {'PH V':>7}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['scenarios']:>3} {row['build_s']:>8.2f} {row['direct_s']:>9.2f} "
+            f"{row['direct_objective']:>9.2f} {row['direct_volume']:>7.4f} "
+            f"{row['ph_s']:>8.2f} {row['ph_iterations']:>6} {row['ph_objective']:>9.2f} "
+            f"{row['ph_volume']:>7.4f}  {row['status']}"
+            f"{'' if row['ph_converged'] else ' (PH not converged)'}"
+        )
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,97 @@
+"""Benchmark of the semi-batch dosing optimization.
+
+For several time discretizations, simulates the nominal recipe (even dosing
+over the first half of the batch) and optimizes the dosing profile under a
+temperature limit the nominal recipe violates, reporting build, simulation
+and optimization times with the yield and peak temperature of both profiles.
+A cold optimization (no simulation, variables at their defaults) shows what
+the warm start buys.
+
+Run from repository root:
+    python benchmarks/semibatch_dosing.py
+"""
+
+from pathlib import Path
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.opt import check_optimal_termination
+
+from asa_cm_control.asa_process_flowsheet import solve_model
+from asa_cm_control.asa_semibatch import (
+    add_dosing_optimization,
+    build_semibatch_flowsheet,
+    dosing_solution,
+    optimize_dosing,
+    set_semibatch_conditions,
+)
+
+
+ELEMENTS = (12, 24, 48)
+
+TEMPERATURE_MAX = 338.0
+
+COLD_ELEMENTS = 24
+
+
+def _cold(nfe, temperature_max):
+    start = time.perf_counter()
+    model = build_semibatch_flowsheet(nfe=nfe)
+    set_semibatch_conditions(model)
+    add_dosing_optimization(model, temperature_max)
+    built = time.perf_counter()
+    results = solve_model(model, tee=False)
+    solved = time.perf_counter()
+    return {
+        "case": f"cold nfe={nfe}",
+        "build_s": built - start,
+        "simulate_s": 0.0,
+        "optimize_s": solved - built,
+        "nominal": None,
+        "optimal": dosing_solution(model) if check_optimal_termination(results) else None,
+        "status": str(results.solver.termination_condition),
+    }
+
+
+def run(elements=ELEMENTS, temperature_max=TEMPERATURE_MAX):
+    rows = [
+        {"case": f"nfe={nfe}", **optimize_dosing(nfe=nfe, temperature_max=temperature_max)}
+        for nfe in elements
+    ]
+    rows.append(_cold(COLD_ELEMENTS, temperature_max))
+    return rows
+
+
+def _outcome(solution):
+    if solution is None:
+        return f"{'-':>7} {'-':>7}"
+    return f"{solution['aspirin_yield']:>7.4f} {solution['peak_temperature']:>7.2f}"
+
+
+def report(rows):
+    print(f"temperature limit {TEMPERATURE_MAX} K")
+    print(
+        f"{'case':>11} {'build s':>8} {'sim s':>7} {'opt s':>7} "
+        f"{'nom Y':>7} {'nom T':>7} {'opt Y':>7} {'opt T':>7}  status"
+    )
+    for row in rows:
+        print(
+            f"{row['case']:>11} {row['build_s']:>8.2f} {row['simulate_s']:>7.2f} "
+            f"{row['optimize_s']:>7.2f} {_outcome(row['nominal'])} {_outcome(row['optimal'])}  "
+            f"{row['status']}"
+        )
+    print()
+    for row in rows:
+        if row["optimal"] is not None:
+            rates = " ".join(f"{rate:.4f}" for rate in row["optimal"]["dosing_rate"])
+            print(f"{row['case']} dosing rates (mol/s): {rates}")
+
+
+if __name__ == "__main__":
+    report(run())
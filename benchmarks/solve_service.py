@@ -0,0 +1,109 @@
+"""Benchmark of the warm-pool solve service against one process per case.
+
+Starts ``python run_asa.py serve`` on a free loopback port, sends the same
+cases from concurrent client threads, and reports throughput, the service
+latency percentiles and the mean batch size. For comparison, a few cases are
+solved by spawning ``run_asa.py run`` per case, which pays the imports, the
+build and a cold solve every time.
+
+Run from repository root:
+    python benchmarks/solve_service.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+from pathlib import Path
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asa_cm_control.asa_solve_service import SolveClient
+
+
+LAUNCHER = REPO_ROOT / "run_asa.py"
+
+CASES = [
+    {"temperature": t, "flow_mol": f}
+    for t in (315.0, 320.0, 325.0, 330.0, 335.0)
+    for f in (0.4, 0.5, 0.6, 0.8)
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _spawned(cases):
+    times = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for k, case in enumerate(cases):
+            path = Path(tmp) / f"case{k}.json"
+            path.write_text(json.dumps(case))
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, str(LAUNCHER), "run", "--case", str(path)],
+                check=True, capture_output=True,
+            )
+            times.append(time.perf_counter() - start)
+    return sum(times) / len(times)
+
+
+def run(n_workers=2, n_clients=8, n_spawned=2):
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(LAUNCHER), "serve", "--port", str(port), "--workers", str(n_workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    client = SolveClient(port=port)
+    try:
+        start = time.perf_counter()
+        client.wait_until_ready()
+        startup_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_clients) as clients:
+            results = list(clients.map(client.solve, CASES))
+        service_s = time.perf_counter() - start
+        stats, health = client.stats(), client.health()
+    finally:
+        server.terminate()
+        server.wait()
+    
+    return {
+        "startup_s": startup_s,
+        "cases": len(CASES),
+        "solved": sum(result["outputs"] is not None for result in results),
+        "service_s": service_s,
+        "stats": stats,
+        "workers": len(health["workers"]),
+        "spawned_per_case_s": _spawned(CASES[:n_spawned]),
+    }
+
+
+def report(result):
+    stats = result["stats"]
+    latency = stats["latency_s"]
+    print(f"service start-up (imports, build, warm-up): {result['startup_s']:.1f} s")
+    print(
+        f"{result['solved']}/{result['cases']} cases solved in {result['service_s']:.2f} s "
+        f"({result['cases'] / result['service_s']:.1f} cases/s) on {result['workers']} worker(s)"
+    )
+    print(
+        f"latency p50 {latency['p50']:.3f} s, p90 {latency['p90']:.3f} s, p99 {latency['p99']:.3f} s; "
+        f"mean batch size {stats['mean_batch_size']:.2f}; queue depth {stats['queue_depth']}"
+    )
+    print(f"one process per case: {result['spawned_per_case_s']:.2f} s per case")
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,83 @@
+"""Benchmark of the IPOPT option autotuner on the ASA case library.
+
+Runs ``tune_solver_options`` with successive halving over
+``DEFAULT_OPTION_GRID`` on ``DEFAULT_CASE_LIBRARY``, prints the ranking,
+saves the winner as a profile in a temporary directory and compares
+``solve_model`` with IPOPT defaults against the tuned profile on every case.
+
+Run from repository root:
+    python benchmarks/solver_tuning.py
+"""
+
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from pyomo.opt import check_optimal_termination
+
+import asa_cm_control.asa_process_flowsheet as flowsheet
+from asa_cm_control.asa_solver_tuning import (
+    DEFAULT_CASE_LIBRARY,
+    save_tuned_profile,
+    tune_solver_options,
+)
+
+
+PROFILE_NAME = "benchmark"
+
+
+def _solve_library(profile, repeats):
+    times, n_ok = [], 0
+    for case in DEFAULT_CASE_LIBRARY:
+        conditions = dict(case)
+        model = flowsheet.build_flowsheet(reactor=conditions.pop("reactor"))
+        flowsheet.set_operating_conditions(model, **conditions)
+        flowsheet.initialize_model(model)
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = flowsheet.solve_model(model, tee=False, profile=profile)
+            times.append(time.perf_counter() - start)
+            n_ok += check_optimal_termination(results)
+    return statistics.median(times), n_ok / len(times)
+
+
+def run(search="halving", repeats=3, n_workers=None):
+    start = time.perf_counter()
+    rows = tune_solver_options(search=search, repeats=repeats, n_workers=n_workers)
+    tuning_s = time.perf_counter() - start
+    
+    profile_dir = flowsheet.SOLVER_PROFILE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        flowsheet.SOLVER_PROFILE_DIR = Path(tmp)
+        try:
+            save_tuned_profile(PROFILE_NAME, rows)
+            default = _solve_library(None, repeats)
+            tuned = _solve_library(PROFILE_NAME, repeats)
+        finally:
+            flowsheet.SOLVER_PROFILE_DIR = profile_dir
+    return {"rows": rows, "tuning_s": tuning_s, "default": default, "tuned": tuned}
+
+
+def report(result):
+    print(f"{'rank':>4} {'success':>8} {'median s':>9} {'tail s':>7} {'trials':>6}  options")
+    for rank, row in enumerate(result["rows"], 1):
+        print(
+            f"{rank:>4} {row['success_rate']:>8.2f} {row['median_s']:>9.3f} {row['tail_s']:>7.3f} "
+            f"{row['trials']:>6}  {row['options']}"
+        )
+    print(f"\ntuning wall time: {result['tuning_s']:.1f} s")
+    for label in ("default", "tuned"):
+        median_s, success = result[label]
+        print(f"{label:>8}: median solve {median_s:.3f} s, success {success:.2f}")
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,113 @@
+"""Benchmark of stacked CSTR case solves against one IPOPT call per case.
+
+Solves the same grid of CSTR cases one at a time on a warm model
+(``asa_batch.solve_case``) and K at a time in stacked NLPs
+(``asa_stacked_cases``) for several K, and reports cases per second, the
+fallback count and the largest outlet deviation from the one-at-a-time
+results. A last run caps the stacked solve at a few IPOPT iterations with two
+far-off cases in the batch to exercise the per-case fallback.
+
+Run from repository root:
+    python benchmarks/stacked_cases.py
+"""
+
+from pathlib import Path
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asa_cm_control.asa_batch import solve_case
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions
+from asa_cm_control.asa_stacked_cases import StackedCaseSolver
+
+
+CASES = [
+    {"temperature": t, "flow_mol": f}
+    for t in (315.0, 320.0, 325.0, 330.0)
+    for f in (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+]
+
+COPIES = (1, 2, 4, 8, 16, 32)
+
+# Far from the reference point, so a capped stacked solve leaves them unconverged
+FAR_CASES = [
+    {"temperature": 255.0, "flow_mol": 0.01, "volume": 50},
+    {"temperature": 499.0, "flow_mol": 0.001, "volume": 100},
+]
+
+
+def _sequential(cases):
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    start = time.perf_counter()
+    records = [solve_case(model, case) for case in cases]
+    return time.perf_counter() - start, records
+
+
+def _stacked(cases, n_copies, options=None):
+    start = time.perf_counter()
+    solver = StackedCaseSolver(n_copies, options=options)
+    built = time.perf_counter()
+    records = solver.solve(cases)
+    return built - start, time.perf_counter() - built, records
+
+
+def _max_deviation(records, baseline):
+    return max(
+        abs(record["outputs"][key] - base["outputs"][key])
+        for record, base in zip(records, baseline)
+        if record["outputs"] is not None and base["outputs"] is not None
+        for key in base["outputs"]
+    )
+
+
+def _row(label, cases, setup_s, solve_s, records, baseline):
+    return {
+        "case": label,
+        "setup_s": setup_s,
+        "solve_s": solve_s,
+        "cases_per_s": len(cases) / solve_s,
+        "failed": sum(record["outputs"] is None for record in records),
+        "fallback": sum(record.get("fallback", False) for record in records),
+        "deviation": _max_deviation(records, baseline) if baseline is not None else 0.0,
+    }
+
+
+def run(cases=CASES, copies=COPIES):
+    solve_s, baseline = _sequential(cases)
+    rows = [_row("one by one", cases, 0.0, solve_s, baseline, None)]
+    for n_copies in copies:
+        setup_s, solve_s, records = _stacked(cases, n_copies)
+        rows.append(_row(f"K={n_copies}", cases, setup_s, solve_s, records, baseline))
+    
+    mixed = cases[:6] + FAR_CASES
+    _, mixed_baseline = _sequential(mixed)
+    setup_s, solve_s, records = _stacked(mixed, len(mixed), options={"max_iter": 8})
+    rows.append(_row("K=8 capped", mixed, setup_s, solve_s, records, mixed_baseline))
+    return rows
+
+
+def report(rows):
+    print(
+        f"{'case':>12} {'setup s':>8} {'solve s':>8} {'cases/s':>8} {'failed':>7} "
+        f"{'fallback':>9} {'max dev':>9}"
+    )
+    for row in rows:
+        print(
+            f"{row['case']:>12} {row['setup_s']:>8.2f} {row['solve_s']:>8.2f} "
+            f"{row['cases_per_s']:>8.2f} {row['failed']:>7} {row['fallback']:>9} "
+            f"{row['deviation']:>9.2e}"
+        )
+    base = rows[0]["cases_per_s"]
+    best = max(rows[1:-1], key=lambda row: row["cases_per_s"])
+    print(f"\nbest stacked throughput: {best['case']}, {best['cases_per_s'] / base:.2f}x one by one")
+
+
+if __name__ == "__main__":
+    report(run())
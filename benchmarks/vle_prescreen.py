@@ -0,0 +1,140 @@
+"""Benchmark of the bubble-point pre-screen for the VLE equations.
+
+Solves CSTR operating points three ways:
+- ``liquid``: the package without VLE (``vle=False``), the old baseline.
+- ``rigorous``: flash equations active in every state block.
+- ``screened``: flash equations only where ``bubble_point_screen`` finds the
+  state may boil, re-screened after the solve (``solve_with_phase_screen``).
+
+Reports the NLP size, initialization plus solve time (median over repeats),
+the outlet vapor fraction, and the cost saved by screening over the rigorous
+model on the liquid-only points. A final row times the vectorized screen for
+a large batch of states.
+
+Run from repository root:
+    python benchmarks/vle_prescreen.py
+"""
+
+from pathlib import Path
+import statistics
+import sys
+import time
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import numpy as np
+from pyomo.environ import value
+from idaes.core.util.model_statistics import (
+    number_activated_equalities,
+    number_unfixed_variables_in_activated_equalities,
+)
+
+from asa_cm_control.asa_decomposition import seed_outlet_from_inlet
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    screen_phases,
+    set_operating_conditions,
+    solve_model,
+    solve_with_phase_screen,
+)
+from asa_cm_control.props.asa_thermo_property_package import bubble_point_screen
+
+
+# (inlet temperature K, pressure Pa); the last point boils in the reactor
+OPERATING_POINTS = [
+    (315.0, 101325.0),
+    (325.0, 101325.0),
+    (335.0, 101325.0),
+    (345.0, 101325.0),
+    (345.0, 20000.0),
+]
+
+MODES = ("liquid", "rigorous", "screened")
+
+SCREEN_BATCH = 100000
+
+
+def _solve(mode, temperature, pressure):
+    model = build_flowsheet(vle=mode != "liquid")
+    set_operating_conditions(model, temperature=temperature, pressure=pressure)
+    start = time.perf_counter()
+    if mode == "screened":
+        seed_outlet_from_inlet(model.fs.cstr.control_volume)
+        screen_phases(model)
+    model.fs.cstr.initialize()
+    if mode == "screened":
+        results, _ = solve_with_phase_screen(model)
+    else:
+        results = solve_model(model, tee=False)
+    elapsed = time.perf_counter() - start
+    
+    outlet = model.fs.cstr.control_volume.properties_out[0]
+    return {
+        "time_s": elapsed,
+        "size": (number_unfixed_variables_in_activated_equalities(model), number_activated_equalities(model)),
+        "status": str(results.solver.termination_condition),
+        "vapor_frac": value(outlet.vle.vapor_frac) if mode != "liquid" else 0.0,
+        "temperature_out": value(outlet.temperature),
+    }
+
+
+def _time_screen(params, n):
+    rng = np.random.default_rng(0)
+    mole_frac = rng.dirichlet(np.ones(len(params.component_list)), size=n)
+    temperature = rng.uniform(300.0, 420.0, size=n)
+    pressure = np.full(n, 101325.0)
+    start = time.perf_counter()
+    result = bubble_point_screen(params, temperature, pressure, mole_frac)
+    return time.perf_counter() - start, float(result["vapor_possible"].mean())
+
+
+def run(points=OPERATING_POINTS, repeats=3):
+    rows = []
+    for temperature, pressure in points:
+        for mode in MODES:
+            runs = [_solve(mode, temperature, pressure) for _ in range(repeats)]
+            row = dict(runs[-1], time_s=statistics.median(r["time_s"] for r in runs))
+            rows.append({"temperature": temperature, "pressure": pressure, "mode": mode, **row})
+    
+    params = build_flowsheet(vle=True).fs.thermo_params
+    return rows, _time_screen(params, SCREEN_BATCH)
+
+
+def report(result):
+    rows, (screen_s, vapor_share) = result
+    print(
+        f"{'T K':>6} {'P kPa':>7} {'mode':>9} {'vars':>5} {'cons':>5} {'time s':>7} "
+        f"{'T out':>6} {'V out':>6}  status"
+    )
+    for row in rows:
+        n_var, n_con = row["size"]
+        print(
+            f"{row['temperature']:>6.1f} {row['pressure'] / 1000:>7.1f} {row['mode']:>9} "
+            f"{n_var:>5} {n_con:>5} {row['time_s']:>7.3f} {row['temperature_out']:>6.1f} "
+            f"{row['vapor_frac']:>6.3f}  {row['status']}"
+        )
+    
+    by_key = {(r["temperature"], r["pressure"], r["mode"]): r for r in rows}
+    liquid_only = [
+        key[:2] for key in by_key
+        if key[2] == "rigorous" and by_key[key]["vapor_frac"] < 1e-6
+    ]
+    if liquid_only:
+        rigorous = sum(by_key[(*k, "rigorous")]["time_s"] for k in liquid_only)
+        screened = sum(by_key[(*k, "screened")]["time_s"] for k in liquid_only)
+        print(
+            f"\nliquid-only points: rigorous {rigorous:.3f} s, screened {screened:.3f} s, "
+            f"saved {100 * (1 - screened / rigorous):.0f}%"
+        )
+    print(
+        f"bubble_point_screen: {SCREEN_BATCH} states in {screen_s * 1000:.1f} ms "
+        f"({100 * vapor_share:.0f}% possibly two-phase)"
+    )
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,22 @@
+"""Root launcher for the ASA command line.
+
+Run from repository root:
+    python run_asa.py --help
+    python run_asa.py run --case case.json
+    python run_asa.py validate case.json
+"""
+
+from pathlib import Path
+import sys
+
+
+REPO_ROOT = Path(__file__).resolve().parent
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asa_cm_control.asa_cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
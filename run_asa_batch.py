@@ -0,0 +1,22 @@
+"""Root launcher for sharded, resumable batch runs of the ASA flowsheet.
+
+Run from repository root:
+    python run_asa_batch.py prepare RUN_DIR --grid temperature=320,325,330
+    python run_asa_batch.py work RUN_DIR
+    python run_asa_batch.py merge RUN_DIR
+"""
+
+from pathlib import Path
+import sys
+
+
+REPO_ROOT = Path(__file__).resolve().parent
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asa_cm_control.asa_batch import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+# To-Do:
+# - Record the solver CPU time alongside each case
+
+
+"""Resumable, sharded batch runs of the steady-state ASA flowsheet.
+
+A run directory holds everything needed to resume or scale a sweep across
+machines that share a filesystem, without a scheduler service:
+
+    run_dir/
+        manifest.json              case list split into shards
+        locks/shard-0000.lock      claim held by one worker (host, pid, time)
+        results/shard-0000.jsonl   one JSON record appended per finished case
+        results/shard-0000.attempts  one line per case started, for crash counts
+        results/shard-0000.done    marker written once a shard is complete
+        results.jsonl              merged dataset (``merge_shards``)
+
+Workers claim shards by creating the lock file exclusively, refresh its
+modification time after every case as a heartbeat, and take over locks whose
+heartbeat is older than ``stale_after`` seconds. Records are flushed and
+synced as they are written, so a crash loses at most the case in progress;
+a rerun skips every case already recorded in the shard file. A case that
+raises is recorded as an error, and a case that kills its worker outright is
+recorded as crashed once it has been started ``MAX_ATTEMPTS`` times, so one
+poison case cannot stall the run.
+
+Command line (from repository root):
+    python run_asa_batch.py prepare RUN_DIR --grid temperature=320,325,330 ...
+    python run_asa_batch.py work RUN_DIR
+    python run_asa_batch.py merge RUN_DIR
+"""
+
+import argparse
+from collections import Counter
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import socket
+import time
+from pathlib import Path
+
+from pyomo.environ import value
+from pyomo.opt import check_optimal_termination
+from idaes.core.util.exceptions import InitializationError
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    set_operating_conditions,
+    solve_model,
+)
+
+
+MANIFEST_NAME = "manifest.json"
+MERGED_NAME = "results.jsonl"
+
+# Starts of a case without a record before it is recorded as crashed
+MAX_ATTEMPTS = 2
+
+
+def case_id(conditions):
+    """Return a stable identifier for a set of operating conditions."""
+    canonical = json.dumps(conditions, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+def grid_cases(**axes):
+    """Return the Cartesian product of operating-condition axes.
+
+    Args:
+        **axes: ``set_operating_conditions`` keyword mapped to a list of values.
+
+    Returns:
+        list: Case dicts with ``case_id`` and ``conditions``.
+    """
+    names = list(axes)
+    return [
+        {"case_id": case_id(conditions), "conditions": conditions}
+        for conditions in (
+            dict(zip(names, combination))
+            for combination in itertools.product(*axes.values())
+        )
+    ]
+
+
+def prepare_run(run_dir, cases, shard_size=50, overwrite=False):
+    """Write the manifest that splits ``cases`` into shards.
+
+    Shard names restart from ``shard-0000``, so locks, results and done
+    markers left by an earlier run would be taken for this one; a non-empty
+    run directory is refused unless ``overwrite`` clears it.
+
+    Args:
+        run_dir: Run directory; created if missing.
+        cases: Case dicts from ``grid_cases`` (or with the same keys).
+        shard_size: Cases per shard.
+        overwrite: Delete the contents of an existing run directory first.
+
+    Returns:
+        dict: The manifest.
+
+    Raises:
+        FileExistsError: If ``run_dir`` is not empty and ``overwrite`` is False.
+    """
+    run_dir = Path(run_dir)
+    if run_dir.exists() and any(run_dir.iterdir()):
+        if not overwrite:
+            raise FileExistsError(
+                f"Run directory {run_dir} is not empty; use a new directory or overwrite it"
+            )
+        for path in run_dir.iterdir():
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+    (run_dir / "locks").mkdir(parents=True, exist_ok=True)
+    (run_dir / "results").mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "created": time.time(),
+        "shards": [
+            {"name": f"shard-{k:04d}", "cases": cases[start:start + shard_size]}
+            for k, start in enumerate(range(0, len(cases), shard_size))
+        ],
+    }
+    tmp = run_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1))
+    os.replace(tmp, run_dir / MANIFEST_NAME)
+    return manifest
+
+
+def load_manifest(run_dir):
+    return json.loads((Path(run_dir) / MANIFEST_NAME).read_text())
+
+
+def read_records(path):
+    """Read the JSON records of a shard file, skipping lines cut by a crash."""
+    records = []
+    if not Path(path).exists():
+        return records
+    with open(path) as stream:
+        for line in stream:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def _append_record(path, record):
+    # Terminate a line left partial by a crash so the new record stays intact
+    prefix = ""
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb") as stream:
+            stream.seek(-1, os.SEEK_END)
+            prefix = "" if stream.read(1) == b"\n" else "\n"
+    with open(path, "a") as stream:
+        stream.write(prefix + json.dumps(record) + "\n")
+        stream.flush()
+        os.fsync(stream.fileno())
+
+
+def _read_lock(lock_path):
+    """Return ``(contents, mtime)`` of a lock file, or None if there is none."""
+    try:
+        return Path(lock_path).read_text(), os.path.getmtime(lock_path)
+    except FileNotFoundError:
+        return None
+
+
+def _owns_lock(lock_path, worker):
+    lock = _read_lock(lock_path)
+    if lock is None:
+        return False
+    try:
+        return json.loads(lock[0])["worker"] == worker
+    except (json.JSONDecodeError, KeyError):
+        return False
+
+
+def claim_shard(lock_path, worker, stale_after):
+    """Try to take the lock of a shard.
+
+    Returns:
+        bool: True if this worker now holds the lock.
+    """
+    observed = _read_lock(lock_path)
+    if observed is not None:
+        if time.time() - observed[1] < stale_after:
+            return False
+        # Heartbeat expired: the owner died. Renaming first lets only one of
+        # several competing workers remove the stale claim.
+        stale_path = f"{lock_path}.stale-{worker}"
+        try:
+            os.rename(lock_path, stale_path)
+        except FileNotFoundError:
+            return False
+        if _read_lock(stale_path) != observed:
+            # The lock was refreshed or taken over between the check and the
+            # rename, so the renamed claim is live: put it back unless yet
+            # another worker has created a lock meanwhile
+            try:
+                os.link(stale_path, lock_path)
+            except FileExistsError:
+                pass
+            os.remove(stale_path)
+            return False
+        os.remove(stale_path)
+    
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as stream:
+        stream.write(json.dumps({"worker": worker, "claimed": time.time()}))
+    return True
+
+
+def solve_case(model, conditions, options=None, return_results=False):
+    """Solve one case on a reused flowsheet and return its outputs.
+
+    The solve warm-starts from the previous case; on failure it is retried
+    once after a fresh ``cstr.initialize()``.
+
+    Args:
+        model: Initialized model from ``build_flowsheet``.
+        conditions: Keyword arguments for ``set_operating_conditions``.
+        options: IPOPT options for both solves (e.g. ``max_wall_time``).
+        return_results: Also return the results of the last solve (e.g. for
+            ``asa_results_export.collect_results``).
+
+    Returns:
+        dict: ``status``, IPOPT ``iterations`` of the last solve, ``solve_s``
+        and outlet ``outputs`` (None on failure); with ``return_results`` a
+        ``(record, results)`` tuple.
+    """
+    start = time.perf_counter()
+    set_operating_conditions(model, **conditions)
+    results = solve_model(model, tee=False, options=options, count_iterations=True)
+    if not check_optimal_termination(results):
+        try:
+            model.fs.cstr.initialize()
+            results = solve_model(model, tee=False, options=options, count_iterations=True)
+        except InitializationError:
+            pass
+    
+    outputs = None
+    if check_optimal_termination(results):
+        outlet = model.fs.cstr.outlet
+        outputs = {
+            "flow_mol": value(outlet.flow_mol[0]),
+            "temperature": value(outlet.temperature[0]),
+            **{
+                f"x_{j}": value(outlet.mole_frac_comp[0, j])
+                for j in model.fs.thermo_params.component_list
+            },
+        }
+    record = {
+        "status": str(results.solver.termination_condition),
+        "iterations": results.solver.iterations,
+        "solve_s": time.perf_counter() - start,
+        "outputs": outputs,
+    }
+    return (record, results) if return_results else record
+
+
+def run_worker(run_dir, worker=None, stale_after=3600.0, max_shards=None):
+    """Claim and process shards until none are left.
+
+    Each case is marked as started before it is solved. A case that raises is
+    recorded with status ``"error"`` and the model is rebuilt for the next
+    case; a case already started ``MAX_ATTEMPTS`` times without a record
+    (its worker died) is recorded as ``"crashed"`` without solving it again.
+    A worker that finds its lock taken over stops the shard and moves on.
+
+    Args:
+        run_dir: Run directory written by ``prepare_run``.
+        worker: Worker label stored in locks and records. Defaults to
+            ``host:pid``.
+        stale_after: Seconds without a heartbeat after which another worker's
+            lock is taken over. Must exceed the slowest single case.
+        max_shards: Optional limit on the number of shards processed.
+
+    Returns:
+        int: Number of cases recorded by this call.
+    """
+    run_dir = Path(run_dir)
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    manifest = load_manifest(run_dir)
+    model = None
+    n_solved = 0
+    n_shards = 0
+    
+    for shard in manifest["shards"]:
+        if max_shards is not None and n_shards >= max_shards:
+            break
+        results_path = run_dir / "results" / f"{shard['name']}.jsonl"
+        done_path = run_dir / "results" / f"{shard['name']}.done"
+        attempts_path = run_dir / "results" / f"{shard['name']}.attempts"
+        lock_path = run_dir / "locks" / f"{shard['name']}.lock"
+        if done_path.exists() or not claim_shard(lock_path, worker, stale_after):
+            continue
+        
+        lost = False
+        try:
+            completed = {record["case_id"] for record in read_records(results_path)}
+            attempts = Counter(record["case_id"] for record in read_records(attempts_path))
+            for case in shard["cases"]:
+                if case["case_id"] in completed:
+                    continue
+                if attempts[case["case_id"]] >= MAX_ATTEMPTS:
+                    outcome = {"status": "crashed", "solve_s": None, "outputs": None}
+                else:
+                    _append_record(attempts_path, {"case_id": case["case_id"], "worker": worker})
+                    try:
+                        if model is None:
+                            model = build_flowsheet()
+                            set_operating_conditions(model, **case["conditions"])
+                            model.fs.cstr.initialize()
+                        outcome = solve_case(model, case["conditions"])
+                    except Exception as err:
+                        # Any failure of one case is recorded, not fatal; the
+                        # model may be left mid-update, so rebuild it
+                        outcome = {
+                            "status": "error",
+                            "error": f"{type(err).__name__}: {err}",
+                            "solve_s": None,
+                            "outputs": None,
+                        }
+                        model = None
+                record = {
+                    "case_id": case["case_id"],
+                    "conditions": case["conditions"],
+                    "worker": worker,
+                    **outcome,
+                }
+                _append_record(results_path, record)
+                n_solved += 1
+                if not _owns_lock(lock_path, worker):
+                    lost = True
+                    break
+                os.utime(lock_path)
+            if not lost:
+                done_path.touch()
+                n_shards += 1
+        finally:
+            if not lost and _owns_lock(lock_path, worker):
+                os.remove(lock_path)
+    return n_solved
+
+
+def run_status(run_dir):
+    """Return counts of finished, locked and pending shards and cases."""
+    run_dir = Path(run_dir)
+    manifest = load_manifest(run_dir)
+    status = {"shards": len(manifest["shards"]), "done": 0, "locked": 0, "cases": 0, "recorded": 0}
+    for shard in manifest["shards"]:
+        status["cases"] += len(shard["cases"])
+        status["recorded"] += len(read_records(run_dir / "results" / f"{shard['name']}.jsonl"))
+        status["done"] += (run_dir / "results" / f"{shard['name']}.done").exists()
+        status["locked"] += (run_dir / "locks" / f"{shard['name']}.lock").exists()
+    return status
+
+
+def merge_shards(run_dir, output=None):
+    """Merge shard results into one dataset in manifest case order.
+
+    A case recorded more than once (e.g. after a lock takeover) keeps its
+    last record.
+
+    Args:
+        run_dir: Run directory written by ``prepare_run``.
+        output: Output path; defaults to ``run_dir/results.jsonl``.
+
+    Returns:
+        tuple: ``(records, missing)`` with merged records and the case ids
+        that have no result yet.
+    """
+    run_dir = Path(run_dir)
+    manifest = load_manifest(run_dir)
+    records = []
+    missing = []
+    for shard in manifest["shards"]:
+        latest = {
+            record["case_id"]: record
+            for record in read_records(run_dir / "results" / f"{shard['name']}.jsonl")
+        }
+        for case in shard["cases"]:
+            if case["case_id"] in latest:
+                records.append(latest[case["case_id"]])
+            else:
+                missing.append(case["case_id"])
+    
+    output = Path(output) if output else run_dir / MERGED_NAME
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "w") as stream:
+        for record in records:
+            stream.write(json.dumps(record) + "\n")
+    os.replace(tmp, output)
+    return records, missing
+
+
+def _parse_axis(text):
+    name, values = text.split("=", 1)
+    return name, [float(v) for v in values.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded batch runs of the ASA flowsheet.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    prepare = commands.add_parser("prepare", help="Write the case manifest.")
+    prepare.add_argument("run_dir")
+    prepare.add_argument(
+        "--grid", action="append", type=_parse_axis, default=[],
+        help="Axis as name=v1,v2,... (repeatable), e.g. temperature=320,330",
+    )
+    prepare.add_argument("--shard-size", type=int, default=50)
+    prepare.add_argument(
+        "--overwrite", action="store_true",
+        help="Clear an existing run directory instead of refusing it",
+    )
+    
+    work = commands.add_parser("work", help="Claim and solve shards.")
+    work.add_argument("run_dir")
+    work.add_argument("--stale-after", type=float, default=3600.0)
+    work.add_argument("--max-shards", type=int)
+    
+    merge = commands.add_parser("merge", help="Merge shard results.")
+    merge.add_argument("run_dir")
+    merge.add_argument("--output")
+    
+    status = commands.add_parser("status", help="Show run progress.")
+    status.add_argument("run_dir")
+    
+    args = parser.parse_args(argv)
+    if args.command == "prepare":
+        try:
+            manifest = prepare_run(args.run_dir, grid_cases(**dict(args.grid)), args.shard_size, args.overwrite)
+        except FileExistsError as err:
+            parser.error(f"{err} (--overwrite)")
+        print(f"{sum(len(s['cases']) for s in manifest['shards'])} cases in {len(manifest['shards'])} shards")
+    elif args.command == "work":
+        print(f"Recorded {run_worker(args.run_dir, stale_after=args.stale_after, max_shards=args.max_shards)} cases")
+    elif args.command == "merge":
+        records, missing = merge_shards(args.run_dir, args.output)
+        print(f"Merged {len(records)} records; {len(missing)} cases missing")
+    else:
+        print(run_status(args.run_dir))
@@ -0,0 +1,480 @@
+# To-Do:
+# - Add an optimize subcommand wrapping multistart_rto
+
+
+"""Command line entry point with lazily imported modelling stack.
+
+Importing pyomo, idaes and the property packages takes seconds, so this module
+imports only the standard library at load time. The modelling modules are
+imported inside the subcommands that need them, through ``lazy_import``, which
+also records how long each import took.
+
+Subcommands:
+    run        build, initialize and solve one case and print the report
+    sweep      solve a grid of cases on one warm-started model
+    benchmark  list or run the scripts in ``benchmarks/``
+    serve      run the warm-pool solve service (``asa_solve_service``)
+    validate   check a case file without importing the modelling stack
+
+``--import-profile`` prints the import-time breakdown on stderr at exit.
+``run`` and ``validate`` take ``--components TABLE.json``, a component table
+in the layout of ``ASA_COMPONENTS``, for flowsheets with other components, and
+``--nrtl PAIRS.json``, the matching NRTL pair table (a list of
+``{"pair": [i, j], "tau": ..., "alpha": ...}``; defaults to ``ASA_NRTL``). The
+table must cover the species of the reaction table and the sulfuric acid
+catalyst, and those of ``ASA_NRTL`` unless ``--nrtl`` is given; ``validate``
+reports a table that does not.
+``validate`` and ``--help`` must stay within ``STARTUP_BUDGET_S``; see
+``benchmarks/cli_startup.py``.
+
+Run from repository root:
+    python run_asa.py run --case case.json
+    python run_asa.py sweep --grid temperature=320,330 --output sweep.parquet
+    python run_asa.py validate case.json
+    python run_asa.py serve --port 8765
+"""
+
+import argparse
+import ast
+import functools
+import importlib
+import importlib.util
+import json
+import runpy
+import sys
+import time
+from pathlib import Path
+
+
+# Wall-clock budget in s for interpreter start plus the lightweight subcommands
+STARTUP_BUDGET_S = 0.5
+
+BENCHMARK_DIR = Path(__file__).resolve().parents[2] / "benchmarks"
+
+# Modules holding the default component, NRTL and reaction tables
+THERMO_MODULE = "asa_cm_control.props.asa_thermo_property_package"
+REACTION_MODULE = "asa_cm_control.props.asa_reaction_property_package"
+
+# The proton activity of the catalysed rate terms is read from this component
+CATALYST = "sulfuric_acid"
+
+# Case field -> (lower, upper) for the numeric ``set_operating_conditions`` inputs
+CASE_BOUNDS = {
+    "flow_mol": (0.0, None),
+    "temperature": (250.0, 500.0),
+    "pressure": (0.0, None),
+    "volume": (0.0, None),
+    "length": (0.0, None),
+}
+
+REACTORS = ("cstr", "pfr")
+
+# Heavy modules in dependency order; importing them one by one before the
+# modelling modules splits the import profile into its layers
+MODELLING_STACK = (
+    "pyomo.environ",
+    "idaes.core",
+    "idaes.models.unit_models",
+    "asa_cm_control.props.asa_thermo_property_package",
+    "asa_cm_control.props.asa_reaction_property_package",
+    "asa_cm_control.asa_process_flowsheet",
+)
+
+# Module name -> seconds spent in its (first) import via ``lazy_import``
+IMPORT_TIMES = {}
+
+
+def lazy_import(name):
+    """Import a module on first use and record the time it took.
+
+    Args:
+        name: Dotted module name.
+
+    Returns:
+        module: The imported module.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - start
+    return module
+
+
+def load_modelling_stack():
+    """Import ``MODELLING_STACK`` and return the flowsheet module."""
+    for name in MODELLING_STACK:
+        module = lazy_import(name)
+    return module
+
+
+def format_import_profile():
+    """Return the recorded import times, in import order, as text."""
+    lines = [f"{'module':<52} {'import s':>9}"]
+    for name, seconds in IMPORT_TIMES.items():
+        lines.append(f"{name:<52} {seconds:>9.3f}")
+    lines.append(f"{'total':<52} {sum(IMPORT_TIMES.values()):>9.3f}")
+    return "\n".join(lines)
+
+
+def _module_literal(module, name):
+    """Return a module-level literal table without importing its module.
+
+    The property package modules import pyomo and idaes, so their literal
+    tables are read from the source unless the module is already loaded.
+    """
+    if module in sys.modules:
+        return getattr(sys.modules[module], name)
+    source = Path(importlib.util.find_spec(module).origin).read_text()
+    for node in ast.parse(source).body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(getattr(target, "id", None) == name for target in node.targets)
+        ):
+            return ast.literal_eval(node.value)
+    raise LookupError(f"{name} is not defined in {module}")
+
+
+@functools.lru_cache(maxsize=None)
+def default_components():
+    """Return the component names of ``ASA_COMPONENTS``, in table order."""
+    return tuple(_module_literal(THERMO_MODULE, "ASA_COMPONENTS"))
+
+
+@functools.lru_cache(maxsize=None)
+def reaction_components():
+    """Return the species of ``ASA_REACTIONS`` plus the catalyst ``CATALYST``."""
+    species = {CATALYST}
+    for spec in _module_literal(REACTION_MODULE, "ASA_REACTIONS").values():
+        species.update(spec["stoichiometry"], spec["orders"])
+    return tuple(sorted(species))
+
+
+def load_component_table(path):
+    """Read a component table (name -> constants, as ``ASA_COMPONENTS``)."""
+    table = json.loads(Path(path).read_text())
+    if not isinstance(table, dict) or not all(isinstance(row, dict) for row in table.values()):
+        raise ValueError(f"{path}: a component table maps names to objects of constants")
+    return table
+
+
+def load_nrtl_table(path):
+    """Read an NRTL pair table: a list of ``{"pair": [i, j], "tau": ..., "alpha": ...}``.
+
+    Returns:
+        dict: ``(i, j)`` to ``tau`` and optional ``alpha``, as ``ASA_NRTL``.
+    """
+    rows = json.loads(Path(path).read_text())
+    if not isinstance(rows, list) or not all(
+        isinstance(row, dict) and isinstance(row.get("pair"), list) and len(row["pair"]) == 2
+        for row in rows
+    ):
+        raise ValueError(f"{path}: an NRTL table is a list of objects with a two-name 'pair'")
+    return {
+        tuple(row["pair"]): {key: val for key, val in row.items() if key != "pair"}
+        for row in rows
+    }
+
+
+def check_component_table(components, nrtl=None):
+    """Check that a component table fits the reaction and NRTL tables.
+
+    Args:
+        components: Component names of the table.
+        nrtl: NRTL pair table used with it; defaults to ``ASA_NRTL``.
+
+    Returns:
+        list: Error messages; empty if the flowsheet can be built.
+    """
+    components = set(components)
+    errors = []
+    missing = sorted(set(reaction_components()) - components)
+    if missing:
+        errors.append(f"component table lacks the reaction species {missing}")
+    if nrtl is None:
+        nrtl, source = _module_literal(THERMO_MODULE, "ASA_NRTL"), "ASA_NRTL"
+    else:
+        source = "the NRTL table"
+    unknown = sorted({j for pair in nrtl for j in pair} - components)
+    if unknown:
+        errors.append(
+            f"{source} names components missing from the component table {unknown}"
+            + (" (pass --nrtl)" if source == "ASA_NRTL" else "")
+        )
+    return errors
+
+
+def load_cases(path):
+    """Read a case file: one conditions object or ``{"cases": [...]}``.
+
+    Returns:
+        list: Case dicts; each may hold ``reactor`` besides the
+        ``set_operating_conditions`` keywords.
+    """
+    data = json.loads(Path(path).read_text())
+    if isinstance(data, dict) and "cases" in data:
+        return data["cases"]
+    return data if isinstance(data, list) else [data]
+
+
+def validate_case(case, components=None):
+    """Check one case against the operating-condition schema.
+
+    Args:
+        case: Mapping of ``set_operating_conditions`` keywords (plus an
+            optional ``reactor``) to values.
+        components: Component names of the flowsheet's table; defaults to
+            ``default_components()``.
+
+    Returns:
+        list: Error messages; empty if the case is valid.
+    """
+    if not isinstance(case, dict):
+        return [f"case must be an object, got {type(case).__name__}"]
+    if components is None:
+        components = default_components()
+    errors = []
+    for key, val in case.items():
+        if key == "reactor":
+            if val not in REACTORS:
+                errors.append(f"reactor '{val}' is not one of {REACTORS}")
+        elif key == "mole_frac_comp":
+            if not isinstance(val, dict):
+                errors.append("mole_frac_comp must be an object")
+                continue
+            unknown = set(val) - set(components)
+            if unknown:
+                errors.append(f"unknown components {sorted(unknown)}")
+            if any(not isinstance(x, (int, float)) or x < 0 for x in val.values()):
+                errors.append("mole fractions must be non-negative numbers")
+            elif sum(val.values()) <= 0:
+                errors.append("mole fractions must not all be zero")
+        elif key in CASE_BOUNDS:
+            lower, upper = CASE_BOUNDS[key]
+            if not isinstance(val, (int, float)) or isinstance(val, bool):
+                errors.append(f"{key} must be a number")
+            elif val <= lower or (upper is not None and val > upper):
+                errors.append(f"{key}={val} is outside ({lower}, {upper}]")
+        else:
+            errors.append(f"unknown field '{key}'")
+    return errors
+
+
+def _split_case(case):
+    conditions = dict(case)
+    return conditions.pop("reactor", "cstr"), conditions
+
+
+def _table_components(args):
+    return tuple(args.components) if args.components is not None else None
+
+
+def _table_errors(args):
+    if args.components is None:
+        if args.nrtl is None:
+            return []
+        return check_component_table(default_components(), args.nrtl)
+    return check_component_table(args.components, args.nrtl)
+
+
+def _cmd_validate(args):
+    components = _table_components(args)
+    n_invalid = 0
+    for error in _table_errors(args):
+        print(f"tables: {error}")
+        n_invalid += 1
+    for path in args.case_files:
+        try:
+            cases = load_cases(path)
+        except (OSError, json.JSONDecodeError) as err:
+            print(f"{path}: {err}")
+            n_invalid += 1
+            continue
+        if not cases:
+            print(f"{path}: no cases")
+            n_invalid += 1
+        for k, case in enumerate(cases):
+            errors = validate_case(case, components)
+            for error in errors:
+                print(f"{path}[{k}]: {error}")
+            n_invalid += bool(errors)
+        print(f"{path}: {len(cases)} case(s) checked")
+    return 1 if n_invalid else 0
+
+
+def _cmd_run(args):
+    cases = load_cases(args.case) if args.case else [{}]
+    if len(cases) != 1:
+        print(
+            f"{args.case} holds {len(cases)} cases; run solves exactly one "
+            "(use sweep or batch for several)",
+            file=sys.stderr,
+        )
+        return 1
+    errors = _table_errors(args) + validate_case(cases[0], _table_components(args))
+    if errors:
+        print("\n".join(errors), file=sys.stderr)
+        return 1
+    reactor, conditions = _split_case(cases[0])
+    
+    flowsheet = load_modelling_stack()
+    model = flowsheet.build_flowsheet(reactor=reactor, components=args.components, nrtl=args.nrtl)
+    flowsheet.set_operating_conditions(model, **conditions)
+    flowsheet.initialize_model(model, method=args.init)
+    flowsheet.solve_model(model, tee=args.tee, profile=args.solver_profile)
+    flowsheet.report_results(model)
+    return 0
+
+
+def _parse_axis(text):
+    name, values = text.split("=", 1)
+    return name, [float(v) for v in values.split(",")]
+
+
+def _cmd_sweep(args):
+    errors = [error for name, values in args.grid for v in values for error in validate_case({name: v})]
+    if errors:
+        print("\n".join(errors), file=sys.stderr)
+        return 1
+    
+    flowsheet = load_modelling_stack()
+    batch = lazy_import("asa_cm_control.asa_batch")
+    cases = batch.grid_cases(**dict(args.grid))
+    model = flowsheet.build_flowsheet()
+    flowsheet.set_operating_conditions(model, **cases[0]["conditions"])
+    model.fs.cstr.initialize()
+    
+    writer = None
+    if args.output:
+        export = lazy_import("asa_cm_control.asa_results_export")
+        schema = export.results_schema(
+            model, case_id="str", status="str", **{name: "float" for name, _ in args.grid}
+        )
+        try:
+            writer = export.ResultsWriter(args.output, schema=schema, overwrite=args.overwrite)
+        except FileExistsError as err:
+            print(f"{err} (--overwrite)", file=sys.stderr)
+            return 1
+    try:
+        for case in cases:
+            record, results = batch.solve_case(model, case["conditions"], return_results=True)
+            print(f"{case['case_id']} {case['conditions']} {record['status']} {record['solve_s']:.2f} s")
+            if writer is not None and record["outputs"] is not None:
+                writer.append(
+                    export.collect_results(
+                        model,
+                        results,
+                        case_id=case["case_id"],
+                        status=record["status"],
+                        **case["conditions"],
+                    )
+                )
+    finally:
+        if writer is not None:
+            writer.close()
+    return 0
+
+
+def _cmd_benchmark(args):
+    scripts = sorted(path.stem for path in BENCHMARK_DIR.glob("*.py"))
+    if args.name is None:
+        print("\n".join(scripts))
+        return 0
+    if args.name not in scripts:
+        print(f"Unknown benchmark '{args.name}'; expected one of {scripts}", file=sys.stderr)
+        return 1
+    sys.argv = [str(BENCHMARK_DIR / f"{args.name}.py"), *args.args]
+    runpy.run_path(sys.argv[0], run_name="__main__")
+    return 0
+
+
+def _cmd_serve(args):
+    load_modelling_stack()
+    service = lazy_import("asa_cm_control.asa_solve_service")
+    service.serve(
+        args.host, args.port, n_workers=args.workers, max_batch=args.max_batch,
+        solve_timeout=args.solve_timeout,
+    )
+    return 0
+
+
+def _add_components_argument(parser):
+    parser.add_argument(
+        "--components", type=load_component_table,
+        help="Component table JSON (name -> constants); defaults to ASA_COMPONENTS.",
+    )
+    parser.add_argument(
+        "--nrtl", type=load_nrtl_table,
+        help="NRTL pair table JSON matching --components; defaults to ASA_NRTL.",
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="ASA process model command line.")
+    parser.add_argument(
+        "--import-profile", action="store_true",
+        help="Print the import-time breakdown on stderr at exit.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run = commands.add_parser("run", help="Solve one case and print the report.")
+    run.add_argument("--case", help="Case file holding one case.")
+    run.add_argument(
+        "--init", choices=("sequential", "decomposition"), default="sequential",
+        help="Initialization method.",
+    )
+    run.add_argument("--tee", action="store_true", help="Stream IPOPT output.")
+    run.add_argument(
+        "--solver-profile", help="Named IPOPT option profile (see asa_solver_tuning).",
+    )
+    _add_components_argument(run)
+    run.set_defaults(handler=_cmd_run)
+    
+    sweep = commands.add_parser("sweep", help="Solve a grid of CSTR cases.")
+    sweep.add_argument(
+        "--grid", action="append", type=_parse_axis, default=[], required=True,
+        help="Axis as name=v1,v2,... (repeatable), e.g. temperature=320,330",
+    )
+    sweep.add_argument("--output", help="Results file (.parquet, .feather or .csv).")
+    sweep.add_argument(
+        "--overwrite", action="store_true", help="Replace an existing results file.",
+    )
+    sweep.set_defaults(handler=_cmd_sweep)
+    
+    benchmark = commands.add_parser("benchmark", help="List or run a benchmark script.")
+    benchmark.add_argument("name", nargs="?")
+    benchmark.add_argument("args", nargs=argparse.REMAINDER)
+    benchmark.set_defaults(handler=_cmd_benchmark)
+    
+    serve = commands.add_parser("serve", help="Run the local solve service.")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--workers", type=int, help="Worker processes (default: CPU count).")
+    serve.add_argument("--max-batch", type=int, default=8, help="Largest batch per worker.")
+    serve.add_argument(
+        "--solve-timeout", type=float, default=60.0,
+        help="IPOPT wall-time limit per solve in s; also sets the hung-worker watchdog.",
+    )
+    serve.set_defaults(handler=_cmd_serve)
+    
+    validate = commands.add_parser("validate", help="Check case files.")
+    validate.add_argument("case_files", nargs="+")
+    _add_components_argument(validate)
+    validate.set_defaults(handler=_cmd_validate)
+    return parser
+
+
+def main(argv=None):
+    """Parse arguments and dispatch to the subcommand.
+
+    This function is invoked by the root launcher script ``run_asa.py``.
+
+    Returns:
+        int: Process exit status.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    finally:
+        if args.import_profile:
+            print(format_import_profile(), file=sys.stderr)
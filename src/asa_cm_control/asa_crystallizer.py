@@ -0,0 +1,452 @@
+# To-Do:
+# - Add a dynamic form of the moment equations for start-up studies
+# - Represent the crystal product as a solid-phase stream instead of a Var
+
+
+"""Moment-based MSMPR crystallizer for aspirin, downstream of the CSTR.
+
+``ASACrystallizer`` is a steady-state mixed-suspension mixed-product-removal
+crystallizer built on the ASA thermophysical package. The crystal size
+distribution is represented by its first four moments ``mu_0 .. mu_3``
+instead of a discretized population balance:
+
+    mu_0 = B tau,    mu_k = k G tau mu_{k-1}   (k = 1, 2, 3)
+
+with residence time ``tau = V / Q`` of the mother liquor, nucleation rate
+``B = k_b sigma^b`` and growth rate ``G = k_g sigma^g``. The relative
+supersaturation ``sigma`` comes from the NRTL activity of the solute in the
+mother liquor and its ideal solubility activity,
+
+    S = gamma x / exp(-dh_fus / R (1/T - 1/T_fus)),    sigma = max(S - 1, 0)
+
+(smoothed). The crystal product leaves with volume fraction ``k_v mu_3`` of
+the mother liquor flow, which closes the solute balance. Moments are carried
+as dimensionless variables scaled by ``NUMBER_SCALE`` and ``LENGTH_SCALE`` so
+that the NLP stays well conditioned.
+
+``build_crystallization_flowsheet`` connects the crystallizer to the outlet of
+the reactor of ``build_flowsheet``; ``initialize_crystallization_flowsheet``
+initializes the two units sequentially.
+"""
+
+from pyomo.common.config import ConfigBlock, ConfigValue, In
+from pyomo.environ import (
+    Constraint,
+    Expression,
+    Param,
+    RangeSet,
+    TransformationFactory,
+    Var,
+    exp,
+    units as pyunits,
+    value,
+)
+from pyomo.network import Arc
+from pyomo.opt import check_optimal_termination
+from pyomo.util.calc_var_value import calculate_variable_from_constraint
+from idaes.core import UnitModelBlockData, declare_process_block_class, useDefault
+from idaes.core.solvers import get_solver
+from idaes.core.util.config import is_physical_parameter_block
+from idaes.core.util.constants import Constants
+from idaes.core.util.exceptions import ConfigurationError, InitializationError
+from idaes.core.util.initialization import propagate_state
+from idaes.core.util.math import smooth_max
+import idaes.logger as idaeslog
+
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, get_reactor, initialize_model
+
+
+# Characteristic crystal number density (1/m^3) and size (m) scaling mu_k
+NUMBER_SCALE = 1e11
+LENGTH_SCALE = 1e-4
+
+# Relative supersaturation assumed when seeding the moments for initialization
+INITIAL_SUPERSATURATION = 0.3
+
+
+@declare_process_block_class("ASACrystallizer")
+class ASACrystallizerData(UnitModelBlockData):
+    """Steady-state MSMPR cooling crystallizer with moment-based CSD.
+
+    Ports ``inlet`` and ``outlet`` (mother liquor) use the thermophysical
+    package state. The crystal product is ``crystal_flow_mol`` of pure solute.
+    """
+    
+    CONFIG = UnitModelBlockData.CONFIG()
+    CONFIG.declare(
+        "property_package",
+        ConfigValue(
+            default=useDefault,
+            domain=is_physical_parameter_block,
+            description="Property package to use for the liquid states",
+        ),
+    )
+    CONFIG.declare(
+        "property_package_args",
+        ConfigBlock(
+            implicit=True,
+            description="Arguments to use for constructing property packages",
+        ),
+    )
+    CONFIG.declare(
+        "solute",
+        ConfigValue(
+            default="aspirin",
+            domain=str,
+            description="Crystallizing component",
+        ),
+    )
+    CONFIG.declare(
+        "n_moments",
+        ConfigValue(
+            default=4,
+            domain=In(range(4, 8)),
+            description="Number of CSD moments tracked (mu_0 .. mu_{n-1}); at least 4",
+        ),
+    )
+    
+    def build(self):
+        """Build state blocks, kinetic parameters, moments and balances."""
+        super().build()
+        if self.config.dynamic:
+            raise ConfigurationError("ASACrystallizer supports steady-state flowsheets only.")
+        
+        params = self.config.property_package
+        solute = self.config.solute
+        if solute not in params.component_list:
+            raise ConfigurationError(f"Solute '{solute}' is not a component of {params.name}.")
+        time = self.flowsheet().time
+        
+        self.properties_in = params.build_state_block(
+            time, defined_state=True, **self.config.property_package_args
+        )
+        self.properties_out = params.build_state_block(
+            time, defined_state=False, **self.config.property_package_args
+        )
+        self.add_port("inlet", self.properties_in, doc="Crystallizer feed")
+        self.add_port("outlet", self.properties_out, doc="Mother liquor")
+        
+        self.moment_idx = RangeSet(0, self.config.n_moments - 1)
+        
+        # Design and kinetic parameters
+        
+        self.volume = Var(initialize=0.2, units=pyunits.m**3, doc="Suspension volume")
+        
+        self.growth_rate_constant = Var(
+            initialize=5e-8,
+            units=pyunits.m / pyunits.s,
+            doc="Growth rate constant k_g",
+        )
+        self.growth_rate_constant.fix()
+        
+        self.growth_order = Var(initialize=1.5, units=pyunits.dimensionless, doc="Growth order g")
+        self.growth_order.fix()
+        
+        self.nucleation_rate_constant = Var(
+            initialize=1e8,
+            units=pyunits.m**-3 / pyunits.s,
+            doc="Nucleation rate constant k_b",
+        )
+        self.nucleation_rate_constant.fix()
+        
+        self.nucleation_order = Var(initialize=2.5, units=pyunits.dimensionless, doc="Nucleation order b")
+        self.nucleation_order.fix()
+        
+        self.shape_factor = Var(initialize=0.5, units=pyunits.dimensionless, doc="Volume shape factor k_v")
+        self.shape_factor.fix()
+        
+        self.number_scale = Param(initialize=NUMBER_SCALE, units=pyunits.m**-3)
+        self.length_scale = Param(initialize=LENGTH_SCALE, units=pyunits.m)
+        self.eps_supersaturation = Param(initialize=1e-4, mutable=True, units=pyunits.dimensionless)
+        
+        # Unit variables
+        
+        self.heat_duty = Var(time, initialize=0.0, units=pyunits.W, doc="Heat duty (negative for cooling)")
+        self.crystal_flow_mol = Var(
+            time,
+            initialize=0.0,
+            bounds=(0, None),
+            units=pyunits.mol / pyunits.s,
+            doc="Crystal product flow of the solute",
+        )
+        self.moment_scaled = Var(
+            time,
+            self.moment_idx,
+            initialize=1.0,
+            bounds=(0, None),
+            units=pyunits.dimensionless,
+            doc="CSD moment mu_k / (NUMBER_SCALE LENGTH_SCALE^k)",
+        )
+        
+        # Kinetics from the mother-liquor state
+        
+        def activity_sat_rule(b, t):
+            state = b.properties_out[t]
+            return exp(
+                -params.dh_fus_comp[solute] / Constants.gas_constant
+                * (1 / state.temperature - 1 / params.temperature_fus_comp[solute])
+            )
+        self.activity_sat = Expression(time, rule=activity_sat_rule, doc="Solute activity at saturation")
+        
+        self.supersaturation_ratio = Expression(
+            time,
+            rule=lambda b, t: b.properties_out[t].act_coeff_liq_comp[solute]
+            * b.properties_out[t].mole_frac_comp[solute]
+            / b.activity_sat[t],
+            doc="Supersaturation ratio S = a / a_sat",
+        )
+        self.relative_supersaturation = Expression(
+            time,
+            rule=lambda b, t: smooth_max(b.supersaturation_ratio[t] - 1, 0, b.eps_supersaturation),
+            doc="Relative supersaturation sigma = max(S - 1, 0)",
+        )
+        self.growth_rate = Expression(
+            time,
+            rule=lambda b, t: b.growth_rate_constant * b.relative_supersaturation[t] ** b.growth_order,
+            doc="Crystal growth rate G",
+        )
+        self.nucleation_rate = Expression(
+            time,
+            rule=lambda b, t: b.nucleation_rate_constant
+            * b.relative_supersaturation[t] ** b.nucleation_order,
+            doc="Nucleation rate B",
+        )
+        
+        def flow_vol_rule(b, t):
+            state = b.properties_out[t]
+            mw = sum(state.mole_frac_comp[j] * params.mw_comp[j] for j in state.component_list)
+            return state.flow_mol * mw / state.dens_mass
+        self.flow_vol = Expression(time, rule=flow_vol_rule, doc="Mother liquor volumetric flow")
+        
+        self.residence_time = Expression(
+            time,
+            rule=lambda b, t: b.volume / b.flow_vol[t],
+            doc="Residence time tau = V / Q",
+        )
+        
+        # Moment equations of the steady MSMPR population balance
+        
+        def moment_rule(b, t, k):
+            if k == 0:
+                # Divided by NUMBER_SCALE so the residual is O(1), not O(1e11)
+                return b.moment_scaled[t, 0] == b.nucleation_rate[t] * b.residence_time[t] / b.number_scale
+            return (
+                b.moment_scaled[t, k] * b.length_scale
+                == k * b.growth_rate[t] * b.residence_time[t] * b.moment_scaled[t, k - 1]
+            )
+        self.moment_balance = Constraint(time, self.moment_idx, rule=moment_rule)
+        
+        self.crystal_formation = Constraint(
+            time,
+            rule=lambda b, t: b.crystal_flow_mol[t] * params.mw_comp[solute]
+            == params.density_sol_comp[solute] * b.shape_factor * b.crystal_moment(t, 3) * b.flow_vol[t],
+        )
+        
+        # Balances
+        
+        def material_balance_rule(b, t, j):
+            crystals = b.crystal_flow_mol[t] if j == solute else 0 * pyunits.mol / pyunits.s
+            return (
+                b.properties_in[t].get_material_flow_terms("liquid", j)
+                == b.properties_out[t].get_material_flow_terms("liquid", j) + crystals
+            )
+        self.material_balance = Constraint(time, params.component_list, rule=material_balance_rule)
+        
+        self.pressure_balance = Constraint(
+            time, rule=lambda b, t: b.properties_out[t].pressure == b.properties_in[t].pressure
+        )
+        
+        def enth_mol_crystal_rule(b, t):
+            return (
+                params.dh_form_liq_comp[solute]
+                - params.dh_fus_comp[solute]
+                + params.cp_mol_sol_comp[solute]
+                * (b.properties_out[t].temperature - params.temperature_ref)
+            )
+        self.enth_mol_crystal = Expression(time, rule=enth_mol_crystal_rule, doc="Crystal molar enthalpy")
+        
+        self.energy_balance = Constraint(
+            time,
+            rule=lambda b, t: b.properties_in[t].get_enthalpy_flow_terms("liquid") + b.heat_duty[t]
+            == b.properties_out[t].get_enthalpy_flow_terms("liquid")
+            + b.crystal_flow_mol[t] * b.enth_mol_crystal[t],
+        )
+    
+    
+    def crystal_moment(self, t, k):
+        """Return the moment ``mu_k`` (units m^k/m^3) at time ``t``."""
+        return self.moment_scaled[t, k] * self.number_scale * self.length_scale**k
+    
+    
+    def mean_size(self, t):
+        """Return the number-mean crystal size ``mu_1 / mu_0`` in m."""
+        return self.crystal_moment(t, 1) / self.crystal_moment(t, 0)
+    
+    
+    def sauter_mean_size(self, t):
+        """Return the Sauter mean crystal size ``mu_3 / mu_2`` in m."""
+        return self.crystal_moment(t, 3) / self.crystal_moment(t, 2)
+    
+    
+    def crystal_yield(self, t):
+        """Return the crystallized fraction of the solute fed."""
+        solute = self.config.solute
+        return self.crystal_flow_mol[t] / self.properties_in[t].get_material_flow_terms("liquid", solute)
+    
+    
+    def _seed_moments(self, t, supersaturation):
+        # Moments of the MSMPR distribution at the given supersaturation
+        tau = value(self.residence_time[t])
+        growth = value(self.growth_rate_constant) * supersaturation ** value(self.growth_order)
+        nucleation = value(self.nucleation_rate_constant) * supersaturation ** value(self.nucleation_order)
+        self.moment_scaled[t, 0].set_value(nucleation * tau / NUMBER_SCALE)
+        for k in self.moment_idx:
+            if k > 0:
+                self.moment_scaled[t, k].set_value(
+                    k * growth * tau / LENGTH_SCALE * value(self.moment_scaled[t, k - 1])
+                )
+    
+    
+    def initialize_build(self, state_args=None, outlvl=idaeslog.NOTSET, solver=None, optarg=None):
+        """Initialize the crystallizer in three steps.
+
+        1. The mother liquor starts from the feed at the outlet temperature.
+        2. The solute balance is closed at the relative supersaturation
+           ``INITIAL_SUPERSATURATION`` (moment equations inactive), which
+           fixes the crystal flow and composition near their final values.
+        3. The moments are seeded from the MSMPR solution at that
+           supersaturation and the full unit is solved.
+
+        Args:
+            state_args: Optional initial guesses for the inlet state.
+            outlvl: IDAES logging level.
+            solver: Optional solver name.
+            optarg: Optional solver options.
+
+        Raises:
+            InitializationError: If the final solve does not converge.
+        """
+        init_log = idaeslog.getInitLogger(self.name, outlvl, tag="unit")
+        solve_log = idaeslog.getSolveLogger(self.name, outlvl, tag="unit")
+        opt = get_solver(solver, optarg or {})
+        
+        flags = self.properties_in.initialize(outlvl=outlvl, hold_state=True, state_args=state_args)
+        for t in self.flowsheet().time:
+            state_in, state_out = self.properties_in[t], self.properties_out[t]
+            for name, var in state_in.define_state_vars().items():
+                for index in var:
+                    out_var = state_out.define_state_vars()[name][index]
+                    if not out_var.fixed:
+                        out_var.set_value(value(var[index]))
+        init_log.info_high("Initialization Step 1 Complete.")
+        
+        # Step 2: close the solute balance at a target supersaturation, or
+        # without crystals if the feed is undersaturated at the outlet
+        self.moment_balance.deactivate()
+        self.crystal_formation.deactivate()
+        self.moment_scaled.fix()
+        
+        def target_rule(b, t):
+            return b.supersaturation_ratio[t] == 1 + INITIAL_SUPERSATURATION
+        self._init_supersaturation = Constraint(self.flowsheet().time, rule=target_rule)
+        for t in self.flowsheet().time:
+            if value(self.supersaturation_ratio[t]) <= 1 + INITIAL_SUPERSATURATION:
+                self._init_supersaturation[t].deactivate()
+                self.crystal_flow_mol[t].fix(0)
+        with idaeslog.solver_log(solve_log, idaeslog.DEBUG) as slc:
+            results = opt.solve(self, tee=slc.tee)
+        self.del_component(self._init_supersaturation)
+        self.crystal_flow_mol.unfix()
+        self.moment_scaled.unfix()
+        self.moment_balance.activate()
+        self.crystal_formation.activate()
+        init_log.info_high(f"Initialization Step 2 {idaeslog.condition(results)}.")
+        
+        # Step 3: seed the moments and solve the full unit
+        for t in self.flowsheet().time:
+            sigma = max(value(self.supersaturation_ratio[t]) - 1, value(self.eps_supersaturation))
+            self._seed_moments(t, sigma)
+            calculate_variable_from_constraint(self.heat_duty[t], self.energy_balance[t])
+        with idaeslog.solver_log(solve_log, idaeslog.DEBUG) as slc:
+            results = opt.solve(self, tee=slc.tee)
+        
+        self.properties_in.release_state(flags, outlvl)
+        if not check_optimal_termination(results):
+            raise InitializationError(
+                f"{self.name} failed to initialize successfully. Please check "
+                f"the output logs for more information."
+            )
+        init_log.info(f"Initialization Complete: {idaeslog.condition(results)}")
+    
+    
+    def _get_performance_contents(self, time_point=0):
+        return {
+            "vars": {
+                "Volume": self.volume,
+                "Heat Duty": self.heat_duty[time_point],
+                "Crystal Flow": self.crystal_flow_mol[time_point],
+            },
+            "exprs": {
+                "Residence Time": self.residence_time[time_point],
+                "Supersaturation Ratio": self.supersaturation_ratio[time_point],
+                "Growth Rate": self.growth_rate[time_point],
+                "Nucleation Rate": self.nucleation_rate[time_point],
+                "Mean Size": self.mean_size(time_point),
+                "Sauter Mean Size": self.sauter_mean_size(time_point),
+                "Yield": self.crystal_yield(time_point),
+            },
+        }
+
+
+def build_crystallization_flowsheet(reactor="cstr", **build_options):
+    """Build the reactor flowsheet with a crystallizer on the reactor outlet.
+
+    Args:
+        reactor: Reactor type passed to ``build_flowsheet``.
+        **build_options: Further ``build_flowsheet`` keyword arguments.
+
+    Returns:
+        ConcreteModel: Model with ``fs.crystallizer`` and the expanded arc
+        ``fs.reactor_effluent``.
+    """
+    model = build_flowsheet(reactor=reactor, **build_options)
+    model.fs.crystallizer = ASACrystallizer(property_package=model.fs.thermo_params)
+    model.fs.reactor_effluent = Arc(
+        source=get_reactor(model).outlet, destination=model.fs.crystallizer.inlet
+    )
+    TransformationFactory("network.expand_arcs").apply_to(model)
+    return model
+
+
+def set_crystallizer_conditions(model, temperature=300.0, volume=0.2):
+    """Fix the crystallizer operating temperature and suspension volume.
+
+    Args:
+        model: Model from ``build_crystallization_flowsheet``.
+        temperature: Mother liquor (outlet) temperature in K.
+        volume: Suspension volume in m^3.
+    """
+    crystallizer = model.fs.crystallizer
+    crystallizer.volume.fix(volume)
+    for t in model.fs.time:
+        crystallizer.outlet.temperature[t].fix(temperature)
+
+
+def initialize_crystallization_flowsheet(model, method="sequential", outlvl=idaeslog.NOTSET):
+    """Initialize the reactor, propagate its outlet and initialize the crystallizer.
+
+    Args:
+        model: Model from ``build_crystallization_flowsheet`` with inputs fixed.
+        method: Reactor initialization method, see ``initialize_model``.
+        outlvl: IDAES logging level for the crystallizer.
+    """
+    crystallizer = model.fs.crystallizer
+    crystallizer.deactivate()
+    model.fs.reactor_effluent_expanded.deactivate()
+    try:
+        initialize_model(model, method=method)
+    finally:
+        crystallizer.activate()
+        model.fs.reactor_effluent_expanded.activate()
+    propagate_state(arc=model.fs.reactor_effluent)
+    crystallizer.initialize(outlvl=outlvl)
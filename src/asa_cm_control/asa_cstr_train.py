@@ -0,0 +1,107 @@
+# To-Do:
+# - Allow unequal volume splits along the train
+
+
+"""CSTR-in-series train flowsheet for residence-time approximation.
+
+A train of N equal CSTRs approximates the residence-time distribution of a
+real vessel (tanks-in-series model). All units share one thermophysical and
+one reaction parameter block and are connected by Arcs.
+
+Initialization is sequential-modular: each unit is initialized from the
+propagated outlet of its predecessor, so the simultaneous solve of the whole
+train starts from a consistent profile.
+"""
+
+from pyomo.environ import ConcreteModel, RangeSet, TransformationFactory
+from pyomo.network import Arc
+from idaes.core import FlowsheetBlock
+from idaes.core.util.initialization import propagate_state
+from idaes.models.unit_models import CSTR
+import idaes.logger as idaeslog
+
+from asa_cm_control.asa_process_flowsheet import feed_mole_fractions, fix_inlet
+from asa_cm_control.props.asa_thermo_property_package import ThermoParameterBlock
+from asa_cm_control.props.asa_reaction_property_package import ASAReactionParameterBlock
+
+
+def build_cstr_train(n_units):
+    """Build a flowsheet with ``n_units`` CSTRs connected in series.
+
+    Args:
+        n_units: Number of CSTRs in the train.
+
+    Returns:
+        ConcreteModel: Model with indexed units ``model.fs.cstr_train[1..N]``
+        and expanded arcs ``model.fs.train_stream[1..N-1]``.
+    """
+    model = ConcreteModel()
+    model.fs = FlowsheetBlock(dynamic=False)
+    
+    model.fs.thermo_params = ThermoParameterBlock()
+    model.fs.reaction_params = ASAReactionParameterBlock(
+        property_package=model.fs.thermo_params,
+    )
+    
+    model.fs.units = RangeSet(n_units)
+    model.fs.cstr_train = CSTR(
+        model.fs.units,
+        property_package=model.fs.thermo_params,
+        reaction_package=model.fs.reaction_params,
+    )
+    
+    model.fs.streams = RangeSet(n_units - 1)
+    model.fs.train_stream = Arc(
+        model.fs.streams,
+        rule=lambda fs, i: {
+            "source": fs.cstr_train[i].outlet,
+            "destination": fs.cstr_train[i + 1].inlet,
+        },
+    )
+    TransformationFactory("network.expand_arcs").apply_to(model)
+    
+    return model
+
+
+def set_train_operating_conditions(
+    model,
+    flow_mol=0.5,
+    temperature=325.0,
+    pressure=101325,
+    mole_frac_comp=None,
+    total_volume=1,
+):
+    """Fix the train feed and split the total volume equally across units.
+
+    Args:
+        model: Model returned by ``build_cstr_train``.
+        flow_mol: Feed molar flow in mol/s.
+        temperature: Feed temperature in K.
+        pressure: Feed pressure in Pa.
+        mole_frac_comp: Optional nominal feed composition (see
+            ``feed_mole_fractions``).
+        total_volume: Combined volume of all units in m^3.
+    """
+    fix_inlet(
+        model.fs.cstr_train[model.fs.units.first()].inlet,
+        0,
+        flow_mol,
+        temperature,
+        pressure,
+        feed_mole_fractions(mole_frac_comp),
+    )
+    for i in model.fs.units:
+        model.fs.cstr_train[i].volume.fix(total_volume / len(model.fs.units))
+
+
+def initialize_cstr_train(model, outlvl=idaeslog.NOTSET):
+    """Initialize the train unit by unit, propagating each outlet downstream.
+
+    Args:
+        model: Model returned by ``build_cstr_train`` with inputs fixed.
+        outlvl: IDAES logging level for unit initialization.
+    """
+    for i in model.fs.units:
+        if i > model.fs.units.first():
+            propagate_state(arc=model.fs.train_stream[i - 1])
+        model.fs.cstr_train[i].initialize(outlvl=outlvl)
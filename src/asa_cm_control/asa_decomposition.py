@@ -0,0 +1,181 @@
+# To-Do:
+# - Reuse the block partition across operating points instead of recomputing it
+
+
+"""Block-triangular decomposition initializer for square flowsheets.
+
+With all inputs fixed, the CSTR flowsheet is a square system whose incidence
+matrix has a block-triangular (Dulmage-Mendelsohn) form: a chain of scalar
+equations (inlet properties, kinetic constants, ...) and a single coupled block
+(the reactor balances with the outlet activity coefficients and rates).
+
+``initialize_by_decomposition`` solves the strongly connected blocks in
+topological order with the upstream variables fixed:
+- 1x1 blocks with ``calculate_variable_from_constraint``.
+- Larger blocks, and any scalar block ``calculate_variable_from_constraint``
+  fails on, with IPOPT.
+
+For the CSTR this leaves IPOPT only the 16x16 reactor balance block; the
+other 14 of the 30 equations are solved in place without writing an NL file.
+The coupled block is stiff in temperature, and a damped Newton method started
+from the inlet-seeded outlet diverges on it, so it is not tried. The scalar
+equations are trivial, so on the CSTR the decomposition saves no time over
+the sequential initialization (or over no initialization at all, see
+``benchmarks/decomposition_initialization.py``); its value is the per-block
+report that localizes a failing part of the model.
+
+Each block's size, method, IPOPT iterations, final residual and time are
+returned, so poorly conditioned parts of the model show up directly.
+"""
+
+import os
+import re
+import tempfile
+import time
+
+from pyomo.contrib.incidence_analysis import IncidenceGraphInterface
+from pyomo.contrib.incidence_analysis.scc_solver import generate_strongly_connected_components
+from pyomo.environ import SolverFactory, value
+from pyomo.opt import check_optimal_termination
+from pyomo.util.calc_var_value import calculate_variable_from_constraint
+from pyomo.util.subsystems import TemporarySubsystemManager
+from idaes.core.util.exceptions import InitializationError
+from idaes.core.util.model_statistics import degrees_of_freedom
+import idaes.logger as idaeslog
+
+
+_IPOPT_ITERATIONS = re.compile(r"Number of Iterations\.*:\s*(\d+)")
+
+
+def seed_outlet_from_inlet(control_volume):
+    """Copy inlet state variable values to the outlet state at every time.
+
+    Gives the coupled reactor block a feasible-looking start (outlet equals
+    feed) instead of the property package defaults.
+    """
+    for t in control_volume.flowsheet().time:
+        inlet_vars = control_volume.properties_in[t].define_state_vars()
+        outlet_vars = control_volume.properties_out[t].define_state_vars()
+        for name, inlet_var in inlet_vars.items():
+            for index in inlet_var:
+                outlet_vars[name][index].set_value(value(inlet_var[index]))
+
+
+def solve_counting_iterations(block, solver, tee=False):
+    """Solve with an IPOPT solver and record its iteration count.
+
+    The IPOPT results object carries no iteration count, so it is read from
+    the solver log and stored as ``results.solver.iterations`` (None if the
+    log has none, e.g. after an evaluation error).
+
+    Returns:
+        SolverResults: The solve results.
+    """
+    handle, logfile = tempfile.mkstemp(suffix=".log")
+    os.close(handle)
+    try:
+        results = solver.solve(block, tee=tee, logfile=logfile)
+        with open(logfile) as stream:
+            match = _IPOPT_ITERATIONS.search(stream.read())
+    finally:
+        os.remove(logfile)
+    results.solver.iterations = int(match.group(1)) if match else None
+    return results
+
+
+def initialize_by_decomposition(model, solver_options=None, outlvl=idaeslog.NOTSET):
+    """Solve a square model block by block in block-triangular order.
+
+    Args:
+        model: Model with all inputs fixed (zero degrees of freedom).
+        solver_options: Optional IPOPT options for the block solves.
+        outlvl: IDAES output level for the per-block log.
+
+    Returns:
+        list: One dict per block with ``size``, ``method`` (``calc_var`` or
+        ``ipopt``; ``calc_var>ipopt`` marks a fallback), IPOPT
+        ``iterations`` (None for ``calc_var``), ``residual``, ``time_s`` and
+        the first constraint name as ``constraint``.
+
+    Raises:
+        InitializationError: If the model is not square or a block fails to
+            converge with every method.
+    """
+    init_log = idaeslog.getInitLogger(__name__, outlvl)
+    dof = degrees_of_freedom(model)
+    if dof != 0:
+        raise InitializationError(
+            f"Decomposition initialization needs a square model; {model.name} has {dof} degrees of freedom."
+        )
+    solver = SolverFactory("ipopt")
+    solver.options.update(solver_options or {})
+    
+    igraph = IncidenceGraphInterface(model, active=True, include_fixed=False, include_inequality=False)
+    stats = []
+    for k, (scc, inputs) in enumerate(
+        generate_strongly_connected_components(igraph.constraints, igraph.variables, igraph=igraph)
+    ):
+        variables = list(scc.vars.values())
+        constraints = list(scc.cons.values())
+        size = len(variables)
+        start = time.perf_counter()
+        with TemporarySubsystemManager(to_fix=inputs, remove_bounds_on_fix=True):
+            converged, iterations, method = False, None, "ipopt"
+            if size == 1:
+                try:
+                    calculate_variable_from_constraint(variables[0], constraints[0])
+                    converged, method = True, "calc_var"
+                except (RuntimeError, ValueError, ZeroDivisionError, OverflowError):
+                    method = "calc_var"
+            if not converged:
+                results = solve_counting_iterations(scc, solver)
+                converged = check_optimal_termination(results)
+                iterations = results.solver.iterations
+                method = "ipopt" if method == "ipopt" else f"{method}>ipopt"
+            residual = max(abs(value(con.body - con.upper)) for con in constraints)
+        
+        stats.append(
+            {
+                "block": k,
+                "size": size,
+                "method": method,
+                "iterations": iterations,
+                "residual": float(residual),
+                "time_s": time.perf_counter() - start,
+                "constraint": constraints[0].name,
+            }
+        )
+        init_log.info_high(
+            f"Block {k}: {size}x{size} by {method} in {stats[-1]['time_s']:.4f} s, "
+            f"residual {residual:.1e}"
+        )
+        if not converged:
+            raise InitializationError(
+                f"Block {k} ({size}x{size}, starting with {constraints[0].name}) failed to converge."
+            )
+    init_log.info(f"Decomposition initialization complete: {len(stats)} blocks.")
+    return stats
+
+
+def report_decomposition(stats):
+    """Print the per-block statistics of ``initialize_by_decomposition``.
+
+    Ends with the equations, blocks and time per method, i.e. how much of the
+    system is solved without IPOPT.
+    """
+    print(f"{'block':>5} {'size':>5} {'method':>14} {'iters':>6} {'residual':>9} {'time s':>8}  first constraint")
+    for row in stats:
+        iterations = "-" if row["iterations"] is None else row["iterations"]
+        print(
+            f"{row['block']:>5} {row['size']:>5} {row['method']:>14} {iterations:>6} "
+            f"{row['residual']:>9.1e} {row['time_s']:>8.4f}  {row['constraint']}"
+        )
+    print(f"total {sum(row['time_s'] for row in stats):.4f} s over {len(stats)} blocks")
+    n_equations = sum(row["size"] for row in stats)
+    for method in sorted({row["method"] for row in stats}):
+        rows = [row for row in stats if row["method"] == method]
+        size = sum(row["size"] for row in rows)
+        print(
+            f"  {method}: {size}/{n_equations} equations in {len(rows)} blocks, "
+            f"{sum(row['time_s'] for row in rows):.4f} s"
+        )
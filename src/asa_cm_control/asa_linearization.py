@@ -0,0 +1,426 @@
+# To-Do:
+# - Add a balanced-truncation helper once the MPC layer settles on a state set
+
+
+"""Linear state-space extraction for the ASA CSTR around steady states.
+
+The CSTR holdup equations form a DAE whose liquid volume constraint makes it
+higher index in the natural holdup coordinates, so the Jacobians cannot simply
+be read off the balance equations. Instead, the linearization is taken on one
+backward-Euler step of the dynamic flowsheet:
+
+    (I - dt A) dx_1 = dx_0 + dt B du
+    dy_1 = C dx_1 + D du
+
+The step map ``x_1 = Phi(x_0, u)`` is differentiated exactly with the implicit
+function theorem, using constraint gradients from Pyomo's reverse-mode
+automatic differentiation. For a backward-Euler step the continuous matrices
+are recovered exactly as ``A = (I - A_d^-1) / dt`` and ``B = A_d^-1 B_d / dt``,
+independent of the step length.
+
+States, inputs and outputs are given as specs relative to ``fs.cstr``:
+strings such as ``"outlet.temperature"`` or ``"outlet.mole_frac_comp[aspirin]"``,
+or callables ``spec(cstr, t)`` returning a Pyomo variable or expression.
+"""
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+from pyomo.core.expr.calculus.derivatives import Modes, differentiate
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.dae import DerivativeVar
+from pyomo.environ import Constraint, Var, value
+from idaes.core.util.exceptions import ConfigurationError
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_dynamic_flowsheet,
+    build_flowsheet,
+    copy_flowsheet_state,
+    fix_initial_steady_state,
+    set_dynamic_operating_conditions,
+    set_operating_conditions,
+    set_steady_holdups,
+    solve_model,
+)
+
+
+# One mole fraction is dependent through the closure equation; the inert
+# catalyst (sulfuric acid) is the one left out of the state vector
+DEFAULT_STATES = (
+    "outlet.temperature",
+    "outlet.mole_frac_comp[salicylic_acid]",
+    "outlet.mole_frac_comp[acetic_anhydride]",
+    "outlet.mole_frac_comp[aspirin]",
+    "outlet.mole_frac_comp[acetic_acid]",
+    "outlet.mole_frac_comp[water]",
+)
+
+DEFAULT_INPUTS = (
+    "inlet.flow_mol",
+    "inlet.temperature",
+)
+
+DEFAULT_OUTPUTS = (
+    "outlet.temperature",
+    "outlet.mole_frac_comp[aspirin]",
+    "outlet.mole_frac_comp[salicylic_acid]",
+)
+
+
+def resolve_spec(cstr, spec, t):
+    """Return the component a state/input/output spec refers to at time ``t``.
+
+    Args:
+        cstr: CSTR unit model block.
+        spec: Dotted attribute path relative to ``cstr`` with an optional
+            non-time index in brackets (``"outlet.mole_frac_comp[water]"``),
+            or a callable ``spec(cstr, t)``.
+        t: Time point.
+
+    Returns:
+        Pyomo VarData or expression.
+    """
+    if callable(spec):
+        return spec(cstr, t)
+    
+    path, _, index = spec.partition("[")
+    component = cstr
+    for attribute in path.split("."):
+        component = getattr(component, attribute)
+    if not index:
+        return component[t]
+    return component[(t,) + tuple(part.strip() for part in index.rstrip("]").split(","))]
+
+
+def _spec_label(spec):
+    return spec if isinstance(spec, str) else getattr(spec, "__name__", repr(spec))
+
+
+class LinearStateSpace:
+    """Continuous-time linear model ``dx/dt = A x + B u``, ``y = C x + D u``.
+
+    All quantities are deviations from ``operating_point``.
+
+    Attributes:
+        A, B, C, D: Dense NumPy state-space matrices.
+        state_labels, input_labels, output_labels: Row/column labels.
+        operating_point: Values of states, inputs and outputs at linearization.
+        jacobian: Sparse Jacobian blocks of the step equations with respect
+            to the unknowns, initial states and inputs, and the unknown labels.
+        dt: Step length of the backward-Euler step used for extraction.
+    """
+    
+    def __init__(
+        self,
+        A,
+        B,
+        C,
+        D,
+        state_labels,
+        input_labels,
+        output_labels,
+        operating_point,
+        jacobian,
+        dt,
+    ):
+        self.A = A
+        self.B = B
+        self.C = C
+        self.D = D
+        self.state_labels = list(state_labels)
+        self.input_labels = list(input_labels)
+        self.output_labels = list(output_labels)
+        self.operating_point = operating_point
+        self.jacobian = jacobian
+        self.dt = dt
+    
+    
+    def steady_state_gain(self):
+        """Return the steady-state gain matrix ``D - C A^-1 B``."""
+        return self.D - self.C @ np.linalg.solve(self.A, self.B)
+    
+    
+    def discretize(self, sample_time):
+        """Return zero-order-hold discrete matrices ``(A_d, B_d)``.
+
+        Args:
+            sample_time: Sampling period in seconds.
+        """
+        from scipy.linalg import expm
+        
+        n, m = self.B.shape
+        block = np.zeros((n + m, n + m))
+        block[:n, :n] = self.A
+        block[:n, n:] = self.B
+        phi = expm(block * sample_time)
+        return phi[:n, :n], phi[:n, n:]
+
+
+class CSTRLinearizer:
+    """Reusable linearizer holding a one-step dynamic copy of the CSTR.
+
+    The step model and the structure of its Jacobian (constraint list,
+    variable ordering and incidence) are built once, so repeated
+    linearization across operating points only re-evaluates derivatives.
+
+    Args:
+        states: State specs; default ``DEFAULT_STATES``.
+        inputs: Input specs; default ``DEFAULT_INPUTS``. Inputs must be fixed
+            variables of the flowsheet.
+        outputs: Output specs; default ``DEFAULT_OUTPUTS``. Outputs may be
+            variables or expressions.
+        dt: Length of the backward-Euler step in seconds.
+    """
+    
+    def __init__(self, states=None, inputs=None, outputs=None, dt=1.0):
+        self.states = tuple(states or DEFAULT_STATES)
+        self.inputs = tuple(inputs or DEFAULT_INPUTS)
+        self.outputs = tuple(outputs or DEFAULT_OUTPUTS)
+        self.dt = dt
+        
+        self.model = build_dynamic_flowsheet(horizon=dt, nfe=1)
+        set_dynamic_operating_conditions(self.model)
+        fix_initial_steady_state(self.model)
+        self._build_structure()
+    
+    
+    def _build_structure(self):
+        """Collect step equations, unknowns and per-constraint incidence."""
+        fs = self.model.fs
+        cstr = fs.cstr
+        t0, t1 = fs.time.first(), fs.time.last()
+        
+        self._state_vars_0 = [resolve_spec(cstr, spec, t0) for spec in self.states]
+        self._state_vars_1 = [resolve_spec(cstr, spec, t1) for spec in self.states]
+        self._input_vars = [resolve_spec(cstr, spec, t1) for spec in self.inputs]
+        self._output_exprs = [resolve_spec(cstr, spec, t1) for spec in self.outputs]
+        
+        for spec, var in zip(self.inputs, self._input_vars):
+            if not var.fixed:
+                raise ConfigurationError(
+                    f"Linearization input '{_spec_label(spec)}' must be a fixed variable."
+                )
+        
+        # Balances at t0 only define the initial derivatives, which do not
+        # influence the state at t1, so they are excluded from the step map.
+        # Discretization reclassifies DerivativeVars as Vars, hence isinstance.
+        initial_derivatives = {
+            id(var)
+            for derivative in self.model.component_objects(Var)
+            if isinstance(derivative, DerivativeVar)
+            for index, var in derivative.items()
+            if (index[0] if isinstance(index, tuple) else index) == t0
+        }
+        
+        given = {id(var) for var in self._state_vars_0 + self._input_vars}
+        self._constraints = []
+        self._incidence = []
+        unknowns = {}
+        for con in self.model.component_data_objects(Constraint, active=True, descend_into=True):
+            if not con.equality:
+                continue
+            con_vars = list(identify_variables(con.body, include_fixed=True))
+            if any(id(var) in initial_derivatives for var in con_vars):
+                continue
+            con_vars = [var for var in con_vars if id(var) in given or not var.fixed]
+            self._constraints.append(con)
+            self._incidence.append(con_vars)
+            for var in con_vars:
+                if id(var) not in given:
+                    unknowns.setdefault(id(var), var)
+        
+        self._unknowns = list(unknowns.values())
+        self._unknown_index = {id(var): k for k, var in enumerate(self._unknowns)}
+        self._state_index = {id(var): k for k, var in enumerate(self._state_vars_0)}
+        self._input_index = {id(var): k for k, var in enumerate(self._input_vars)}
+        
+        if len(self._unknowns) != len(self._constraints):
+            raise ConfigurationError(
+                f"Linearization step system is not square: {len(self._constraints)} "
+                f"equations and {len(self._unknowns)} unknowns. Check that the "
+                f"states {list(map(_spec_label, self.states))} are an independent set."
+            )
+        for spec, var in zip(self.states, self._state_vars_1):
+            if id(var) not in self._unknown_index:
+                raise ConfigurationError(
+                    f"Linearization state '{_spec_label(spec)}' does not appear in the "
+                    "step equations as an unknown."
+                )
+    
+    
+    def _evaluate_jacobians(self):
+        """Return sparse Jacobians w.r.t. unknowns, initial states and inputs."""
+        n = len(self._unknowns)
+        blocks = {"z": ([], [], []), "x": ([], [], []), "u": ([], [], [])}
+        for row, (con, con_vars) in enumerate(zip(self._constraints, self._incidence)):
+            gradient = differentiate(con.body, wrt_list=con_vars, mode=Modes.reverse_numeric)
+            for var, derivative in zip(con_vars, gradient):
+                if derivative == 0:
+                    continue
+                for key, index in (
+                    ("z", self._unknown_index),
+                    ("x", self._state_index),
+                    ("u", self._input_index),
+                ):
+                    col = index.get(id(var))
+                    if col is not None:
+                        rows, cols, data = blocks[key]
+                        rows.append(row)
+                        cols.append(col)
+                        data.append(derivative)
+                        break
+        
+        shapes = {"z": (n, n), "x": (n, len(self._state_vars_0)), "u": (n, len(self._input_vars))}
+        return {
+            key: sparse.csc_matrix((data, (rows, cols)), shape=shapes[key])
+            for key, (rows, cols, data) in blocks.items()
+        }
+    
+    
+    def _output_gradients(self):
+        """Return dense output gradients w.r.t. unknowns, initial states and inputs."""
+        n_y = len(self._output_exprs)
+        grad_z = np.zeros((n_y, len(self._unknowns)))
+        grad_x = np.zeros((n_y, len(self._state_vars_0)))
+        grad_u = np.zeros((n_y, len(self._input_vars)))
+        for row, expr in enumerate(self._output_exprs):
+            expr_vars = list(identify_variables(expr, include_fixed=True))
+            gradient = differentiate(expr, wrt_list=expr_vars, mode=Modes.reverse_numeric)
+            for var, derivative in zip(expr_vars, gradient):
+                for target, index in (
+                    (grad_z, self._unknown_index),
+                    (grad_x, self._state_index),
+                    (grad_u, self._input_index),
+                ):
+                    col = index.get(id(var))
+                    if col is not None:
+                        target[row, col] += derivative
+                        break
+        return grad_z, grad_x, grad_u
+    
+    
+    def load_steady_state(self, steady_model):
+        """Load a converged steady-state flowsheet into the step model.
+
+        Inputs, parameter values and the solution are copied to both time
+        points, which is an exact solution of the step with zero accumulation.
+
+        Args:
+            steady_model: Converged model from ``build_flowsheet``.
+        """
+        copy_flowsheet_state(steady_model, self.model, include_fixed=True)
+        set_steady_holdups(self.model)
+    
+    
+    def linearize(self, steady_model=None):
+        """Extract the linear state-space model at the current operating point.
+
+        Args:
+            steady_model: Optional converged steady-state flowsheet to load
+                first. If omitted, the step model must already hold a
+                steady state (see ``load_steady_state``).
+
+        Returns:
+            LinearStateSpace: Continuous-time matrices with labels.
+        """
+        if steady_model is not None:
+            self.load_steady_state(steady_model)
+        
+        jac = self._evaluate_jacobians()
+        lu = splu(jac["z"])
+        dz_dx = -lu.solve(jac["x"].toarray())
+        dz_du = -lu.solve(jac["u"].toarray())
+        
+        rows_1 = [self._unknown_index[id(var)] for var in self._state_vars_1]
+        A_d = dz_dx[rows_1, :]
+        B_d = dz_du[rows_1, :]
+        
+        grad_z, grad_x, grad_u = self._output_gradients()
+        G_x = grad_z @ dz_dx + grad_x
+        G_u = grad_z @ dz_du + grad_u
+        
+        A_d_inv = np.linalg.inv(A_d)
+        n_x = A_d.shape[0]
+        A = (np.eye(n_x) - A_d_inv) / self.dt
+        B = A_d_inv @ B_d / self.dt
+        C = G_x @ A_d_inv
+        D = G_u - C @ B_d
+        
+        labels = {
+            "states": [_spec_label(spec) for spec in self.states],
+            "inputs": [_spec_label(spec) for spec in self.inputs],
+            "outputs": [_spec_label(spec) for spec in self.outputs],
+        }
+        operating_point = {
+            "states": dict(zip(labels["states"], map(value, self._state_vars_1))),
+            "inputs": dict(zip(labels["inputs"], map(value, self._input_vars))),
+            "outputs": dict(zip(labels["outputs"], map(value, self._output_exprs))),
+        }
+        jacobian = dict(jac)
+        jacobian["unknown_labels"] = [var.name for var in self._unknowns]
+        
+        return LinearStateSpace(
+            A,
+            B,
+            C,
+            D,
+            labels["states"],
+            labels["inputs"],
+            labels["outputs"],
+            operating_point,
+            jacobian,
+            self.dt,
+        )
+
+
+def linearize_flowsheet(model, states=None, inputs=None, outputs=None, dt=1.0):
+    """Linearize a converged steady-state CSTR flowsheet.
+
+    Args:
+        model: Converged model from ``build_flowsheet``.
+        states, inputs, outputs: Specs as accepted by ``CSTRLinearizer``.
+        dt: Length of the backward-Euler step in seconds.
+
+    Returns:
+        LinearStateSpace: Continuous-time matrices with labels.
+    """
+    linearizer = CSTRLinearizer(states=states, inputs=inputs, outputs=outputs, dt=dt)
+    return linearizer.linearize(model)
+
+
+def linearize_operating_points(
+    operating_points, states=None, inputs=None, outputs=None, dt=1.0, tee=False
+):
+    """Linearize the CSTR across a grid of operating points.
+
+    One steady-state flowsheet and one linearizer are built and reused. Points
+    are solved in the given order, each warm-started from the previous
+    solution, so ordering neighbouring points together speeds up the batch.
+
+    Args:
+        operating_points: Iterable of keyword dicts for
+            ``set_operating_conditions``.
+        states, inputs, outputs: Specs as accepted by ``CSTRLinearizer``.
+        dt: Length of the backward-Euler step in seconds.
+        tee: Show solver output.
+
+    Returns:
+        list: ``(operating_point, LinearStateSpace)`` pairs, with ``None`` in
+        place of the linear model for points whose solve did not converge.
+    """
+    from pyomo.opt import check_optimal_termination
+    
+    linearizer = CSTRLinearizer(states=states, inputs=inputs, outputs=outputs, dt=dt)
+    steady = build_flowsheet()
+    set_operating_conditions(steady)
+    steady.fs.cstr.initialize()
+    
+    results = []
+    for point in operating_points:
+        set_operating_conditions(steady, **point)
+        solver_results = solve_model(steady, tee=tee)
+        if not check_optimal_termination(solver_results):
+            results.append((point, None))
+            continue
+        results.append((point, linearizer.linearize(steady)))
+    return results
@@ -0,0 +1,207 @@
+# To-Do:
+# - Include grey-box equations in the Dulmage-Mendelsohn partition
+
+
+"""Fail-fast pre-solve checks for flowsheet models.
+
+``check_model`` rejects a mis-specified model before IPOPT sees it, with a
+diagnostic naming the offending variables and constraints:
+- Structure: degrees of freedom and the Dulmage-Mendelsohn partition of the
+  incidence graph of the active equalities. Over-constrained or unmatched
+  constraints are always an error (the equations cannot all hold, e.g. an
+  inlet composition fixed next to an extra closure equation); under-constrained
+  variables and non-zero degrees of freedom are errors for square
+  (simulation) models, i.e. models without an active objective.
+- Values: empty bounds, fixed values outside their bounds or missing,
+  unfixed variables with zero-width bounds, and fully fixed state-block
+  compositions that do not sum to one. Uninitialized variables and variables
+  sitting on a zero bound are reported as warnings.
+
+The structural part is the expensive one, so its result is cached on the model
+per structure (active equalities, fixed variables and whether an objective is
+active); repeat solves of the same structure only pay the fingerprint and the
+value checks.
+"""
+
+import time
+
+from pyomo.contrib.incidence_analysis import IncidenceGraphInterface, IncidenceMethod
+from pyomo.common.errors import InfeasibleConstraintException
+from pyomo.environ import Block, Constraint, Objective, Var, value
+from idaes.core import StateBlockData
+from idaes.core.util.exceptions import ConfigurationError
+from idaes.core.util.model_statistics import degrees_of_freedom, number_activated_greybox_blocks
+
+
+# Tolerance on the sum of a fully fixed composition and on fixed-value bounds
+MOLE_FRAC_SUM_TOL = 1e-6
+BOUND_TOL = 1e-8
+
+# Names listed per diagnostic before the rest is summarized
+MAX_LISTED = 8
+
+
+class StructuralValidationError(ConfigurationError):
+    """Raised by ``check_model`` for a model that cannot be solved as posed.
+
+    Args:
+        report: Report dict of ``check_model``, kept as ``self.report``.
+    """
+    
+    def __init__(self, report):
+        self.report = report
+        super().__init__(format_check_report(report))
+
+
+def _names(components):
+    names = [component.name for component in components]
+    if len(names) > MAX_LISTED:
+        return ", ".join(names[:MAX_LISTED]) + f", ... ({len(names) - MAX_LISTED} more)"
+    return ", ".join(names)
+
+
+def structure_fingerprint(model):
+    """Return a hashable key of the model structure relevant to ``check_model``.
+
+    Components are identified by name: an ``id`` may be reused by a component
+    created after another was deleted.
+    """
+    return (
+        tuple(con.name for con in model.component_data_objects(Constraint, active=True) if con.equality),
+        tuple(var.name for var in model.component_data_objects(Var) if var.fixed),
+        any(True for _ in model.component_data_objects(Objective, active=True)),
+    )
+
+
+def _structural_check(model, square):
+    if number_activated_greybox_blocks(model):
+        # Grey-box equations are not in the incidence graph
+        return {
+            "dof": degrees_of_freedom(model),
+            "errors": [],
+            "warnings": ["grey-box blocks present; Dulmage-Mendelsohn check skipped"],
+        }
+    
+    # The AMPL representation finds the incident variables about 10x faster
+    # than the standard one, which matters for stacked multi-copy models, but
+    # refuses fixed values outside their bounds; ``_value_check`` reports those
+    options = {"active": True, "include_fixed": False, "include_inequality": False}
+    try:
+        igraph = IncidenceGraphInterface(model, method=IncidenceMethod.ampl_repn, **options)
+    except InfeasibleConstraintException:
+        igraph = IncidenceGraphInterface(model, method=IncidenceMethod.standard_repn, **options)
+    dof = len(igraph.variables) - len(igraph.constraints)
+    var_dmp, con_dmp = igraph.dulmage_mendelsohn()
+    errors = []
+    if square and dof != 0:
+        errors.append(f"square model has {dof} degrees of freedom")
+    over = con_dmp.unmatched + con_dmp.overconstrained
+    if over:
+        errors.append(
+            f"{len(over)} constraint(s) in an over-constrained subsystem "
+            f"({len(con_dmp.unmatched)} unmatched, listed first): {_names(over)}"
+        )
+    under = var_dmp.unmatched + var_dmp.underconstrained
+    if square and under:
+        errors.append(
+            f"{len(under)} variable(s) in an under-constrained subsystem "
+            f"({len(var_dmp.unmatched)} unmatched, listed first): {_names(under)}"
+        )
+    return {"dof": dof, "errors": errors, "warnings": []}
+
+
+def _value_check(model):
+    errors, warnings = [], []
+    empty, out_of_bounds, missing, zero_width, uninitialized, at_zero = [], [], [], [], [], []
+    for var in model.component_data_objects(Var):
+        lb, ub, val = var.lb, var.ub, var.value
+        if lb is not None and ub is not None and lb > ub:
+            empty.append(var)
+        elif var.fixed:
+            if val is None:
+                missing.append(var)
+            elif (lb is not None and val < lb - BOUND_TOL) or (ub is not None and val > ub + BOUND_TOL):
+                out_of_bounds.append(var)
+        elif lb is not None and lb == ub:
+            zero_width.append(var)
+        elif val is None:
+            uninitialized.append(var)
+        elif val == 0 and 0 in (lb, ub):
+            at_zero.append(var)
+    
+    if empty:
+        errors.append(f"{len(empty)} variable(s) with lower bound above upper bound: {_names(empty)}")
+    if missing:
+        errors.append(f"{len(missing)} fixed variable(s) without a value: {_names(missing)}")
+    if out_of_bounds:
+        errors.append(
+            f"{len(out_of_bounds)} fixed variable(s) outside their bounds: "
+            + ", ".join(f"{var.name}={var.value:g}" for var in out_of_bounds[:MAX_LISTED])
+        )
+    if zero_width:
+        errors.append(f"{len(zero_width)} unfixed variable(s) with zero-width bounds: {_names(zero_width)}")
+    if uninitialized:
+        warnings.append(f"{len(uninitialized)} unfixed variable(s) without a value: {_names(uninitialized)}")
+    if at_zero:
+        warnings.append(f"{len(at_zero)} unfixed variable(s) starting on a zero bound: {_names(at_zero)}")
+    
+    for block in model.component_data_objects(Block):
+        if not isinstance(block, StateBlockData) or not hasattr(block, "mole_frac_comp"):
+            continue
+        fractions = list(block.mole_frac_comp.values())
+        if all(x.fixed and x.value is not None for x in fractions):
+            total = sum(value(x) for x in fractions)
+            if abs(total - 1) > MOLE_FRAC_SUM_TOL:
+                errors.append(f"fixed mole fractions of {block.name} sum to {total:.8g}, not 1")
+    return errors, warnings
+
+
+def check_model(model, square=None, use_cache=True, raise_on_error=True):
+    """Check a model for structural and specification errors before a solve.
+
+    Args:
+        model: Pyomo model or block.
+        square: Require zero degrees of freedom and no under-constrained
+            subsystem. Defaults to True unless an objective is active.
+        use_cache: Reuse the structural result of an identical structure.
+        raise_on_error: Raise ``StructuralValidationError`` on errors.
+
+    Returns:
+        dict: ``dof``, ``errors`` and ``warnings`` (lists of messages),
+        ``cached`` (structural part reused) and ``time_s``.
+
+    Raises:
+        StructuralValidationError: If ``raise_on_error`` and any error is found.
+    """
+    start = time.perf_counter()
+    fingerprint = structure_fingerprint(model)
+    if square is None:
+        square = not fingerprint[2]
+    
+    cache = model.__dict__.setdefault("_structure_checks", {})
+    key = (fingerprint, square)
+    cached = use_cache and key in cache
+    if not cached:
+        cache[key] = _structural_check(model, square)
+    structural = cache[key]
+    
+    errors, warnings = _value_check(model)
+    report = {
+        "model": model.name,
+        "dof": structural["dof"],
+        "errors": structural["errors"] + errors,
+        "warnings": structural["warnings"] + warnings,
+        "cached": cached,
+        "time_s": time.perf_counter() - start,
+    }
+    if raise_on_error and report["errors"]:
+        raise StructuralValidationError(report)
+    return report
+
+
+def format_check_report(report):
+    """Return a ``check_model`` report as readable text."""
+    lines = [f"Model check of {report['model']}: {report['dof']} degrees of freedom"]
+    lines += [f"  error: {message}" for message in report["errors"]]
+    lines += [f"  warning: {message}" for message in report["warnings"]]
+    return "\n".join(lines)
@@ -0,0 +1,454 @@
+# To-Do:
+# - Reuse the PyNumero NL file when only the fixed-variable set changes
+
+
+"""Direct Newton solver for square flowsheets, with IPOPT as the fallback.
+
+At fixed inputs the CSTR is a square system of about 30 equations, for which
+writing the NL file, starting IPOPT and running the interior-point machinery
+cost far more than the Newton steps themselves. ``NewtonSolver`` collects the
+system once (the active equality constraints, the free variables they contain
+and the fixed variables as parameters), so re-solves after input changes
+reuse it.
+
+Residuals and the sparse Jacobian are evaluated in memory:
+- ``"pynumero"``: the ASL through PyNumero. The NL file is written once, with
+  the fixed variables as primals, so input changes only update the primal
+  vector. Needs the PyNumero ASL library (``idaes get-extensions``).
+- ``"casadi"``: a CasADi function compiled from the constraint expressions.
+  Named expressions (e.g. the NRTL activity coefficients shared by the rate
+  equations) are converted once, and fixed variables are function inputs.
+- ``"pyomo"``: the Pyomo expressions themselves, with the Jacobian by
+  reverse-mode differentiation. Always available, but each evaluation walks
+  the full expression trees, so a CSTR re-solve is only about 1.5x faster
+  than IPOPT (CasADi: about 200x; ``benchmarks/newton_solver.py``).
+
+``"auto"`` picks PyNumero when ``AmplInterface.available()``, else CasADi
+when installed (``environment.yaml``), else the Pyomo evaluator.
+
+Steps are damped by backtracking on the row-scaled residual norm and stop
+short of variable bounds. The sparse LU factorization of the Jacobian is
+reused across iterations and across solves (chord steps) as long as every
+step reduces the residual norm by ``CHORD_CONTRACTION``; otherwise it is
+refactorized at the current point. When Newton fails, the starting point is
+restored and the model is solved with ``solve_model``.
+
+Usage:
+    solver = NewtonSolver(model)
+    stats = solver.solve()
+"""
+
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+from pyomo.common.dependencies import attempt_import
+from pyomo.common.numeric_types import native_numeric_types
+from pyomo.core.expr import numeric_expr
+from pyomo.core.expr.calculus.derivatives import Modes, differentiate
+from pyomo.core.expr.visitor import StreamBasedExpressionVisitor, identify_variables
+from pyomo.environ import Constraint, Objective, value
+from pyomo.opt import check_optimal_termination
+from pyomo.util.subsystems import TemporarySubsystemManager, create_subsystem_block
+from idaes.core.util.exceptions import ConfigurationError
+
+from asa_cm_control.asa_process_flowsheet import solve_model
+
+casadi, casadi_available = attempt_import("casadi")
+pynumero_asl, _ = attempt_import("pyomo.contrib.pynumero.asl")
+pyomo_nlp, _ = attempt_import("pyomo.contrib.pynumero.interfaces.pyomo_nlp")
+pynumero_exceptions, _ = attempt_import("pyomo.contrib.pynumero.exceptions")
+
+NEWTON_EVALUATORS = ("auto", "pynumero", "casadi", "pyomo")
+
+# Convergence tolerance on the row-scaled residuals (each residual over the
+# largest Jacobian entry of its row), so energy balances in J/s and mole
+# fraction equations are held to comparable accuracy
+DEFAULT_TOL = 1e-10
+
+DEFAULT_MAX_ITER = 30
+
+# Fraction of the distance to a variable bound a Newton step may cover
+FRACTION_TO_BOUNDARY = 0.99
+
+# A step with a reused (older) factorization is accepted only if it cuts the
+# scaled residual norm by this factor; otherwise the Jacobian is refactorized
+CHORD_CONTRACTION = 0.5
+
+# Smallest step fraction of the backtracking line search
+MIN_STEP = 1e-4
+
+
+class _CasadiVisitor(StreamBasedExpressionVisitor):
+    """Convert Pyomo expressions to CasADi SX, sharing named expressions."""
+    
+    def __init__(self, symbols):
+        super().__init__()
+        self.symbols = symbols
+        self.named = {}
+    
+    def beforeChild(self, node, child, child_idx):
+        if type(child) in native_numeric_types:
+            return False, child
+        if child.is_variable_type():
+            return False, self.symbols[id(child)]
+        if not child.is_potentially_variable():
+            return False, value(child)
+        if child.is_named_expression_type() and id(child) in self.named:
+            return False, self.named[id(child)]
+        return True, None
+    
+    def exitNode(self, node, data):
+        if node.is_named_expression_type():
+            self.named[id(node)] = data[0]
+            return data[0]
+        if isinstance(node, numeric_expr.SumExpression):
+            return sum(data[1:], data[0])
+        if isinstance(node, (numeric_expr.ProductExpression, numeric_expr.MonomialTermExpression)):
+            return data[0] * data[1]
+        if isinstance(node, numeric_expr.DivisionExpression):
+            return data[0] / data[1]
+        if isinstance(node, numeric_expr.PowExpression):
+            return data[0] ** data[1]
+        if isinstance(node, numeric_expr.NegationExpression):
+            return -data[0]
+        if isinstance(node, numeric_expr.AbsExpression):
+            return casadi.fabs(data[0])
+        if isinstance(node, numeric_expr.UnaryFunctionExpression):
+            function = getattr(casadi, node.getname(), None)
+            if function is not None:
+                return function(data[0])
+        if isinstance(node, numeric_expr.Expr_ifExpression):
+            return casadi.if_else(*data)
+        raise ConfigurationError(
+            f"Cannot compile {type(node).__name__} '{node}' with CasADi; use evaluator='pyomo'."
+        )
+
+
+def pynumero_available():
+    """Return True if the PyNumero ASL library is installed."""
+    return pynumero_asl.AmplInterface.available()
+
+
+def _residual_exprs(constraints):
+    return [con.body - con.upper for con in constraints]
+
+
+class _PyNumeroEvaluator:
+    """Residuals and sparse Jacobian from the ASL through PyNumero.
+
+    The fixed variables are unfixed while the NL file is written, so they are
+    primals of the NLP and set with the unknowns on every evaluation.
+    """
+    
+    def __init__(self, constraints, variables, parameters):
+        block = create_subsystem_block(constraints, variables + parameters)
+        # PyomoNLP needs exactly one objective
+        block._obj = Objective(expr=0.0)
+        with TemporarySubsystemManager(to_unfix=parameters):
+            self._nlp = pyomo_nlp.PyomoNLP(block)
+        self._rows = self._nlp.get_equality_constraint_indices(constraints)
+        self._x = self._nlp.get_primal_indices(variables)
+        self._p = self._nlp.get_primal_indices(parameters)
+        self._primals = self._nlp.get_primals()
+    
+    def _load(self, x, p):
+        self._primals[self._x] = x
+        self._primals[self._p] = p
+        self._nlp.set_primals(self._primals)
+    
+    def residuals(self, x, p):
+        self._load(x, p)
+        try:
+            return self._nlp.evaluate_eq_constraints()[self._rows]
+        except pynumero_exceptions.PyNumeroEvaluationError:
+            return np.full(len(self._rows), np.nan)
+    
+    def jacobian(self, x, p):
+        self._load(x, p)
+        try:
+            jacobian = self._nlp.evaluate_jacobian_eq().tocsr()
+        except pynumero_exceptions.PyNumeroEvaluationError:
+            return sparse.diags(np.full(len(self._rows), np.nan), format="csc")
+        return sparse.csc_matrix(jacobian[self._rows][:, self._x])
+
+
+class _CasadiEvaluator:
+    """Residuals and sparse Jacobian from compiled CasADi functions."""
+    
+    def __init__(self, constraints, variables, parameters):
+        residual_exprs = _residual_exprs(constraints)
+        x = casadi.SX.sym("x", len(variables))
+        p = casadi.SX.sym("p", len(parameters))
+        symbols = {id(var): x[k] for k, var in enumerate(variables)}
+        symbols.update({id(var): p[k] for k, var in enumerate(parameters)})
+        visitor = _CasadiVisitor(symbols)
+        residuals = casadi.vertcat(*[visitor.walk_expression(expr) for expr in residual_exprs])
+        self._residuals = casadi.Function("residuals", [x, p], [residuals])
+        self._jacobian = casadi.Function("jacobian", [x, p], [casadi.jacobian(residuals, x)])
+    
+    def residuals(self, x, p):
+        return np.asarray(self._residuals(x, p)).ravel()
+    
+    def jacobian(self, x, p):
+        return sparse.csc_matrix(self._jacobian(x, p).sparse())
+
+
+class _PyomoEvaluator:
+    """Residuals and sparse Jacobian from the Pyomo expressions in place.
+
+    Fixed variables are read from the model, so ``p`` is unused.
+    """
+    
+    def __init__(self, constraints, variables, parameters):
+        residual_exprs = _residual_exprs(constraints)
+        self._exprs = residual_exprs
+        self._variables = variables
+        index = {id(var): k for k, var in enumerate(variables)}
+        self._incidence = [
+            [var for var in identify_variables(expr) if id(var) in index] for expr in residual_exprs
+        ]
+        self._columns = [[index[id(var)] for var in row] for row in self._incidence]
+    
+    def _load(self, x):
+        for var, xi in zip(self._variables, x):
+            var.set_value(xi, skip_validation=True)
+    
+    def residuals(self, x, p):
+        self._load(x)
+        try:
+            return np.array([value(expr) for expr in self._exprs], dtype=float)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            return np.full(len(self._exprs), np.nan)
+    
+    def jacobian(self, x, p):
+        self._load(x)
+        rows, cols, data = [], [], []
+        for row, (expr, row_vars, row_cols) in enumerate(zip(self._exprs, self._incidence, self._columns)):
+            gradient = differentiate(expr, wrt_list=row_vars, mode=Modes.reverse_numeric)
+            rows += [row] * len(row_cols)
+            cols += row_cols
+            data += gradient
+        n = len(self._variables)
+        return sparse.csc_matrix((data, (rows, cols)), shape=(n, n))
+
+
+def _bounded_step(variables, x, dx):
+    # Per-variable fraction to boundary: a component that would cross a bound
+    # moves only part of the way towards it, the others take the full step
+    x_new = x + dx
+    for k, var in enumerate(variables):
+        if var.lb is not None and x_new[k] < var.lb:
+            x_new[k] = x[k] + FRACTION_TO_BOUNDARY * (var.lb - x[k])
+        elif var.ub is not None and x_new[k] > var.ub:
+            x_new[k] = x[k] + FRACTION_TO_BOUNDARY * (var.ub - x[k])
+    return x_new
+
+
+class NewtonSolver:
+    """Damped Newton solver for a square model, reusable across re-solves.
+
+    The system structure (which variables are fixed) is checked on every
+    solve and rebuilt when it changed; constraint activation changes need a
+    new solver.
+
+    Args:
+        model: Model or block whose active equality constraints and the free
+            variables in them form a square system.
+        evaluator: ``"pynumero"``, ``"casadi"``, ``"pyomo"`` or ``"auto"``
+            (the first of them installed); see the module docstring.
+        tol: Convergence tolerance on the largest row-scaled residual.
+        max_iter: Newton iterations per solve before falling back.
+        fallback: Solve with ``solve_model`` when Newton fails.
+        options: IPOPT options of the fallback solves.
+
+    Raises:
+        ConfigurationError: If the evaluator is unknown or not installed, or
+            the model has active inequality constraints or is not square.
+    """
+    
+    def __init__(
+        self,
+        model,
+        evaluator="auto",
+        tol=DEFAULT_TOL,
+        max_iter=DEFAULT_MAX_ITER,
+        fallback=True,
+        options=None,
+    ):
+        if evaluator not in NEWTON_EVALUATORS:
+            raise ConfigurationError(
+                f"Unknown Newton evaluator '{evaluator}'; expected one of {NEWTON_EVALUATORS}."
+            )
+        if evaluator == "auto":
+            if pynumero_available():
+                evaluator = "pynumero"
+            else:
+                evaluator = "casadi" if casadi_available else "pyomo"
+        if evaluator == "pynumero" and not pynumero_available():
+            raise ConfigurationError(
+                "The 'pynumero' Newton evaluator needs the PyNumero ASL library "
+                "(idaes get-extensions)."
+            )
+        if evaluator == "casadi" and not casadi_available:
+            raise ConfigurationError("The 'casadi' Newton evaluator needs CasADi installed.")
+        self.model = model
+        self.evaluator = evaluator
+        self.tol = tol
+        self.max_iter = max_iter
+        self.fallback = fallback
+        self.options = options
+        self._build()
+    
+    def _build(self):
+        """Collect the equations, unknowns and parameters and the evaluator."""
+        constraints = []
+        variables = {}
+        parameters = {}
+        for con in self.model.component_data_objects(Constraint, active=True, descend_into=True):
+            if not con.equality:
+                raise ConfigurationError(
+                    f"Newton solve needs equality constraints only; {con.name} is an inequality."
+                )
+            constraints.append(con)
+            for var in identify_variables(con.body, include_fixed=True):
+                (parameters if var.fixed else variables).setdefault(id(var), var)
+        if len(constraints) != len(variables):
+            raise ConfigurationError(
+                f"Newton solve needs a square system; {self.model.name} has "
+                f"{len(constraints)} equations and {len(variables)} unknowns."
+            )
+        
+        self.constraints = constraints
+        self.variables = list(variables.values())
+        self.parameters = list(parameters.values())
+        evaluator = {
+            "pynumero": _PyNumeroEvaluator,
+            "casadi": _CasadiEvaluator,
+            "pyomo": _PyomoEvaluator,
+        }[self.evaluator]
+        self._evaluator = evaluator(constraints, self.variables, self.parameters)
+        self._lu = None
+        self._row_scale = None
+    
+    def _structure_changed(self):
+        return any(var.fixed for var in self.variables) or not all(
+            var.fixed for var in self.parameters
+        )
+    
+    def _residuals(self, x, p):
+        r = self._evaluator.residuals(x, p)
+        return r if np.all(np.isfinite(r)) else None
+    
+    def _factorize(self, x, p):
+        """Factorize the Jacobian at ``x``; return False if that fails."""
+        jacobian = self._evaluator.jacobian(x, p)
+        if not np.all(np.isfinite(jacobian.data)):
+            return False
+        # Balance the merit between, e.g., energy (J/s) and mole fraction
+        # equations using the Jacobian rows
+        row_max = abs(jacobian).max(axis=1).toarray().ravel()
+        try:
+            self._lu = splu(jacobian)
+        except RuntimeError:
+            return False
+        self._row_scale = 1 / np.maximum(row_max, 1e-8)
+        return True
+    
+    def _newton(self, x, p):
+        """Run damped Newton from ``x``.
+
+        Returns:
+            tuple: ``(converged, x, iterations, factorizations, residual)``.
+        """
+        iterations = factorizations = 0
+        r = self._residuals(x, p)
+        if r is None:
+            return False, x, 0, 0, float("inf")
+        
+        while True:
+            fresh = self._lu is None
+            if fresh:
+                if not self._factorize(x, p):
+                    break
+                factorizations += 1
+            scaled = self._row_scale * r
+            residual = float(np.max(np.abs(scaled)))
+            if residual < self.tol:
+                return True, x, iterations, factorizations, residual
+            if iterations == self.max_iter:
+                break
+            
+            norm = np.linalg.norm(scaled)
+            dx = self._lu.solve(-r)
+            # Backtrack on fresh factorizations; a reused one must contract
+            # with the full step, otherwise refactorize and retry from x
+            alpha, r_trial = 1.0, None
+            while alpha >= MIN_STEP:
+                x_trial = _bounded_step(self.variables, x, alpha * dx)
+                r_trial = self._residuals(x_trial, p)
+                target = norm if fresh else CHORD_CONTRACTION * norm
+                if r_trial is not None and np.linalg.norm(self._row_scale * r_trial) < target:
+                    break
+                r_trial = None
+                if not fresh:
+                    break
+                alpha /= 2
+            if r_trial is None:
+                self._lu = None
+                if fresh:
+                    break
+                continue
+            x, r = x_trial, r_trial
+            iterations += 1
+        
+        self._lu = None
+        scaled = r if self._row_scale is None else self._row_scale * r
+        return False, x, iterations, factorizations, float(np.max(np.abs(scaled)))
+    
+    def solve(self):
+        """Solve the system from the current variable values.
+
+        Returns:
+            dict: ``method`` (``newton``, or ``newton>ipopt`` after a
+            fallback), ``status`` (``converged``, ``failed`` or the IPOPT
+            termination condition), ``converged``, Newton ``iterations`` and
+            ``factorizations``, the largest row-scaled Newton ``residual``
+            and ``solve_s``.
+        """
+        start = time.perf_counter()
+        if self._structure_changed():
+            self._build()
+        x0 = np.array([var.value for var in self.variables], dtype=float)
+        p = np.array([var.value for var in self.parameters], dtype=float)
+        converged, x, iterations, factorizations, residual = self._newton(x0, p)
+        
+        method, status = "newton", "converged" if converged else "failed"
+        for var, xi in zip(self.variables, x if converged else x0):
+            var.set_value(xi, skip_validation=True)
+        if not converged and self.fallback:
+            results = solve_model(self.model, tee=False, options=self.options)
+            converged = check_optimal_termination(results)
+            method, status = "newton>ipopt", str(results.solver.termination_condition)
+        return {
+            "method": method,
+            "status": status,
+            "converged": converged,
+            "iterations": iterations,
+            "factorizations": factorizations,
+            "residual": residual,
+            "solve_s": time.perf_counter() - start,
+        }
+
+
+def solve_newton(model, evaluator="auto", tol=DEFAULT_TOL, max_iter=DEFAULT_MAX_ITER, options=None):
+    """Solve a square model once by damped Newton, falling back to IPOPT.
+
+    For repeated solves keep a ``NewtonSolver``, which reuses the compiled
+    system and the Jacobian factorization.
+
+    Returns:
+        dict: Solve statistics (see ``NewtonSolver.solve``).
+    """
+    return NewtonSolver(model, evaluator=evaluator, tol=tol, max_iter=max_iter, options=options).solve()
@@ -0,0 +1,304 @@
+# To-Do:
+# - Add a jacketed CSTR variant so the outlet temperature limit can be met by cooling
+
+
+"""Steady-state economic optimization (RTO) of the ASA CSTR.
+
+``add_rto_block`` turns a solved flowsheet into an NLP: selected operating
+variables (feed temperature, anhydride-to-salicylic-acid feed ratio, reactor
+volume, feed flow) are unfixed within bounds, product specifications become
+inequality constraints, and an economic or production objective is added on
+``model.fs.rto``. One IPOPT solve then returns the optimum.
+
+``multistart_rto`` repeats the solve from Latin hypercube starting points in
+a process pool and keeps the best local optimum.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pyomo.environ import (
+    Block,
+    Constraint,
+    Objective,
+    Param,
+    Var,
+    maximize,
+    value,
+)
+from pyomo.opt import check_optimal_termination
+from idaes.core.util.exceptions import ConfigurationError, InitializationError
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    set_operating_conditions,
+    solve_model,
+)
+from asa_cm_control.asa_surrogate import latin_hypercube
+
+
+# Decision variable -> (lower, upper) bounds
+DEFAULT_DECISION_BOUNDS = {
+    "temperature": (310.0, 345.0),
+    "feed_ratio": (1.5, 5.0),
+    "volume": (0.005, 1.0),
+    "flow_mol": (0.1, 1.0),
+}
+
+# Feed components held at fixed mole fractions while the ratio varies
+FIXED_FEED_FRACTIONS = {
+    "sulfuric_acid": 0.01,
+    "water": 0.02,
+    "aspirin": 1e-8,
+    "acetic_acid": 1e-8,
+}
+
+# Prices in $/mol, $/J and $/(m^3 s); the objective is reported in $/h
+DEFAULT_PRICES = {
+    "aspirin": 1.0,
+    "salicylic_acid": 0.25,
+    "acetic_anhydride": 0.10,
+    "feed_heating": 1e-6,
+    "reactor_volume": 1.6e-3,
+}
+
+# Outlet specifications: mole fraction ceilings and a temperature limit
+DEFAULT_SPECS = {
+    "x_salicylic_acid_max": 0.01,
+    "x_acetic_acid_max": 0.30,
+    "temperature_max": 370.0,
+}
+
+OBJECTIVES = ("profit", "production", "yield")
+
+AMBIENT_TEMPERATURE = 298.15
+
+
+def feed_composition(feed_ratio, x_water=None):
+    """Return the feed mole fractions for an anhydride/salicylic acid ratio.
+
+    Args:
+        feed_ratio: Anhydride to salicylic acid molar ratio.
+        x_water: Optional feed water fraction replacing the default in
+            ``FIXED_FEED_FRACTIONS``.
+
+    Returns:
+        dict: Component mole fractions summing to one.
+    """
+    fixed = dict(FIXED_FEED_FRACTIONS)
+    if x_water is not None:
+        fixed["water"] = x_water
+    reactive = 1.0 - sum(fixed.values())
+    x_sa = reactive / (1.0 + feed_ratio)
+    return {
+        "salicylic_acid": x_sa,
+        "acetic_anhydride": feed_ratio * x_sa,
+        **fixed,
+    }
+
+
+def _start_conditions(start):
+    conditions = {key: start[key] for key in ("temperature", "volume", "flow_mol") if key in start}
+    if "feed_ratio" in start:
+        conditions["mole_frac_comp"] = feed_composition(start["feed_ratio"])
+    return conditions
+
+
+def add_rto_block(
+    model,
+    decisions=tuple(DEFAULT_DECISION_BOUNDS),
+    bounds=None,
+    objective="profit",
+    prices=None,
+    specs=None,
+    flowsheet=None,
+):
+    """Add decision freedom, specifications and an objective on ``model.fs.rto``.
+
+    The feed ratio is modelled by freeing the salicylic acid and anhydride
+    inlet mole fractions, tied by ``x_AA = feed_ratio * x_SA`` and the inlet
+    closure ``sum(x) = 1``; the remaining fractions stay fixed.
+
+    Args:
+        model: Solved steady-state model from ``build_flowsheet``.
+        decisions: Names from ``DEFAULT_DECISION_BOUNDS`` to free.
+        bounds: Optional overrides of ``DEFAULT_DECISION_BOUNDS``.
+        objective: ``"profit"`` ($/h), ``"production"`` (aspirin mol/s) or
+            ``"yield"`` (aspirin per salicylic acid fed).
+        prices: Optional overrides of ``DEFAULT_PRICES`` (mutable Params).
+        specs: Optional overrides of ``DEFAULT_SPECS`` (mutable Params).
+        flowsheet: Flowsheet holding ``cstr``; defaults to ``model.fs``. The
+            block is added as ``flowsheet.rto``.
+
+    Returns:
+        Block: The ``rto`` block.
+    """
+    unknown = set(decisions) - set(DEFAULT_DECISION_BOUNDS)
+    if unknown:
+        raise ConfigurationError(f"Unknown RTO decisions {sorted(unknown)}.")
+    if objective not in OBJECTIVES:
+        raise ConfigurationError(
+            f"Unknown RTO objective '{objective}'; expected one of {OBJECTIVES}."
+        )
+    bounds = {**DEFAULT_DECISION_BOUNDS, **(bounds or {})}
+    prices = {**DEFAULT_PRICES, **(prices or {})}
+    specs = {**DEFAULT_SPECS, **(specs or {})}
+    
+    fs = model.fs if flowsheet is None else flowsheet
+    t = fs.time.first()
+    cstr = fs.cstr
+    components = cstr.config.property_package.component_list
+    inlet = cstr.inlet
+    outlet = cstr.outlet
+    feed_state = cstr.control_volume.properties_in[t]
+    
+    fs.rto = Block()
+    rto = fs.rto
+    rto.price = Param(list(prices), initialize=prices, mutable=True)
+    rto.spec = Param(list(specs), initialize=specs, mutable=True)
+    
+    x_sa = inlet.mole_frac_comp[t, "salicylic_acid"]
+    x_aa = inlet.mole_frac_comp[t, "acetic_anhydride"]
+    rto.feed_ratio = Var(initialize=value(x_aa / x_sa), bounds=bounds["feed_ratio"])
+    if "feed_ratio" in decisions:
+        x_sa.unfix()
+        x_aa.unfix()
+        rto.feed_ratio_eqn = Constraint(expr=x_aa == rto.feed_ratio * x_sa)
+        rto.feed_closure = Constraint(
+            expr=sum(inlet.mole_frac_comp[t, j] for j in components) == 1
+        )
+    else:
+        rto.feed_ratio.fix()
+    
+    for name, var in (
+        ("temperature", inlet.temperature[t]),
+        ("flow_mol", inlet.flow_mol[t]),
+        ("volume", cstr.volume[t]),
+    ):
+        if name in decisions:
+            var.unfix()
+            var.setlb(bounds[name][0])
+            var.setub(bounds[name][1])
+    
+    rto.salicylic_acid_spec = Constraint(
+        expr=outlet.mole_frac_comp[t, "salicylic_acid"] <= rto.spec["x_salicylic_acid_max"]
+    )
+    rto.acetic_acid_spec = Constraint(
+        expr=outlet.mole_frac_comp[t, "acetic_acid"] <= rto.spec["x_acetic_acid_max"]
+    )
+    rto.temperature_spec = Constraint(expr=outlet.temperature[t] <= rto.spec["temperature_max"])
+    
+    aspirin_out = outlet.flow_mol[t] * outlet.mole_frac_comp[t, "aspirin"]
+    sa_in = inlet.flow_mol[t] * x_sa
+    if objective == "profit":
+        revenue = rto.price["aspirin"] * aspirin_out
+        feed_cost = (
+            rto.price["salicylic_acid"] * sa_in
+            + rto.price["acetic_anhydride"] * inlet.flow_mol[t] * x_aa
+        )
+        heating = (
+            rto.price["feed_heating"] * inlet.flow_mol[t] * feed_state.cp_mol
+            * (inlet.temperature[t] - AMBIENT_TEMPERATURE)
+        )
+        capital = rto.price["reactor_volume"] * cstr.volume[t]
+        rto.objective = Objective(
+            expr=3600 * (revenue - feed_cost - heating - capital), sense=maximize
+        )
+    elif objective == "production":
+        rto.objective = Objective(expr=aspirin_out, sense=maximize)
+    else:
+        rto.objective = Objective(expr=aspirin_out / sa_in, sense=maximize)
+    return rto
+
+
+def rto_solution(model, flowsheet=None):
+    """Return the decision values, outlet state and objective of a solved RTO."""
+    fs = model.fs if flowsheet is None else flowsheet
+    t = fs.time.first()
+    cstr = fs.cstr
+    return {
+        "objective": value(fs.rto.objective),
+        "temperature": value(cstr.inlet.temperature[t]),
+        "feed_ratio": value(fs.rto.feed_ratio),
+        "volume": value(cstr.volume[t]),
+        "flow_mol": value(cstr.inlet.flow_mol[t]),
+        "outlet_temperature": value(cstr.outlet.temperature[t]),
+        **{
+            f"outlet_x_{j}": value(cstr.outlet.mole_frac_comp[t, j])
+            for j in cstr.config.property_package.component_list
+        },
+    }
+
+
+def optimize_operating_point(start=None, tee=False, **options):
+    """Build, initialize at ``start`` and solve the RTO problem once.
+
+    Args:
+        start: Optional mapping of decision name to starting value.
+        tee: Stream IPOPT output.
+        **options: Passed to ``add_rto_block``.
+
+    Returns:
+        dict: ``rto_solution`` plus ``start`` and ``status``; decision values
+        are None when the start point cannot be initialized.
+    """
+    start = dict(start or {})
+    model = build_flowsheet()
+    set_operating_conditions(model, **_start_conditions(start))
+    try:
+        model.fs.cstr.initialize()
+    except InitializationError:
+        # Initialize at nominal conditions and move to the start point with a
+        # square solve; its values seed the RTO solve even if it fails
+        set_operating_conditions(model)
+        try:
+            model.fs.cstr.initialize()
+        except InitializationError:
+            return {"start": start, "status": "initialization_failed", "objective": None}
+        set_operating_conditions(model, **_start_conditions(start))
+        solve_model(model, tee=False)
+    
+    add_rto_block(model, **options)
+    results = solve_model(model, tee=tee)
+    solution = rto_solution(model) if check_optimal_termination(results) else {"objective": None}
+    return {
+        **solution,
+        "start": start,
+        "status": str(results.solver.termination_condition),
+    }
+
+
+def _optimize_start(args):
+    start, options = args
+    return optimize_operating_point(start, **options)
+
+
+def multistart_rto(n_starts=8, n_workers=None, seed=0, bounds=None, **options):
+    """Solve the RTO problem from Latin hypercube starts and keep the best.
+
+    Args:
+        n_starts: Number of starting points.
+        n_workers: Worker processes; ``1`` runs in-process.
+        seed: Seed of the starting-point design.
+        bounds: Optional overrides of ``DEFAULT_DECISION_BOUNDS``; also the
+            box the starts are drawn from.
+        **options: Passed to ``add_rto_block`` (e.g. ``objective``).
+
+    Returns:
+        tuple: ``(best, runs)`` with the best successful run (None if all
+        failed) and every run in start order.
+    """
+    bounds = {**DEFAULT_DECISION_BOUNDS, **(bounds or {})}
+    decisions = options.get("decisions", tuple(DEFAULT_DECISION_BOUNDS))
+    names, X = latin_hypercube(n_starts, {k: bounds[k] for k in decisions}, seed=seed)
+    tasks = [(dict(zip(names, map(float, x))), {**options, "bounds": bounds}) for x in X]
+    
+    if n_workers == 1:
+        runs = [_optimize_start(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers or os.cpu_count() or 1) as pool:
+            runs = list(pool.map(_optimize_start, tasks))
+    
+    successful = [run for run in runs if run["objective"] is not None]
+    best = max(successful, key=lambda run: run["objective"]) if successful else None
+    return best, runs
@@ -1,5 +1,4 @@
 # To-Do:
-# - Add crystallizer unit model and test with same property package
 # - 
 
 
@@ -18,18 +17,221 @@ The module is intentionally importable and does not provide a direct
 ``if __name__ == "__main__"`` execution block.
 """
 
-from pyomo.environ import ConcreteModel, SolverFactory
+import json
+from pathlib import Path
+
+from pyomo.environ import (
+    ConcreteModel,
+    Constraint,
+    SolverFactory,
+    TransformationFactory,
+    Var,
+    units as pyunits,
+)
+from pyomo.common.collections import ComponentSet
+from pyomo.dae.flatten import flatten_dae_components
+from pyomo.util.calc_var_value import calculate_variable_from_constraint
+from pyomo.util.subsystems import TemporarySubsystemManager, create_subsystem_block
 from idaes.core import FlowsheetBlock
-from asa_cm_control.props.asa_thermo_property_package import ThermoParameterBlock
+from asa_cm_control.props.asa_thermo_property_package import (
+    VLE_SCREEN_MARGIN,
+    ThermoParameterBlock,
+)
 from asa_cm_control.props.asa_reaction_property_package import ASAReactionParameterBlock
-from idaes.models.unit_models import CSTR
-from idaes.core.util.model_statistics import degrees_of_freedom
+from asa_cm_control.props.asa_parameters import parameter_names
+from idaes.models.unit_models import CSTR, PFR
+from idaes.core.util.exceptions import ConfigurationError
+from asa_cm_control.asa_model_checks import check_model
+from asa_cm_control.asa_decomposition import (
+    initialize_by_decomposition,
+    report_decomposition,
+    seed_outlet_from_inlet,
+    solve_counting_iterations,
+)
 import idaes.logger as idaeslog
 
-def build_flowsheet():
+_log = idaeslog.getLogger(__name__)
+
+
+# Nominal feed composition before trace padding (zero entries become epsilon)
+DEFAULT_FEED_MOLE_FRAC = {
+    "salicylic_acid": 0.19,
+    "acetic_anhydride": 0.78,
+    "sulfuric_acid": 0.01,
+    "aspirin": 0.0,
+    "acetic_acid": 0.0,
+    "water": 0.02,
+}
+
+
+def feed_mole_fractions(mole_frac_comp=None, epsilon=1e-8, components=None):
+    """Return a feed composition with zero entries padded to a trace amount.
+
+    Args:
+        mole_frac_comp: Optional mapping of component to nominal mole fraction.
+            Defaults to ``DEFAULT_FEED_MOLE_FRAC``. Values are normalized.
+        epsilon: Mole fraction assigned to absent components so logarithms and
+            fractional powers in the property packages stay well defined.
+        components: Optional full component list; components missing from
+            ``mole_frac_comp`` are treated as absent.
+
+    Returns:
+        dict: Component mole fractions summing to one.
+    """
+    if mole_frac_comp is None:
+        mole_frac_comp = DEFAULT_FEED_MOLE_FRAC
+    if components is not None:
+        mole_frac_comp = {j: mole_frac_comp.get(j, 0.0) for j in components}
+    
+    total = sum(mole_frac_comp.values())
+    n_trace = sum(1 for x in mole_frac_comp.values() if x <= 0)
+    major = 1 - n_trace * epsilon
+    return {
+        component: (x / total * major if x > 0 else epsilon)
+        for component, x in mole_frac_comp.items()
+    }
+
+
+INITIALIZATION_METHODS = ("sequential", "decomposition")
+
+
+# Default PFR tube length in m; the cross-sectional area follows from the volume
+PFR_LENGTH = 10.0
+
+# Default PFR volume in m^3. At the 1 m^3 CSTR default the reactions finish
+# within the first few percent of the tube, a front the uniform collocation
+# grid cannot resolve, so the profile oscillates and the solve is infeasible
+PFR_VOLUME = 0.002
+
+# Directory of the named IPOPT option profiles loaded by ``solve_model``
+SOLVER_PROFILE_DIR = Path(__file__).resolve().parent / "solver_profiles"
+
+
+def fix_inlet(port, t, flow_mol, temperature, pressure, mole_frac_comp):
+    """Fix the state of an inlet port at time ``t``.
+
+    Args:
+        port: Inlet port with ``flow_mol``, ``temperature``, ``pressure``
+            and ``mole_frac_comp``.
+        t: Time point.
+        flow_mol: Total molar flow in mol/s.
+        temperature: Temperature in K.
+        pressure: Pressure in Pa.
+        mole_frac_comp: Mole fraction by component name.
+    """
+    port.flow_mol[t].fix(flow_mol)
+    port.temperature[t].fix(temperature)
+    port.pressure[t].fix(pressure)
+    for component, x in mole_frac_comp.items():
+        port.mole_frac_comp[t, component].fix(x)
+
+
+def build_flowsheet(
+    reactor="cstr",
+    finite_elements=20,
+    collocation_points=3,
+    hplus_activity="approximate",
+    vle=False,
+    lean_parameters=False,
+    estimable_parameters=(),
+    components=None,
+    nrtl=None,
+):
+    """Build the ASA reactor flowsheet.
+
+    Args:
+        reactor: ``"cstr"`` or ``"pfr"``.
+        finite_elements: Axial finite elements of the PFR.
+        collocation_points: Collocation points per PFR element.
+        hplus_activity: H+ activity model of the reaction package.
+        vle: Add vapor-liquid equilibrium to the state blocks.
+        lean_parameters: Declare package constants as mutable Params instead
+            of fixed Vars, except for ``estimable_parameters``.
+        estimable_parameters: Parameter names (on either package) kept as
+            fixed Vars in lean mode, e.g. ``("Acat", "tau_nrtl")``.
+        components: Component table of the thermo package (see
+            ``ASA_COMPONENTS``); defaults to the six ASA components.
+        nrtl: NRTL pair table of the thermo package (see ``ASA_NRTL``).
+
+    Returns:
+        ConcreteModel: Flowsheet model with ``fs.cstr`` or ``fs.pfr``.
+    """
     model = ConcreteModel()
     model.fs = FlowsheetBlock(dynamic=False)
     
+    estimable_parameters = frozenset(
+        [estimable_parameters] if isinstance(estimable_parameters, str) else estimable_parameters
+    )
+    parameter_options = {
+        "parameter_representation": "lean" if lean_parameters else "var",
+        "estimable_parameters": estimable_parameters,
+    }
+    model.fs.thermo_params = ThermoParameterBlock(
+        vle=vle, components=components, nrtl=nrtl, **parameter_options
+    )
+    model.fs.reaction_params = ASAReactionParameterBlock(
+        property_package=model.fs.thermo_params,
+        hplus_activity=hplus_activity,
+        **parameter_options,
+    )
+    unknown = estimable_parameters - parameter_names(model.fs.thermo_params) - parameter_names(
+        model.fs.reaction_params
+    )
+    if unknown:
+        raise ConfigurationError(
+            f"Unknown estimable parameters {sorted(unknown)}; they are not declared "
+            "by the thermo or reaction package."
+        )
+    
+    if reactor == "cstr":
+        model.fs.cstr = CSTR(
+            property_package=model.fs.thermo_params,
+            reaction_package=model.fs.reaction_params,
+        )
+    elif reactor == "pfr":
+        # Radau collocation over the normalized tube length; finite_elements
+        # and collocation_points set the axial grid
+        model.fs.pfr = PFR(
+            property_package=model.fs.thermo_params,
+            reaction_package=model.fs.reaction_params,
+            transformation_method="dae.collocation",
+            transformation_scheme="LAGRANGE-RADAU",
+            finite_elements=finite_elements,
+            collocation_points=collocation_points,
+        )
+    else:
+        raise ValueError(f"Unknown reactor type '{reactor}'; expected 'cstr' or 'pfr'.")
+    
+    return model
+
+
+def get_reactor(model):
+    """Return the reactor unit (``fs.cstr`` or ``fs.pfr``) of a flowsheet."""
+    if hasattr(model.fs, "pfr"):
+        return model.fs.pfr
+    return model.fs.cstr
+
+
+def build_dynamic_flowsheet(horizon=3600.0, nfe=12):
+    """Build a dynamic form of the ASA CSTR flowsheet.
+
+    The time domain is discretized with backward finite differences so every
+    finite element boundary is a sample point of length ``horizon / nfe``.
+
+    Args:
+        horizon: Length of the time domain in seconds.
+        nfe: Number of finite elements in time.
+
+    Returns:
+        ConcreteModel: Discretized model with ``model.fs.cstr``.
+    """
+    model = ConcreteModel()
+    model.fs = FlowsheetBlock(
+        dynamic=True,
+        time_set=[0, horizon],
+        time_units=pyunits.s,
+    )
+    
     model.fs.thermo_params = ThermoParameterBlock()
     model.fs.reaction_params = ASAReactionParameterBlock(
         property_package=model.fs.thermo_params,
@@ -40,38 +242,430 @@ def build_flowsheet():
         reaction_package=model.fs.reaction_params,
     )
     
+    TransformationFactory("dae.finite_difference").apply_to(
+        model.fs,
+        nfe=nfe,
+        wrt=model.fs.time,
+        scheme="BACKWARD",
+    )
+    
     return model
 
 
-def set_operating_conditions(model):
-    model.fs.cstr.inlet.flow_mol.fix(0.5)
-    model.fs.cstr.inlet.temperature.fix(325.0)
-    model.fs.cstr.inlet.pressure.fix(101325)
+def set_operating_conditions(
+    model,
+    flow_mol=0.5,
+    temperature=325.0,
+    pressure=101325,
+    mole_frac_comp=None,
+    volume=None,
+    length=PFR_LENGTH,
+):
+    reactor = get_reactor(model)
+    is_pfr = reactor is getattr(model.fs, "pfr", None)
+    if volume is None:
+        volume = PFR_VOLUME if is_pfr else 1
+    for t in model.fs.time:
+        fix_inlet(
+            reactor.inlet,
+            t,
+            flow_mol,
+            temperature,
+            pressure,
+            feed_mole_fractions(mole_frac_comp, components=reactor.config.property_package.component_list),
+        )
     
-    epsilon = 1e-8
-    major = 1 - 2 * epsilon
-    model.fs.cstr.inlet.mole_frac_comp[0, "salicylic_acid"].fix(0.19 * major)
-    model.fs.cstr.inlet.mole_frac_comp[0, "acetic_anhydride"].fix(0.78 * major)
-    model.fs.cstr.inlet.mole_frac_comp[0, "sulfuric_acid"].fix(0.01 * major)
-    model.fs.cstr.inlet.mole_frac_comp[0, "aspirin"].fix(epsilon)
-    model.fs.cstr.inlet.mole_frac_comp[0, "acetic_acid"].fix(epsilon)
-    model.fs.cstr.inlet.mole_frac_comp[0, "water"].fix(0.02 * major)
+    reactor.volume.fix(volume)
+    if is_pfr:
+        reactor.length.fix(length)
+
+
+def set_dynamic_operating_conditions(model, **kwargs):
+    """Fix inputs of a dynamic flowsheet at every time point.
+
+    Besides the inlet and volume, the holdup of the unused vapor and solid
+    phases is pinned to zero so only the liquid initial state remains free.
+
+    Args:
+        model: Model returned by ``build_dynamic_flowsheet``.
+        **kwargs: Operating conditions passed to ``set_operating_conditions``.
+    """
+    set_operating_conditions(model, **kwargs)
     
-    model.fs.cstr.volume.fix(1)
+    control_volume = model.fs.cstr.control_volume
+    t0 = model.fs.time.first()
+    for t in model.fs.time:
+        for phase in ("vapor", "solid"):
+            control_volume.phase_fraction[t, phase].fix(0)
+    for phase in ("vapor", "solid"):
+        control_volume.energy_accumulation[t0, phase].fix(0)
+        for component in model.fs.thermo_params.component_list:
+            control_volume.material_accumulation[t0, phase, component].fix(0)
 
 
-def initialize_model(model):
-    print("Degrees of Freedom =", degrees_of_freedom(model.fs))
-    model.fs.cstr.initialize(outlvl=idaeslog.INFO)
+def fix_initial_steady_state(model):
+    """Start a dynamic flowsheet from steady state (zero liquid accumulation)."""
+    control_volume = model.fs.cstr.control_volume
+    t0 = model.fs.time.first()
+    control_volume.energy_accumulation[t0, "liquid"].fix(0)
+    for component in model.fs.thermo_params.component_list:
+        control_volume.material_accumulation[t0, "liquid", component].fix(0)
 
 
-def solve_model(model, tee=True):
+def initialize_model(model, method="sequential"):
+    """Initialize the steady-state flowsheet.
+
+    Args:
+        model: Model with operating conditions set.
+        method: ``"sequential"`` uses the unit model initialization routine;
+            ``"decomposition"`` solves the CSTR flowsheet block by block in
+            block-triangular order (see ``asa_decomposition``) and prints the
+            per-block statistics.
+
+    Returns:
+        list: Per-block statistics for ``"decomposition"``, otherwise None.
+    """
+    if method not in INITIALIZATION_METHODS:
+        raise ConfigurationError(
+            f"Unknown initialization method '{method}'; expected one of {INITIALIZATION_METHODS}."
+        )
+    report = check_model(model)
+    print("Degrees of Freedom =", report["dof"])
+    if method == "decomposition":
+        if hasattr(model.fs, "pfr"):
+            raise ConfigurationError("Decomposition initialization supports the CSTR flowsheet only.")
+        seed_outlet_from_inlet(model.fs.cstr.control_volume)
+        stats = initialize_by_decomposition(model.fs, outlvl=idaeslog.INFO)
+        report_decomposition(stats)
+        return stats
+    if hasattr(model.fs, "pfr"):
+        initialize_pfr(model, outlvl=idaeslog.INFO)
+    else:
+        model.fs.cstr.initialize(outlvl=idaeslog.INFO)
+
+
+def initialize_pfr(model, outlvl=idaeslog.NOTSET):
+    """Initialize the PFR by marching element by element from the inlet.
+
+    Every axial point starts from the inlet state. The equations at the inlet
+    point are solved first, then each finite element is solved as a subsystem
+    of its own points with the upstream element end held fixed, and the
+    converged element end state seeds the next element. Each solve only sees
+    one element, so the march is linear in the number of elements.
+
+    Args:
+        model: Model from ``build_flowsheet(reactor="pfr")`` with inputs fixed.
+        outlvl: IDAES logging level.
+    """
+    init_log = idaeslog.getInitLogger(model.fs.pfr.name, outlvl, tag="unit")
+    pfr = model.fs.pfr
+    control_volume = pfr.control_volume
+    x_domain = control_volume.length_domain
     solver = SolverFactory("ipopt")
+    
+    if not control_volume.area.fixed:
+        calculate_variable_from_constraint(control_volume.area, pfr.geometry)
+    
+    _, var_slices = flatten_dae_components(pfr, x_domain, Var)
+    _, con_slices = flatten_dae_components(pfr, x_domain, Constraint)
+    
+    x_points = list(x_domain)
+    x_inlet = x_points[0]
+    t = model.fs.time.first()
+    
+    # Point-wise sets. References (e.g. pressure) can expose one variable
+    # through several slices, and scalar constraints of the conditionally
+    # built property blocks (sum_mole_frac) are not sliced at all
+    vars_at = {}
+    cons_at = {}
+    for x in x_points:
+        free = ComponentSet(
+            var[x] for var in var_slices if x in var and not var[x].fixed
+        )
+        active = ComponentSet(
+            con[x] for con in con_slices if x in con and con[x].active
+        )
+        for block in (control_volume.properties[t, x], control_volume.reactions[t, x]):
+            active.update(block.component_data_objects(Constraint, active=True))
+        vars_at[x] = list(free)
+        cons_at[x] = list(active)
+    free_at = {x: ComponentSet(vars_at[x]) for x in x_points}
+    
+    # Seed every axial point with the inlet values
+    for var in var_slices:
+        if var[x_inlet].value is None:
+            continue
+        for x in x_points[1:]:
+            if not var[x].fixed:
+                var[x].set_value(var[x_inlet].value, skip_validation=True)
+    
+    element_bounds = x_domain.get_finite_elements()
+    steps = [[x_inlet]] + [
+        [x for x in x_points if lo < x <= hi]
+        for lo, hi in zip(element_bounds[:-1], element_bounds[1:])
+    ]
+    for k, step in enumerate(steps):
+        constraints = [con for x in step for con in cons_at[x]]
+        if constraints:
+            block = create_subsystem_block(constraints, [var for x in step for var in vars_at[x]])
+            # Upstream states and the area enter as fixed inputs
+            with TemporarySubsystemManager(to_fix=list(block.input_vars.values())):
+                results = solver.solve(block, tee=False)
+            init_log.info_high(
+                f"Element {k}: {results.solver.termination_condition}"
+            )
+        
+        # March: the end of this step seeds the following element
+        if k + 1 < len(steps):
+            x_end = step[-1]
+            for var in var_slices:
+                for x in steps[k + 1]:
+                    if var[x] in free_at[x]:
+                        var[x].set_value(var[x_end].value, skip_validation=True)
+    
+    init_log.info("Initialization Complete.")
+
+
+def copy_flowsheet_state(source, target, include_fixed=False):
+    """Copy variable values between steady-state and dynamic flowsheets.
+
+    Time-indexed values are read at the first time point of ``source`` and
+    broadcast to every time point of ``target``; time-invariant variables
+    (parameter blocks, scalar unit variables) are copied directly. Variables
+    are matched by name, so both models must come from the builders in this
+    module.
+
+    Args:
+        source: Flowsheet model providing the values.
+        target: Flowsheet model receiving the values.
+        include_fixed: If True, also overwrite values of fixed variables in
+            ``target`` (inputs and parameters) without changing fixed flags.
+    """
+    source_scalars, source_slices = flatten_dae_components(
+        source.fs, source.fs.time, Var
+    )
+    target_scalars, target_slices = flatten_dae_components(
+        target.fs, target.fs.time, Var
+    )
+    t_source = source.fs.time.first()
+    
+    scalar_values = {var.name: var.value for var in source_scalars}
+    for var in target_scalars:
+        if var.name in scalar_values and (include_fixed or not var.fixed):
+            var.set_value(scalar_values[var.name], skip_validation=True)
+    
+    slice_values = {str(var.referent): var[t_source].value for var in source_slices}
+    for var in target_slices:
+        source_value = slice_values.get(str(var.referent))
+        if source_value is None:
+            continue
+        for t in target.fs.time:
+            if include_fixed or not var[t].fixed:
+                var[t].set_value(source_value, skip_validation=True)
+
+
+def set_steady_holdups(model):
+    """Make holdups of a dynamic flowsheet consistent with a steady state.
+
+    Phase fractions and material/energy holdups are computed from the current
+    state at every time point, and all unfixed accumulation terms are zeroed.
+    Use after broadcasting a steady-state solution with ``copy_flowsheet_state``.
+
+    Args:
+        model: Model returned by ``build_dynamic_flowsheet``.
+    """
+    control_volume = model.fs.cstr.control_volume
+    for t in model.fs.time:
+        calculate_variable_from_constraint(
+            control_volume.phase_fraction[t, "liquid"],
+            control_volume.sum_of_phase_fractions[t],
+        )
+    for index, con in control_volume.material_holdup_calculation.items():
+        calculate_variable_from_constraint(control_volume.material_holdup[index], con)
+    for index, con in control_volume.energy_holdup_calculation.items():
+        calculate_variable_from_constraint(control_volume.energy_holdup[index], con)
+    for accumulation in (
+        control_volume.material_accumulation,
+        control_volume.energy_accumulation,
+    ):
+        for var in accumulation.values():
+            if not var.fixed:
+                var.set_value(0)
+
+
+def initialize_dynamic_flowsheet(model):
+    """Initialize a dynamic flowsheet from the steady state at its t0 inputs.
+
+    A steady-state copy of the CSTR is built with the inputs and parameter
+    values found at the first time point, initialized and solved, and its
+    solution is broadcast to every time point of ``model``. Fixed variables
+    are left untouched.
+
+    Args:
+        model: Model returned by ``build_dynamic_flowsheet`` with inputs fixed.
+
+    Returns:
+        ConcreteModel: The solved steady-state model used as the initial guess.
+    """
+    steady = build_flowsheet()
+    set_operating_conditions(steady)
+    copy_flowsheet_state(model, steady, include_fixed=True)
+    steady.fs.cstr.initialize()
+    solve_model(steady, tee=False)
+    
+    copy_flowsheet_state(steady, model)
+    set_steady_holdups(model)
+    
+    return steady
+
+
+def solver_profile_path(name, directory=None):
+    """Return the JSON file of solver profile ``name``."""
+    return Path(directory or SOLVER_PROFILE_DIR) / f"{name}.json"
+
+
+def save_solver_profile(name, options, directory=None, **metadata):
+    """Write a named IPOPT option profile for ``solve_model(profile=name)``.
+
+    Args:
+        name: Profile name.
+        options: Mapping of IPOPT option to value.
+        directory: Profile directory. Defaults to ``SOLVER_PROFILE_DIR``.
+        **metadata: Extra JSON-serializable fields stored with the options,
+            e.g. the tuning statistics.
+
+    Returns:
+        Path: The written file.
+    """
+    path = solver_profile_path(name, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"options": dict(options), **metadata}, indent=2) + "\n")
+    return path
+
+
+def load_solver_profile(name, directory=None):
+    """Return the IPOPT options of a saved solver profile.
+
+    Raises:
+        ConfigurationError: If no profile ``name`` exists.
+    """
+    path = solver_profile_path(name, directory)
+    if not path.is_file():
+        raise ConfigurationError(f"Solver profile '{name}' not found at {path}.")
+    return json.loads(path.read_text())["options"]
+
+
+def solve_model(model, tee=True, profile=None, options=None, check=False, count_iterations=False):
+    """Solve the model with IPOPT.
+
+    Args:
+        model: Model to solve.
+        tee: Stream IPOPT output.
+        profile: Name of a saved solver profile (see ``save_solver_profile``
+            and ``asa_solver_tuning``) whose options are applied.
+        options: IPOPT options applied on top of the profile.
+        check: Run ``check_model`` first (cached per model structure); off by
+            default so callers that solve partly specified or deliberately
+            perturbed models are unaffected.
+        count_iterations: Read the IPOPT iteration count from the solver log
+            into ``results.solver.iterations``.
+
+    Returns:
+        SolverResults: IPOPT results.
+
+    Raises:
+        StructuralValidationError: If ``check`` finds the model mis-specified.
+    """
+    if check:
+        check_model(model)
+    solver = SolverFactory("ipopt")
+    if profile is not None:
+        solver.options.update(load_solver_profile(profile))
+    if options:
+        solver.options.update(options)
+    if count_iterations:
+        return solve_counting_iterations(model, solver, tee=tee)
     return solver.solve(model, tee=tee)
 
 
+def _reactor_state_blocks(model):
+    control_volume = get_reactor(model).control_volume
+    if hasattr(control_volume, "properties"):
+        return [control_volume.properties]
+    return [control_volume.properties_in, control_volume.properties_out]
+
+
+def screen_phases(model, margin=VLE_SCREEN_MARGIN):
+    """Activate the flash equations only in reactor states that may boil.
+
+    Args:
+        model: Flowsheet from ``build_flowsheet(vle=True)``.
+        margin: Relative bubble-pressure margin, see ``bubble_point_screen``.
+
+    Returns:
+        dict: State block name -> True where the flash equations are active.
+    """
+    active = {}
+    for state_block in _reactor_state_blocks(model):
+        for index, flag in state_block.screen_vle(margin).items():
+            active[state_block[index].name] = flag
+    return active
+
+
+def _apply_phase_flags(model, active):
+    for state_block in _reactor_state_blocks(model):
+        for state in state_block.values():
+            if active[state.name]:
+                state.activate_vle()
+            else:
+                state.deactivate_vle()
+
+
+def solve_with_phase_screen(model, margin=VLE_SCREEN_MARGIN, max_passes=3, tee=False):
+    """Solve a VLE flowsheet with the flash equations screened by bubble point.
+
+    States are screened at their current values, the model is solved, and the
+    screen is repeated on the solution. Flash equations of screened-out states
+    that turn out to be able to boil are activated and the model is solved
+    again. Flash blocks are never deactivated after a solve (an active flash
+    block at a subcooled state already solves with no vapor), so the passes
+    only add equations. The model is left with the flags of its last solve,
+    so results, flags and variable values agree; if ``max_passes`` runs out
+    while states still need their flash equations, a warning is logged.
+
+    Args:
+        model: Initialized flowsheet from ``build_flowsheet(vle=True)``.
+        margin: Relative bubble-pressure margin, see ``bubble_point_screen``.
+        max_passes: Maximum number of screen-and-solve passes.
+        tee: Stream IPOPT output.
+
+    Returns:
+        tuple: ``(results, active)`` with the last solver results and the
+        ``screen_phases`` flags it was solved with.
+    """
+    active = screen_phases(model, margin)
+    for n_pass in range(1, max_passes + 1):
+        results = solve_model(model, tee=tee)
+        rescreened = screen_phases(model, margin)
+        if rescreened != active:
+            # The re-screen applied its own flags; go back to those solved with
+            _apply_phase_flags(model, active)
+        boiling = [name for name, flag in rescreened.items() if flag and not active[name]]
+        if not boiling:
+            return results, active
+        if n_pass < max_passes:
+            active = {name: flag or rescreened[name] for name, flag in active.items()}
+            _apply_phase_flags(model, active)
+    
+    _log.warning(
+        f"Phase screen of {model.name} did not settle in {max_passes} passes; "
+        f"{len(boiling)} screened-out states may boil."
+    )
+    return results, active
+
+
 def report_results(model):
-    model.fs.cstr.report()
+    get_reactor(model).report()
 
 
 def main():
@@ -0,0 +1,418 @@
+# To-Do:
+# - Add scenario generation from measured feed-quality histories
+
+
+"""Multi-scenario stacked flowsheet for robust design under feed quality.
+
+Feed water content drives acetic anhydride hydrolysis (``r2``), so a design
+that is optimal for one feed can miss specifications on another. This module
+stacks S scenario sub-flowsheets ``model.fs.scenario[s]`` in one model; they
+share the thermophysical and reaction parameter blocks and differ only in the
+feed water fraction.
+
+- First-stage (design) variables ``fs.design_volume`` and
+  ``fs.design_temperature`` are shared by all scenarios through linking
+  constraints on ``cstr.volume`` and the inlet temperature.
+- Second-stage (recourse) variables, feed flow and anhydride ratio, are chosen
+  per scenario.
+- Each scenario carries the RTO specifications and profit of
+  ``asa_optimization``; the model maximizes the probability-weighted profit.
+
+The stacked model can be solved directly, or decomposed by progressive hedging
+with the scenario subproblems solved across a process pool.
+"""
+
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pyomo.environ import (
+    ConcreteModel,
+    Constraint,
+    Objective,
+    Param,
+    Set,
+    Var,
+    maximize,
+    value,
+)
+from pyomo.opt import check_optimal_termination
+from idaes.core import FlowsheetBlock
+from idaes.core.util.exceptions import InitializationError
+from idaes.models.unit_models import CSTR
+
+from asa_cm_control.asa_optimization import (
+    DEFAULT_DECISION_BOUNDS,
+    add_rto_block,
+    feed_composition,
+    rto_solution,
+)
+from asa_cm_control.asa_process_flowsheet import fix_inlet, solve_model
+from asa_cm_control.props.asa_thermo_property_package import ThermoParameterBlock
+from asa_cm_control.props.asa_reaction_property_package import ASAReactionParameterBlock
+
+
+FIRST_STAGE = ("volume", "temperature")
+RECOURSE = ("flow_mol", "feed_ratio")
+
+# Per-process scenario subproblems of one hedging call, reused across its
+# iterations; each scenario is pinned to one worker process so its subproblem
+# stays warm. Keyed by the call's run id, so a later call (or a forked worker
+# of one) never picks up models built for other scenarios or options
+_SUBPROBLEMS = {"run": None, "models": {}}
+
+
+def water_scenarios(n_scenarios, x_water_range=(0.005, 0.05)):
+    """Return equally likely scenarios spanning a feed water range.
+
+    Args:
+        n_scenarios: Number of scenarios S.
+        x_water_range: ``(lower, upper)`` feed water mole fraction.
+
+    Returns:
+        list: Scenario dicts with ``name``, ``probability`` and ``x_water``.
+    """
+    return [
+        {"name": f"s{k}", "probability": 1.0 / n_scenarios, "x_water": float(x_water)}
+        for k, x_water in enumerate(np.linspace(*x_water_range, n_scenarios))
+    ]
+
+
+def build_scenario_flowsheet(scenarios):
+    """Build one model with a CSTR sub-flowsheet per scenario.
+
+    Args:
+        scenarios: Scenario dicts from ``water_scenarios`` (or the same keys).
+
+    Returns:
+        ConcreteModel: Model with ``fs.scenario[s].cstr``, ``fs.probability``
+        and the unlinked first-stage variables ``fs.design_volume`` and
+        ``fs.design_temperature``.
+    """
+    model = ConcreteModel()
+    model.fs = FlowsheetBlock(dynamic=False)
+    
+    model.fs.thermo_params = ThermoParameterBlock()
+    model.fs.reaction_params = ASAReactionParameterBlock(
+        property_package=model.fs.thermo_params,
+    )
+    
+    model.fs.scenario_set = Set(initialize=[s["name"] for s in scenarios], ordered=True)
+    model.fs.probability = Param(
+        model.fs.scenario_set,
+        initialize={s["name"]: s["probability"] for s in scenarios},
+        mutable=True,
+    )
+    model.fs.scenario = FlowsheetBlock(model.fs.scenario_set, dynamic=False)
+    for s in model.fs.scenario_set:
+        model.fs.scenario[s].cstr = CSTR(
+            property_package=model.fs.thermo_params,
+            reaction_package=model.fs.reaction_params,
+        )
+    
+    model.fs.design_volume = Var(initialize=1.0, bounds=DEFAULT_DECISION_BOUNDS["volume"])
+    model.fs.design_temperature = Var(
+        initialize=325.0, bounds=DEFAULT_DECISION_BOUNDS["temperature"]
+    )
+    return model
+
+
+def set_scenario_operating_conditions(
+    model,
+    scenarios,
+    flow_mol=0.5,
+    temperature=325.0,
+    pressure=101325,
+    feed_ratio=4.1,
+    volume=1,
+):
+    """Fix every scenario's feed (with its own water content) and volume.
+
+    Args:
+        model: Model returned by ``build_scenario_flowsheet``.
+        scenarios: The scenario dicts used to build the model.
+        flow_mol: Feed molar flow in mol/s.
+        temperature: Feed temperature in K.
+        pressure: Feed pressure in Pa.
+        feed_ratio: Anhydride to salicylic acid molar ratio.
+        volume: Reactor volume in m^3.
+    """
+    for scenario in scenarios:
+        cstr = model.fs.scenario[scenario["name"]].cstr
+        fix_inlet(
+            cstr.inlet,
+            0,
+            flow_mol,
+            temperature,
+            pressure,
+            feed_composition(feed_ratio, x_water=scenario["x_water"]),
+        )
+        cstr.volume.fix(volume)
+    model.fs.design_volume.set_value(volume)
+    model.fs.design_temperature.set_value(temperature)
+
+
+def initialize_scenarios(model):
+    """Initialize each scenario reactor at its fixed operating point.
+
+    A scenario whose initialization fails is initialized with the nominal feed
+    water fraction instead and then moved to its own feed by a square solve.
+    """
+    for s in model.fs.scenario_set:
+        cstr = model.fs.scenario[s].cstr
+        try:
+            cstr.initialize()
+        except InitializationError:
+            x_in = cstr.inlet.mole_frac_comp
+            feed = {j: value(x_in[0, j]) for j in cstr.config.property_package.component_list}
+            nominal = feed_composition(feed["acetic_anhydride"] / feed["salicylic_acid"])
+            for j, x in nominal.items():
+                x_in[0, j].fix(x)
+            cstr.initialize()
+            for j, x in feed.items():
+                x_in[0, j].fix(x)
+            if not check_optimal_termination(solve_model(cstr, tee=False)):
+                raise
+
+
+def add_robust_design(model, **rto_options):
+    """Link the scenarios through the design variables and add the objective.
+
+    Each scenario gets an ``rto`` block with its recourse decisions, the
+    product specifications and a (deactivated) profit objective; the model
+    objective ``fs.expected_objective`` is their probability-weighted sum.
+    Overrides in ``bounds`` also apply to the first-stage variables.
+
+    Args:
+        model: Initialized model from ``build_scenario_flowsheet``.
+        **rto_options: Passed to ``add_rto_block`` (``prices``, ``specs``,
+            ``objective``, ``bounds``).
+    """
+    fs = model.fs
+    bounds = _design_bounds(rto_options)
+    for name in FIRST_STAGE:
+        getattr(fs, f"design_{name}").setlb(bounds[name][0])
+        getattr(fs, f"design_{name}").setub(bounds[name][1])
+    for s in fs.scenario_set:
+        add_rto_block(model, flowsheet=fs.scenario[s], decisions=RECOURSE, **rto_options)
+        fs.scenario[s].rto.objective.deactivate()
+        fs.scenario[s].cstr.volume[0].unfix()
+        fs.scenario[s].cstr.inlet.temperature[0].unfix()
+    
+    fs.volume_link = Constraint(
+        fs.scenario_set,
+        rule=lambda fs, s: fs.scenario[s].cstr.volume[0] == fs.design_volume,
+    )
+    fs.temperature_link = Constraint(
+        fs.scenario_set,
+        rule=lambda fs, s: fs.scenario[s].cstr.inlet.temperature[0] == fs.design_temperature,
+    )
+    fs.expected_objective = Objective(
+        expr=sum(fs.probability[s] * fs.scenario[s].rto.objective.expr for s in fs.scenario_set),
+        sense=maximize,
+    )
+
+
+def design_solution(model):
+    """Return the first-stage design and each scenario's recourse and outlet."""
+    fs = model.fs
+    return {
+        "volume": value(fs.design_volume),
+        "temperature": value(fs.design_temperature),
+        "scenarios": {s: rto_solution(model, flowsheet=fs.scenario[s]) for s in fs.scenario_set},
+    }
+
+
+def solve_robust_design(scenarios, tee=False, **rto_options):
+    """Build, initialize and solve the stacked robust-design NLP directly.
+
+    Args:
+        scenarios: Scenario dicts from ``water_scenarios``.
+        tee: Stream IPOPT output.
+        **rto_options: Passed to ``add_robust_design``.
+
+    Returns:
+        dict: ``design_solution`` plus ``objective``, ``status`` and
+        ``build_s``/``solve_s`` timings.
+    """
+    start = time.perf_counter()
+    model = build_scenario_flowsheet(scenarios)
+    set_scenario_operating_conditions(model, scenarios)
+    initialize_scenarios(model)
+    add_robust_design(model, **rto_options)
+    built = time.perf_counter()
+    results = solve_model(model, tee=tee)
+    solved = time.perf_counter()
+    return {
+        **design_solution(model),
+        "objective": value(model.fs.expected_objective),
+        "status": str(results.solver.termination_condition),
+        "build_s": built - start,
+        "solve_s": solved - built,
+    }
+
+
+def _design_bounds(rto_options):
+    """Return the effective decision bounds of a set of ``rto_options``."""
+    return {**DEFAULT_DECISION_BOUNDS, **(rto_options.get("bounds") or {})}
+
+
+def _normalized_design(fs, name):
+    var = getattr(fs, f"design_{name}")
+    return (var - var.lb) / (var.ub - var.lb)
+
+
+def _build_subproblem(scenario, rto_options):
+    """Build a one-scenario model with a progressive hedging objective.
+
+    The objective is the scenario profit minus the hedging terms
+    ``w.x + rho/2 |x - xbar|^2`` on the first-stage variables normalized to
+    their bounds.
+    """
+    model = build_scenario_flowsheet([{**scenario, "probability": 1.0}])
+    set_scenario_operating_conditions(model, [scenario])
+    initialize_scenarios(model)
+    add_robust_design(model, **rto_options)
+    
+    fs = model.fs
+    fs.expected_objective.deactivate()
+    fs.ph_stage = Set(initialize=FIRST_STAGE, ordered=True)
+    fs.ph_weight = Param(fs.ph_stage, initialize=0.0, mutable=True)
+    fs.ph_xbar = Param(fs.ph_stage, initialize=0.0, mutable=True)
+    fs.ph_rho = Param(initialize=1.0, mutable=True)
+    fs.ph_objective = Objective(
+        expr=fs.expected_objective.expr
+        - sum(
+            fs.ph_weight[j] * _normalized_design(fs, j)
+            + fs.ph_rho / 2 * (_normalized_design(fs, j) - fs.ph_xbar[j]) ** 2
+            for j in fs.ph_stage
+        ),
+        sense=maximize,
+    )
+    return model
+
+
+def _clear_subproblems(run_id=None):
+    _SUBPROBLEMS["run"] = run_id
+    _SUBPROBLEMS["models"] = {}
+
+
+def _solve_subproblem(args):
+    """Solve one scenario subproblem, reusing it across iterations of a run."""
+    run_id, scenario, weights, xbar, rho, rto_options = args
+    if _SUBPROBLEMS["run"] != run_id:
+        _clear_subproblems(run_id)
+    models = _SUBPROBLEMS["models"]
+    model = models.get(scenario["name"])
+    if model is None:
+        model = models[scenario["name"]] = _build_subproblem(scenario, rto_options)
+    
+    fs = model.fs
+    fs.ph_rho.set_value(rho)
+    for j in FIRST_STAGE:
+        fs.ph_weight[j].set_value(weights[j])
+        fs.ph_xbar[j].set_value(xbar[j])
+    results = solve_model(model, tee=False)
+    return {
+        "name": scenario["name"],
+        "x": {j: value(_normalized_design(fs, j)) for j in FIRST_STAGE},
+        "profit": value(fs.expected_objective),
+        "ok": check_optimal_termination(results),
+    }
+
+
+def progressive_hedging(
+    scenarios,
+    rho=10.0,
+    max_iter=50,
+    tol=1e-4,
+    n_workers=None,
+    **rto_options,
+):
+    """Solve the robust design by progressive hedging over scenario subproblems.
+
+    Every iteration solves all scenario subproblems (in parallel when
+    ``n_workers`` is not 1), averages their first-stage decisions into
+    ``xbar``, and updates the multipliers ``w_s += rho (x_s - xbar)``. Each
+    scenario is pinned to one single-process worker, which keeps its
+    subproblem between iterations, so later solves are warm.
+
+    Args:
+        scenarios: Scenario dicts from ``water_scenarios``.
+        rho: Penalty on first-stage variables normalized to [0, 1].
+        max_iter: Maximum hedging iterations.
+        tol: Convergence threshold on the probability-weighted distance of the
+            normalized scenario decisions from ``xbar``.
+        n_workers: Worker processes (at most one per scenario); ``1`` solves
+            in-process.
+        **rto_options: Passed to ``add_robust_design``.
+
+    Returns:
+        dict: First-stage ``volume`` and ``temperature``, expected scenario
+        ``objective``, ``iterations``, final ``gap``, ``converged`` and
+        ``time_s``.
+    """
+    start = time.perf_counter()
+    run_id = uuid.uuid4().hex
+    probability = {s["name"]: s["probability"] for s in scenarios}
+    weights = {s["name"]: {j: 0.0 for j in FIRST_STAGE} for s in scenarios}
+    xbar = {j: 0.0 for j in FIRST_STAGE}
+    current_rho = 0.0
+    
+    # One single-process executor per worker; scenario k always goes to
+    # worker k mod n, where its subproblem from the last iteration is cached
+    pools = []
+    if n_workers != 1:
+        n_pools = min(n_workers or os.cpu_count() or 1, len(scenarios))
+        pools = [ProcessPoolExecutor(max_workers=1) for _ in range(n_pools)]
+    try:
+        for iteration in range(1, max_iter + 1):
+            tasks = [
+                (run_id, s, weights[s["name"]], xbar, current_rho, rto_options)
+                for s in scenarios
+            ]
+            if pools:
+                futures = [
+                    pools[k % len(pools)].submit(_solve_subproblem, task)
+                    for k, task in enumerate(tasks)
+                ]
+                solutions = [future.result() for future in futures]
+            else:
+                solutions = [_solve_subproblem(task) for task in tasks]
+            xbar = {
+                j: sum(probability[sol["name"]] * sol["x"][j] for sol in solutions)
+                for j in FIRST_STAGE
+            }
+            gap = sum(
+                probability[sol["name"]]
+                * np.sqrt(sum((sol["x"][j] - xbar[j]) ** 2 for j in FIRST_STAGE))
+                for sol in solutions
+            )
+            # The first pass solves each scenario on its own (rho = 0)
+            current_rho = rho
+            for sol in solutions:
+                for j in FIRST_STAGE:
+                    weights[sol["name"]][j] += current_rho * (sol["x"][j] - xbar[j])
+            if gap < tol:
+                break
+    finally:
+        for pool in pools:
+            pool.shutdown()
+        _clear_subproblems()
+    
+    bounds = _design_bounds(rto_options)
+    design = {
+        j: bounds[j][0] + xbar[j] * (bounds[j][1] - bounds[j][0])
+        for j in FIRST_STAGE
+    }
+    return {
+        **design,
+        "objective": sum(probability[sol["name"]] * sol["profit"] for sol in solutions),
+        "all_ok": all(sol["ok"] for sol in solutions),
+        "iterations": iteration,
+        "gap": float(gap),
+        "converged": bool(gap < tol),
+        "time_s": time.perf_counter() - start,
+    }
@@ -0,0 +1,487 @@
+# To-Do:
+# - Add a reactor fill-volume limit once vessel data are available
+
+
+"""Semi-batch ASA reactor with dynamic optimization of anhydride dosing.
+
+The reactor is the dynamic, jacketed CSTR of the thermophysical and reaction
+packages with its outlet closed: salicylic acid, acetic acid (solvent),
+sulfuric acid and some water are charged at ``t = 0`` and acetic anhydride is
+dosed through the inlet, so the liquid volume grows over the batch. Dosing
+the anhydride limits the exotherm of the aspirin synthesis, and the jacket
+removes heat at ``UA (T_jacket - T)``.
+
+- The time domain is discretized with backward finite differences over
+  ``nfe`` elements; the dosing rate is piecewise constant over
+  ``n_dosing_intervals`` equal intervals (``fs.dosing_rate``).
+- ``initialize_semibatch`` simulates the nominal recipe (even dosing over the
+  first half of the batch) as a square problem, marching element by element
+  with one small in-memory subsystem solve per time point, so the
+  optimization starts from a consistent trajectory.
+- ``add_dosing_optimization`` frees the dosing rates, caps the total dose at
+  the anhydride equivalents and maximizes the aspirin yield on the charged salicylic acid subject to a
+  temperature limit at every time point.
+
+Usage:
+    result = optimize_dosing(horizon=7200.0, nfe=24, temperature_max=345.0)
+"""
+
+import math
+import time as _time
+
+from pyomo.environ import (
+    Block,
+    ConcreteModel,
+    Constraint,
+    Expression,
+    Objective,
+    Param,
+    RangeSet,
+    TransformationFactory,
+    Var,
+    maximize,
+    units as pyunits,
+    value,
+)
+from pyomo.common.collections import ComponentSet
+from pyomo.dae.flatten import flatten_dae_components
+from pyomo.opt import check_optimal_termination
+from pyomo.util.calc_var_value import calculate_variable_from_constraint
+from pyomo.util.subsystems import TemporarySubsystemManager, create_subsystem_block
+from idaes.core import FlowsheetBlock
+from idaes.core.util.exceptions import ConfigurationError, InitializationError
+from idaes.models.unit_models import CSTR
+import idaes.core.util.scaling as iscale
+
+from asa_cm_control.asa_newton import casadi_available, solve_newton
+from asa_cm_control.asa_process_flowsheet import feed_mole_fractions, solve_model
+from asa_cm_control.props.asa_thermo_property_package import ThermoParameterBlock
+from asa_cm_control.props.asa_reaction_property_package import ASAReactionParameterBlock
+
+
+SEMIBATCH_HORIZON = 7200.0
+
+# Initial charge in mol; traces keep every holdup strictly positive
+DEFAULT_CHARGE = {
+    "salicylic_acid": 100.0,
+    "acetic_anhydride": 1e-3,
+    "sulfuric_acid": 2.0,
+    "aspirin": 1e-3,
+    "acetic_acid": 150.0,
+    "water": 1.0,
+}
+
+# Operating conditions of the charge, the dosed anhydride and the jacket
+DEFAULT_SEMIBATCH_CONDITIONS = {
+    "charge_temperature": 330.0,
+    "dose_temperature": 298.15,
+    "pressure": 101325.0,
+    "anhydride_equivalents": 1.2,
+    "jacket_temperature": 330.0,
+    "jacket_ua": 50.0,
+}
+
+# Fraction of the batch over which the nominal recipe doses evenly
+NOMINAL_DOSING_FRACTION = 0.5
+
+DEFAULT_TEMPERATURE_MAX = 345.0
+
+# Scaling factor of the energy holdup equations (J -> MJ)
+ENERGY_HOLDUP_SCALE = 1e-6
+
+
+def _dosing_interval(t, horizon, n_intervals):
+    # Backward differences: the rate at t applies over the element ending at t
+    return min(n_intervals, max(1, math.ceil(n_intervals * t / horizon - 1e-9)))
+
+
+def build_semibatch_flowsheet(horizon=SEMIBATCH_HORIZON, nfe=24, n_dosing_intervals=6):
+    """Build the discretized semi-batch reactor flowsheet.
+
+    Args:
+        horizon: Batch time in s.
+        nfe: Finite elements in time.
+        n_dosing_intervals: Equal intervals of constant dosing rate; at most
+            ``nfe``.
+
+    Returns:
+        ConcreteModel: Model with ``fs.cstr`` (jacketed, dynamic),
+        ``fs.dosing_rate`` and the fixed jacket variables ``fs.jacket_ua`` and
+        ``fs.jacket_temperature``.
+
+    Raises:
+        ConfigurationError: If there are more dosing intervals than elements.
+    """
+    if not 1 <= n_dosing_intervals <= nfe:
+        raise ConfigurationError(
+            f"n_dosing_intervals must be between 1 and nfe={nfe}, got {n_dosing_intervals}."
+        )
+    model = ConcreteModel()
+    model.fs = FlowsheetBlock(dynamic=True, time_set=[0, horizon], time_units=pyunits.s)
+    
+    model.fs.thermo_params = ThermoParameterBlock()
+    model.fs.reaction_params = ASAReactionParameterBlock(
+        property_package=model.fs.thermo_params,
+    )
+    model.fs.cstr = CSTR(
+        property_package=model.fs.thermo_params,
+        reaction_package=model.fs.reaction_params,
+        has_heat_transfer=True,
+    )
+    
+    model.fs.jacket_ua = Var(initialize=50.0, units=pyunits.W / pyunits.K, doc="Jacket UA")
+    model.fs.jacket_temperature = Var(initialize=330.0, units=pyunits.K, doc="Jacket temperature")
+    model.fs.dosing_interval = RangeSet(n_dosing_intervals)
+    model.fs.dosing_rate = Var(
+        model.fs.dosing_interval,
+        initialize=0.0,
+        bounds=(0, None),
+        units=pyunits.mol / pyunits.s,
+        doc="Anhydride dosing rate per interval",
+    )
+    
+    TransformationFactory("dae.finite_difference").apply_to(
+        model.fs,
+        nfe=nfe,
+        wrt=model.fs.time,
+        scheme="BACKWARD",
+    )
+    
+    cstr = model.fs.cstr
+    # Energy holdups are ~1e8 J (formation enthalpies), so unscaled their
+    # round-off alone exceeds IPOPT's tolerance and the optimization drifts
+    for con in cstr.control_volume.energy_holdup_calculation.values():
+        iscale.constraint_scaling_transform(con, ENERGY_HOLDUP_SCALE)
+    model.fs.jacket_heat = Constraint(
+        model.fs.time,
+        rule=lambda fs, t: cstr.heat_duty[t]
+        == fs.jacket_ua * (fs.jacket_temperature - cstr.control_volume.properties_out[t].temperature),
+    )
+    model.fs.dosing_link = Constraint(
+        model.fs.time,
+        rule=lambda fs, t: cstr.inlet.flow_mol[t]
+        == fs.dosing_rate[_dosing_interval(t, horizon, n_dosing_intervals)],
+    )
+    return model
+
+
+def charged_moles(model, component):
+    """Return the charged amount of a component in mol."""
+    control_volume = model.fs.cstr.control_volume
+    return value(control_volume.material_holdup[model.fs.time.first(), "liquid", component])
+
+
+def total_dose(model):
+    """Return the anhydride dose of ``fs.anhydride_equivalents`` in mol."""
+    return model.fs.anhydride_equivalents.value * charged_moles(model, "salicylic_acid")
+
+
+def nominal_dosing_profile(model, dosing_fraction=NOMINAL_DOSING_FRACTION):
+    """Return dosing rates that dose the total evenly over the first intervals.
+
+    Returns:
+        dict: Dosing interval -> rate in mol/s.
+    """
+    fs = model.fs
+    intervals = list(fs.dosing_interval)
+    n_dosing = max(1, round(dosing_fraction * len(intervals)))
+    interval_length = (fs.time.last() - fs.time.first()) / len(intervals)
+    rate = total_dose(model) / (n_dosing * interval_length)
+    return {k: (rate if k <= n_dosing else 0.0) for k in intervals}
+
+
+def set_semibatch_conditions(model, charge=None, profile=None, **conditions):
+    """Fix the charge, the dosed stream, the jacket and the dosing profile.
+
+    Args:
+        model: Model returned by ``build_semibatch_flowsheet``.
+        charge: Initial moles per component; defaults to ``DEFAULT_CHARGE``.
+        profile: Dosing rates per interval; defaults to
+            ``nominal_dosing_profile``.
+        **conditions: Overrides of ``DEFAULT_SEMIBATCH_CONDITIONS``.
+
+    Raises:
+        ConfigurationError: For unknown condition names.
+    """
+    unknown = set(conditions) - set(DEFAULT_SEMIBATCH_CONDITIONS)
+    if unknown:
+        raise ConfigurationError(f"Unknown semi-batch conditions {sorted(unknown)}.")
+    conditions = {**DEFAULT_SEMIBATCH_CONDITIONS, **conditions}
+    charge = {**DEFAULT_CHARGE, **(charge or {})}
+    
+    fs = model.fs
+    cstr = fs.cstr
+    control_volume = cstr.control_volume
+    components = fs.thermo_params.component_list
+    t0 = fs.time.first()
+    dose = feed_mole_fractions({"acetic_anhydride": 1.0}, components=components)
+    
+    for t in fs.time:
+        cstr.inlet.temperature[t].fix(conditions["dose_temperature"])
+        cstr.inlet.pressure[t].fix(conditions["pressure"])
+        for j in components:
+            cstr.inlet.mole_frac_comp[t, j].fix(dose[j])
+        # Closed outlet: the volume follows the holdup
+        cstr.outlet.flow_mol[t].fix(0)
+        cstr.volume[t].unfix()
+        for phase in ("vapor", "solid"):
+            control_volume.phase_fraction[t, phase].fix(0)
+    for phase in ("vapor", "solid"):
+        control_volume.energy_accumulation[t0, phase].fix(0)
+        for j in components:
+            control_volume.material_accumulation[t0, phase, j].fix(0)
+    
+    for j in components:
+        control_volume.material_holdup[t0, "liquid", j].fix(charge[j])
+    control_volume.properties_out[t0].temperature.fix(conditions["charge_temperature"])
+    
+    fs.jacket_ua.fix(conditions["jacket_ua"])
+    fs.jacket_temperature.fix(conditions["jacket_temperature"])
+    if not hasattr(fs, "anhydride_equivalents"):
+        fs.anhydride_equivalents = Param(mutable=True, initialize=0.0)
+    fs.anhydride_equivalents.set_value(conditions["anhydride_equivalents"])
+    
+    profile = profile or nominal_dosing_profile(model)
+    for k in fs.dosing_interval:
+        fs.dosing_rate[k].fix(profile[k])
+
+
+def _set_charge_state(model, t):
+    """Set every variable at ``t`` to the well-mixed, unreacted charge."""
+    fs = model.fs
+    cstr = fs.cstr
+    control_volume = cstr.control_volume
+    params = fs.thermo_params
+    t0 = fs.time.first()
+    components = params.component_list
+    moles = {j: value(control_volume.material_holdup[t0, "liquid", j]) for j in components}
+    total = sum(moles.values())
+    state = control_volume.properties_out[t]
+    for j in components:
+        state.mole_frac_comp[j].set_value(moles[j] / total)
+    state.temperature.set_value(control_volume.properties_out[t0].temperature.value)
+    state.pressure.set_value(cstr.inlet.pressure[t].value)
+    control_volume.phase_fraction[t, "liquid"].set_value(1.0)
+    control_volume.volume[t].set_value(
+        sum(moles[j] * value(params.mw_comp[j] / params.density_liq_comp[j]) for j in components)
+    )
+    
+    # Derived variables from their defining equations, in dependency order
+    for con, var in (
+        (fs.dosing_link[t], cstr.inlet.flow_mol[t]),
+        (fs.jacket_heat[t], cstr.heat_duty[t]),
+        *(
+            (
+                control_volume.material_holdup_calculation[t, p, j],
+                control_volume.material_holdup[t, p, j],
+            )
+            for p in params.phase_list
+            for j in components
+        ),
+        *(
+            (control_volume.energy_holdup_calculation[t, p], control_volume.energy_holdup[t, p])
+            for p in params.phase_list
+        ),
+        *(
+            (cstr.cstr_performance_eqn[t, r], control_volume.rate_reaction_extent[t, r])
+            for r in fs.reaction_params.rate_reaction_idx
+        ),
+        *(
+            (
+                control_volume.rate_reaction_stoichiometry_constraint[t, p, j],
+                control_volume.rate_reaction_generation[t, p, j],
+            )
+            for p in params.phase_list
+            for j in components
+        ),
+    ):
+        if not var.fixed:
+            calculate_variable_from_constraint(var, con)
+    for var in (
+        *control_volume.material_accumulation[t, ...],
+        *control_volume.energy_accumulation[t, ...],
+    ):
+        if not var.fixed:
+            var.set_value(0)
+
+
+def initialize_semibatch(model, tee=False):
+    """Simulate the fixed dosing profile to initialize the trajectory.
+
+    Time points are solved one after the other, each as a subsystem of its
+    own equations and free variables: the holdups at ``t_{k-1}`` and the
+    dosing rates enter as fixed inputs and ``t_k`` starts from the state at
+    ``t_{k-1}``. With backward differences these small square problems
+    reproduce the full simulation, which is then solved once as a whole to
+    confirm convergence.
+
+    The subsystems are solved in memory by ``asa_newton`` (CasADi evaluator,
+    IPOPT fallback), so the full-horizon solve is the only NL file written.
+    Without CasADi each subsystem goes to IPOPT, whose start-up then
+    dominates; the Pyomo Newton evaluator is no faster on these subsystems.
+
+    Args:
+        model: Model with ``set_semibatch_conditions`` applied.
+        tee: Stream IPOPT output of the final full-horizon solve.
+
+    Returns:
+        SolverResults: Results of the full-horizon simulation.
+
+    Raises:
+        InitializationError: If a time point or the final solve does not
+            converge.
+    """
+    fs = model.fs
+    control_volume = fs.cstr.control_volume
+    _, var_slices = flatten_dae_components(fs, fs.time, Var)
+    _, con_slices = flatten_dae_components(fs, fs.time, Constraint)
+    
+    previous = None
+    for t in fs.time:
+        if previous is None:
+            _set_charge_state(model, t)
+        else:
+            for var in var_slices:
+                if not var[t].fixed:
+                    var[t].set_value(var[previous].value, skip_validation=True)
+        # Discretization equations do not exist at t0; references can expose
+        # one variable through several slices
+        constraints = ComponentSet(con[t] for con in con_slices if t in con and con[t].active)
+        for block in (
+            control_volume.properties_in[t],
+            control_volume.properties_out[t],
+            control_volume.reactions[t],
+        ):
+            constraints.update(block.component_data_objects(Constraint, active=True))
+        variables = ComponentSet(var[t] for var in var_slices if t in var and not var[t].fixed)
+        block = create_subsystem_block(list(constraints), list(variables))
+        with TemporarySubsystemManager(to_fix=list(block.input_vars.values())):
+            if casadi_available:
+                stats = solve_newton(block, evaluator="casadi")
+                converged, status = stats["converged"], stats["status"]
+            else:
+                results = solve_model(block, tee=False)
+                converged = check_optimal_termination(results)
+                status = results.solver.termination_condition
+        if not converged:
+            raise InitializationError(f"Semi-batch simulation failed at t = {t} s: {status}")
+        previous = t
+    
+    results = solve_model(model, tee=tee)
+    if not check_optimal_termination(results):
+        raise InitializationError(
+            f"Semi-batch simulation failed: {results.solver.termination_condition}"
+        )
+    return results
+
+
+def add_dosing_optimization(model, temperature_max=DEFAULT_TEMPERATURE_MAX, max_dosing_rate=None):
+    """Free the dosing profile and add the yield objective on ``fs.dosing_opt``.
+
+    The total dose may not exceed the anhydride equivalents, the reactor
+    temperature must stay below ``temperature_max`` at every time point, and
+    the objective is the aspirin yield (in percent) on the charged salicylic
+    acid at the end of the batch.
+
+    Args:
+        model: Simulated model from ``initialize_semibatch``.
+        temperature_max: Temperature limit in K (mutable Param
+            ``dosing_opt.temperature_max``).
+        max_dosing_rate: Optional upper bound on the dosing rate in mol/s.
+
+    Returns:
+        Block: The ``dosing_opt`` block.
+    """
+    fs = model.fs
+    time = fs.time
+    t_end = time.last()
+    control_volume = fs.cstr.control_volume
+    interval_length = (t_end - time.first()) / len(fs.dosing_interval)
+    
+    fs.dosing_opt = Block()
+    opt = fs.dosing_opt
+    opt.temperature_max = Param(initialize=temperature_max, mutable=True, units=pyunits.K)
+    for k in fs.dosing_interval:
+        fs.dosing_rate[k].unfix()
+        fs.dosing_rate[k].setub(max_dosing_rate)
+    
+    opt.total_dose = Constraint(
+        expr=sum(fs.dosing_rate[k] for k in fs.dosing_interval) * interval_length
+        <= total_dose(model)
+    )
+    opt.temperature_limit = Constraint(
+        time,
+        rule=lambda b, t: control_volume.properties_out[t].temperature <= b.temperature_max,
+    )
+    opt.aspirin_yield = Expression(
+        expr=control_volume.material_holdup[t_end, "liquid", "aspirin"]
+        / charged_moles(model, "salicylic_acid")
+    )
+    # In percent: a fractional yield is too small next to the balance
+    # residuals and IPOPT stops at poor local optima (late dosing)
+    opt.objective = Objective(expr=100 * opt.aspirin_yield, sense=maximize)
+    return opt
+
+
+def dosing_solution(model):
+    """Return the dosing profile and the batch outcome of a solved model."""
+    fs = model.fs
+    control_volume = fs.cstr.control_volume
+    t_end = fs.time.last()
+    temperatures = [value(control_volume.properties_out[t].temperature) for t in fs.time]
+    return {
+        "dosing_rate": [value(fs.dosing_rate[k]) for k in fs.dosing_interval],
+        "aspirin_yield": value(control_volume.material_holdup[t_end, "liquid", "aspirin"])
+        / charged_moles(model, "salicylic_acid"),
+        "peak_temperature": max(temperatures),
+        "final_volume": value(control_volume.volume[t_end]),
+        "time": list(fs.time),
+        "temperature": temperatures,
+    }
+
+
+def optimize_dosing(
+    horizon=SEMIBATCH_HORIZON,
+    nfe=24,
+    n_dosing_intervals=6,
+    temperature_max=DEFAULT_TEMPERATURE_MAX,
+    max_dosing_rate=None,
+    charge=None,
+    tee=False,
+    **conditions,
+):
+    """Simulate the nominal recipe, then optimize the dosing profile.
+
+    Args:
+        horizon: Batch time in s.
+        nfe: Finite elements in time.
+        n_dosing_intervals: Intervals of constant dosing rate.
+        temperature_max: Temperature limit in K.
+        max_dosing_rate: Optional upper bound on the dosing rate in mol/s.
+        charge: Initial moles per component (see ``DEFAULT_CHARGE``).
+        tee: Stream IPOPT output of the optimization.
+        **conditions: Overrides of ``DEFAULT_SEMIBATCH_CONDITIONS``.
+
+    Returns:
+        dict: ``nominal`` and ``optimal`` ``dosing_solution`` results,
+        ``status`` and ``build_s``, ``simulate_s`` and ``optimize_s`` timings.
+    """
+    start = _time.perf_counter()
+    model = build_semibatch_flowsheet(horizon, nfe, n_dosing_intervals)
+    set_semibatch_conditions(model, charge=charge, **conditions)
+    built = _time.perf_counter()
+    initialize_semibatch(model)
+    nominal = dosing_solution(model)
+    simulated = _time.perf_counter()
+    
+    add_dosing_optimization(model, temperature_max, max_dosing_rate)
+    results = solve_model(model, tee=tee)
+    optimized = _time.perf_counter()
+    return {
+        "nominal": nominal,
+        "optimal": dosing_solution(model) if check_optimal_termination(results) else None,
+        "status": str(results.solver.termination_condition),
+        "build_s": built - start,
+        "simulate_s": simulated - built,
+        "optimize_s": optimized - simulated,
+    }
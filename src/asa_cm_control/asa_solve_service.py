@@ -0,0 +1,485 @@
+# To-Do:
+# - Route PFR cases to a second pool once the PFR flowsheet solves reliably
+
+
+"""Long-lived local solve service over a pool of warm CSTR models.
+
+Starting the modelling stack, building the flowsheet and solving from a cold
+start dominate the cost of a single ``run_asa_process.py`` call. The service
+pays them once: each worker process builds and initializes a CSTR flowsheet
+at start-up and then solves every case it receives warm-started from the
+previous one (``asa_batch.solve_case``).
+
+An asyncio front end accepts JSON requests over HTTP on the loopback
+interface and puts the cases on a queue. A dispatcher hands them to the
+workers in batches: the queue is split evenly over the idle workers (at most
+``max_batch`` cases each), so a burst spreads over the pool, and while every
+worker is busy new requests accumulate and share the next round trip.
+
+A case that raises fails on its own; the worker rebuilds its model and goes
+on with the rest of the batch. IPOPT stops each solve after ``solve_timeout``
+s; a batch still running well past that is taken as a hung worker and the
+pool is replaced, as it is when a worker process dies. ``/health`` reports
+"degraded" while a batch is overdue, the pool is restarting, or a pool failure
+happened within ``HEALTH_WINDOW_S``.
+
+Endpoints:
+    POST /solve   one case object or ``{"cases": [...]}`` in the case format
+                  of ``asa_cli``; returns one result per case
+    GET  /stats   queue depth, cases in flight, latency percentiles, batch sizes
+    GET  /health  status derived from the pool state, recent pool failures
+                  and per-worker activity
+
+Everything runs offline; ``SolveClient`` is a standard-library client for
+other processes and tests.
+
+Run from repository root:
+    python run_asa.py serve --port 8765
+"""
+
+import asyncio
+from collections import deque
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import http.client
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from asa_cm_control.asa_batch import solve_case
+from asa_cm_control.asa_cli import validate_case
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions
+
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+
+# Largest number of cases sent to one worker at once
+MAX_BATCH = 8
+
+# IPOPT wall-time limit per solve in s
+SOLVE_TIMEOUT_S = 60.0
+
+# A batch running longer than this many solve timeouts per case (a failed
+# solve is retried after a re-initialization) is taken as a hung worker
+WATCHDOG_FACTOR = 3
+
+# Pool failures within this many s mark the service degraded
+HEALTH_WINDOW_S = 300.0
+
+# Number of recent requests kept for the latency percentiles
+LATENCY_WINDOW = 1024
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+_WORKER = {}
+
+
+def _init_worker():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    _WORKER["model"] = model
+
+
+def _ping():
+    return os.getpid()
+
+
+def _solve_batch(cases, options=None):
+    """Solve a batch of cases on the worker's warm flowsheet.
+
+    A case that raises gets an "error" record (as in ``asa_batch``) and the
+    model is rebuilt, since the failed solve may have left it anywhere.
+
+    Args:
+        cases: Keyword arguments for ``set_operating_conditions``, one per case.
+        options: IPOPT options for every solve.
+
+    Returns:
+        tuple: Worker process id and one ``solve_case`` record per case.
+    """
+    records = []
+    for case in cases:
+        try:
+            records.append(solve_case(_WORKER["model"], case, options))
+        except Exception as err:
+            records.append({
+                "status": "error",
+                "error": f"{type(err).__name__}: {err}",
+                "solve_s": None,
+                "outputs": None,
+            })
+            _init_worker()
+    return os.getpid(), records
+
+
+def _batch_size(n_queued, n_idle, max_batch):
+    """Return the next batch size: the queue split evenly over the idle workers."""
+    return max(1, min(max_batch, math.ceil(n_queued / max(n_idle, 1))))
+
+
+def _failed_records(batch, status):
+    return [{"status": status, "solve_s": None, "outputs": None} for _ in batch]
+
+
+def _case_errors(case):
+    errors = validate_case(case)
+    if isinstance(case, dict) and case.get("reactor", "cstr") != "cstr":
+        errors.append("the solve service only runs the CSTR flowsheet")
+    return errors
+
+
+class SolveService:
+    """Asyncio front end batching case requests onto warm worker processes.
+
+    Args:
+        n_workers: Worker processes, each holding one warm CSTR flowsheet.
+            Defaults to the CPU count.
+        max_batch: Largest number of cases per worker round trip.
+        solve_timeout: IPOPT wall-time limit per solve in s; also sets the
+            hung-worker watchdog (``WATCHDOG_FACTOR``).
+    """
+    
+    def __init__(self, n_workers=None, max_batch=MAX_BATCH, solve_timeout=SOLVE_TIMEOUT_S):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.solve_timeout = solve_timeout
+        self.started = None
+        self.pool_restarts = 0
+        self.timeouts = 0
+        self.n_completed = 0
+        self.n_failed = 0
+        self.in_flight = 0
+        self.workers = {}
+        self.failures = deque(maxlen=LATENCY_WINDOW)
+        self._running = {}
+        self._batch_ids = itertools.count()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self._pool = None
+        self._queue = None
+        self._slots = None
+        self._ready = None
+        self._server = None
+        self._dispatcher = None
+    
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker)
+    
+    async def start(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """Start the workers, wait until every model is warm, then listen.
+
+        Returns:
+            int: The bound port (useful with ``port=0``).
+        """
+        loop = asyncio.get_running_loop()
+        self._pool = self._new_pool()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._pool, _ping) for _ in range(self.n_workers))
+        )
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.n_workers)
+        self._ready = asyncio.Event()
+        self._ready.set()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.started = time.time()
+        return self._server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        """Stop listening, cancel the dispatcher and shut the workers down."""
+        self._server.close()
+        await self._server.wait_closed()
+        self._dispatcher.cancel()
+        self._pool.shutdown(cancel_futures=True)
+    
+    async def serve_forever(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """Start the service and handle requests until cancelled."""
+        port = await self.start(host, port)
+        print(f"ASA solve service on http://{host}:{port} with {self.n_workers} worker(s)", flush=True)
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+    
+    async def solve(self, cases):
+        """Queue cases and wait for their results.
+
+        Args:
+            cases: Valid case dicts.
+
+        Returns:
+            list: One result dict per case: ``status``, ``solve_s``,
+            ``latency_s``, ``outputs`` (None on failure) and ``worker``.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        futures = []
+        for case in cases:
+            future = loop.create_future()
+            futures.append(future)
+            self._queue.put_nowait((case, future))
+        results = await asyncio.gather(*futures)
+        latency = time.perf_counter() - start
+        self._latencies.append(latency)
+        for result in results:
+            result["latency_s"] = latency
+        return results
+    
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            await self._ready.wait()
+            batch = [await self._queue.get()]
+            # The idle workers include the one whose slot was just taken
+            size = _batch_size(
+                1 + self._queue.qsize(), self.n_workers - len(self._running), self.max_batch
+            )
+            while len(batch) < size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            batch_id = next(self._batch_ids)
+            self._running[batch_id] = (time.monotonic(), len(batch))
+            asyncio.create_task(self._run_batch(batch_id, batch))
+    
+    async def _run_batch(self, batch_id, batch):
+        loop = asyncio.get_running_loop()
+        self.in_flight += len(batch)
+        self._batch_sizes.append(len(batch))
+        conditions = [{k: v for k, v in case.items() if k != "reactor"} for case, _ in batch]
+        options = {"max_wall_time": self.solve_timeout}
+        pool = self._pool
+        try:
+            pid, records = await asyncio.wait_for(
+                loop.run_in_executor(pool, _solve_batch, conditions, options),
+                timeout=WATCHDOG_FACTOR * self.solve_timeout * len(batch),
+            )
+        except asyncio.TimeoutError:
+            # IPOPT's own limit did not end the batch, so the worker is hung
+            self.timeouts += 1
+            self._restart_pool(pool, "batch timed out")
+            pid, records = None, _failed_records(batch, "timeout")
+        except BrokenProcessPool:
+            self._restart_pool(pool, "worker process died")
+            pid, records = None, _failed_records(batch, "worker_failure")
+        except Exception as err:
+            error = f"{type(err).__name__}: {err}"
+            self.failures.append((time.time(), f"batch failed: {error}"))
+            pid, records = None, [
+                {**record, "error": error} for record in _failed_records(batch, "error")
+            ]
+        finally:
+            self.in_flight -= len(batch)
+            del self._running[batch_id]
+            self._slots.release()
+        
+        if pid is not None:
+            worker = self.workers.setdefault(pid, {"batches": 0, "cases": 0, "failed": 0})
+            worker["batches"] += 1
+            worker["cases"] += len(records)
+            worker["failed"] += sum(record["outputs"] is None for record in records)
+            worker["last_seen"] = time.time()
+        for (_, future), record in zip(batch, records):
+            self.n_completed += 1
+            self.n_failed += record["outputs"] is None
+            if not future.done():
+                future.set_result({**record, "worker": pid})
+    
+    def _restart_pool(self, pool, reason):
+        """Replace a failed pool (once) and pause dispatch until it is warm."""
+        if pool is not self._pool:
+            return
+        self.failures.append((time.time(), reason))
+        self.pool_restarts += 1
+        self._ready.clear()
+        self._pool = self._new_pool()
+        # A running task cannot be cancelled, so stop the old workers outright
+        # rather than leave a hung solve holding a core
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        asyncio.create_task(self._warm_up(self._pool))
+    
+    async def _warm_up(self, pool):
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(
+                *(loop.run_in_executor(pool, _ping) for _ in range(self.n_workers))
+            )
+        except BrokenProcessPool:
+            # The next batch fails fast and triggers another restart
+            self.failures.append((time.time(), "worker start-up failed"))
+        finally:
+            self._ready.set()
+    
+    def stats(self):
+        """Return queue, throughput and latency statistics."""
+        latencies = np.array(self._latencies)
+        percentiles = (
+            np.percentile(latencies, LATENCY_PERCENTILES) if latencies.size else [None] * 3
+        )
+        return {
+            "queue_depth": self._queue.qsize(),
+            "in_flight": self.in_flight,
+            "completed": self.n_completed,
+            "failed": self.n_failed,
+            "latency_s": {
+                f"p{q}": (None if p is None else float(p))
+                for q, p in zip(LATENCY_PERCENTILES, percentiles)
+            },
+            "mean_batch_size": float(np.mean(self._batch_sizes)) if self._batch_sizes else None,
+        }
+    
+    def health(self):
+        """Return the service status, its reasons, and per-worker activity.
+
+        The status is "degraded" while the pool restarts, while a batch runs
+        past the solve timeout of its cases (a likely hang, before the
+        watchdog fires), or within ``HEALTH_WINDOW_S`` of a pool failure;
+        otherwise "ok".
+        """
+        now = time.time()
+        problems = []
+        if not self._ready.is_set():
+            problems.append("worker pool restarting")
+        overdue = sum(
+            time.monotonic() - start > self.solve_timeout * size
+            for start, size in self._running.values()
+        )
+        if overdue:
+            problems.append(f"{overdue} batch(es) past the solve timeout")
+        problems += [
+            f"{reason} {now - when:.0f} s ago"
+            for when, reason in self.failures if now - when < HEALTH_WINDOW_S
+        ]
+        return {
+            "status": "degraded" if problems else "ok",
+            "problems": problems,
+            "uptime_s": now - self.started,
+            "n_workers": self.n_workers,
+            "busy_workers": len(self._running),
+            "pool_restarts": self.pool_restarts,
+            "timeouts": self.timeouts,
+            "workers": {
+                str(pid): {**worker, "idle_s": now - worker["last_seen"]}
+                for pid, worker in self.workers.items()
+            },
+        }
+    
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "GET" and path == "/health":
+            return 200, self.health()
+        if method == "POST" and path == "/solve":
+            payload = json.loads(body or b"{}")
+            cases = payload["cases"] if isinstance(payload, dict) and "cases" in payload else [payload]
+            errors = {k: e for k, e in enumerate(_case_errors(case) for case in cases) if e}
+            if errors:
+                return 400, {"error": "invalid case", "details": errors}
+            return 200, {"results": await self.solve(cases)}
+        return 404, {"error": f"no route for {method} {path}"}
+    
+    async def _handle(self, reader, writer):
+        try:
+            method, path, _ = (await reader.readline()).decode().split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, val = line.decode().partition(":")
+                headers[name.strip().lower()] = val.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            status, payload = await self._route(method, path, body)
+        except (ValueError, KeyError, asyncio.IncompleteReadError) as err:
+            status, payload = 400, {"error": f"malformed request: {err}"}
+        
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode() + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+def serve(
+    host=SERVICE_HOST, port=SERVICE_PORT, n_workers=None, max_batch=MAX_BATCH,
+    solve_timeout=SOLVE_TIMEOUT_S,
+):
+    """Run the solve service until interrupted."""
+    service = SolveService(n_workers=n_workers, max_batch=max_batch, solve_timeout=solve_timeout)
+    try:
+        asyncio.run(service.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+class SolveClient:
+    """Blocking client for a running ``SolveService``.
+
+    Uses only the standard library, so callers do not import the modelling
+    stack.
+
+    Args:
+        host: Service host.
+        port: Service port.
+        timeout: Socket timeout in s.
+    """
+    
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT, timeout=300.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+    
+    def _request(self, method, path, payload=None):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            body = None if payload is None else json.dumps(payload)
+            connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            data = json.loads(response.read())
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise ValueError(f"{response.status}: {data}")
+        return data
+    
+    def solve(self, case):
+        """Solve one case and return its result dict."""
+        return self._request("POST", "/solve", case)["results"][0]
+    
+    def solve_many(self, cases):
+        """Solve several cases in one request and return their results."""
+        return self._request("POST", "/solve", {"cases": list(cases)})["results"]
+    
+    def stats(self):
+        """Return the service statistics (``/stats``)."""
+        return self._request("GET", "/stats")
+    
+    def health(self):
+        """Return the pool and worker state (``/health``)."""
+        return self._request("GET", "/health")
+    
+    def wait_until_ready(self, timeout=120.0, interval=0.2):
+        """Poll ``/health`` until the service answers.
+
+        Raises:
+            TimeoutError: If the service does not answer within ``timeout``.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.health()
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"No solve service on {self.host}:{self.port}") from None
+                time.sleep(interval)
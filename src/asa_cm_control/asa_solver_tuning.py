@@ -0,0 +1,242 @@
+# To-Do:
+# - Tune per-reactor profiles once the PFR flowsheet solves reliably
+
+
+"""IPOPT option tuning over a library of representative ASA cases.
+
+Every candidate option set is solved on every case of a library, from the
+same initialized point, and ranked by robustness (fraction of optimal solves),
+then by median and tail (90th percentile) solve time. The winner is saved as
+a named profile that ``solve_model(model, profile=name)`` loads.
+
+Two searches are available:
+- ``"grid"``: every option set of the Cartesian product of ``grid``,
+  ``repeats`` solves per case.
+- ``"halving"``: successive halving; all option sets are solved once per
+  case, the better half is kept and solved again, until ``keep`` remain, so
+  most of the solve budget goes to the promising sets.
+
+Trials run in worker processes. Each worker builds and initializes a case the
+first time it needs it and restores the initialized values before every
+trial, so option sets are compared on identical starting points. A case that
+fails to initialize counts as a failed trial for every option set.
+
+Usage:
+    rows = tune_solver_options()
+    save_tuned_profile("asa", rows)
+    solve_model(model, profile="asa")
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+from pyomo.environ import SolverFactory, Var
+from pyomo.opt import check_optimal_termination
+from idaes.core.util.exceptions import InitializationError
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    initialize_model,
+    save_solver_profile,
+    set_operating_conditions,
+)
+
+
+SEARCH_METHODS = ("grid", "halving")
+
+# Representative steady CSTR cases, in the case format of ``asa_cli``
+DEFAULT_CASE_LIBRARY = (
+    {"reactor": "cstr"},
+    {"reactor": "cstr", "temperature": 310.0},
+    {"reactor": "cstr", "temperature": 345.0},
+    {"reactor": "cstr", "flow_mol": 1.5, "volume": 0.5},
+    {"reactor": "cstr", "temperature": 340.0, "flow_mol": 1.0},
+    {
+        "reactor": "cstr",
+        "mole_frac_comp": {
+            "salicylic_acid": 0.22,
+            "acetic_anhydride": 0.74,
+            "sulfuric_acid": 0.02,
+            "water": 0.02,
+        },
+    },
+)
+
+# IPOPT option -> candidate values; linear solvers missing from the IPOPT
+# build fail every trial and rank last
+DEFAULT_OPTION_GRID = {
+    "linear_solver": ["mumps", "ma27", "spral"],
+    "mu_strategy": ["monotone", "adaptive"],
+    "bound_push": [1e-2, 1e-8],
+    "nlp_scaling_method": ["gradient-based", "none"],
+}
+
+# Tail quantile reported next to the median
+TAIL_QUANTILE = 0.9
+
+_WORKER = {}
+
+
+def option_sets(grid=None):
+    """Return the Cartesian product of an option grid as a list of dicts."""
+    grid = grid or DEFAULT_OPTION_GRID
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def _initialized_case(case):
+    key = json.dumps(case, sort_keys=True)
+    if key not in _WORKER:
+        conditions = dict(case)
+        model = build_flowsheet(reactor=conditions.pop("reactor", "cstr"))
+        set_operating_conditions(model, **conditions)
+        try:
+            initialize_model(model)
+        except InitializationError:
+            _WORKER[key] = None
+            return None
+        variables = list(model.component_data_objects(Var, descend_into=True))
+        _WORKER[key] = (model, variables, [var.value for var in variables])
+    return _WORKER[key]
+
+
+def _run_trials(args):
+    """Solve one case with one option set ``repeats`` times.
+
+    Returns:
+        tuple: Option set index, case index, solve times in s and a success
+        flag per repeat.
+    """
+    set_index, options, case_index, case, repeats, time_limit = args
+    initialized = _initialized_case(case)
+    if initialized is None:
+        return set_index, case_index, [float("nan")] * repeats, [False] * repeats
+    model, variables, initial = initialized
+    solver = SolverFactory("ipopt")
+    solver.options.update(options)
+    solver.options["max_cpu_time"] = time_limit
+    
+    times, ok = [], []
+    for _ in range(repeats):
+        for var, val in zip(variables, initial):
+            var.set_value(val, skip_validation=True)
+        start = time.perf_counter()
+        try:
+            results = solver.solve(model, tee=False, load_solutions=False)
+            success = check_optimal_termination(results)
+        except (RuntimeError, ValueError):
+            success = False
+        times.append(time.perf_counter() - start)
+        ok.append(success)
+    return set_index, case_index, times, ok
+
+
+def _run_tasks(tasks, n_workers):
+    if n_workers == 1:
+        return [_run_trials(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        return list(pool.map(_run_trials, tasks))
+
+
+def _summarize(options, trials):
+    times = np.concatenate([t for t, _ in trials])
+    ok = np.concatenate([o for _, o in trials]).astype(bool)
+    solved = times[ok]
+    return {
+        "options": options,
+        "success_rate": float(ok.mean()),
+        "median_s": float(np.median(solved)) if solved.size else float("inf"),
+        "tail_s": float(np.quantile(solved, TAIL_QUANTILE)) if solved.size else float("inf"),
+        "trials": int(ok.size),
+    }
+
+
+def _rank_key(row):
+    return -row["success_rate"], row["median_s"], row["tail_s"]
+
+
+def tune_solver_options(
+    cases=DEFAULT_CASE_LIBRARY,
+    grid=None,
+    search="grid",
+    repeats=3,
+    keep=2,
+    time_limit=30.0,
+    n_workers=None,
+):
+    """Benchmark IPOPT option sets on a case library and rank them.
+
+    Args:
+        cases: Case dicts (``reactor`` plus ``set_operating_conditions``
+            keywords).
+        grid: Mapping of IPOPT option to candidate values. Defaults to
+            ``DEFAULT_OPTION_GRID``.
+        search: One of ``SEARCH_METHODS``.
+        repeats: Solves per case and option set (``"grid"``), or per round
+            (``"halving"``).
+        keep: Option sets left when successive halving stops.
+        time_limit: IPOPT ``max_cpu_time`` per solve, in s.
+        n_workers: Worker processes. ``1`` solves in-process.
+
+    Returns:
+        list: One dict per option set, best first, with ``options``,
+        ``success_rate``, ``median_s``, ``tail_s`` and ``trials``.
+    """
+    if search not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search '{search}'; expected one of {SEARCH_METHODS}.")
+    n_workers = n_workers or os.cpu_count() or 1
+    candidates = dict(enumerate(option_sets(grid)))
+    trials = {set_index: [] for set_index in candidates}
+    
+    def run_round(set_indices, n_repeats):
+        tasks = [
+            (set_index, candidates[set_index], case_index, case, n_repeats, time_limit)
+            for set_index in set_indices
+            for case_index, case in enumerate(cases)
+        ]
+        for set_index, _, times, ok in _run_tasks(tasks, n_workers):
+            trials[set_index].append((times, ok))
+    
+    def ranking(set_indices):
+        rows = {k: _summarize(candidates[k], trials[k]) for k in set_indices}
+        return sorted(set_indices, key=lambda k: _rank_key(rows[k])), rows
+    
+    alive = list(candidates)
+    run_round(alive, repeats if search == "grid" else 1)
+    if search == "halving":
+        while len(alive) > keep:
+            order, _ = ranking(alive)
+            alive = order[: max(keep, len(alive) // 2)]
+            run_round(alive, repeats)
+    
+    # Survivors of the halving rounds first, then the eliminated sets
+    order, rows = ranking(alive)
+    dropped, dropped_rows = ranking([k for k in candidates if k not in alive])
+    return [rows[k] for k in order] + [dropped_rows[k] for k in dropped]
+
+
+def save_tuned_profile(name, rows, directory=None):
+    """Save the best option set of ``tune_solver_options`` as a profile.
+
+    Args:
+        name: Profile name for ``solve_model(profile=name)``.
+        rows: Ranking returned by ``tune_solver_options``.
+        directory: Profile directory. Defaults to ``SOLVER_PROFILE_DIR``.
+
+    Returns:
+        Path: The written file.
+    """
+    best = rows[0]
+    return save_solver_profile(
+        name,
+        best["options"],
+        directory,
+        success_rate=best["success_rate"],
+        median_s=best["median_s"],
+        tail_s=best["tail_s"],
+        trials=best["trials"],
+    )
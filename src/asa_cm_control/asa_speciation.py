@@ -0,0 +1,180 @@
+# To-Do:
+# - Warm-start the substitution loop from the previous operating point in sweeps
+
+
+"""Initialization and solution of flowsheets with grey-box H+ speciation.
+
+With ``build_flowsheet(hplus_activity="greybox")`` every reaction block holds
+a PyNumero ``ExternalGreyBoxBlock`` mapping temperature, ``x_H2SO4`` and
+``gamma_H2SO4`` to ``a_hplus``. Grey-box blocks cannot be written to an NL
+file, so:
+- ``initialize_speciated_model`` initializes the reactor with ``a_hplus``
+  fixed at the value from the speciation Newton loop.
+- ``solve_speciated_model`` solves the model with one of three methods:
+  - ``"simultaneous"``: the grey-box NLP with cyipopt. This needs cyipopt
+    and the PyNumero ASL library (``idaes get-extensions``).
+  - ``"compact"``: the grey-box blocks are replaced by their
+    ``speciation_cubic`` equations, one equation in ``a_hplus`` per reaction
+    block instead of the four speciation equilibria, and the whole model is
+    solved at once by IPOPT.
+  - ``"substitution"``: IPOPT solves at fixed ``a_hplus`` alternate with
+    speciation updates until ``a_hplus`` stops changing.
+"""
+
+import time
+from contextlib import contextmanager
+
+from pyomo.common.dependencies import attempt_import
+from pyomo.environ import SolverFactory, value
+from pyomo.opt import check_optimal_termination
+from idaes.core.util.exceptions import ConfigurationError
+
+from asa_cm_control.asa_process_flowsheet import get_reactor, solve_model
+
+cyipopt, cyipopt_available = attempt_import("cyipopt")
+pynumero_asl, _ = attempt_import("pyomo.contrib.pynumero.asl")
+
+SPECIATION_SOLVE_METHODS = ("auto", "simultaneous", "compact", "substitution")
+
+
+def simultaneous_available():
+    """Return True if cyipopt and the PyNumero ASL library are installed."""
+    return bool(cyipopt_available) and pynumero_asl.AmplInterface.available()
+
+
+def speciation_blocks(model):
+    """Return the reaction blocks that carry a grey-box speciation block."""
+    control_volume = get_reactor(model).control_volume
+    return [block for block in control_volume.reactions.values() if hasattr(block, "speciation")]
+
+
+@contextmanager
+def fixed_hplus_activity(model):
+    """Deactivate the grey-box blocks and fix ``a_hplus`` at its speciation value.
+
+    The grey-box inputs stay tied to the state by their link constraints, so
+    the remaining model is square and can be handed to IPOPT.
+    """
+    blocks = speciation_blocks(model)
+    for block in blocks:
+        block.speciation.deactivate()
+        block.a_hplus_speciation.fix(block.initialize_speciation())
+    try:
+        yield blocks
+    finally:
+        for block in blocks:
+            block.a_hplus_speciation.unfix()
+            block.speciation.activate()
+
+
+@contextmanager
+def compact_speciation(model):
+    """Replace the grey-box blocks by their ``speciation_cubic`` equations.
+
+    The link constraints are deactivated with the grey-box blocks, so the
+    cubic ties ``a_hplus`` to the state directly and the model stays square.
+    """
+    blocks = speciation_blocks(model)
+    links = ("speciation_temperature_link", "speciation_x_link", "speciation_gamma_link")
+    for block in blocks:
+        block.initialize_speciation()
+        block.speciation.deactivate()
+        for name in links:
+            getattr(block, name).deactivate()
+        block.speciation_cubic.activate()
+    try:
+        yield blocks
+    finally:
+        for block in blocks:
+            block.speciation_cubic.deactivate()
+            for name in links:
+                getattr(block, name).activate()
+            block.speciation.activate()
+
+
+def initialize_speciated_model(model):
+    """Initialize a grey-box speciation flowsheet at fixed ``a_hplus``."""
+    with fixed_hplus_activity(model):
+        get_reactor(model).initialize()
+
+
+def _substitution_solve(model, tol, max_iter, tee):
+    """Alternate IPOPT solves at fixed ``a_hplus`` with speciation updates.
+
+    An update is kept only if another solve follows it, so the model is left
+    at the last IPOPT solution and the ``a_hplus`` values it was solved at.
+
+    Returns:
+        tuple: ``(results, iterations, change, converged)``; ``converged`` is
+        True if the last solve was optimal and the update it gave changed
+        ``a_hplus`` by less than ``tol`` (relative).
+    """
+    change, converged = float("inf"), False
+    with fixed_hplus_activity(model) as blocks:
+        for iteration in range(1, max_iter + 1):
+            results = solve_model(model, tee=tee)
+            if not check_optimal_termination(results):
+                break
+            solved_at = [value(block.a_hplus_speciation) for block in blocks]
+            change = 0.0
+            for block, previous in zip(blocks, solved_at):
+                block.a_hplus_speciation.fix(block.initialize_speciation())
+                change = max(change, abs(value(block.a_hplus_speciation) - previous) / max(previous, 1e-12))
+            converged = change < tol
+            if converged or iteration == max_iter:
+                for block, previous in zip(blocks, solved_at):
+                    block.a_hplus_speciation.fix(previous)
+                break
+    return results, iteration, change, converged
+
+
+def solve_speciated_model(model, method="auto", tol=1e-8, max_iter=30, tee=False):
+    """Solve a flowsheet built with ``hplus_activity="greybox"``.
+
+    Args:
+        model: Initialized model (see ``initialize_speciated_model``).
+        method: ``"simultaneous"`` (cyipopt on the grey-box NLP),
+            ``"compact"`` (IPOPT on the model with the reduced speciation
+            equation), ``"substitution"`` (IPOPT at fixed ``a_hplus``,
+            repeated), or ``"auto"`` (simultaneous if cyipopt and the
+            PyNumero ASL library are installed, otherwise compact).
+        tol: Relative ``a_hplus`` change at which substitution stops.
+        max_iter: Substitution iteration limit.
+        tee: Stream solver output.
+
+    Returns:
+        dict: ``method``, ``status``, ``converged`` (optimal, and for
+        substitution also within ``tol``), ``iterations`` (IPOPT solves),
+        ``a_hplus_change`` and ``time_s``.
+    """
+    if method not in SPECIATION_SOLVE_METHODS:
+        raise ConfigurationError(
+            f"Unknown speciation solve method '{method}'; expected one of {SPECIATION_SOLVE_METHODS}."
+        )
+    if method == "auto":
+        method = "simultaneous" if simultaneous_available() else "compact"
+    if method == "simultaneous" and not simultaneous_available():
+        raise ConfigurationError(
+            "The simultaneous grey-box solve requires cyipopt and the PyNumero ASL library."
+        )
+    
+    start = time.perf_counter()
+    if method == "simultaneous":
+        results = SolverFactory("cyipopt").solve(model, tee=tee)
+        iterations, change = 1, 0.0
+        converged = check_optimal_termination(results)
+    elif method == "compact":
+        with compact_speciation(model):
+            results = solve_model(model, tee=tee)
+        iterations, change = 1, 0.0
+        converged = check_optimal_termination(results)
+    else:
+        results, iterations, change, converged = _substitution_solve(model, tol, max_iter, tee)
+    return {
+        "method": method,
+        "status": str(results.solver.termination_condition),
+        "converged": converged,
+        "iterations": iterations,
+        "a_hplus_change": change,
+        "time_s": time.perf_counter() - start,
+    }
@@ -0,0 +1,266 @@
+# To-Do:
+# - Stack PFR cases once the PFR flowsheet solves reliably
+
+
+"""Independent CSTR cases solved K at a time in one stacked NLP.
+
+For a model as small as the ASA CSTR, writing the NL file, starting IPOPT and
+loading the result cost about as much as the Newton iterations. This module
+stacks K copies ``model.fs.case[k].cstr`` of the CSTR in one model, sharing
+the thermophysical and reaction parameter blocks as in ``asa_scenarios``, and
+solves one batch of cases per IPOPT call. The copies share no equations, so
+the stacked KKT system is block diagonal and a copy that satisfies its own
+equations is a solution of its case, whatever happens to the others.
+
+Every copy starts from one initialized reference CSTR and is warm-started
+from its previous case afterwards. When the stacked solve does not converge,
+copies whose equations are satisfied are kept; only the remaining cases are
+re-solved one by one from the reference point, with a fresh
+``cstr.initialize()`` as the last resort.
+
+Usage:
+    records = solve_stacked_cases(cases, n_copies=8)
+"""
+
+import time
+
+from pyomo.environ import ConcreteModel, Constraint, RangeSet, Var, value
+from pyomo.opt import check_optimal_termination
+from idaes.core import FlowsheetBlock
+from idaes.core.util.exceptions import InitializationError
+from idaes.models.unit_models import CSTR
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    feed_mole_fractions,
+    fix_inlet,
+    set_operating_conditions,
+    solve_model,
+)
+from asa_cm_control.props.asa_thermo_property_package import ThermoParameterBlock
+from asa_cm_control.props.asa_reaction_property_package import ASAReactionParameterBlock
+
+
+# Largest equality residual of a copy accepted after a failed stacked solve
+RESIDUAL_TOL = 1e-6
+
+# Keyword defaults of ``set_operating_conditions`` for fields a case omits
+CASE_DEFAULTS = {
+    "flow_mol": 0.5,
+    "temperature": 325.0,
+    "pressure": 101325,
+    "mole_frac_comp": None,
+    "volume": 1,
+}
+
+
+def build_stacked_flowsheet(n_copies):
+    """Build one model with ``n_copies`` independent CSTR copies.
+
+    Args:
+        n_copies: Number of copies K.
+
+    Returns:
+        ConcreteModel: Model with ``fs.case[k].cstr`` for k = 1..K and the
+        shared ``fs.thermo_params`` and ``fs.reaction_params``.
+    """
+    model = ConcreteModel()
+    model.fs = FlowsheetBlock(dynamic=False)
+    
+    model.fs.thermo_params = ThermoParameterBlock()
+    model.fs.reaction_params = ASAReactionParameterBlock(
+        property_package=model.fs.thermo_params,
+    )
+    
+    model.fs.case_set = RangeSet(n_copies)
+    model.fs.case = FlowsheetBlock(model.fs.case_set, dynamic=False)
+    for k in model.fs.case_set:
+        model.fs.case[k].cstr = CSTR(
+            property_package=model.fs.thermo_params,
+            reaction_package=model.fs.reaction_params,
+        )
+    return model
+
+
+def _free_vars(block):
+    return [var for var in block.component_data_objects(Var, descend_into=True) if not var.fixed]
+
+
+class StackedCaseSolver:
+    """Solve batches of CSTR cases on a stacked model of K copies.
+
+    Args:
+        n_copies: Copies K, i.e. the largest batch per IPOPT call.
+        reference: Case the reference CSTR is initialized at. Defaults to the
+            nominal operating point.
+        options: IPOPT options of the stacked solves; the per-case fallback
+            solves use the defaults.
+    """
+    
+    def __init__(self, n_copies, reference=None, options=None):
+        self.n_copies = n_copies
+        self.options = options
+        self.model = build_stacked_flowsheet(n_copies)
+        
+        reference_model = build_flowsheet()
+        set_operating_conditions(reference_model, **(reference or {}))
+        reference_model.fs.cstr.initialize()
+        self._reference = [var.value for var in _free_vars(reference_model.fs.cstr)]
+        
+        self._copies = [self.model.fs.case[k].cstr for k in self.model.fs.case_set]
+        for cstr in self._copies:
+            set_copy_conditions(cstr, {})
+            self.reset_copy(cstr)
+    
+    def reset_copy(self, cstr):
+        """Restore the reference (initialized) values in one copy."""
+        for var, val in zip(_free_vars(cstr), self._reference):
+            var.set_value(val, skip_validation=True)
+    
+    def solve_batch(self, cases):
+        """Solve up to K cases in one IPOPT call, with per-case fallback.
+
+        Copies beyond ``len(cases)`` are deactivated for the call.
+
+        Args:
+            cases: Keyword dicts for ``set_operating_conditions``.
+
+        Returns:
+            list: One record per case: ``status``, ``solve_s`` (time of the
+            batch for cases of the stacked solve, own time for fallback
+            solves), ``outputs`` (None on failure) and ``fallback``.
+        """
+        if len(cases) > self.n_copies:
+            raise ValueError(f"{len(cases)} cases do not fit into {self.n_copies} copies.")
+        active = self._copies[: len(cases)]
+        for k, cstr in enumerate(self._copies):
+            if k < len(cases):
+                cstr.parent_block().activate()
+            else:
+                cstr.parent_block().deactivate()
+        for cstr, case in zip(active, cases):
+            set_copy_conditions(cstr, case)
+        
+        start = time.perf_counter()
+        try:
+            converged = check_optimal_termination(
+                solve_model(self.model, tee=False, options=self.options)
+            )
+        except (RuntimeError, ValueError):
+            converged = False
+        batch_s = time.perf_counter() - start
+        
+        records = []
+        for cstr in active:
+            if converged or copy_residual(cstr) < RESIDUAL_TOL:
+                records.append(
+                    {
+                        "status": "optimal" if converged else "converged",
+                        "solve_s": batch_s,
+                        "outputs": copy_outputs(cstr),
+                        "fallback": False,
+                    }
+                )
+            else:
+                records.append(self._fallback(cstr))
+        for cstr in self._copies:
+            cstr.parent_block().activate()
+        return records
+    
+    def _fallback(self, cstr):
+        start = time.perf_counter()
+        self.reset_copy(cstr)
+        results = solve_model(cstr, tee=False)
+        if not check_optimal_termination(results):
+            try:
+                cstr.initialize()
+                results = solve_model(cstr, tee=False)
+            except InitializationError:
+                pass
+        ok = check_optimal_termination(results)
+        if not ok:
+            # Do not warm-start the next case from a failed point
+            self.reset_copy(cstr)
+        return {
+            "status": str(results.solver.termination_condition),
+            "solve_s": time.perf_counter() - start,
+            "outputs": copy_outputs(cstr) if ok else None,
+            "fallback": True,
+        }
+    
+    def solve(self, cases):
+        """Solve any number of cases in batches of K.
+
+        Returns:
+            list: One ``solve_batch`` record per case, in order.
+        """
+        records = []
+        for start in range(0, len(cases), self.n_copies):
+            records += self.solve_batch(cases[start:start + self.n_copies])
+        return records
+
+
+def set_copy_conditions(cstr, case):
+    """Fix the inlet and volume of one CSTR copy.
+
+    Args:
+        cstr: CSTR of one copy.
+        case: ``set_operating_conditions`` keywords; omitted fields take the
+            values of ``CASE_DEFAULTS``.
+    """
+    conditions = {**CASE_DEFAULTS, **case}
+    fix_inlet(
+        cstr.inlet,
+        0,
+        conditions["flow_mol"],
+        conditions["temperature"],
+        conditions["pressure"],
+        feed_mole_fractions(
+            conditions["mole_frac_comp"], components=cstr.config.property_package.component_list
+        ),
+    )
+    cstr.volume.fix(conditions["volume"])
+
+
+def copy_residual(cstr):
+    """Return the largest absolute residual of the active equalities of a copy.
+
+    Evaluation errors count as an infinite residual.
+    """
+    worst = 0.0
+    for con in cstr.component_data_objects(ctype=Constraint, active=True, descend_into=True):
+        if not con.equality:
+            continue
+        try:
+            worst = max(worst, abs(value(con.body) - value(con.upper)))
+        except (ValueError, ZeroDivisionError, OverflowError):
+            return float("inf")
+    return worst
+
+
+def copy_outputs(cstr):
+    """Return the outlet flow, temperature and mole fractions of a copy."""
+    outlet = cstr.outlet
+    return {
+        "flow_mol": value(outlet.flow_mol[0]),
+        "temperature": value(outlet.temperature[0]),
+        **{
+            f"x_{j}": value(outlet.mole_frac_comp[0, j])
+            for j in cstr.config.property_package.component_list
+        },
+    }
+
+
+def solve_stacked_cases(cases, n_copies=8, reference=None, options=None):
+    """Solve independent CSTR cases K at a time in stacked NLPs.
+
+    Args:
+        cases: Keyword dicts for ``set_operating_conditions``.
+        n_copies: Copies K per stacked model.
+        reference: Case the shared starting point is initialized at.
+        options: IPOPT options of the stacked solves.
+
+    Returns:
+        list: One record per case (see ``StackedCaseSolver.solve_batch``).
+    """
+    return StackedCaseSolver(n_copies, reference=reference, options=options).solve(cases)
@@ -0,0 +1,512 @@
+# To-Do:
+# - Add an arrival-cost covariance update instead of fixed prior weights
+
+
+"""Moving-horizon estimation for the dynamic ASA CSTR flowsheet.
+
+This module estimates the outlet composition and the drifting catalytic
+activity of the aspirin synthesis reaction (a multiplier on
+``Acat[r1_aspirin_synthesis]``) from noisy outlet temperature, flow and
+composition measurements.
+
+Temperature and flow alone do not identify the activity at nominal
+conditions: the synthesis is equimolar, so the outlet flow does not depend
+on it, and conversion is nearly complete, so the outlet temperature moves by
+less than a kelvin between activities of 0.05 and 1. The residual salicylic
+acid fraction scales roughly with the inverse of the activity, so it is
+measured by default (``measured_components``), with relative noise.
+
+The estimator owns a single discretized dynamic flowsheet whose time points
+are the samples of a fixed-size window. Sliding the window shifts mutable
+measurement parameters, fixed inlet values and the previous solution in place,
+so no model is rebuilt between updates and every solve is warm-started.
+
+``simulate_measurements`` generates synthetic plant data with the same model
+equations for testing.
+"""
+
+import time as _time
+
+import numpy as np
+from pyomo.environ import (
+    Block,
+    Constraint,
+    Objective,
+    Param,
+    Set,
+    Suffix,
+    SolverFactory,
+    Var,
+    units as pyunits,
+    value,
+)
+from pyomo.dae.flatten import flatten_dae_components
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_dynamic_flowsheet,
+    fix_initial_steady_state,
+    initialize_dynamic_flowsheet,
+    set_dynamic_operating_conditions,
+    solve_model,
+)
+
+
+# Outlet mole fractions measured by default; see the module docstring
+DEFAULT_MEASURED_COMPONENTS = ("salicylic_acid",)
+
+DEFAULT_MHE_SOLVER_OPTIONS = {
+    "warm_start_init_point": "yes",
+    "warm_start_bound_push": 1e-8,
+    "warm_start_mult_bound_push": 1e-8,
+    "mu_init": 1e-4,
+}
+
+
+def _profile_value(profile, k):
+    if profile is None or np.isscalar(profile):
+        return profile
+    return profile[k]
+
+
+class MovingHorizonEstimator:
+    """Fixed-window moving-horizon estimator built on the dynamic CSTR.
+
+    Decision variables are the liquid state at the start of the window and the
+    activity multiplier ``fs.mhe.activity``
+    (``Acat[r1] = activity * Acat_nom[r1]`` for the aspirin synthesis),
+    which is held constant over one window. The objective is a weighted
+    least-squares fit of outlet temperature, flow and the relative error of
+    the measured mole fractions, plus an arrival cost that ties the window
+    start to the previous estimate.
+
+    Args:
+        window: Number of sample intervals in the estimation window.
+        sample_time: Sampling period in seconds.
+        sigma_temperature: Temperature measurement standard deviation in K.
+        sigma_flow: Flow measurement standard deviation in mol/s.
+        sigma_activity: Prior standard deviation of the activity multiplier.
+        sigma_mole_frac: Relative prior standard deviation of the initial
+            mole fractions (relative, since they span several decades).
+        measured_components: Components whose outlet mole fraction is
+            measured.
+        sigma_composition: Relative standard deviation of the mole fraction
+            measurements.
+        solver_options: Optional IPOPT options overriding the warm-start
+            defaults in ``DEFAULT_MHE_SOLVER_OPTIONS``.
+        **operating_conditions: Nominal inputs passed to
+            ``set_dynamic_operating_conditions``.
+    """
+    
+    def __init__(
+        self,
+        window=12,
+        sample_time=300.0,
+        sigma_temperature=0.5,
+        sigma_flow=0.005,
+        sigma_activity=0.2,
+        sigma_mole_frac=0.02,
+        measured_components=DEFAULT_MEASURED_COMPONENTS,
+        sigma_composition=0.05,
+        solver_options=None,
+        **operating_conditions,
+    ):
+        self.window = window
+        self.measured_components = tuple(measured_components)
+        self.sample_time = sample_time
+        self.solver = SolverFactory("ipopt")
+        self.solver.options.update(DEFAULT_MHE_SOLVER_OPTIONS)
+        if solver_options is not None:
+            self.solver.options.update(solver_options)
+        
+        self.model = build_dynamic_flowsheet(horizon=window * sample_time, nfe=window)
+        set_dynamic_operating_conditions(self.model, **operating_conditions)
+        fix_initial_steady_state(self.model)
+        initialize_dynamic_flowsheet(self.model)
+        
+        self._times = list(self.model.fs.time)
+        _, self._time_slices = flatten_dae_components(
+            self.model.fs, self.model.fs.time, Var
+        )
+        self._build_estimation_block(
+            sigma_temperature, sigma_flow, sigma_activity, sigma_mole_frac, sigma_composition
+        )
+        
+        self.current_time = 0.0
+        self.n_updates = 0
+        self.latency_log = []
+        self.last_results = None
+    
+    
+    def _build_estimation_block(
+        self, sigma_temperature, sigma_flow, sigma_activity, sigma_mole_frac, sigma_composition
+    ):
+        """Attach measurement data, priors, decision variables and objective."""
+        fs = self.model.fs
+        time = fs.time
+        t0 = time.first()
+        outlet = fs.cstr.control_volume.properties_out
+        components = fs.thermo_params.component_list
+        params = fs.reaction_params
+        
+        fs.mhe = Block()
+        mhe = fs.mhe
+        
+        mhe.meas_temperature = Param(
+            time,
+            mutable=True,
+            initialize={t: value(outlet[t].temperature) for t in time},
+            units=pyunits.K,
+            doc="Measured outlet temperature in the window",
+        )
+        mhe.meas_flow_mol = Param(
+            time,
+            mutable=True,
+            initialize={t: value(outlet[t].flow_mol) for t in time},
+            units=pyunits.mol / pyunits.s,
+            doc="Measured outlet molar flow in the window",
+        )
+        mhe.measured_components = Set(initialize=self.measured_components)
+        mhe.meas_mole_frac_comp = Param(
+            time,
+            mhe.measured_components,
+            mutable=True,
+            initialize={
+                (t, j): value(outlet[t].mole_frac_comp[j])
+                for t in time
+                for j in self.measured_components
+            },
+            doc="Measured outlet mole fractions in the window",
+        )
+        
+        mhe.prior_activity = Param(mutable=True, initialize=1.0)
+        mhe.prior_temperature = Param(
+            mutable=True,
+            initialize=value(outlet[t0].temperature),
+            units=pyunits.K,
+        )
+        mhe.prior_flow_mol = Param(
+            mutable=True,
+            initialize=value(outlet[t0].flow_mol),
+            units=pyunits.mol / pyunits.s,
+        )
+        mhe.prior_mole_frac_comp = Param(
+            components,
+            mutable=True,
+            initialize={j: value(outlet[t0].mole_frac_comp[j]) for j in components},
+        )
+        
+        mhe.weight_temperature = Param(mutable=True, initialize=sigma_temperature**-2)
+        mhe.weight_flow = Param(mutable=True, initialize=sigma_flow**-2)
+        mhe.weight_activity = Param(mutable=True, initialize=sigma_activity**-2)
+        mhe.weight_mole_frac = Param(mutable=True, initialize=sigma_mole_frac**-2)
+        mhe.weight_composition = Param(mutable=True, initialize=sigma_composition**-2)
+        
+        mhe.activity = Var(
+            initialize=1.0,
+            bounds=(1e-3, 10.0),
+            doc="Catalytic activity multiplier on Acat[r1_aspirin_synthesis]",
+        )
+        mhe.acat_nominal = Param(
+            mutable=True,
+            initialize=value(params.Acat["r1_aspirin_synthesis"]),
+            units=pyunits.mol / pyunits.m**3 / pyunits.s,
+        )
+        params.Acat["r1_aspirin_synthesis"].unfix()
+        mhe.acat_link = Constraint(expr=params.Acat["r1_aspirin_synthesis"] == mhe.acat_nominal * mhe.activity)
+        
+        # Release the initial liquid state so it is estimated with an arrival cost
+        control_volume = fs.cstr.control_volume
+        control_volume.energy_accumulation[t0, "liquid"].unfix()
+        for component in components:
+            control_volume.material_accumulation[t0, "liquid", component].unfix()
+        
+        def objective_rule(b):
+            fit = sum(
+                b.weight_temperature
+                * ((outlet[t].temperature - b.meas_temperature[t]) / pyunits.K) ** 2
+                + b.weight_flow
+                * ((outlet[t].flow_mol - b.meas_flow_mol[t]) * pyunits.s / pyunits.mol) ** 2
+                + b.weight_composition
+                * sum(
+                    ((outlet[t].mole_frac_comp[j] - b.meas_mole_frac_comp[t, j]) / b.meas_mole_frac_comp[t, j])
+                    ** 2
+                    for j in b.measured_components
+                )
+                for t in time
+            )
+            arrival = (
+                b.weight_activity * (b.activity - b.prior_activity) ** 2
+                + b.weight_temperature
+                * ((outlet[t0].temperature - b.prior_temperature) / pyunits.K) ** 2
+                + b.weight_flow
+                * ((outlet[t0].flow_mol - b.prior_flow_mol) * pyunits.s / pyunits.mol) ** 2
+                + b.weight_mole_frac
+                * sum(
+                    ((outlet[t0].mole_frac_comp[j] - b.prior_mole_frac_comp[j]) / b.prior_mole_frac_comp[j])
+                    ** 2
+                    for j in components
+                )
+            )
+            return fit + arrival
+        
+        mhe.objective = Objective(rule=objective_rule)
+        
+        self.model.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
+        self.model.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
+        self.model.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
+        self.model.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
+        self.model.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
+    
+    
+    def _shift_window(self):
+        """Shift data, inputs and the previous solution one sample back in time."""
+        mhe = self.model.fs.mhe
+        inlet = self.model.fs.cstr.inlet
+        times = self._times
+        
+        for t_old, t_new in zip(times[:-1], times[1:]):
+            mhe.meas_temperature[t_old] = value(mhe.meas_temperature[t_new])
+            mhe.meas_flow_mol[t_old] = value(mhe.meas_flow_mol[t_new])
+            for j in mhe.measured_components:
+                mhe.meas_mole_frac_comp[t_old, j] = value(mhe.meas_mole_frac_comp[t_new, j])
+            inlet.flow_mol[t_old].fix(value(inlet.flow_mol[t_new]))
+            inlet.temperature[t_old].fix(value(inlet.temperature[t_new]))
+        
+        for var in self._time_slices:
+            for t_old, t_new in zip(times[:-1], times[1:]):
+                if not var[t_old].fixed:
+                    var[t_old].set_value(var[t_new].value, skip_validation=True)
+    
+    
+    def _update_priors(self):
+        """Use the current estimate at the second window point as the new prior."""
+        mhe = self.model.fs.mhe
+        state = self.model.fs.cstr.control_volume.properties_out[self._times[1]]
+        mhe.prior_activity = value(mhe.activity)
+        mhe.prior_temperature = value(state.temperature)
+        mhe.prior_flow_mol = value(state.flow_mol)
+        for component in self.model.fs.thermo_params.component_list:
+            mhe.prior_mole_frac_comp[component] = value(state.mole_frac_comp[component])
+    
+    
+    def update(
+        self,
+        temperature,
+        flow_mol,
+        inlet_temperature=None,
+        inlet_flow_mol=None,
+        mole_frac_comp=None,
+    ):
+        """Slide the window by one sample, add a measurement and re-estimate.
+
+        Args:
+            temperature: Measured outlet temperature in K.
+            flow_mol: Measured outlet molar flow in mol/s.
+            inlet_temperature: Inlet temperature applied over the new sample
+                interval. Defaults to the last value in the window.
+            inlet_flow_mol: Inlet molar flow applied over the new sample
+                interval. Defaults to the last value in the window.
+            mole_frac_comp: Measured outlet mole fractions; must contain
+                every component in ``measured_components``.
+
+        Returns:
+            dict: Current estimate as returned by ``estimate``.
+
+        Raises:
+            ValueError: If a measured component is missing.
+        """
+        missing = [j for j in self.measured_components if j not in (mole_frac_comp or {})]
+        if missing:
+            raise ValueError(f"Missing mole fraction measurements for {missing}.")
+        start = _time.perf_counter()
+        mhe = self.model.fs.mhe
+        inlet = self.model.fs.cstr.inlet
+        t_end = self._times[-1]
+        
+        if self.n_updates > 0:
+            self._update_priors()
+        self._shift_window()
+        
+        mhe.meas_temperature[t_end] = temperature
+        mhe.meas_flow_mol[t_end] = flow_mol
+        for j in self.measured_components:
+            mhe.meas_mole_frac_comp[t_end, j] = mole_frac_comp[j]
+        if inlet_temperature is not None:
+            inlet.temperature[t_end].fix(inlet_temperature)
+        if inlet_flow_mol is not None:
+            inlet.flow_mol[t_end].fix(inlet_flow_mol)
+        
+        shifted = _time.perf_counter()
+        self.last_results = self.solver.solve(self.model, tee=False, load_solutions=True)
+        solved = _time.perf_counter()
+        
+        # Carry bound multipliers forward for the next warm start
+        self.model.ipopt_zL_in.update(self.model.ipopt_zL_out)
+        self.model.ipopt_zU_in.update(self.model.ipopt_zU_out)
+        
+        self.n_updates += 1
+        self.current_time += self.sample_time
+        self.latency_log.append(
+            {
+                "update": self.n_updates,
+                "shift_s": shifted - start,
+                "solve_s": solved - shifted,
+                "total_s": _time.perf_counter() - start,
+                "termination": str(self.last_results.solver.termination_condition),
+            }
+        )
+        return self.estimate()
+    
+    
+    def estimate(self):
+        """Return the estimate at the most recent sample in the window.
+
+        Returns:
+            dict: Time, activity multiplier, ``Acat[r1_aspirin_synthesis]``
+            and outlet state.
+        """
+        fs = self.model.fs
+        state = fs.cstr.control_volume.properties_out[self._times[-1]]
+        return {
+            "time": self.current_time,
+            "activity": value(fs.mhe.activity),
+            "acat_1": value(fs.reaction_params.Acat["r1_aspirin_synthesis"]),
+            "temperature": value(state.temperature),
+            "flow_mol": value(state.flow_mol),
+            "mole_frac_comp": {
+                j: value(state.mole_frac_comp[j]) for j in fs.thermo_params.component_list
+            },
+        }
+    
+    
+    def latency_statistics(self):
+        """Summarize per-update latencies recorded so far.
+
+        Returns:
+            dict: For ``total_s``, ``solve_s`` and ``shift_s``, the mean,
+            median, 95th percentile and maximum in seconds, plus the update
+            count.
+        """
+        stats = {"count": len(self.latency_log)}
+        if not self.latency_log:
+            return stats
+        for key in ("total_s", "solve_s", "shift_s"):
+            samples = np.array([entry[key] for entry in self.latency_log])
+            stats[key] = {
+                "mean": float(samples.mean()),
+                "median": float(np.median(samples)),
+                "p95": float(np.percentile(samples, 95)),
+                "max": float(samples.max()),
+            }
+        return stats
+
+
+def simulate_measurements(
+    n_samples,
+    sample_time=300.0,
+    activity=1.0,
+    inlet_temperature=None,
+    inlet_flow_mol=None,
+    sigma_temperature=0.5,
+    sigma_flow=0.005,
+    sigma_composition=0.05,
+    seed=0,
+    **operating_conditions,
+):
+    """Generate synthetic noisy measurements from the dynamic CSTR.
+
+    The plant is simulated one sample interval at a time with a single-element
+    copy of the estimator model, starting from steady state at the first
+    activity value. Each step carries the independent liquid holdups (all but
+    the one the fixed volume determines) and the outlet flow forward as the
+    next initial condition.
+
+    Args:
+        n_samples: Number of samples to generate.
+        sample_time: Sampling period in seconds.
+        activity: Scalar or sequence of ``Acat[r1_aspirin_synthesis]`` multipliers per sample.
+        inlet_temperature: Optional scalar or sequence of inlet temperatures.
+        inlet_flow_mol: Optional scalar or sequence of inlet molar flows.
+        sigma_temperature: Temperature noise standard deviation in K.
+        sigma_flow: Flow noise standard deviation in mol/s.
+        sigma_composition: Relative noise standard deviation of the mole
+            fractions.
+        seed: Seed for the noise generator.
+        **operating_conditions: Nominal inputs passed to
+            ``set_dynamic_operating_conditions``.
+
+    Returns:
+        list: One dict per sample with the noisy measurements, the applied
+        inputs and the true outlet state and activity.
+    """
+    rng = np.random.default_rng(seed)
+    model = build_dynamic_flowsheet(horizon=sample_time, nfe=1)
+    set_dynamic_operating_conditions(model, **operating_conditions)
+    
+    fs = model.fs
+    params = fs.reaction_params
+    control_volume = fs.cstr.control_volume
+    components = fs.thermo_params.component_list
+    t0, t1 = fs.time.first(), fs.time.last()
+    acat_nominal = value(params.Acat["r1_aspirin_synthesis"])
+    
+    params.Acat["r1_aspirin_synthesis"].fix(acat_nominal * _profile_value(activity, 0))
+    fix_initial_steady_state(model)
+    initialize_dynamic_flowsheet(model)
+    _, time_slices = flatten_dae_components(fs, fs.time, Var)
+    # The fixed volume ties the liquid holdups together, so one component
+    # holdup (the largest) is left for the volume constraint to determine
+    volume_component = max(
+        components, key=lambda j: value(control_volume.material_holdup[t0, "liquid", j])
+    )
+    
+    samples = []
+    for k in range(n_samples):
+        params.Acat["r1_aspirin_synthesis"].fix(acat_nominal * _profile_value(activity, k))
+        for t in (t0, t1):
+            if inlet_temperature is not None:
+                fs.cstr.inlet.temperature[t].fix(_profile_value(inlet_temperature, k))
+            if inlet_flow_mol is not None:
+                fs.cstr.inlet.flow_mol[t].fix(_profile_value(inlet_flow_mol, k))
+        
+        solve_model(model, tee=False)
+        
+        state = control_volume.properties_out[t1]
+        samples.append(
+            {
+                "time": (k + 1) * sample_time,
+                "inlet_temperature": value(fs.cstr.inlet.temperature[t1]),
+                "inlet_flow_mol": value(fs.cstr.inlet.flow_mol[t1]),
+                "temperature": value(state.temperature)
+                + rng.normal(0.0, sigma_temperature),
+                "flow_mol": value(state.flow_mol) + rng.normal(0.0, sigma_flow),
+                "mole_frac_comp": {
+                    j: value(state.mole_frac_comp[j]) * (1 + rng.normal(0.0, sigma_composition))
+                    for j in components
+                },
+                "true_activity": _profile_value(activity, k),
+                "true_temperature": value(state.temperature),
+                "true_flow_mol": value(state.flow_mol),
+                "true_mole_frac_comp": {j: value(state.mole_frac_comp[j]) for j in components},
+            }
+        )
+        
+        # Carry the end-of-interval state forward as the next initial
+        # condition: the independent holdups, and the outlet flow so the t0
+        # balances determine the t0 accumulations
+        for var in time_slices:
+            if not var[t0].fixed:
+                var[t0].set_value(var[t1].value, skip_validation=True)
+        control_volume.energy_accumulation[t0, "liquid"].unfix()
+        control_volume.energy_holdup[t0, "liquid"].fix(
+            value(control_volume.energy_holdup[t1, "liquid"])
+        )
+        for component in components:
+            control_volume.material_accumulation[t0, "liquid", component].unfix()
+            if component != volume_component:
+                control_volume.material_holdup[t0, "liquid", component].fix(
+                    value(control_volume.material_holdup[t1, "liquid", component])
+                )
+        control_volume.properties_out[t0].flow_mol.fix(value(control_volume.properties_out[t1].flow_mol))
+    
+    return samples
@@ -0,0 +1,632 @@
+# To-Do:
+# - Add adaptive resampling where held-out error is largest
+
+
+"""Fast data-driven surrogates of the steady-state ASA CSTR.
+
+This module provides a pipeline that:
+- Samples the operating space of ``set_operating_conditions`` with a Latin
+  hypercube design (inlet temperature, flow, reactor volume and feed
+  composition).
+- Solves the samples in parallel, each worker reusing one built flowsheet and
+  warm-starting from its previous sample.
+- Fits a compact surrogate (total-degree polynomial or a small tanh MLP) and
+  reports held-out errors.
+
+Surrogates are plain NumPy evaluators suitable for batched real-time queries,
+can be saved to and loaded from JSON, and can be embedded in a Pyomo model as
+algebraic constraints in place of the full CSTR.
+"""
+
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.stats import qmc
+from pyomo.environ import Block, ConcreteModel, Constraint, Set, Var, tanh, value
+from pyomo.opt import check_optimal_termination
+from idaes.core import FlowsheetBlock
+from idaes.core.util.exceptions import InitializationError
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    set_operating_conditions,
+    solve_model,
+)
+
+
+# Sampled inputs and their (lower, upper) bounds
+DEFAULT_INPUT_BOUNDS = {
+    "temperature": (310.0, 345.0),
+    "flow_mol": (0.1, 1.0),
+    "volume": (0.005, 1.0),
+    "x_salicylic_acid": (0.10, 0.30),
+    "x_water": (0.0, 0.05),
+}
+
+# Catalyst feed fraction held at its nominal value; anhydride makes up the rest
+FEED_SULFURIC_ACID = 0.01
+
+DEFAULT_OUTPUTS = (
+    "temperature",
+    "x_salicylic_acid",
+    "x_acetic_anhydride",
+    "x_aspirin",
+    "x_acetic_acid",
+    "x_water",
+)
+
+
+def operating_conditions_from_inputs(inputs):
+    """Map a surrogate input dict to ``set_operating_conditions`` keywords.
+
+    Args:
+        inputs: Mapping with the keys of ``DEFAULT_INPUT_BOUNDS``. Missing
+            keys fall back to the flowsheet defaults.
+
+    Returns:
+        dict: Keyword arguments for ``set_operating_conditions``.
+    """
+    conditions = {
+        key: float(inputs[key])
+        for key in ("temperature", "flow_mol", "volume")
+        if key in inputs
+    }
+    if "x_salicylic_acid" in inputs or "x_water" in inputs:
+        x_sa = float(inputs.get("x_salicylic_acid", 0.19))
+        x_water = float(inputs.get("x_water", 0.02))
+        conditions["mole_frac_comp"] = {
+            "salicylic_acid": x_sa,
+            "acetic_anhydride": 1.0 - x_sa - x_water - FEED_SULFURIC_ACID,
+            "sulfuric_acid": FEED_SULFURIC_ACID,
+            "aspirin": 0.0,
+            "acetic_acid": 0.0,
+            "water": x_water,
+        }
+    return conditions
+
+
+def collect_outputs(model, outputs=DEFAULT_OUTPUTS):
+    """Read surrogate outputs from a solved steady-state flowsheet.
+
+    Args:
+        model: Solved model from ``build_flowsheet``.
+        outputs: Output names; ``"temperature"`` or ``"x_<component>"``.
+
+    Returns:
+        list: Output values in the order of ``outputs``.
+    """
+    outlet = model.fs.cstr.outlet
+    values = []
+    for name in outputs:
+        if name == "temperature":
+            values.append(value(outlet.temperature[0]))
+        else:
+            values.append(value(outlet.mole_frac_comp[0, name[len("x_"):]]))
+    return values
+
+
+def latin_hypercube(n_samples, bounds=None, seed=0):
+    """Return a scrambled Latin hypercube design over the input bounds.
+
+    Args:
+        n_samples: Number of design points.
+        bounds: Mapping of input name to ``(lower, upper)``.
+        seed: Random seed.
+
+    Returns:
+        tuple: ``(names, X)`` with ``X`` of shape ``(n_samples, n_inputs)``.
+    """
+    bounds = bounds or DEFAULT_INPUT_BOUNDS
+    names = list(bounds)
+    sampler = qmc.LatinHypercube(d=len(names), seed=seed)
+    lower = np.array([bounds[name][0] for name in names])
+    upper = np.array([bounds[name][1] for name in names])
+    return names, qmc.scale(sampler.random(n_samples), lower, upper)
+
+
+def nearest_neighbour_order(X):
+    """Order design points so that consecutive points are close.
+
+    Starting from the first row, each step visits the nearest unvisited point
+    in range-normalized coordinates, so a solve sequence warm-starts from
+    nearby solutions.
+
+    Args:
+        X: Array of design points of shape ``(n, d)``.
+
+    Returns:
+        list: Row indices of ``X`` in visiting order.
+    """
+    span = np.ptp(X, axis=0)
+    Z = (X - X.min(axis=0)) / np.where(span > 0, span, 1.0)
+    remaining = list(range(len(Z)))
+    order = [remaining.pop(0)]
+    while remaining:
+        distances = np.linalg.norm(Z[remaining] - Z[order[-1]], axis=1)
+        order.append(remaining.pop(int(np.argmin(distances))))
+    return order
+
+
+def solve_samples(names, X, outputs=DEFAULT_OUTPUTS):
+    """Solve design points sequentially on one reused, warm-started flowsheet.
+
+    A point whose warm-started solve fails is retried once after a fresh
+    ``cstr.initialize()``.
+
+    Args:
+        names: Input names for the columns of ``X``.
+        X: Array of design points.
+        outputs: Output names passed to ``collect_outputs``.
+
+    Returns:
+        tuple: ``(Y, ok)`` with outputs (NaN rows for failures) and a boolean
+        success mask, both in the row order of ``X``.
+    """
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    
+    Y = np.full((len(X), len(outputs)), np.nan)
+    ok = np.zeros(len(X), dtype=bool)
+    for k in nearest_neighbour_order(X):
+        set_operating_conditions(
+            model, **operating_conditions_from_inputs(dict(zip(names, X[k])))
+        )
+        results = solve_model(model, tee=False)
+        if not check_optimal_termination(results):
+            try:
+                model.fs.cstr.initialize()
+            except InitializationError:
+                continue
+            results = solve_model(model, tee=False)
+        if check_optimal_termination(results):
+            Y[k] = collect_outputs(model, outputs)
+            ok[k] = True
+    return Y, ok
+
+
+def _solve_chunk(args):
+    names, X, outputs = args
+    return solve_samples(names, X, outputs)
+
+
+def solve_samples_parallel(names, X, outputs=DEFAULT_OUTPUTS, n_workers=None):
+    """Solve design points across a process pool.
+
+    The design is split into one contiguous chunk per worker; each worker
+    builds a single flowsheet and warm-starts through its chunk.
+
+    Args:
+        names: Input names for the columns of ``X``.
+        X: Array of design points.
+        outputs: Output names passed to ``collect_outputs``.
+        n_workers: Number of worker processes. ``1`` solves in-process.
+
+    Returns:
+        tuple: ``(Y, ok)`` as returned by ``solve_samples``.
+    """
+    if n_workers == 1:
+        return solve_samples(names, X, outputs)
+    
+    n_workers = n_workers or os.cpu_count() or 1
+    chunks = [chunk for chunk in np.array_split(X, n_workers) if len(chunk)]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        parts = list(pool.map(_solve_chunk, [(names, chunk, outputs) for chunk in chunks]))
+    Y = np.vstack([part[0] for part in parts])
+    ok = np.concatenate([part[1] for part in parts])
+    return Y, ok
+
+
+class _Scaling:
+    """Affine input scaling to [-1, 1] and output standardization."""
+    
+    def __init__(self, input_lower, input_upper, output_mean, output_std):
+        self.input_lower = np.asarray(input_lower, dtype=float)
+        self.input_upper = np.asarray(input_upper, dtype=float)
+        self.output_mean = np.asarray(output_mean, dtype=float)
+        self.output_std = np.asarray(output_std, dtype=float)
+    
+    
+    @classmethod
+    def fit(cls, X, Y, bounds):
+        lower = np.array([bound[0] for bound in bounds])
+        upper = np.array([bound[1] for bound in bounds])
+        std = Y.std(axis=0)
+        return cls(lower, upper, Y.mean(axis=0), np.where(std > 0, std, 1.0))
+    
+    
+    def scale_inputs(self, X):
+        return 2.0 * (X - self.input_lower) / (self.input_upper - self.input_lower) - 1.0
+    
+    
+    def unscale_outputs(self, Ys):
+        return Ys * self.output_std + self.output_mean
+    
+    
+    def scale_outputs(self, Y):
+        return (Y - self.output_mean) / self.output_std
+    
+    
+    def to_dict(self):
+        return {
+            "input_lower": self.input_lower.tolist(),
+            "input_upper": self.input_upper.tolist(),
+            "output_mean": self.output_mean.tolist(),
+            "output_std": self.output_std.tolist(),
+        }
+
+
+class PolynomialSurrogate:
+    """Total-degree polynomial surrogate fitted by ridge least squares.
+
+    Args:
+        input_names: Input names in column order.
+        output_names: Output names in column order.
+        degree: Maximum total polynomial degree.
+        ridge: Tikhonov regularization weight.
+    """
+    
+    kind = "polynomial"
+    
+    def __init__(self, input_names, output_names, degree=3, ridge=1e-8):
+        self.input_names = list(input_names)
+        self.output_names = list(output_names)
+        self.degree = degree
+        self.ridge = ridge
+        n = len(self.input_names)
+        self.exponents = np.array(
+            [
+                np.bincount(np.array(combo, dtype=int), minlength=n)
+                for d in range(degree + 1)
+                for combo in itertools.combinations_with_replacement(range(n), d)
+            ]
+        ).reshape(-1, n)
+        self.scaling = None
+        self.coefficients = None
+    
+    
+    def _features(self, Xs):
+        return np.prod(Xs[:, None, :] ** self.exponents[None, :, :], axis=2)
+    
+    
+    def fit(self, X, Y, bounds):
+        """Fit coefficients to inputs ``X`` and outputs ``Y``."""
+        self.scaling = _Scaling.fit(X, Y, bounds)
+        Phi = self._features(self.scaling.scale_inputs(X))
+        lhs = Phi.T @ Phi + self.ridge * np.eye(Phi.shape[1])
+        self.coefficients = np.linalg.solve(lhs, Phi.T @ self.scaling.scale_outputs(Y))
+        return self
+    
+    
+    def predict(self, X):
+        """Evaluate the surrogate for a batch of inputs of shape ``(n, n_inputs)``."""
+        Xs = self.scaling.scale_inputs(np.atleast_2d(X))
+        return self.scaling.unscale_outputs(self._features(Xs) @ self.coefficients)
+    
+    
+    def pyomo_outputs(self, scaled_inputs):
+        """Return Pyomo expressions for each output given scaled input expressions."""
+        monomials = []
+        for powers in self.exponents:
+            term = 1.0
+            for expr, power in zip(scaled_inputs, powers):
+                if power:
+                    term = term * expr ** int(power)
+            monomials.append(term)
+        return [
+            self.scaling.output_mean[j]
+            + self.scaling.output_std[j]
+            * sum(float(c) * m for c, m in zip(self.coefficients[:, j], monomials) if c != 0)
+            for j in range(len(self.output_names))
+        ]
+    
+    
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "input_names": self.input_names,
+            "output_names": self.output_names,
+            "degree": self.degree,
+            "ridge": self.ridge,
+            "scaling": self.scaling.to_dict(),
+            "coefficients": self.coefficients.tolist(),
+        }
+    
+    
+    @classmethod
+    def from_dict(cls, data):
+        surrogate = cls(data["input_names"], data["output_names"], data["degree"], data["ridge"])
+        surrogate.scaling = _Scaling(**data["scaling"])
+        surrogate.coefficients = np.array(data["coefficients"])
+        return surrogate
+
+
+class MLPSurrogate:
+    """Single-hidden-layer tanh network trained with L-BFGS in NumPy.
+
+    Args:
+        input_names: Input names in column order.
+        output_names: Output names in column order.
+        hidden: Number of hidden units.
+        l2: Weight decay.
+        seed: Seed for the initial weights.
+    """
+    
+    kind = "mlp"
+    
+    def __init__(self, input_names, output_names, hidden=16, l2=1e-6, seed=0):
+        self.input_names = list(input_names)
+        self.output_names = list(output_names)
+        self.hidden = hidden
+        self.l2 = l2
+        self.seed = seed
+        self.scaling = None
+        self.W1 = self.b1 = self.W2 = self.b2 = None
+    
+    
+    def _unpack(self, theta):
+        n, h, m = len(self.input_names), self.hidden, len(self.output_names)
+        sizes = [n * h, h, h * m, m]
+        parts = np.split(theta, np.cumsum(sizes)[:-1])
+        return parts[0].reshape(n, h), parts[1], parts[2].reshape(h, m), parts[3]
+    
+    
+    def fit(self, X, Y, bounds, maxiter=2000):
+        """Fit network weights to inputs ``X`` and outputs ``Y``."""
+        self.scaling = _Scaling.fit(X, Y, bounds)
+        Xs = self.scaling.scale_inputs(X)
+        Ys = self.scaling.scale_outputs(Y)
+        n, h, m = Xs.shape[1], self.hidden, Ys.shape[1]
+        rng = np.random.default_rng(self.seed)
+        theta0 = np.concatenate(
+            [
+                rng.normal(0, 1 / np.sqrt(n), n * h),
+                np.zeros(h),
+                rng.normal(0, 1 / np.sqrt(h), h * m),
+                np.zeros(m),
+            ]
+        )
+        
+        def loss_and_grad(theta):
+            W1, b1, W2, b2 = self._unpack(theta)
+            H = np.tanh(Xs @ W1 + b1)
+            R = H @ W2 + b2 - Ys
+            N = len(Xs)
+            loss = 0.5 * np.sum(R**2) / N + 0.5 * self.l2 * (np.sum(W1**2) + np.sum(W2**2))
+            dW2 = H.T @ R / N + self.l2 * W2
+            db2 = R.sum(axis=0) / N
+            dH = (R @ W2.T) * (1 - H**2)
+            dW1 = Xs.T @ dH / N + self.l2 * W1
+            db1 = dH.sum(axis=0) / N
+            return loss, np.concatenate([dW1.ravel(), db1, dW2.ravel(), db2])
+        
+        result = minimize(
+            loss_and_grad, theta0, jac=True, method="L-BFGS-B", options={"maxiter": maxiter}
+        )
+        self.W1, self.b1, self.W2, self.b2 = self._unpack(result.x)
+        return self
+    
+    
+    def predict(self, X):
+        """Evaluate the surrogate for a batch of inputs of shape ``(n, n_inputs)``."""
+        Xs = self.scaling.scale_inputs(np.atleast_2d(X))
+        return self.scaling.unscale_outputs(np.tanh(Xs @ self.W1 + self.b1) @ self.W2 + self.b2)
+    
+    
+    def pyomo_outputs(self, scaled_inputs):
+        """Return Pyomo expressions for each output given scaled input expressions."""
+        hidden = [
+            tanh(float(self.b1[k]) + sum(float(self.W1[i, k]) * x for i, x in enumerate(scaled_inputs)))
+            for k in range(self.hidden)
+        ]
+        return [
+            self.scaling.output_mean[j]
+            + self.scaling.output_std[j]
+            * (float(self.b2[j]) + sum(float(self.W2[k, j]) * hk for k, hk in enumerate(hidden)))
+            for j in range(len(self.output_names))
+        ]
+    
+    
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "input_names": self.input_names,
+            "output_names": self.output_names,
+            "hidden": self.hidden,
+            "l2": self.l2,
+            "seed": self.seed,
+            "scaling": self.scaling.to_dict(),
+            "W1": self.W1.tolist(),
+            "b1": self.b1.tolist(),
+            "W2": self.W2.tolist(),
+            "b2": self.b2.tolist(),
+        }
+    
+    
+    @classmethod
+    def from_dict(cls, data):
+        surrogate = cls(
+            data["input_names"], data["output_names"], data["hidden"], data["l2"], data["seed"]
+        )
+        surrogate.scaling = _Scaling(**data["scaling"])
+        for key in ("W1", "b1", "W2", "b2"):
+            setattr(surrogate, key, np.array(data[key]))
+        return surrogate
+
+
+SURROGATE_CLASSES = {cls.kind: cls for cls in (PolynomialSurrogate, MLPSurrogate)}
+
+
+def save_surrogate(surrogate, path):
+    """Write a fitted surrogate to a JSON file."""
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(surrogate.to_dict(), handle)
+
+
+def load_surrogate(path):
+    """Load a surrogate written by ``save_surrogate``."""
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    return SURROGATE_CLASSES[data["kind"]].from_dict(data)
+
+
+def error_report(surrogate, X, Y):
+    """Return per-output held-out error metrics.
+
+    Returns:
+        dict: For each output, RMSE, maximum absolute error and R^2.
+    """
+    residual = surrogate.predict(X) - Y
+    total = np.sum((Y - Y.mean(axis=0)) ** 2, axis=0)
+    report = {}
+    for j, name in enumerate(surrogate.output_names):
+        report[name] = {
+            "rmse": float(np.sqrt(np.mean(residual[:, j] ** 2))),
+            "max_abs": float(np.max(np.abs(residual[:, j]))),
+            "r2": float(1 - np.sum(residual[:, j] ** 2) / total[j]) if total[j] > 0 else 1.0,
+        }
+    return report
+
+
+def time_predictions(surrogate, batch_size=1000, repeats=20, seed=0):
+    """Measure batched evaluation cost of a surrogate.
+
+    Returns:
+        dict: Batch size and mean microseconds per batch and per sample.
+    """
+    bounds = list(zip(surrogate.scaling.input_lower, surrogate.scaling.input_upper))
+    rng = np.random.default_rng(seed)
+    X = np.array([rng.uniform(lo, hi, batch_size) for lo, hi in bounds]).T
+    surrogate.predict(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        surrogate.predict(X)
+    per_batch = (time.perf_counter() - start) / repeats
+    return {
+        "batch_size": batch_size,
+        "us_per_batch": per_batch * 1e6,
+        "us_per_sample": per_batch * 1e6 / batch_size,
+    }
+
+
+def build_surrogate(
+    n_samples=200,
+    bounds=None,
+    kind="polynomial",
+    outputs=DEFAULT_OUTPUTS,
+    test_fraction=0.2,
+    n_workers=None,
+    seed=0,
+    **surrogate_options,
+):
+    """Sample, solve and fit a CSTR surrogate with a held-out error report.
+
+    Args:
+        n_samples: Number of Latin hypercube samples.
+        bounds: Input bounds; default ``DEFAULT_INPUT_BOUNDS``.
+        kind: ``"polynomial"`` or ``"mlp"``.
+        outputs: Output names passed to ``collect_outputs``.
+        test_fraction: Fraction of converged samples held out for testing.
+        n_workers: Worker processes for the solves; ``1`` runs in-process.
+        seed: Seed for the design and the train/test split.
+        **surrogate_options: Passed to the surrogate constructor (``degree``,
+            ``hidden``, ...).
+
+    Returns:
+        tuple: ``(surrogate, report)`` where ``report`` holds sample counts,
+        solve and fit times, held-out errors and prediction timing.
+    """
+    bounds = bounds or DEFAULT_INPUT_BOUNDS
+    names, X = latin_hypercube(n_samples, bounds, seed)
+    
+    start = time.perf_counter()
+    Y, ok = solve_samples_parallel(names, X, outputs, n_workers)
+    solve_time = time.perf_counter() - start
+    X, Y = X[ok], Y[ok]
+    
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(X))
+    n_test = int(round(test_fraction * len(X)))
+    test, train = order[:n_test], order[n_test:]
+    
+    surrogate = SURROGATE_CLASSES[kind](names, outputs, **surrogate_options)
+    start = time.perf_counter()
+    surrogate.fit(X[train], Y[train], [bounds[name] for name in names])
+    fit_time = time.perf_counter() - start
+    
+    report = {
+        "n_samples": n_samples,
+        "n_converged": int(ok.sum()),
+        "n_train": len(train),
+        "n_test": len(test),
+        "solve_time_s": solve_time,
+        "fit_time_s": fit_time,
+        "test_error": error_report(surrogate, X[test], Y[test]) if n_test else {},
+        "prediction_timing": time_predictions(surrogate),
+    }
+    return surrogate, report
+
+
+def add_surrogate_cstr(block, surrogate):
+    """Add an algebraic surrogate CSTR to a Pyomo block.
+
+    Creates ``block.surrogate_cstr`` with ``inputs`` and ``outputs`` Vars
+    indexed by name and one equality per output. Inputs are bounded to the
+    training range and left unfixed, so they can be fixed like the CSTR
+    operating conditions or used as decision variables.
+
+    Args:
+        block: Pyomo block (e.g. ``model.fs``) to attach the surrogate to.
+        surrogate: Fitted ``PolynomialSurrogate`` or ``MLPSurrogate``.
+
+    Returns:
+        Block: The created ``surrogate_cstr`` block.
+    """
+    scaling = surrogate.scaling
+    lower = dict(zip(surrogate.input_names, map(float, scaling.input_lower)))
+    upper = dict(zip(surrogate.input_names, map(float, scaling.input_upper)))
+    mean = dict(zip(surrogate.output_names, map(float, scaling.output_mean)))
+    
+    block.surrogate_cstr = Block()
+    unit = block.surrogate_cstr
+    unit.input_set = Set(initialize=surrogate.input_names, ordered=True)
+    unit.output_set = Set(initialize=surrogate.output_names, ordered=True)
+    unit.inputs = Var(
+        unit.input_set,
+        bounds=lambda b, name: (lower[name], upper[name]),
+        initialize=lambda b, name: 0.5 * (lower[name] + upper[name]),
+    )
+    unit.outputs = Var(unit.output_set, initialize=mean)
+    
+    scaled_inputs = [
+        2.0 * (unit.inputs[name] - lower[name]) / (upper[name] - lower[name]) - 1.0
+        for name in surrogate.input_names
+    ]
+    output_exprs = dict(zip(surrogate.output_names, surrogate.pyomo_outputs(scaled_inputs)))
+    unit.output_eqn = Constraint(
+        unit.output_set, rule=lambda b, name: b.outputs[name] == output_exprs[name]
+    )
+    return unit
+
+
+def build_surrogate_flowsheet(surrogate, **inputs):
+    """Build a model whose flowsheet uses the surrogate instead of the CSTR.
+
+    Args:
+        surrogate: Fitted surrogate.
+        **inputs: Input values to fix, keyed by surrogate input name.
+
+    Returns:
+        ConcreteModel: Model with ``model.fs.surrogate_cstr``.
+    """
+    model = ConcreteModel()
+    model.fs = FlowsheetBlock(dynamic=False)
+    unit = add_surrogate_cstr(model.fs, surrogate)
+    for name, input_value in inputs.items():
+        unit.inputs[name].fix(input_value)
+    return model
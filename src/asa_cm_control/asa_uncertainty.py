@@ -0,0 +1,423 @@
+# To-Do:
+# - Add global sensitivity indices (Sobol) from the same sample stream
+
+
+"""Monte Carlo uncertainty propagation through the steady-state ASA CSTR.
+
+Uncertain kinetic parameters of ``ASAReactionParameterBlock`` and NRTL
+interaction parameters ``tau_nrtl`` of ``ThermoParameterBlock`` are sampled
+from simple distributions around their nominal values, using Latin hypercube
+or quasi-random (Sobol, Halton) designs mapped through inverse CDFs.
+
+Samples are solved in batches across a process pool. Each worker builds one
+flowsheet on start-up and reuses it for all of its batches, warm-starting from
+the previous solution and visiting each batch in nearest-neighbour order.
+Results are streamed batch by batch into running statistics (Welford moments
+plus a fixed-size reservoir for quantiles), so memory stays bounded however
+many samples are drawn, and the run stops early once the confidence intervals
+of the output means are tight enough.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from scipy.stats import norm, qmc
+from pyomo.environ import value
+from pyomo.opt import check_optimal_termination
+from idaes.core.util.exceptions import ConfigurationError, InitializationError
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    set_operating_conditions,
+    solve_model,
+)
+from asa_cm_control.asa_surrogate import nearest_neighbour_order
+
+
+# Parameter path (relative to ``model.fs``) -> (distribution kind, spread).
+# Kinds, all centered on the nominal value p0 with standard normal z:
+#   "lognormal":       p0 * exp(spread * z)
+#   "relative_normal": p0 * (1 + spread * z)
+#   "normal":          p0 + spread * z
+#   "uniform":         p0 + spread * (2u - 1)
+DEFAULT_PARAMETER_DISTRIBUTIONS = {
+    "reaction_params.Acat[r1_aspirin_synthesis]": ("lognormal", 0.3),
+    "reaction_params.Ea_cat[r1_aspirin_synthesis]": ("relative_normal", 0.02),
+    "reaction_params.Acat[r2_acetic_anhydride_hydrolysis]": ("lognormal", 0.3),
+    "reaction_params.Ea_cat[r2_acetic_anhydride_hydrolysis]": ("relative_normal", 0.02),
+    "reaction_params.Acat[r3_aspirin_hydrolysis]": ("lognormal", 0.3),
+    "reaction_params.Ea_cat[r3_aspirin_hydrolysis]": ("relative_normal", 0.02),
+    "thermo_params.tau_nrtl[salicylic_acid,acetic_anhydride]": ("normal", 0.1),
+    "thermo_params.tau_nrtl[acetic_anhydride,salicylic_acid]": ("normal", 0.1),
+    "thermo_params.tau_nrtl[salicylic_acid,aspirin]": ("normal", 0.1),
+    "thermo_params.tau_nrtl[aspirin,salicylic_acid]": ("normal", 0.1),
+}
+
+DEFAULT_UQ_OUTPUTS = (
+    "aspirin_yield",
+    "x_aspirin",
+    "x_salicylic_acid",
+    "x_acetic_acid",
+    "temperature",
+)
+
+SAMPLING_METHODS = ("lhs", "sobol", "halton", "random")
+
+# Per-process flowsheet reused across batches
+_WORKER = {}
+
+
+def nominal_parameters(names):
+    """Return the nominal values of the named parameters of a fresh flowsheet."""
+    model = build_flowsheet()
+    return np.array([value(model.fs.find_component(name)) for name in names])
+
+
+def transform_samples(U, distributions, nominal):
+    """Map unit-hypercube samples to parameter values.
+
+    Args:
+        U: Array of shape ``(n, d)`` with entries in (0, 1).
+        distributions: Sequence of ``(kind, spread)`` per column.
+        nominal: Nominal parameter values per column.
+
+    Returns:
+        numpy.ndarray: Parameter samples of shape ``(n, d)``.
+    """
+    U = np.clip(U, 1e-12, 1 - 1e-12)
+    P = np.empty_like(U)
+    for j, ((kind, spread), p0) in enumerate(zip(distributions, nominal)):
+        if kind == "uniform":
+            P[:, j] = p0 + spread * (2 * U[:, j] - 1)
+            continue
+        z = norm.ppf(U[:, j])
+        if kind == "lognormal":
+            P[:, j] = p0 * np.exp(spread * z)
+        elif kind == "relative_normal":
+            P[:, j] = p0 * (1 + spread * z)
+        elif kind == "normal":
+            P[:, j] = p0 + spread * z
+        else:
+            raise ConfigurationError(f"Unknown distribution kind '{kind}'.")
+    return P
+
+
+def unit_sample_batches(n_dims, batch_size, method="lhs", seed=0):
+    """Yield batches of unit-hypercube samples indefinitely.
+
+    Sobol and Halton batches continue one low-discrepancy sequence, so any
+    prefix of the stream is a valid design. Latin hypercube designs cannot be
+    extended, so each batch is an independent hypercube.
+
+    Args:
+        n_dims: Number of uncertain parameters.
+        batch_size: Samples per batch (a power of two keeps Sobol balanced).
+        method: One of ``SAMPLING_METHODS``.
+        seed: Random seed.
+
+    Yields:
+        numpy.ndarray: Array of shape ``(batch_size, n_dims)``.
+    """
+    if method not in SAMPLING_METHODS:
+        raise ConfigurationError(
+            f"Unknown sampling method '{method}'; expected one of {SAMPLING_METHODS}."
+        )
+    if method == "sobol":
+        sampler = qmc.Sobol(d=n_dims, scramble=True, seed=seed)
+    elif method == "halton":
+        sampler = qmc.Halton(d=n_dims, scramble=True, seed=seed)
+    rng = np.random.default_rng(seed)
+    batch = 0
+    while True:
+        if method == "lhs":
+            yield qmc.LatinHypercube(d=n_dims, seed=seed + batch).random(batch_size)
+        elif method == "random":
+            yield rng.random((batch_size, n_dims))
+        else:
+            yield sampler.random(batch_size)
+        batch += 1
+
+
+def collect_uq_outputs(model, outputs=DEFAULT_UQ_OUTPUTS):
+    """Read UQ outputs from a solved steady-state flowsheet.
+
+    Args:
+        model: Solved model from ``build_flowsheet``.
+        outputs: Output names. ``"aspirin_yield"`` is outlet aspirin per mole
+            of salicylic acid fed; ``"temperature"`` and ``"x_<component>"``
+            refer to the reactor outlet.
+
+    Returns:
+        list: Output values in the order of ``outputs``.
+    """
+    inlet = model.fs.cstr.inlet
+    outlet = model.fs.cstr.outlet
+    values = []
+    for name in outputs:
+        if name == "aspirin_yield":
+            values.append(value(
+                outlet.flow_mol[0] * outlet.mole_frac_comp[0, "aspirin"]
+                / (inlet.flow_mol[0] * inlet.mole_frac_comp[0, "salicylic_acid"])
+            ))
+        elif name == "temperature":
+            values.append(value(outlet.temperature[0]))
+        else:
+            values.append(value(outlet.mole_frac_comp[0, name[len("x_"):]]))
+    return values
+
+
+def _init_worker(operating_conditions):
+    model = build_flowsheet()
+    set_operating_conditions(model, **operating_conditions)
+    model.fs.cstr.initialize()
+    _WORKER["model"] = model
+
+
+def _solve_batch(args):
+    """Solve one batch of parameter samples on the worker's flowsheet.
+
+    A sample whose warm-started solve fails is retried once after a fresh
+    ``cstr.initialize()``.
+    """
+    names, P, outputs = args
+    model = _WORKER["model"]
+    components = [model.fs.find_component(name) for name in names]
+    
+    Y = np.full((len(P), len(outputs)), np.nan)
+    ok = np.zeros(len(P), dtype=bool)
+    for k in nearest_neighbour_order(P):
+        for component, p in zip(components, P[k]):
+            component.set_value(float(p))
+        results = solve_model(model, tee=False)
+        if not check_optimal_termination(results):
+            try:
+                model.fs.cstr.initialize()
+            except InitializationError:
+                continue
+            results = solve_model(model, tee=False)
+        if check_optimal_termination(results):
+            Y[k] = collect_uq_outputs(model, outputs)
+            ok[k] = True
+    return P, Y, ok
+
+
+class RunningStatistics:
+    """Streaming moments and quantiles of vector-valued samples.
+
+    Means and variances use Welford's update; quantiles come from a uniform
+    reservoir sample of at most ``reservoir_size`` rows, so memory does not
+    grow with the number of samples.
+
+    Args:
+        names: Output names.
+        reservoir_size: Rows kept for quantile estimates.
+        seed: Seed of the reservoir sampler.
+    """
+    
+    def __init__(self, names, reservoir_size=4096, seed=0):
+        self.names = list(names)
+        self.count = 0
+        self.failures = 0
+        self.mean = np.zeros(len(self.names))
+        self._m2 = np.zeros(len(self.names))
+        self.min = np.full(len(self.names), np.inf)
+        self.max = np.full(len(self.names), -np.inf)
+        self._reservoir = np.empty((reservoir_size, len(self.names)))
+        self._rng = np.random.default_rng(seed)
+    
+    def update(self, Y, ok=None):
+        """Add a batch of samples; rows with ``ok`` False count as failures."""
+        if ok is not None:
+            self.failures += int(np.sum(~ok))
+            Y = Y[ok]
+        for y in Y:
+            self.count += 1
+            delta = y - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (y - self.mean)
+            
+            size = len(self._reservoir)
+            if self.count <= size:
+                self._reservoir[self.count - 1] = y
+            else:
+                slot = self._rng.integers(self.count)
+                if slot < size:
+                    self._reservoir[slot] = y
+        if len(Y):
+            self.min = np.minimum(self.min, Y.min(axis=0))
+            self.max = np.maximum(self.max, Y.max(axis=0))
+    
+    @property
+    def std(self):
+        if self.count < 2:
+            return np.full(len(self.names), np.nan)
+        return np.sqrt(self._m2 / (self.count - 1))
+    
+    def ci_halfwidth(self, confidence=0.95):
+        """Half-width of the normal-approximation confidence interval of the mean."""
+        return norm.ppf(0.5 + confidence / 2) * self.std / np.sqrt(max(self.count, 1))
+    
+    def quantiles(self, q=(0.05, 0.5, 0.95)):
+        """Quantiles estimated from the reservoir, shape ``(len(q), n_outputs)``."""
+        kept = self._reservoir[:min(self.count, len(self._reservoir))]
+        return np.quantile(kept, q, axis=0)
+    
+    def summary(self, confidence=0.95, q=(0.05, 0.5, 0.95)):
+        """Return a per-output dict of mean, std, CI half-width, range and quantiles."""
+        halfwidth = self.ci_halfwidth(confidence)
+        quantiles = self.quantiles(q) if self.count else np.full((len(q), len(self.names)), np.nan)
+        return {
+            name: {
+                "mean": float(self.mean[j]),
+                "std": float(self.std[j]),
+                "ci_halfwidth": float(halfwidth[j]),
+                "min": float(self.min[j]),
+                "max": float(self.max[j]),
+                **{f"q{round(100 * qk):02d}": float(quantiles[k, j]) for k, qk in enumerate(q)},
+            }
+            for j, name in enumerate(self.names)
+        }
+
+
+def iter_monte_carlo(
+    n_samples,
+    distributions=None,
+    method="lhs",
+    outputs=DEFAULT_UQ_OUTPUTS,
+    batch_size=32,
+    n_workers=None,
+    seed=0,
+    **operating_conditions,
+):
+    """Stream Monte Carlo batches as they complete.
+
+    At most two batches per worker are in flight, so pending work stays
+    bounded. Closing the generator cancels batches not yet started.
+
+    Args:
+        n_samples: Maximum number of parameter samples.
+        distributions: Mapping of parameter path to ``(kind, spread)``.
+            Defaults to ``DEFAULT_PARAMETER_DISTRIBUTIONS``.
+        method: Sampling method, one of ``SAMPLING_METHODS``.
+        outputs: Output names passed to ``collect_uq_outputs``.
+        batch_size: Samples per batch.
+        n_workers: Number of worker processes. ``1`` solves in-process.
+        seed: Random seed.
+        **operating_conditions: Passed to ``set_operating_conditions``.
+
+    Yields:
+        tuple: ``(P, Y, ok)`` per completed batch: parameter samples, outputs
+        (NaN rows for failures) and a success mask.
+    """
+    distributions = distributions or DEFAULT_PARAMETER_DISTRIBUTIONS
+    names = list(distributions)
+    nominal = nominal_parameters(names)
+    batches = unit_sample_batches(len(names), batch_size, method, seed)
+    
+    def next_task(remaining):
+        U = next(batches)[:remaining]
+        return names, transform_samples(U, list(distributions.values()), nominal), outputs
+    
+    remaining = n_samples
+    if n_workers == 1:
+        _init_worker(operating_conditions)
+        while remaining > 0:
+            task = next_task(remaining)
+            remaining -= len(task[1])
+            yield _solve_batch(task)
+        return
+    
+    n_workers = n_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(operating_conditions,),
+    ) as pool:
+        pending = set()
+        try:
+            while remaining > 0 or pending:
+                while remaining > 0 and len(pending) < 2 * n_workers:
+                    task = next_task(remaining)
+                    remaining -= len(task[1])
+                    pending.add(pool.submit(_solve_batch, task))
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def run_monte_carlo(
+    n_samples=1000,
+    distributions=None,
+    method="lhs",
+    outputs=DEFAULT_UQ_OUTPUTS,
+    batch_size=32,
+    n_workers=None,
+    confidence=0.95,
+    rel_tol=None,
+    min_samples=100,
+    callback=None,
+    seed=0,
+    **operating_conditions,
+):
+    """Propagate parameter uncertainty to the outputs with early stopping.
+
+    Args:
+        n_samples: Maximum number of parameter samples.
+        distributions: Mapping of parameter path to ``(kind, spread)``.
+        method: Sampling method, one of ``SAMPLING_METHODS``.
+        outputs: Output names passed to ``collect_uq_outputs``.
+        batch_size: Samples per batch.
+        n_workers: Number of worker processes. ``1`` solves in-process.
+        confidence: Confidence level of the interval on each output mean.
+        rel_tol: Stop once every CI half-width is below ``rel_tol`` times the
+            absolute mean. ``None`` always draws ``n_samples``.
+        min_samples: Successful samples required before stopping early.
+        callback: Optional ``callback(P, Y, ok, stats)`` called per batch,
+            e.g. to persist raw results. Returning True stops the run.
+        seed: Random seed.
+        **operating_conditions: Passed to ``set_operating_conditions``.
+
+    Returns:
+        tuple: ``(stats, info)`` with the ``RunningStatistics`` and a dict of
+        ``n_solved``, ``n_failed``, ``stopped_early`` and ``time_s``.
+    """
+    start = time.perf_counter()
+    stats = RunningStatistics(outputs, seed=seed)
+    stopped_early = False
+    stream = iter_monte_carlo(
+        n_samples,
+        distributions=distributions,
+        method=method,
+        outputs=outputs,
+        batch_size=batch_size,
+        n_workers=n_workers,
+        seed=seed,
+        **operating_conditions,
+    )
+    try:
+        for P, Y, ok in stream:
+            stats.update(Y, ok)
+            if callback is not None and callback(P, Y, ok, stats):
+                stopped_early = True
+                break
+            if (
+                rel_tol is not None
+                and stats.count >= min_samples
+                and np.all(stats.ci_halfwidth(confidence) <= rel_tol * np.abs(stats.mean))
+            ):
+                stopped_early = True
+                break
+    finally:
+        stream.close()
+    
+    return stats, {
+        "n_solved": stats.count,
+        "n_failed": stats.failures,
+        "stopped_early": stopped_early,
+        "time_s": time.perf_counter() - start,
+    }
@@ -0,0 +1,177 @@
+# To-Do:
+# - Give the ions NRTL-consistent activity coefficients instead of unity
+
+
+"""Sulfuric acid speciation in the acetic reaction medium.
+
+The catalyst dissociates in two steps,
+
+    H2SO4 <=> H+ + HSO4-      K_1 = a_H+ x_HSO4 / (gamma_H2SO4 x_H2SO4)
+    HSO4- <=> H+ + SO4--      K_2 = a_H+ x_SO4 / x_HSO4
+
+on a mole-fraction basis, with unit ion activity coefficients and van 't Hoff
+temperature dependence of both constants. With the sulfate balance
+``x_H2SO4 + x_HSO4 + x_SO4 = x_S`` (``x_S`` the apparent sulfuric acid mole
+fraction) and the charge balance ``x_H+ = x_HSO4 + 2 x_SO4``, the free proton
+fraction ``h`` is the single positive root of
+
+    f(h) = h^3 + a h^2 + a (K_2 - x_S) h - 2 a K_2 x_S,    a = K_1 gamma_H2SO4
+
+``f`` is convex for ``h > 0`` and positive at ``h = 2 x_S``, so Newton's method
+started there converges monotonically. Derivatives of ``h`` with respect to
+the inputs follow from the implicit function theorem.
+
+``SulfuricAcidSpeciation`` wraps this as a PyNumero external grey-box model
+(inputs temperature, apparent fraction and activity coefficient; output
+``a_hplus``) so an NLP sees one output equation instead of the speciation
+equilibria.
+"""
+
+import numpy as np
+from pyomo.common.dependencies import attempt_import
+from pyomo.environ import value
+
+egb, greybox_available = attempt_import(
+    "pyomo.contrib.pynumero.interfaces.external_grey_box"
+)
+scipy_sparse, _ = attempt_import("scipy.sparse")
+
+
+GAS_CONSTANT = 8.314462618
+REFERENCE_TEMPERATURE = 298.15
+
+SPECIATION_INPUTS = ("temperature", "x_sulfuric_acid", "gamma_sulfuric_acid")
+
+
+def dissociation_constants(temperature, K1_ref, K2_ref, dH1, dH2, T_ref=REFERENCE_TEMPERATURE):
+    """Return ``(K1, K2, dK1/dT, dK2/dT)`` from van 't Hoff's equation.
+
+    Args:
+        temperature: Temperature in K.
+        K1_ref: First dissociation constant at ``T_ref``.
+        K2_ref: Second dissociation constant at ``T_ref``.
+        dH1: First dissociation enthalpy in J/mol.
+        dH2: Second dissociation enthalpy in J/mol.
+        T_ref: Reference temperature in K.
+    """
+    shift = 1 / temperature - 1 / T_ref
+    K1 = K1_ref * np.exp(-dH1 / GAS_CONSTANT * shift)
+    K2 = K2_ref * np.exp(-dH2 / GAS_CONSTANT * shift)
+    return K1, K2, K1 * dH1 / (GAS_CONSTANT * temperature**2), K2 * dH2 / (GAS_CONSTANT * temperature**2)
+
+
+def solve_hplus(x_total, a, K2, tol=1e-15, max_iter=50):
+    """Solve the speciation cubic for the free proton mole fraction.
+
+    Args:
+        x_total: Apparent sulfuric acid mole fraction ``x_S``.
+        a: ``K_1 gamma_H2SO4``.
+        K2: Second dissociation constant.
+        tol: Relative step tolerance.
+        max_iter: Iteration limit.
+
+    Returns:
+        tuple: ``(h, dh_dx_total, dh_da, dh_dK2, iterations)``.
+    """
+    h = 2.0 * x_total
+    for iteration in range(1, max_iter + 1):
+        f = h**3 + a * h**2 + a * (K2 - x_total) * h - 2 * a * K2 * x_total
+        f_h = 3 * h**2 + 2 * a * h + a * (K2 - x_total)
+        step = f / f_h
+        h -= step
+        if abs(step) <= tol * h:
+            break
+    
+    f_h = 3 * h**2 + 2 * a * h + a * (K2 - x_total)
+    f_a = h**2 + (K2 - x_total) * h - 2 * K2 * x_total
+    f_x = -a * h - 2 * a * K2
+    f_K2 = a * h - 2 * a * x_total
+    return h, -f_x / f_h, -f_a / f_h, -f_K2 / f_h, iteration
+
+
+def speciate(temperature, x_total, gamma, K1_ref, K2_ref, dH1, dH2):
+    """Return all species fractions and the ``a_hplus`` input derivatives.
+
+    Args:
+        temperature: Temperature in K.
+        x_total: Apparent sulfuric acid mole fraction.
+        gamma: Activity coefficient of molecular sulfuric acid.
+        K1_ref, K2_ref, dH1, dH2: Dissociation parameters, see
+            ``dissociation_constants``.
+
+    Returns:
+        dict: ``hplus``, ``h2so4``, ``hso4``, ``so4`` mole fractions,
+        ``gradient`` (d a_hplus / d ``SPECIATION_INPUTS``) and ``iterations``.
+    """
+    K1, K2, dK1_dT, dK2_dT = dissociation_constants(temperature, K1_ref, K2_ref, dH1, dH2)
+    a = K1 * gamma
+    h, dh_dx, dh_da, dh_dK2, iterations = solve_hplus(x_total, a, K2)
+    s0 = x_total / (1 + a / h + a * K2 / h**2)
+    s1 = a * s0 / h
+    return {
+        "hplus": h,
+        "h2so4": s0,
+        "hso4": s1,
+        "so4": K2 * s1 / h,
+        "gradient": np.array([dh_da * gamma * dK1_dT + dh_dK2 * dK2_dT, dh_dx, dh_da * K1]),
+        "iterations": iterations,
+    }
+
+
+class SulfuricAcidSpeciation(egb.ExternalGreyBoxModel if greybox_available else object):
+    """External grey-box model mapping the sulfuric acid state to ``a_hplus``.
+
+    The output is computed by ``solve_hplus`` on every input change and its
+    Jacobian analytically, so the NLP never sees the speciation variables.
+
+    Args:
+        K1_ref, K2_ref, dH1, dH2: Dissociation parameters, see
+            ``dissociation_constants``. Numbers, or Pyomo parameters whose
+            current values are read at every evaluation.
+    """
+    
+    def __init__(self, K1_ref, K2_ref, dH1, dH2):
+        self._parameters = (K1_ref, K2_ref, dH1, dH2)
+        self._inputs = np.array([REFERENCE_TEMPERATURE, 0.01, 1.0])
+        self._result = None
+        self._result_parameters = None
+        self.n_evaluations = 0
+        self.newton_iterations = 0
+    
+    def input_names(self):
+        return list(SPECIATION_INPUTS)
+    
+    def output_names(self):
+        return ["a_hplus"]
+    
+    def finalize_block_construction(self, pyomo_block):
+        pyomo_block.inputs["temperature"].setlb(200.0)
+        pyomo_block.inputs["temperature"].value = REFERENCE_TEMPERATURE
+        pyomo_block.inputs["x_sulfuric_acid"].setlb(0.0)
+        pyomo_block.inputs["x_sulfuric_acid"].value = 0.01
+        pyomo_block.inputs["gamma_sulfuric_acid"].setlb(0.0)
+        pyomo_block.inputs["gamma_sulfuric_acid"].value = 1.0
+        pyomo_block.outputs["a_hplus"].setlb(0.0)
+        pyomo_block.outputs["a_hplus"].value = 0.01
+    
+    def set_input_values(self, input_values):
+        self._inputs = np.asarray(input_values, dtype=float)
+        self._result = None
+    
+    def _speciate(self):
+        parameters = tuple(value(p) for p in self._parameters)
+        if self._result is None or parameters != self._result_parameters:
+            self._result = speciate(*self._inputs, *parameters)
+            self._result_parameters = parameters
+            self.n_evaluations += 1
+            self.newton_iterations += self._result["iterations"]
+        return self._result
+    
+    def evaluate_outputs(self):
+        return np.array([self._speciate()["hplus"]])
+    
+    def evaluate_jacobian_outputs(self):
+        gradient = self._speciate()["gradient"]
+        return scipy_sparse.coo_matrix(
+            (gradient, (np.zeros(3, dtype=int), np.arange(3))), shape=(1, 3)
+        )
@@ -0,0 +1,90 @@
+# To-Do:
+# - Switch a built block between representations without rebuilding it
+
+
+"""Shared parameter declaration for the ASA property packages.
+
+Every constant of ``ThermoParameterBlock`` and ``ASAReactionParameterBlock`` is
+declared through ``add_parameter``, which honours two configuration options
+added by ``declare_parameter_config``:
+- ``parameter_representation``: ``"var"`` (default) declares fixed Vars, as
+  required when parameters are estimated or perturbed through ``fix``;
+  ``"lean"`` declares mutable Params, which the NL writer, scaling tools and
+  model statistics do not have to walk as variables.
+- ``estimable_parameters``: names kept as fixed Vars in lean mode.
+
+Both representations are updated in place with ``set_value``, so sampling
+and sweep code works unchanged.
+"""
+
+from pyomo.common.config import ConfigValue, In
+from pyomo.environ import Param, Reals, Var
+
+
+PARAMETER_REPRESENTATIONS = ("var", "lean")
+
+
+def _name_set(names):
+    return frozenset([names] if isinstance(names, str) else names)
+
+
+def declare_parameter_config(config):
+    """Add the parameter representation options to a parameter block CONFIG."""
+    config.declare(
+        "parameter_representation",
+        ConfigValue(
+            default="var",
+            domain=In(PARAMETER_REPRESENTATIONS),
+            description="Declare constants as fixed Vars ('var') or mutable Params ('lean')",
+        ),
+    )
+    config.declare(
+        "estimable_parameters",
+        ConfigValue(
+            default=frozenset(),
+            domain=_name_set,
+            description="Parameter names kept as fixed Vars when parameter_representation='lean'",
+        ),
+    )
+
+
+def is_estimable(block, name):
+    """Return True if parameter ``name`` of ``block`` is declared as a Var."""
+    config = block.config
+    return config.parameter_representation == "var" or name in config.estimable_parameters
+
+
+def add_parameter(block, name, *index, initialize, units, domain=Reals, doc=None):
+    """Declare a constant as a fixed Var or a mutable Param on a parameter block.
+
+    Args:
+        block: Parameter block whose CONFIG was extended by
+            ``declare_parameter_config``.
+        name: Component name.
+        *index: Index sets, as for ``Var``/``Param``.
+        initialize: Value or mapping of values.
+        units: Pyomo units.
+        domain: Value domain.
+        doc: Component documentation.
+
+    Returns:
+        Var or Param: The new component.
+    """
+    if is_estimable(block, name):
+        component = Var(*index, initialize=initialize, domain=domain, units=units, doc=doc)
+        block.add_component(name, component)
+        component.fix()
+    else:
+        component = Param(
+            *index, initialize=initialize, mutable=True, domain=domain, units=units, doc=doc
+        )
+        block.add_component(name, component)
+    return component
+
+
+def parameter_names(block):
+    """Return the names of all Var and Param components declared on ``block``."""
+    return {
+        component.local_name
+        for component in block.component_objects((Var, Param), descend_into=False)
+    }
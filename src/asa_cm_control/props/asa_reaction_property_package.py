@@ -10,6 +10,26 @@ This module defines an IDAES reaction package with:
 
 Current scope is liquid-phase kinetics for aspirin synthesis and acetic
 anhydride hydrolysis.
+
+The reactions are generated from a table (``ASA_REACTIONS`` by default, or the
+parameter block option ``reactions``) listing each reaction's non-zero
+stoichiometric coefficients, rate orders, catalytic order and Arrhenius
+parameters. Kinetic parameters are indexed by ``rate_reaction_idx`` (fixed
+Vars, or mutable Params under ``parameter_representation="lean"``; see
+``asa_parameters``) and a single rate rule serves every reaction, so adding a reaction is one table
+entry and the model grows with the number of non-zero entries.
+
+The catalytic proton activity ``a_hplus`` is selected by the parameter block
+option ``hplus_activity``:
+- ``"approximate"``: ``gamma_H2SO4 x_H2SO4`` (default).
+- ``"speciation"``: H2SO4/HSO4-/SO4-- equilibria as algebraic constraints in
+  every reaction block.
+- ``"greybox"``: the same equilibria solved inside a PyNumero external
+  grey-box block (see ``asa_electrolyte_speciation``), so the NLP only sees
+  ``a_hplus`` as a function of temperature, ``x_H2SO4`` and ``gamma_H2SO4``.
+  The block also carries the equilibria reduced to one (deactivated) equation
+  in ``a_hplus``, ``speciation_cubic``, which replaces the grey-box block when
+  no grey-box capable solver is installed (see ``asa_speciation``).
 """
 
 from idaes.core import (
@@ -19,6 +39,7 @@ from idaes.core import (
     ReactionBlockDataBase,
     MaterialFlowBasis,
 )
+from pyomo.common.config import ConfigValue, In
 from pyomo.environ import (
     Var,
     Param,
@@ -28,6 +49,7 @@ from pyomo.environ import (
     NonNegativeReals,
     units as pyunits,
     exp,
+    log,
     Reals,
     PositiveReals,
     value,
@@ -35,6 +57,94 @@ from pyomo.environ import (
 from idaes.core.util.exceptions import ConfigurationError
 import idaes.logger as idaeslog
 
+from asa_cm_control.props.asa_parameters import add_parameter, declare_parameter_config
+from asa_cm_control.props.asa_electrolyte_speciation import (
+    REFERENCE_TEMPERATURE,
+    SulfuricAcidSpeciation,
+    egb,
+    greybox_available,
+    speciate,
+)
+
+
+HPLUS_ACTIVITY_OPTIONS = ("approximate", "speciation", "greybox")
+
+# Reaction table: name -> phase (default liquid), non-zero stoichiometric
+# coefficients, activity exponents of the rate-determining components, order
+# in the proton activity of the catalysed term, and Arrhenius parameters
+# (A in mol/m^3/s, Ea in J/mol) of the uncatalysed and catalysed terms
+ASA_REACTIONS = {
+    # salicylic_acid + acetic_anhydride -> aspirin + acetic_acid
+    "r1_aspirin_synthesis": {
+        "stoichiometry": {"salicylic_acid": -1, "acetic_anhydride": -1, "aspirin": 1, "acetic_acid": 1},
+        "orders": {"salicylic_acid": 1.0, "acetic_anhydride": 1.0},
+        "catalytic_order": 0.0,
+        "A0": 0.0,
+        "Ea0": 0.0,
+        "Acat": 1.1e12,
+        "Ea_cat": 6.44e4,
+    },
+    # acetic_anhydride + water -> 2 acetic_acid
+    "r2_acetic_anhydride_hydrolysis": {
+        "stoichiometry": {"acetic_anhydride": -1, "water": -1, "acetic_acid": 2},
+        "orders": {"acetic_anhydride": 1.0, "water": 1.0},
+        "catalytic_order": 1.0,
+        "A0": 1.5e9,
+        "Ea0": 5.01e4,
+        "Acat": 1.0e13,
+        "Ea_cat": 5.78e4,
+    },
+    # aspirin + water -> salicylic_acid + acetic_acid
+    "r3_aspirin_hydrolysis": {
+        "stoichiometry": {"aspirin": -1, "water": -1, "salicylic_acid": 1, "acetic_acid": 1},
+        "orders": {"aspirin": 1.0, "water": 1.0},
+        "catalytic_order": 1.0,
+        "A0": 1.5e9,
+        "Ea0": 5.01e4,
+        "Acat": 1.0e13,
+        "Ea_cat": 5.78e4,
+    },
+}
+
+REACTION_TABLE_KEYS = ("stoichiometry", "orders", "A0", "Ea0", "Acat", "Ea_cat")
+
+
+class SparseStoichiometry(dict):
+    """Stoichiometry mapping ``(reaction, phase, component) -> coefficient``.
+
+    Only non-zero coefficients are stored; missing keys read as zero, which is
+    what the IDAES control volumes expect for a dense lookup.
+    """
+    
+    def __missing__(self, key):
+        return 0
+
+
+def validate_reaction_table(table, component_list):
+    """Check a reaction table against a component list.
+
+    Args:
+        table: Mapping of reaction name to its specification (see
+            ``ASA_REACTIONS``).
+        component_list: Components of the property package.
+
+    Raises:
+        ConfigurationError: If a reaction lacks a required key or names an
+            unknown component or phase.
+    """
+    if not table:
+        raise ConfigurationError("The reaction table is empty.")
+    components = set(component_list)
+    for name, spec in table.items():
+        missing = [key for key in REACTION_TABLE_KEYS if key not in spec]
+        if missing:
+            raise ConfigurationError(f"Reaction '{name}' is missing {missing}.")
+        if spec.get("phase", "liquid") != "liquid":
+            raise ConfigurationError(f"Reaction '{name}': only liquid-phase reactions are supported.")
+        unknown = (set(spec["stoichiometry"]) | set(spec["orders"])) - components
+        if unknown:
+            raise ConfigurationError(f"Reaction '{name}' uses unknown components {sorted(unknown)}.")
+
 
 # PARAMETER BLOCK CLASS
 
@@ -45,16 +155,42 @@ class ASAReactionParameterData(ReactionParameterBlock):
     The block stores reaction indices, stoichiometric maps, and fixed kinetic
     parameters used by associated reaction state blocks.
     """
-
+    
+    CONFIG = ReactionParameterBlock.CONFIG()
+    CONFIG.declare(
+        "hplus_activity",
+        ConfigValue(
+            default="approximate",
+            domain=In(HPLUS_ACTIVITY_OPTIONS),
+            description="Proton activity model for the catalysed rate terms",
+        ),
+    )
+    CONFIG.declare(
+        "reactions",
+        ConfigValue(
+            default=None,
+            domain=dict,
+            description="Reaction table (see ASA_REACTIONS); defaults to the ASA chemistry",
+        ),
+    )
+    declare_parameter_config(CONFIG)
+    
     def build(self):
         """Construct reaction sets, stoichiometry, and kinetic parameters.
 
-        Defines two liquid-phase rate reactions:
-        - r1_aspirin_synthesis
-        - r2_acetic_anhydride_hydrolysis
+        Builds one rate reaction per entry of the reaction table (the
+        ``reactions`` option, ``ASA_REACTIONS`` by default: r1 aspirin
+        synthesis and r2 acetic anhydride hydrolysis), after checking it
+        against the property package components. Only the table's non-zero
+        stoichiometric coefficients are stored.
 
-        Kinetic constants are stored as fixed Vars for straightforward
-        calibration updates and reproducible simulation behavior.
+        Kinetic parameters ``A0``, ``Ea0``, ``Acat``, ``Ea_cat`` and ``m`` are
+        indexed by ``rate_reaction_idx``, and the rate orders
+        ``reaction_order`` by the (reaction, component) pairs of the table.
+        They are declared through ``add_parameter``: fixed Vars, or mutable
+        Params under ``parameter_representation="lean"``. The sulfuric acid
+        dissociation constants used by the speciation models are declared
+        the same way.
         """
         
         super().build()
@@ -63,78 +199,27 @@ class ASAReactionParameterData(ReactionParameterBlock):
         property_package = self.config.property_package
         if property_package is None:
             raise ConfigurationError("ASAReactionParameterBlock requires property_package.")
+        if self.config.hplus_activity == "greybox" and not greybox_available:
+            raise ConfigurationError(
+                "hplus_activity='greybox' requires pyomo.contrib.pynumero (numpy and scipy)."
+            )
         
-        self.rate_reaction_idx = Set(initialize=[
-            "r1_aspirin_synthesis",
-            "r2_acetic_anhydride_hydrolysis",
-            "r3_aspirin_hydrolysis"
-            ]
-        )
+        table = self.config.reactions if self.config.reactions is not None else ASA_REACTIONS
+        validate_reaction_table(table, property_package.component_list)
+        self.reaction_table = table
+        
+        self.rate_reaction_idx = Set(initialize=list(table), ordered=True)
         
         # Empty for now, might be filled in later if any reactions get upgraded to equilibrium
         self.equilibrium_reaction_idx = Set(initialize=[])
         
-        self.rate_reaction_stoichiometry = {
-            # r1: salicylic_acid + acetic_anhydride -> aspirin + acetic_acid (liquid only)
-            ("r1_aspirin_synthesis", "liquid", "salicylic_acid"): -1,
-            ("r1_aspirin_synthesis", "liquid", "acetic_anhydride"): -1,
-            ("r1_aspirin_synthesis", "liquid", "sulfuric_acid"): 0,
-            ("r1_aspirin_synthesis", "liquid", "aspirin"): 1,
-            ("r1_aspirin_synthesis", "liquid", "acetic_acid"): 1,
-            ("r1_aspirin_synthesis", "liquid", "water"): 0,
-            ("r1_aspirin_synthesis", "vapor", "salicylic_acid"): 0,
-            ("r1_aspirin_synthesis", "vapor", "acetic_anhydride"): 0,
-            ("r1_aspirin_synthesis", "vapor", "sulfuric_acid"): 0,
-            ("r1_aspirin_synthesis", "vapor", "aspirin"): 0,
-            ("r1_aspirin_synthesis", "vapor", "acetic_acid"): 0,
-            ("r1_aspirin_synthesis", "vapor", "water"): 0,
-            ("r1_aspirin_synthesis", "solid", "salicylic_acid"): 0,
-            ("r1_aspirin_synthesis", "solid", "acetic_anhydride"): 0,
-            ("r1_aspirin_synthesis", "solid", "sulfuric_acid"): 0,
-            ("r1_aspirin_synthesis", "solid", "aspirin"): 0,
-            ("r1_aspirin_synthesis", "solid", "acetic_acid"): 0,
-            ("r1_aspirin_synthesis", "solid", "water"): 0,
-            
-            # r2: acetic_anhydride + water -> 2 acetic_acid (liquid only)
-            ("r2_acetic_anhydride_hydrolysis", "liquid", "salicylic_acid"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "liquid", "acetic_anhydride"): -1,
-            ("r2_acetic_anhydride_hydrolysis", "liquid", "sulfuric_acid"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "liquid", "aspirin"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "liquid", "acetic_acid"): 2,
-            ("r2_acetic_anhydride_hydrolysis", "liquid", "water"): -1,
-            ("r2_acetic_anhydride_hydrolysis", "vapor", "salicylic_acid"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "vapor", "acetic_anhydride"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "vapor", "sulfuric_acid"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "vapor", "aspirin"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "vapor", "acetic_acid"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "vapor", "water"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "solid", "salicylic_acid"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "solid", "acetic_anhydride"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "solid", "sulfuric_acid"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "solid", "aspirin"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "solid", "acetic_acid"): 0,
-            ("r2_acetic_anhydride_hydrolysis", "solid", "water"): 0,
-            
-            # r3: aspirin + water -> salicylic_acid + acetic_acid (liquid_only)
-            ("r3_aspirin_hydrolysis", "liquid", "salicylic_acid"): 1,
-            ("r3_aspirin_hydrolysis", "liquid", "acetic_anhydride"): 0,
-            ("r3_aspirin_hydrolysis", "liquid", "sulfuric_acid"): 0,
-            ("r3_aspirin_hydrolysis", "liquid", "aspirin"): -1,
-            ("r3_aspirin_hydrolysis", "liquid", "acetic_acid"): 1,
-            ("r3_aspirin_hydrolysis", "liquid", "water"): -1,
-            ("r3_aspirin_hydrolysis", "vapor", "salicylic_acid"): 0,
-            ("r3_aspirin_hydrolysis", "vapor", "acetic_anhydride"): 0,
-            ("r3_aspirin_hydrolysis", "vapor", "sulfuric_acid"): 0,
-            ("r3_aspirin_hydrolysis", "vapor", "aspirin"): 0,
-            ("r3_aspirin_hydrolysis", "vapor", "acetic_acid"): 0,
-            ("r3_aspirin_hydrolysis", "vapor", "water"): 0,
-            ("r3_aspirin_hydrolysis", "solid", "salicylic_acid"): 0,
-            ("r3_aspirin_hydrolysis", "solid", "acetic_anhydride"): 0,
-            ("r3_aspirin_hydrolysis", "solid", "sulfuric_acid"): 0,
-            ("r3_aspirin_hydrolysis", "solid", "aspirin"): 0,
-            ("r3_aspirin_hydrolysis", "solid", "acetic_acid"): 0,
-            ("r3_aspirin_hydrolysis", "solid", "water"): 0,
-        }
+        # Only the table entries are stored; every other (reaction, phase,
+        # component) coefficient reads as zero
+        self.rate_reaction_stoichiometry = SparseStoichiometry(
+            ((r, spec.get("phase", "liquid"), j), nu)
+            for r, spec in table.items()
+            for j, nu in spec["stoichiometry"].items()
+        )
         
         # EMPTY FOR NOW, WILL FILL IN IF EQUILIBRIUM REACTIONS ARE EVER USED
         self.equilibrium_reaction_stoichiometry = {}
@@ -142,203 +227,114 @@ class ASAReactionParameterData(ReactionParameterBlock):
         reaction_rate_units = pyunits.mol / pyunits.m**3 / pyunits.s
         
         
-        # PARAMETER SET FOR REACTION 1
+        # KINETIC PARAMETERS, INDEXED BY REACTION
         
-        self.A0_1 = Var(
-            initialize=0.0,
+        add_parameter(
+            self,
+            "A0",
+            self.rate_reaction_idx,
+            initialize={r: spec["A0"] for r, spec in table.items()},
             domain=NonNegativeReals,
             units=reaction_rate_units,
-            doc="",
+            doc="Pre-exponential factor of the uncatalysed term",
         )
         
-        self.A0_1.fix()
-        
-        self.Ea0_1 = Var(
-            initialize=0.0,
+        add_parameter(
+            self,
+            "Ea0",
+            self.rate_reaction_idx,
+            initialize={r: spec["Ea0"] for r, spec in table.items()},
             domain=NonNegativeReals,
             units=pyunits.J/pyunits.mol,
-            doc="",
+            doc="Activation energy of the uncatalysed term",
         )
         
-        self.Ea0_1.fix()
-        
-        self.Acat_1 = Var(
-            initialize=1.1e12,
+        add_parameter(
+            self,
+            "Acat",
+            self.rate_reaction_idx,
+            initialize={r: spec["Acat"] for r, spec in table.items()},
             domain=NonNegativeReals,
             units=reaction_rate_units,
-            doc="",
+            doc="Pre-exponential factor of the acid-catalysed term",
         )
         
-        self.Acat_1.fix()
-        
-        self.Ea_cat_1 = Var(
-            initialize=6.44e4,
+        add_parameter(
+            self,
+            "Ea_cat",
+            self.rate_reaction_idx,
+            initialize={r: spec["Ea_cat"] for r, spec in table.items()},
             domain=NonNegativeReals,
             units=pyunits.J/pyunits.mol,
-            doc="",
+            doc="Activation energy of the acid-catalysed term",
         )
         
-        self.Ea_cat_1.fix()
-        
-        self.m_1 = Var(
-            initialize=0.0,
+        add_parameter(
+            self,
+            "m",
+            self.rate_reaction_idx,
+            initialize={r: spec.get("catalytic_order", 0.0) for r, spec in table.items()},
             domain=NonNegativeReals,
             units=pyunits.dimensionless,
-            doc="",
+            doc="Order of the catalysed term in the proton activity",
         )
         
-        self.m_1.fix()
-        
-        self.alpha_1 = Var(
-            initialize=1.0,
-            domain=NonNegativeReals,
-            units=pyunits.dimensionless,
-            doc="",
+        # Orders only exist for the (reaction, component) pairs in the table
+        self.reaction_order_idx = Set(
+            initialize=[(r, j) for r, spec in table.items() for j in spec["orders"]],
+            dimen=2,
+            ordered=True,
         )
         
-        self.alpha_1.fix()
-        
-        self.beta_1 = Var(
-            initialize=1.0,
+        add_parameter(
+            self,
+            "reaction_order",
+            self.reaction_order_idx,
+            initialize={(r, j): order for r, spec in table.items() for j, order in spec["orders"].items()},
             domain=NonNegativeReals,
             units=pyunits.dimensionless,
-            doc="",
-        )
-        
-        self.beta_1.fix()
-        
-        
-        # PARAMETER SET FOR REACTION 2
-        
-        self.A0_2 = Var(
-            initialize=1.5e9,
-            domain=NonNegativeReals,
-            units=reaction_rate_units,
-            doc="",
-        )
-        
-        self.A0_2.fix()
-        
-        self.Ea0_2 = Var(
-            initialize=5.01e4,
-            domain=NonNegativeReals,
-            units=pyunits.J/pyunits.mol,
-            doc="",
-        )
-        
-        self.Ea0_2.fix()
-        
-        self.Acat_2 = Var(
-            initialize=1.0e13,
-            domain=NonNegativeReals,
-            units=reaction_rate_units,
-            doc="",
-        )
-        
-        self.Acat_2.fix()
-        
-        self.Ea_cat_2 = Var(
-            initialize=5.78e4,
-            domain=NonNegativeReals,
-            units=pyunits.J/pyunits.mol,
-            doc="",
+            doc="Activity exponent of each rate-determining component",
         )
         
-        self.Ea_cat_2.fix()
         
-        self.m_2 = Var(
-            initialize=1.0,
-            domain=NonNegativeReals,
-            units=pyunits.dimensionless,
-            doc="",
-        )
-        
-        self.m_2.fix()
+        # SULFURIC ACID DISSOCIATION (used unless hplus_activity="approximate")
         
-        self.alpha_2 = Var(
-            initialize=1.0,
-            domain=NonNegativeReals,
+        add_parameter(
+            self,
+            "K_diss_1",
+            initialize=1.0e-3,
+            domain=PositiveReals,
             units=pyunits.dimensionless,
-            doc="",
+            doc="H2SO4 -> H+ + HSO4- constant at 298.15 K (mole-fraction basis)",
         )
         
-        self.alpha_2.fix()
-        
-        self.beta_2 = Var(
-            initialize=1.0,
-            domain=NonNegativeReals,
+        add_parameter(
+            self,
+            "K_diss_2",
+            initialize=1.0e-6,
+            domain=PositiveReals,
             units=pyunits.dimensionless,
-            doc="",
+            doc="HSO4- -> H+ + SO4-- constant at 298.15 K (mole-fraction basis)",
         )
         
-        self.beta_2.fix()
-        
-        
-        # PARAMETER SET FOR REACTION 3
-        
-        self.A0_3 = Var(
-            initialize=1.5e9,
-            domain=NonNegativeReals,
-            units=reaction_rate_units,
-            doc="",
-        )
-        
-        self.A0_3.fix()
-        
-        self.Ea0_3 = Var(
-            initialize=5.01e4,
-            domain=NonNegativeReals,
+        add_parameter(
+            self,
+            "dH_diss_1",
+            initialize=-2.0e4,
+            domain=Reals,
             units=pyunits.J/pyunits.mol,
-            doc="",
+            doc="First dissociation enthalpy",
         )
         
-        self.Ea0_3.fix()
-        
-        self.Acat_3 = Var(
-            initialize=1.0e13,
-            domain=NonNegativeReals,
-            units=reaction_rate_units,
-            doc="",
-        )
-        
-        self.Acat_3.fix()
-        
-        self.Ea_cat_3 = Var(
-            initialize=5.78e4,
-            domain=NonNegativeReals,
+        add_parameter(
+            self,
+            "dH_diss_2",
+            initialize=-2.2e4,
+            domain=Reals,
             units=pyunits.J/pyunits.mol,
-            doc="",
-        )
-        
-        self.Ea_cat_3.fix()
-        
-        self.m_3 = Var(
-            initialize=1.0,
-            domain=NonNegativeReals,
-            units=pyunits.dimensionless,
-            doc="",
-        )
-        
-        self.m_3.fix()
-        
-        self.alpha_3 = Var(
-            initialize=1.0,
-            domain=NonNegativeReals,
-            units=pyunits.dimensionless,
-            doc="",
-        )
-        
-        self.alpha_3.fix()
-        
-        self.beta_3 = Var(
-            initialize=1.0,
-            domain=NonNegativeReals,
-            units=pyunits.dimensionless,
-            doc="",
+            doc="Second dissociation enthalpy",
         )
-        
-        self.beta_3.fix()
-
+    
     @classmethod
     def define_metadata(cls, obj):
         """Declare supported reaction properties and default units.
@@ -389,6 +385,9 @@ class ASAReactionBlockMethods(ReactionBlockBase):
             None
         """
         init_log = idaeslog.getInitLogger(self.name, outlvl, tag="reactions")
+        for block in self.values():
+            if hasattr(block, "a_hplus_speciation"):
+                block.initialize_speciation()
         init_log.info("Reaction initialization complete (no solve required).")
         
         _ = state_vars_fixed
@@ -414,21 +413,128 @@ class ASAReactionBlockData(ReactionBlockDataBase):
         """
         return MaterialFlowBasis.molar
     
+    def _speciation_inputs(self):
+        state = self.state_ref
+        return (
+            state.temperature,
+            state.mole_frac_comp["sulfuric_acid"],
+            state.act_coeff_liq_comp["sulfuric_acid"],
+        )
+    
+    def _speciation_parameter_components(self):
+        params = self.params
+        return (params.K_diss_1, params.K_diss_2, params.dH_diss_1, params.dH_diss_2)
+    
+    def _speciation_parameters(self):
+        return tuple(value(p) for p in self._speciation_parameter_components())
+    
+    def _build_dissociation_constants(self, temperature):
+        params = self.params
+        R = 8.314462618 * pyunits.J / pyunits.mol / pyunits.K
+        T_ref = REFERENCE_TEMPERATURE * pyunits.K
+        self.K_diss = Expression(
+            [1, 2],
+            rule=lambda b, j: getattr(params, f"K_diss_{j}") * exp(
+                -getattr(params, f"dH_diss_{j}") / R * (1 / temperature - 1 / T_ref)
+            ),
+            doc="Dissociation constants at the state temperature",
+        )
+    
+    def _build_speciation(self):
+        r"""Add the H2SO4/HSO4-/SO4-- equilibria as algebraic constraints.
+
+        LaTeX form:
+            K_j(T) = K_{j,ref} \exp(-\Delta H_j / R (1/T - 1/T_{ref})) \\
+            x_S = x_{H2SO4} + x_{HSO4} + x_{SO4} \\
+            x_{H+} = x_{HSO4} + 2 x_{SO4} \\
+            K_1 \gamma_S x_{H2SO4} = x_{H+} x_{HSO4} \\
+            K_2 x_{HSO4} = x_{H+} x_{SO4}
+        """
+        temperature, x_total, gamma = self._speciation_inputs()
+        self._build_dissociation_constants(temperature)
+        
+        self.speciation_idx = Set(initialize=["hplus", "h2so4", "hso4", "so4"])
+        self.x_speciation = Var(
+            self.speciation_idx,
+            initialize=1e-3,
+            domain=NonNegativeReals,
+            units=pyunits.dimensionless,
+            doc="Mole fractions of the sulfuric acid species",
+        )
+        x = self.x_speciation
+        self.sulfate_balance = Constraint(expr=x["h2so4"] + x["hso4"] + x["so4"] == x_total)
+        self.charge_balance = Constraint(expr=x["hplus"] == x["hso4"] + 2 * x["so4"])
+        self.first_dissociation = Constraint(
+            expr=self.K_diss[1] * gamma * x["h2so4"] == x["hplus"] * x["hso4"]
+        )
+        self.second_dissociation = Constraint(expr=self.K_diss[2] * x["hso4"] == x["hplus"] * x["so4"])
+        self.a_hplus_speciation = x["hplus"]
+    
+    def _build_speciation_greybox(self):
+        r"""Add ``a_hplus`` as the output of an external grey-box block.
+
+        The grey-box inputs are tied to the state by equality constraints. The
+        grey-box model reads the dissociation parameters at every evaluation,
+        so later changes to them take effect.
+
+        ``speciation_cubic`` is the same equilibrium reduced to the free
+        proton fraction h (see ``asa_electrolyte_speciation``), in log form
+        so its residual is relative. It is built deactivated, as an algebraic
+        stand-in for the grey-box block:
+
+        LaTeX form:
+            a = K_1 \gamma_S \\
+            \ln h + \ln(h^2 + a h + a K_2) = \ln a + \ln x_S + \ln(h + 2 K_2)
+        """
+        temperature, x_total, gamma = self._speciation_inputs()
+        self.speciation = egb.ExternalGreyBoxBlock(
+            external_model=SulfuricAcidSpeciation(*self._speciation_parameter_components())
+        )
+        inputs = self.speciation.inputs
+        self.speciation_temperature_link = Constraint(expr=inputs["temperature"] == temperature)
+        self.speciation_x_link = Constraint(expr=inputs["x_sulfuric_acid"] == x_total)
+        self.speciation_gamma_link = Constraint(expr=inputs["gamma_sulfuric_acid"] == gamma)
+        self.a_hplus_speciation = self.speciation.outputs["a_hplus"]
+        
+        self._build_dissociation_constants(temperature)
+        h = self.a_hplus_speciation
+        a = self.K_diss[1] * gamma
+        self.speciation_cubic = Constraint(
+            expr=log(h) + log(h**2 + a * h + a * self.K_diss[2])
+            == log(a) + log(x_total) + log(h + 2 * self.K_diss[2])
+        )
+        self.speciation_cubic.deactivate()
+    
+    def initialize_speciation(self):
+        """Set the speciation variables from the current state by Newton's method."""
+        inputs = [value(v) for v in self._speciation_inputs()]
+        result = speciate(*inputs, *self._speciation_parameters())
+        if hasattr(self, "speciation"):
+            for name, val in zip(self.speciation.inputs, inputs):
+                self.speciation.inputs[name].set_value(val)
+        else:
+            for j in self.speciation_idx:
+                self.x_speciation[j].set_value(result[j])
+        self.a_hplus_speciation.set_value(result["hplus"])
+        return result["hplus"]
+    
     def _reaction_rate(self):
         """Build reaction-rate expressions for the configured rate reactions.
 
         Activity approximation:
             a_i = gamma_i x_i
 
+        The proton activity a_H+ is gamma_H2SO4 x_H2SO4 unless the parameter
+        block option ``hplus_activity`` selects the speciation models.
+
         Arrhenius terms:
-            k_0 = A_0 exp(-E_{a,0} / (R T))
-            k_cat = A_cat exp(-E_{a,cat} / (R T))
+            k_{0,r} = A_{0,r} exp(-E_{a0,r} / (R T))
+            k_{cat,r} = A_{cat,r} exp(-E_{a,cat,r} / (R T))
 
-        Rate forms:
-            r_1 = (k_0 + k_cat a_H+^{m_1}) a_SA^{alpha_1} a_AA^{beta_1}
-            r_2 = (k_0 + k_cat a_H+^{m_2}) a_AA^{alpha_2} a_H2O^{beta_2}
+        Rate form, with n_{r,i} the table orders of reaction r:
+            r_r = (k_{0,r} + k_{cat,r} a_H+^{m_r}) prod_i a_i^{n_{r,i}}
 
-        where SA is salicylic acid and AA is acetic anhydride.
+        Activities are built only for components that appear in an order.
         """
         
         state = self.state_ref
@@ -437,38 +543,28 @@ class ASAReactionBlockData(ReactionBlockDataBase):
         eps = 1e-12
         R = 8.314462618 * pyunits.J / pyunits.mol / pyunits.K
         
-        a_hplus = gamma["sulfuric_acid"] * state.mole_frac_comp["sulfuric_acid"] + eps
-        a_sa = gamma["salicylic_acid"] * state.mole_frac_comp["salicylic_acid"] + eps
-        a_aa = gamma["acetic_anhydride"] * state.mole_frac_comp["acetic_anhydride"] + eps
-        a_h2o = gamma["water"] * state.mole_frac_comp["water"] + eps
-        a_asa = gamma["aspirin"] * state.mole_frac_comp["aspirin"] + eps
-        
-        def reaction_rule(b, reaction):
-            
-            if reaction == "r1_aspirin_synthesis":
-                
-                k0 = params.A0_1 * exp(-params.Ea0_1 / (R * state.temperature))
-                kcat = params.Acat_1 * exp(-params.Ea_cat_1 / (R * state.temperature))
-                
-                return (k0 + kcat * a_hplus ** params.m_1) * a_sa ** params.alpha_1 * a_aa ** params.beta_1
-            
-            if reaction == "r2_acetic_anhydride_hydrolysis":
-                
-                k0 = params.A0_2 * exp(-params.Ea0_2 / (R * state.temperature))
-                kcat = params.Acat_2 * exp(-params.Ea_cat_2 / (R * state.temperature))
-                
-                return (k0 + kcat * a_hplus ** params.m_2) * a_aa ** params.alpha_2 * a_h2o ** params.beta_2
-            
-            if reaction == "r3_aspirin_hydrolysis":
-                
-                k0 = params.A0_3 * exp(-params.Ea0_3 / (R * state.temperature))
-                kcat = params.Acat_3 * exp(-params.Ea_cat_3 / (R * state.temperature))
-                
-                return (k0 + kcat * a_hplus ** params.m_3) * a_asa ** params.alpha_3 * a_h2o ** params.beta_3
-            
-            raise ConfigurationError(
-                f"Unknown reaction '{reaction}' encountered in "
-                f"ASAReactionBlockData._reaction_rate for block {self.name}."
-            )
-        
-        self.reaction_rate = Expression(params.rate_reaction_idx, rule=reaction_rule)
\ No newline at end of file
+        if params.config.hplus_activity == "speciation":
+            self._build_speciation()
+            a_hplus = self.a_hplus_speciation + eps
+        elif params.config.hplus_activity == "greybox":
+            self._build_speciation_greybox()
+            a_hplus = self.a_hplus_speciation + eps
+        else:
+            a_hplus = gamma["sulfuric_acid"] * state.mole_frac_comp["sulfuric_acid"] + eps
+        activity = {
+            j: gamma[j] * state.mole_frac_comp[j] + eps
+            for j in dict.fromkeys(j for _, j in params.reaction_order_idx)
+        }
+        orders = {}
+        for r, j in params.reaction_order_idx:
+            orders.setdefault(r, []).append(j)
+        
+        def reaction_rule(b, r):
+            k0 = params.A0[r] * exp(-params.Ea0[r] / (R * state.temperature))
+            kcat = params.Acat[r] * exp(-params.Ea_cat[r] / (R * state.temperature))
+            rate = k0 + kcat * a_hplus ** params.m[r]
+            for j in orders.get(r, ()):
+                rate = rate * activity[j] ** params.reaction_order[r, j]
+            return rate
+        
+        self.reaction_rate = Expression(params.rate_reaction_idx, rule=reaction_rule)
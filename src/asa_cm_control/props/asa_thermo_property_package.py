@@ -1,5 +1,5 @@
 # To-Do:
-# - 
+# - Evaluate the VLE activity coefficients at the liquid rather than the overall composition
 
 
 """Custom liquid-focused thermophysical package for first-pass ASA synthesis modeling.
@@ -11,8 +11,30 @@ This module defines a manual IDAES property package with:
 
 The current implementation assumes a liquid-dominant approximation for derived
 phase quantities.
+
+With ``ThermoParameterBlock(vle=True)`` every state block also carries a
+``vle`` sub-block: vapor fraction, liquid and vapor compositions, modified
+Raoult equilibrium and a smoothed complementarity that drives the vapor
+fraction to zero below the bubble point. ``bubble_point_screen`` evaluates the
+bubble pressure for many states at once with numpy, and
+``ThermoStateBlock.screen_vle`` uses it to deactivate the ``vle`` sub-blocks of
+states that are clearly subcooled, so liquid-only operating points pay nothing
+for the flash equations.
+
+The component set and its constants come from a table (``ASA_COMPONENTS`` by
+default, or the parameter block option ``components``), and the NRTL
+interaction parameters from a pair table (``ASA_NRTL``, option ``nrtl``).
+Pairs missing from the NRTL table are ideal, and the activity coefficient
+expressions only sum over the listed pairs, so adding impurities with a few
+known interactions grows each state block linearly.
+
+Constants are declared with ``asa_parameters.add_parameter``: fixed Vars by
+default, or mutable Params with ``parameter_representation="lean"`` except for
+the names listed in ``estimable_parameters``.
 """
 
+import numpy as np
+
 from idaes.core import (
     declare_process_block_class,
     PhysicalParameterBlock,
@@ -26,30 +48,313 @@ from idaes.core import (
     MaterialBalanceType,
     EnergyBalanceType,
 )
+from pyomo.common.config import Bool, ConfigValue
 from pyomo.environ import (Var,
+    Block,
     Expression,
+    Param,
     Constraint,
     NonNegativeReals,
     units as pyunits,
     Reals,
     Set,
     exp,
+    value,
 )
+from idaes.core.util.math import smooth_min
+from asa_cm_control.props.asa_parameters import add_parameter, declare_parameter_config
 from idaes.core.util.initialization import fix_state_vars, revert_state_vars
 from idaes.core.util.exceptions import ConfigurationError
 import idaes.logger as idaeslog
 
 
+# Relative bubble-pressure margin of ``screen_vle``: a state keeps its flash
+# equations if P_bubble > (1 - margin) P, so states close to boiling are kept
+VLE_SCREEN_MARGIN = 0.2
+
+
+def vapor_pressure(temperature, antoine_A, antoine_B, antoine_C):
+    """Return Antoine vapor pressures in Pa, ``ln(P_sat) = A - B / (T + C)``.
+
+    Args:
+        temperature: Temperatures in K, shape ``(n,)``.
+        antoine_A, antoine_B, antoine_C: Component coefficients, shape ``(m,)``.
+
+    Returns:
+        numpy.ndarray: Vapor pressures, shape ``(n, m)``.
+    """
+    temperature = np.asarray(temperature, dtype=float)[:, None]
+    return np.exp(antoine_A - antoine_B / (temperature + antoine_C))
+
+
+def nrtl_activity_coefficients(mole_frac, tau, alpha):
+    """Return NRTL activity coefficients for many compositions at once.
+
+    Vectorized form of ``ThermoStateBlockData._act_coeff_liq_comp``.
+
+    Args:
+        mole_frac: Compositions, shape ``(n, m)``.
+        tau: NRTL ``tau_ij``, shape ``(m, m)``.
+        alpha: NRTL ``alpha_ij``, shape ``(m, m)``.
+
+    Returns:
+        numpy.ndarray: Activity coefficients, shape ``(n, m)``.
+    """
+    x = np.asarray(mole_frac, dtype=float)
+    G = np.exp(-alpha * tau)
+    Q = x @ G + 1e-12
+    ratio = (x @ (tau * G)) / Q
+    log_gamma = ratio + (x / Q) @ (tau * G).T - (x * ratio / Q) @ G.T
+    return np.exp(log_gamma)
+
+
+def bubble_point_screen(params, temperature, pressure, mole_frac, margin=VLE_SCREEN_MARGIN):
+    """Screen states for a possible vapor phase from their bubble pressure.
+
+    The bubble pressure follows from modified Raoult's law with NRTL activity
+    coefficients. A vapor phase can only exist if it exceeds the pressure.
+
+    Args:
+        params: ``ThermoParameterBlock`` supplying Antoine and NRTL parameters.
+        temperature: Temperatures in K, shape ``(n,)``.
+        pressure: Pressures in Pa, shape ``(n,)``.
+        mole_frac: Compositions in ``params.component_list`` order, shape
+            ``(n, m)``.
+        margin: Relative margin below the pressure that still counts as
+            possibly two-phase.
+
+    Returns:
+        dict: ``pressure_bubble`` (Pa), ``k_value`` (``gamma_i P_sat_i / P``,
+        shape ``(n, m)``) and boolean ``vapor_possible``, all as arrays.
+    """
+    components = list(params.component_list)
+    antoine = [
+        np.array([value(getattr(params, name)[c]) for c in components])
+        for name in ("antoine_A", "antoine_B", "antoine_C")
+    ]
+    position = {c: k for k, c in enumerate(components)}
+    tau = np.zeros((len(components), len(components)))
+    alpha = np.zeros_like(tau)
+    for i, j in params.nrtl_pair_set:
+        tau[position[i], position[j]] = value(params.tau_nrtl[i, j])
+        alpha[position[i], position[j]] = value(params.alpha_nrtl[i, j])
+    pressure = np.asarray(pressure, dtype=float)
+    
+    fugacity = nrtl_activity_coefficients(mole_frac, tau, alpha) * vapor_pressure(temperature, *antoine)
+    pressure_bubble = (np.asarray(mole_frac, dtype=float) * fugacity).sum(axis=1)
+    return {
+        "pressure_bubble": pressure_bubble,
+        "k_value": fugacity / pressure[:, None],
+        "vapor_possible": pressure_bubble > (1 - margin) * pressure,
+    }
+
+
+# Per-component constants, keyed like the parameters they initialize; a
+# different component set is a different table (``components`` option)
+ASA_COMPONENTS = {
+    "salicylic_acid": {
+        "mw_comp": 0.13812,
+        "cp_mol_liq_comp": 210.0,
+        "cp_mol_vap_comp": 120.0,
+        "cp_mol_sol_comp": 160.9,
+        "density_liq_comp": 1440.0,
+        "density_sol_comp": 1443.0,
+        "dh_form_liq_comp": -585260,
+        "antoine_A": 25.0,
+        "antoine_B": 8200.0,
+        "antoine_C": 0.0,
+        "dh_vap_comp": 95000.0,
+        "dh_fus_comp": 27100.0,
+        "temperature_fus_comp": 432.0,
+    },
+    "acetic_anhydride": {
+        "mw_comp": 0.10209,
+        "cp_mol_liq_comp": 168.2,
+        "cp_mol_vap_comp": 99.5,
+        "cp_mol_sol_comp": 168.2,
+        "density_liq_comp": 1060.0,
+        "density_sol_comp": 1346.0,
+        "dh_form_liq_comp": -625000,
+        "antoine_A": 22.0,
+        "antoine_B": 3746.5,
+        "antoine_C": -55.0,
+        "dh_vap_comp": 41200.0,
+        "dh_fus_comp": 10500.0,
+        "temperature_fus_comp": 200.0,
+    },
+    "sulfuric_acid": {
+        "mw_comp": 0.098079,
+        "cp_mol_liq_comp": 137.6,
+        "cp_mol_vap_comp": 83.71,
+        "cp_mol_sol_comp": 137.6,
+        "density_liq_comp": 1840.0,
+        "density_sol_comp": 1940.0,
+        "dh_form_liq_comp": -814000,
+        "antoine_A": 25.0,
+        "antoine_B": 9500.0,
+        "antoine_C": 0.0,
+        "dh_vap_comp": 65000.0,
+        "dh_fus_comp": 10710.0,
+        "temperature_fus_comp": 283.5,
+    },
+    "aspirin": {
+        "mw_comp": 0.18016,
+        "cp_mol_liq_comp": 270.0,
+        "cp_mol_vap_comp": 149.0,
+        "cp_mol_sol_comp": 217.8,
+        "density_liq_comp": 1330.0,
+        "density_sol_comp": 1335.0,
+        "dh_form_liq_comp": -758200,
+        "antoine_A": 25.0,
+        "antoine_B": 9000.0,
+        "antoine_C": 0.0,
+        "dh_vap_comp": 105000.0,
+        "dh_fus_comp": 29800.0,
+        "temperature_fus_comp": 408.0,
+    },
+    "acetic_acid": {
+        "mw_comp": 0.06005,
+        "cp_mol_liq_comp": 123.1,
+        "cp_mol_vap_comp": 63.44,
+        "cp_mol_sol_comp": 123.1,
+        "density_liq_comp": 1053.0,
+        "density_sol_comp": 1266.0,
+        "dh_form_liq_comp": -484000,
+        "antoine_A": 22.2945,
+        "antoine_B": 3782.1,
+        "antoine_C": -39.764,
+        "dh_vap_comp": 23700.0,
+        "dh_fus_comp": 11730.0,
+        "temperature_fus_comp": 289.8,
+    },
+    "water": {
+        "mw_comp": 0.01801528,
+        "cp_mol_liq_comp": 75.37,
+        "cp_mol_vap_comp": 33.58,
+        "cp_mol_sol_comp": 37.77,
+        "density_liq_comp": 1000.0,
+        "density_sol_comp": 916.7,
+        "dh_form_liq_comp": -286000,
+        "antoine_A": 23.1964,
+        "antoine_B": 3816.44,
+        "antoine_C": -46.13,
+        "dh_vap_comp": 40660.0,
+        "dh_fus_comp": 6010.0,
+        "temperature_fus_comp": 273.15,
+    },
+}
+
+COMPONENT_TABLE_KEYS = tuple(next(iter(ASA_COMPONENTS.values())))
+
+# NRTL interaction parameters of the listed pairs (i, j); pairs not listed are
+# ideal (tau_ij = 0). Alpha defaults to NRTL_DEFAULT_ALPHA; sulfuric acid pairs
+# and the solute-water pairs use 0.20 and 0.35.
+NRTL_DEFAULT_ALPHA = 0.3
+
+ASA_NRTL = {
+    ("salicylic_acid", "acetic_anhydride"): {"tau": 0.35},
+    ("salicylic_acid", "sulfuric_acid"): {"tau": 0.1, "alpha": 0.2},
+    ("salicylic_acid", "aspirin"): {"tau": 0.2},
+    ("salicylic_acid", "acetic_acid"): {"tau": 0.55},
+    ("salicylic_acid", "water"): {"tau": 1.8, "alpha": 0.35},
+    ("acetic_anhydride", "salicylic_acid"): {"tau": 0.15},
+    ("acetic_anhydride", "sulfuric_acid"): {"tau": 0.2, "alpha": 0.2},
+    ("acetic_anhydride", "aspirin"): {"tau": 0.45},
+    ("acetic_anhydride", "acetic_acid"): {"tau": 0.25},
+    ("acetic_anhydride", "water"): {"tau": 2.2},
+    ("sulfuric_acid", "salicylic_acid"): {"tau": 0.8, "alpha": 0.2},
+    ("sulfuric_acid", "acetic_anhydride"): {"tau": 0.9, "alpha": 0.2},
+    ("sulfuric_acid", "aspirin"): {"tau": 0.2, "alpha": 0.2},
+    ("sulfuric_acid", "acetic_acid"): {"tau": -0.2, "alpha": 0.2},
+    ("sulfuric_acid", "water"): {"tau": -0.8, "alpha": 0.2},
+    ("aspirin", "salicylic_acid"): {"tau": 0.15},
+    ("aspirin", "acetic_anhydride"): {"tau": 0.2},
+    ("aspirin", "sulfuric_acid"): {"tau": 0.9, "alpha": 0.2},
+    ("aspirin", "acetic_acid"): {"tau": 0.4},
+    ("aspirin", "water"): {"tau": 2.0, "alpha": 0.35},
+    ("acetic_acid", "salicylic_acid"): {"tau": 0.3},
+    ("acetic_acid", "acetic_anhydride"): {"tau": 0.1},
+    ("acetic_acid", "sulfuric_acid"): {"tau": 0.8, "alpha": 0.2},
+    ("acetic_acid", "aspirin"): {"tau": 0.25},
+    ("acetic_acid", "water"): {"tau": 1.2},
+    ("water", "salicylic_acid"): {"tau": 0.6, "alpha": 0.35},
+    ("water", "acetic_anhydride"): {"tau": 0.4},
+    ("water", "sulfuric_acid"): {"tau": 2.5, "alpha": 0.2},
+    ("water", "aspirin"): {"tau": 0.8, "alpha": 0.35},
+    ("water", "acetic_acid"): {"tau": -0.35},
+}
+
+
+def _table_column(table, key):
+    return {component: spec[key] for component, spec in table.items()}
+
+
+def validate_component_table(table, nrtl):
+    """Check a component table and an NRTL pair table.
+
+    Args:
+        table: Mapping of component name to its constants (see
+            ``ASA_COMPONENTS``).
+        nrtl: Mapping of component pair ``(i, j)`` to ``tau`` and optional
+            ``alpha`` (see ``ASA_NRTL``).
+
+    Raises:
+        ConfigurationError: If a component lacks a constant, or a pair names
+            an unknown component, is diagonal or lacks ``tau``.
+    """
+    if not table:
+        raise ConfigurationError("The component table is empty.")
+    for name, spec in table.items():
+        missing = [key for key in COMPONENT_TABLE_KEYS if key not in spec]
+        if missing:
+            raise ConfigurationError(f"Component '{name}' is missing {missing}.")
+    for pair, spec in nrtl.items():
+        if len(pair) != 2 or not set(pair) <= set(table):
+            raise ConfigurationError(f"NRTL pair {pair} names unknown components.")
+        if pair[0] == pair[1]:
+            raise ConfigurationError(f"NRTL pair {pair} is diagonal; tau_ii is always zero.")
+        if "tau" not in spec:
+            raise ConfigurationError(f"NRTL pair {pair} is missing 'tau'.")
+
+
 # PARAMETER BLOCK CLASS
 
 @declare_process_block_class("ThermoParameterBlock")
 class ThermoParameterData(PhysicalParameterBlock):
-    """Thermophysical parameter block for the ASA component set.
+    """Thermophysical parameter block for a tabulated component set.
 
     The block defines components, phases, reference conditions, and fixed global
-    property constants used by associated state blocks.
+    property constants used by associated state blocks. Components and their
+    constants come from the ``components`` table, NRTL pairs from ``nrtl``.
     """
-
+    
+    CONFIG = PhysicalParameterBlock.CONFIG()
+    CONFIG.declare(
+        "vle",
+        ConfigValue(
+            default=False,
+            domain=Bool,
+            description="Add vapor-liquid equilibrium equations to the state blocks",
+        ),
+    )
+    CONFIG.declare(
+        "components",
+        ConfigValue(
+            default=None,
+            domain=dict,
+            description="Component table (see ASA_COMPONENTS); defaults to the ASA components",
+        ),
+    )
+    CONFIG.declare(
+        "nrtl",
+        ConfigValue(
+            default=None,
+            domain=dict,
+            description="NRTL pair table (see ASA_NRTL); defaults to the ASA pairs",
+        ),
+    )
+    declare_parameter_config(CONFIG)
+    
     def build(self):
         """Construct the parameter block and fixed global property variables.
 
@@ -60,252 +365,196 @@ class ThermoParameterData(PhysicalParameterBlock):
         super().build()
         self._state_block_class = ThermoStateBlock
         
-        self.salicylic_acid = Component()
-        self.acetic_anhydride = Component()
-        self.sulfuric_acid = Component()
-        self.aspirin = Component()
-        self.acetic_acid = Component()
-        self.water = Component()
+        table = self.config.components or ASA_COMPONENTS
+        nrtl = ASA_NRTL if self.config.nrtl is None else self.config.nrtl
+        validate_component_table(table, nrtl)
+        self.component_table = table
+        self.nrtl_table = nrtl
+        
+        for name in table:
+            self.add_component(name, Component())
         
         self.liquid = LiquidPhase()
         self.vapor = VaporPhase()
         self.solid = SolidPhase()
         
-        self.pressure_ref = Var(
+        add_parameter(
+            self,
+            "pressure_ref",
             initialize=101325.0,
             units=pyunits.Pa,
             doc="Reference pressure",
         )
         
-        self.pressure_ref.fix()
-        
-        self.temperature_ref = Var(
+        add_parameter(
+            self,
+            "temperature_ref",
             initialize=298.15,
             units=pyunits.K,
             doc="Reference temperature",
         )
         
-        self.temperature_ref.fix()
-        
-        self.mw_comp = Var(
+        add_parameter(
+            self,
+            "mw_comp",
             self.component_list,
-            initialize={
-                "salicylic_acid": 0.13812,
-                "acetic_anhydride": 0.10209,
-                "sulfuric_acid": 0.098079,
-                "aspirin": 0.18016,
-                "acetic_acid": 0.06005,
-                "water": 0.01801528,
-            },
+            initialize=_table_column(table, "mw_comp"),
             units=pyunits.kg / pyunits.mol,
             doc="Molecular weight of each component in kg/mol",
         )
         
-        self.mw_comp.fix()
-        
-        self.cp_mol_liq_comp = Var(
+        add_parameter(
+            self,
+            "cp_mol_liq_comp",
             self.component_list,
-            initialize={
-                "salicylic_acid": 210.0,
-                "acetic_anhydride": 168.2,
-                "sulfuric_acid": 137.6,
-                "aspirin": 270.0,
-                "acetic_acid": 123.1,
-                "water": 75.37,
-            },
+            initialize=_table_column(table, "cp_mol_liq_comp"),
             units=pyunits.J / pyunits.mol / pyunits.K,
             doc="Constant molar heat capacity for liquid phase by component"
         )
         
-        self.cp_mol_liq_comp.fix()
-        
-        self.cp_mol_vap_comp = Var(
+        add_parameter(
+            self,
+            "cp_mol_vap_comp",
             self.component_list,
-            initialize={
-                "salicylic_acid": 120.0,
-                "acetic_anhydride": 99.50,
-                "sulfuric_acid": 83.71,
-                "aspirin": 149.0,
-                "acetic_acid": 63.44,
-                "water": 33.58,
-            },
+            initialize=_table_column(table, "cp_mol_vap_comp"),
             units=pyunits.J/pyunits.mol/pyunits.K,
             doc="Constant molar heat capacity for vapor phase by component"
         )
         
-        self.cp_mol_vap_comp.fix()
-        
-        self.cp_mol_sol_comp = Var(
+        add_parameter(
+            self,
+            "cp_mol_sol_comp",
             self.component_list,
-            initialize={
-                "salicylic_acid": 160.9,
-                "acetic_anhydride": 168.2,
-                "sulfuric_acid": 137.6,
-                "aspirin": 217.8,
-                "acetic_acid": 123.1,
-                "water": 37.77,
-            },
+            initialize=_table_column(table, "cp_mol_sol_comp"),
             units=pyunits.J/pyunits.mol/pyunits.K,
             doc="Constant molar heat capacity for solid phase by component"
         )
         
-        self.cp_mol_sol_comp.fix()
-        
-        self.density_liq_comp = Var(
+        add_parameter(
+            self,
+            "density_liq_comp",
             self.component_list,
-            initialize={
-                "salicylic_acid": 1440.0,
-                "acetic_anhydride": 1060.0,
-                "sulfuric_acid": 1840.0,
-                "aspirin": 1330.0,
-                "acetic_acid": 1053.0,
-                "water": 1000.0,
-            },
+            initialize=_table_column(table, "density_liq_comp"),
             units=pyunits.kg / pyunits.m**3,
             doc="Density of pure liquid component at reference conditions (Some are estimated based on literature values at 25C, may need to be updated with more accurate values or temperature dependence)"
         )
         
-        self.density_liq_comp.fix()
-        
-        self.density_sol_comp = Var(
+        add_parameter(
+            self,
+            "density_sol_comp",
             self.component_list,
-            initialize={
-                "salicylic_acid": 1443.0,
-                "acetic_anhydride": 1346.0,
-                "sulfuric_acid": 1940.0,
-                "aspirin": 1335.0,
-                "acetic_acid": 1266.0,
-                "water": 916.7,
-            },
+            initialize=_table_column(table, "density_sol_comp"),
             units=pyunits.kg / pyunits.m**3,
             doc="Density of pure solid component at reference conditions (Some are estimated based on literature values at 25C, may need to be updated with more accurate values or temperature dependence)"
         )
         
-        self.density_sol_comp.fix()
-        
         # STANDARD ENTHALPY OF FORMATION (J/mol)
-        self.dh_form_liq_comp = Var(
+        add_parameter(
+            self,
+            "dh_form_liq_comp",
             self.component_list,
-            initialize={
-                "salicylic_acid": -585260,
-                "acetic_anhydride": -625000,
-                "sulfuric_acid": -814000,
-                "aspirin": -758200,
-                "acetic_acid": -484000,
-                "water": -286000,
-            },
+            initialize=_table_column(table, "dh_form_liq_comp"),
             units=pyunits.J / pyunits.mol,
             doc="Standard enthalpy of formation at reference conditions of 298.15K for liquid phase by component"
         )
         
-        self.dh_form_liq_comp.fix()
+        # NRTL parameters for the listed (non-ideal) pairs; every other pair
+        # has tau_ij = 0 and therefore G_ij = 1
         
-        # NRTL Parameters:
+        self.nrtl_pair_set = Set(initialize=list(nrtl), dimen=2)
         
-        self.nrtl_pair_set = Set(
-            initialize=[(i, j) for i in self.component_list for j in self.component_list],
-            dimen=2,
-        )
-        
-        self.tau_nrtl = Var(
+        add_parameter(
+            self,
+            "tau_nrtl",
             self.nrtl_pair_set,
-            initialize=0.0,
+            initialize={pair: spec["tau"] for pair, spec in nrtl.items()},
             domain=Reals,
             units=pyunits.dimensionless
         )
         
-        self.tau_nrtl.fix()
-        
-        self.alpha_nrtl = Var(
+        add_parameter(
+            self,
+            "alpha_nrtl",
             self.nrtl_pair_set,
-            initialize=0.3,
+            initialize={pair: spec.get("alpha", NRTL_DEFAULT_ALPHA) for pair, spec in nrtl.items()},
             domain=NonNegativeReals,
             units=pyunits.dimensionless
         )
         
-        self.alpha_nrtl.fix()
-        
-        for c in self.component_list:
-            self.tau_nrtl[c, c].fix(0.0)
-            self.alpha_nrtl[c, c].fix(0.0)
-        
-        # -----------------------------
-        # tau_ij seeds (dimensionless)
-        # -----------------------------
-        
-        self.tau_nrtl["salicylic_acid", "acetic_anhydride"].fix(0.35)
-        self.tau_nrtl["acetic_anhydride", "salicylic_acid"].fix(0.15)
-        
-        self.tau_nrtl["salicylic_acid", "sulfuric_acid"].fix(0.10)
-        self.tau_nrtl["sulfuric_acid", "salicylic_acid"].fix(0.80)
-        
-        self.tau_nrtl["salicylic_acid", "aspirin"].fix(0.20)
-        self.tau_nrtl["aspirin", "salicylic_acid"].fix(0.15)
-        
-        self.tau_nrtl["salicylic_acid", "acetic_acid"].fix(0.55)
-        self.tau_nrtl["acetic_acid", "salicylic_acid"].fix(0.30)
-        
-        self.tau_nrtl["salicylic_acid", "water"].fix(1.80)
-        self.tau_nrtl["water", "salicylic_acid"].fix(0.60)
-        
-        self.tau_nrtl["acetic_anhydride", "sulfuric_acid"].fix(0.20)
-        self.tau_nrtl["sulfuric_acid", "acetic_anhydride"].fix(0.90)
-        
-        self.tau_nrtl["acetic_anhydride", "aspirin"].fix(0.45)
-        self.tau_nrtl["aspirin", "acetic_anhydride"].fix(0.20)
-        
-        self.tau_nrtl["acetic_anhydride", "acetic_acid"].fix(0.25)
-        self.tau_nrtl["acetic_acid", "acetic_anhydride"].fix(0.10)
-        
-        self.tau_nrtl["acetic_anhydride", "water"].fix(2.20)
-        self.tau_nrtl["water", "acetic_anhydride"].fix(0.40)
-        
-        self.tau_nrtl["sulfuric_acid", "aspirin"].fix(0.20)
-        self.tau_nrtl["aspirin", "sulfuric_acid"].fix(0.90)
-        
-        self.tau_nrtl["sulfuric_acid", "acetic_acid"].fix(-0.20)
-        self.tau_nrtl["acetic_acid", "sulfuric_acid"].fix(0.80)
-        
-        self.tau_nrtl["sulfuric_acid", "water"].fix(-0.80)
-        self.tau_nrtl["water", "sulfuric_acid"].fix(2.50)
-        
-        self.tau_nrtl["aspirin", "acetic_acid"].fix(0.40)
-        self.tau_nrtl["acetic_acid", "aspirin"].fix(0.25)
-        
-        self.tau_nrtl["aspirin", "water"].fix(2.00)
-        self.tau_nrtl["water", "aspirin"].fix(0.80)
-        
-        self.tau_nrtl["acetic_acid", "water"].fix(1.20)
-        self.tau_nrtl["water", "acetic_acid"].fix(-0.35)
+        # Shared by all state blocks, so the exponentials are built once
+        self.G_nrtl = Expression(
+            self.nrtl_pair_set,
+            rule=lambda b, i, j: exp(-b.alpha_nrtl[i, j] * b.tau_nrtl[i, j]),
+            doc="NRTL G_ij = exp(-alpha_ij * tau_ij)",
+        )
         
-        # -----------------------------------
-        # alpha_ij seeds (dimensionless)
-        # -----------------------------------
-        # Keep most pairs at 0.30, override selected pairs below
+        # Sparsity pattern of the NRTL sums: j -> listed pairs (k, j), i -> (i, j)
+        self.nrtl_pairs_into = {j: [k for k, m in nrtl if m == j] for j in table}
+        self.nrtl_pairs_from = {i: [j for k, j in nrtl if k == i] for i in table}
         
-        self.alpha_nrtl["salicylic_acid", "water"].fix(0.35)
-        self.alpha_nrtl["water", "salicylic_acid"].fix(0.35)
+        # Vapor pressure: ln(P_sat / Pa) = A - B / (T + C)
         
-        self.alpha_nrtl["aspirin", "water"].fix(0.35)
-        self.alpha_nrtl["water", "aspirin"].fix(0.35)
+        add_parameter(
+            self,
+            "antoine_A",
+            self.component_list,
+            initialize=_table_column(table, "antoine_A"),
+            units=pyunits.dimensionless,
+            doc="Antoine coefficient A for ln(P_sat/Pa) (acetic anhydride and the solutes are estimated from normal boiling or sublimation data)"
+        )
         
-        self.alpha_nrtl["sulfuric_acid", "water"].fix(0.20)
-        self.alpha_nrtl["water", "sulfuric_acid"].fix(0.20)
+        add_parameter(
+            self,
+            "antoine_B",
+            self.component_list,
+            initialize=_table_column(table, "antoine_B"),
+            units=pyunits.K,
+            doc="Antoine coefficient B for ln(P_sat/Pa)"
+        )
         
-        self.alpha_nrtl["sulfuric_acid", "acetic_acid"].fix(0.20)
-        self.alpha_nrtl["acetic_acid", "sulfuric_acid"].fix(0.20)
+        add_parameter(
+            self,
+            "antoine_C",
+            self.component_list,
+            initialize=_table_column(table, "antoine_C"),
+            units=pyunits.K,
+            doc="Antoine coefficient C for ln(P_sat/Pa)"
+        )
         
-        self.alpha_nrtl["sulfuric_acid", "acetic_anhydride"].fix(0.20)
-        self.alpha_nrtl["acetic_anhydride", "sulfuric_acid"].fix(0.20)
+        add_parameter(
+            self,
+            "dh_vap_comp",
+            self.component_list,
+            initialize=_table_column(table, "dh_vap_comp"),
+            units=pyunits.J / pyunits.mol,
+            doc="Constant enthalpy of vaporization by component (solute values are estimated)"
+        )
         
-        self.alpha_nrtl["sulfuric_acid", "salicylic_acid"].fix(0.20)
-        self.alpha_nrtl["salicylic_acid", "sulfuric_acid"].fix(0.20)
+        # Melting data for solid-liquid equilibrium (ideal solubility in
+        # activity terms: ln(gamma_i x_i) = -dh_fus_i / R (1/T - 1/T_fus_i))
         
-        self.alpha_nrtl["sulfuric_acid", "aspirin"].fix(0.20)
-        self.alpha_nrtl["aspirin", "sulfuric_acid"].fix(0.20)
+        add_parameter(
+            self,
+            "dh_fus_comp",
+            self.component_list,
+            initialize=_table_column(table, "dh_fus_comp"),
+            units=pyunits.J / pyunits.mol,
+            doc="Enthalpy of fusion at the melting point by component"
+        )
         
+        add_parameter(
+            self,
+            "temperature_fus_comp",
+            self.component_list,
+            initialize=_table_column(table, "temperature_fus_comp"),
+            units=pyunits.K,
+            doc="Melting temperature by component"
+        )
         
-
+        # Smoothing parameter of the vapor-fraction complementarity
+        self.eps_vle = Param(initialize=1e-4, mutable=True, units=pyunits.dimensionless)
+    
+    
     @classmethod
     def define_metadata(cls, obj):
         """Declare package metadata for supported properties and default units.
@@ -332,14 +581,14 @@ class ThermoParameterData(PhysicalParameterBlock):
         obj.define_custom_properties(
             {
                 'act_coeff_liq_comp': {'method': '_act_coeff_liq_comp'},
+                'enth_mol_liq_comp': {'method': '_enth_mol_liq_comp'},
                 'log_gamma_liq_comp': {'method': None},
-                'G_nrtl': {'method': None},
-                'S_nrtl': {'method': None},
-                'N_nrtl': {'method': None},
+                'X_nrtl': {'method': None},
                 'Q_nrtl': {'method': None},
                 'P_nrtl': {'method': None},
-                'W_nrtl': {'method': None},
-                'D_nrtl': {'method': None},
+                'R_nrtl': {'method': None},
+                'U_nrtl': {'method': None},
+                'T_nrtl': {'method': None},
             }
         )
         
@@ -362,7 +611,7 @@ class ThermoStateBlockMethods(StateBlock):
     These methods provide initialization and state-release utilities required by
     IDAES workflows.
     """
-
+    
     def initialize(
         self,
         state_args=None,
@@ -395,6 +644,9 @@ class ThermoStateBlockMethods(StateBlock):
             flags = {}
         
         # No property solve needed yet: all derived properties are expressions
+        # apart from the flash variables, which start from the screen values
+        if self.params.config.vle:
+            self.initialize_vle()
         init_log.info("Property initialization complete (no solve required).")
         
         if hold_state:
@@ -410,6 +662,65 @@ class ThermoStateBlockMethods(StateBlock):
         return None
     
     
+    def _screen(self, margin):
+        blocks = list(self.values())
+        components = list(blocks[0].component_list)
+        result = bubble_point_screen(
+            blocks[0].params,
+            [value(b.temperature) for b in blocks],
+            [value(b.pressure) for b in blocks],
+            [[value(b.mole_frac_comp[c]) for c in components] for b in blocks],
+            margin=margin,
+        )
+        return blocks, components, result
+    
+    
+    def initialize_vle(self):
+        """Start the flash variables from the current state.
+
+        The liquid takes the overall composition, the vapor fraction is zero
+        and the vapor composition is ``K_i x_i`` (normalized above the bubble
+        point). Blocks without active ``vle`` sub-blocks are skipped.
+        """
+        blocks, components, result = self._screen(0.0)
+        for k, b in enumerate(blocks):
+            if not b.vle.active:
+                continue
+            y = result["k_value"][k] * np.array([value(b.mole_frac_comp[c]) for c in components])
+            if y.sum() > 1:
+                y = y / y.sum()
+            b.vle.vapor_frac.set_value(0.0)
+            for c, y_c in zip(components, y):
+                b.vle.mole_frac_liq[c].set_value(value(b.mole_frac_comp[c]))
+                b.vle.mole_frac_vap[c].set_value(float(y_c))
+    
+    
+    def screen_vle(self, margin=VLE_SCREEN_MARGIN):
+        """Activate the flash equations only where a vapor phase is possible.
+
+        Runs ``bubble_point_screen`` on all indexed members at their current
+        temperature, pressure and composition in one vectorized call.
+
+        Args:
+            margin: Relative bubble-pressure margin, see ``bubble_point_screen``.
+
+        Returns:
+            dict: Index -> True where the ``vle`` sub-block is active.
+
+        Raises:
+            ConfigurationError: If the parameter block was built without VLE.
+        """
+        blocks, _, result = self._screen(margin)
+        if not blocks[0].params.config.vle:
+            raise ConfigurationError("screen_vle requires ThermoParameterBlock(vle=True).")
+        for b, possible in zip(blocks, result["vapor_possible"]):
+            if possible:
+                b.activate_vle()
+            else:
+                b.deactivate_vle()
+        return {index: bool(possible) for index, possible in zip(self.keys(), result["vapor_possible"])}
+    
+    
     def fix_initialization_states(self):
         """Fix all state variables on all indexed state block members."""
         fix_state_vars(self)
@@ -490,6 +801,93 @@ class ThermoStateBlockData(StateBlockData):
             self.sum_mole_frac = Constraint(
                 expr=sum(self.mole_frac_comp[component] for component in self.component_list) == 1
             )
+        
+        if self.params.config.vle:
+            self._build_vle()
+    
+    
+    def _build_vle(self):
+        """Build the flash sub-block for vapor-liquid equilibrium.
+
+        The activity coefficients are evaluated at the overall composition,
+        which is exact at the bubble point and an approximation for larger
+        vapor fractions. Above the bubble point the vapor composition sums to
+        one; below it the complementarity holds the vapor fraction at zero and
+        ``mole_frac_vap`` is the incipient-vapor composition. The liquid
+        composition sums to one through the overall closure.
+
+        LaTeX form:
+            x_i = (1 - V) x_i^L + V y_i \\\\
+            y_i P = \gamma_i x_i^L P_{sat,i}(T) \\\\
+            \min(V, 1 - \sum_i y_i) = 0
+        """
+        self.vle = Block()
+        vle = self.vle
+        
+        vle.vapor_frac = Var(
+            initialize=0.0,
+            bounds=(0, 1),
+            units=pyunits.dimensionless,
+            doc="Molar vapor fraction",
+        )
+        vle.mole_frac_liq = Var(
+            self.component_list,
+            initialize=1.0 / len(self.component_list),
+            bounds=(0, 1),
+            units=pyunits.dimensionless,
+            doc="Liquid-phase mole fraction by component",
+        )
+        vle.mole_frac_vap = Var(
+            self.component_list,
+            initialize=1.0 / len(self.component_list),
+            domain=NonNegativeReals,
+            units=pyunits.dimensionless,
+            doc="Vapor-phase (incipient below the bubble point) mole fraction by component",
+        )
+        vle.pressure_sat_comp = Expression(
+            self.component_list,
+            rule=lambda v, c: exp(
+                self.params.antoine_A[c]
+                - self.params.antoine_B[c] / (self.temperature + self.params.antoine_C[c])
+            ) * pyunits.Pa,
+            doc="Antoine vapor pressure by component",
+        )
+        
+        vle.phase_split = Constraint(
+            self.component_list,
+            rule=lambda v, c: self.mole_frac_comp[c]
+            == (1 - v.vapor_frac) * v.mole_frac_liq[c] + v.vapor_frac * v.mole_frac_vap[c],
+        )
+        vle.equilibrium = Constraint(
+            self.component_list,
+            rule=lambda v, c: v.mole_frac_vap[c] * self.pressure
+            == self.act_coeff_liq_comp[c] * v.mole_frac_liq[c] * v.pressure_sat_comp[c],
+        )
+        vle.phase_complementarity = Constraint(
+            expr=smooth_min(
+                vle.vapor_frac,
+                1 - sum(vle.mole_frac_vap[c] for c in self.component_list),
+                self.params.eps_vle,
+            ) == 0
+        )
+    
+    
+    def activate_vle(self):
+        """Activate the flash equations and free the vapor variables."""
+        self.vle.activate()
+        self.vle.vapor_frac.unfix()
+        self.vle.mole_frac_vap.unfix()
+    
+    
+    def deactivate_vle(self):
+        """Deactivate the flash equations for a state known to be subcooled.
+
+        The vapor fraction is fixed at zero and the vapor composition at its
+        current value, so the balances reduce to the liquid-only form.
+        """
+        self.vle.deactivate()
+        self.vle.vapor_frac.fix(0.0)
+        self.vle.mole_frac_vap.fix()
     
     
     # "Required" methods for manual property packages
@@ -525,8 +923,14 @@ class ThermoStateBlockData(StateBlockData):
             component: Component identifier.
 
         Returns:
-            Expression-like term: Liquid flow contribution; zero for other phases.
+            Expression-like term: Liquid flow contribution; zero for other
+            phases. With VLE the vapor flow is split off the liquid.
         """
+        if self.params.config.vle and phase in ("liquid", "vapor"):
+            vapor = self.flow_mol * self.vle.vapor_frac * self.vle.mole_frac_vap[component]
+            if phase == "vapor":
+                return vapor
+            return self.flow_mol * self.mole_frac_comp[component] - vapor
         if phase == "liquid":
             return self.flow_mol * self.mole_frac_comp[component]
         else:
@@ -565,7 +969,26 @@ class ThermoStateBlockData(StateBlockData):
 
         Returns:
             Expression-like term: Liquid enthalpy flow and zero for others.
+            With VLE the vapor carries its liquid enthalpy plus the enthalpy
+            of vaporization.
+
+        LaTeX form (VLE):
+            H^V = F V \sum_i y_i (h_i^L + \Delta h_{vap,i}) \\\\
+            H^L = F (h - V \sum_i y_i h_i^L)
         """
+        if self.params.config.vle and phase in ("liquid", "vapor"):
+            vle = self.vle
+            if phase == "vapor":
+                return self.flow_mol * vle.vapor_frac * sum(
+                    vle.mole_frac_vap[c] * (self.enth_mol_liq_comp[c] + self.params.dh_vap_comp[c])
+                    for c in self.component_list
+                )
+            return self.flow_mol * (
+                self.enth_mol
+                - vle.vapor_frac * sum(
+                    vle.mole_frac_vap[c] * self.enth_mol_liq_comp[c] for c in self.component_list
+                )
+            )
         if phase == "liquid":
             return self.flow_mol * self.enth_mol
         else:
@@ -650,19 +1073,30 @@ class ThermoStateBlockData(StateBlockData):
         """
         self.enth_mol = Expression(
             expr=sum(
-                self.mole_frac_comp[component]
-                * (
-                    self.params.dh_form_liq_comp[component]
-                    + self.params.cp_mol_liq_comp[component]
-                    * (self.temperature - self.params.temperature_ref)
-                    
-                )
+                self.mole_frac_comp[component] * self.enth_mol_liq_comp[component]
                 for component in self.component_list
             ),
             doc="Mixture molar enthalpy (liquid-phase approximation)",
         )
     
     
+    def _enth_mol_liq_comp(self):
+        """Build pure-component liquid molar enthalpy expressions.
+
+        LaTeX form:
+            h_i^L = \Delta h_{f,i}^{ref} + C_{p,i}^{liq}(T - T_{ref})
+        """
+        self.enth_mol_liq_comp = Expression(
+            self.component_list,
+            rule=lambda b, component: (
+                b.params.dh_form_liq_comp[component]
+                + b.params.cp_mol_liq_comp[component]
+                * (b.temperature - b.params.temperature_ref)
+            ),
+            doc="Pure-component liquid molar enthalpy",
+        )
+    
+    
     def _dens_mass(self):
         """Build mixture mass-density expression from idealized volume mixing.
 
@@ -716,10 +1150,7 @@ class ThermoStateBlockData(StateBlockData):
         phase-component flows to zero.
         """
         def flow_mol_phase_comp_rule(b, phase, component):
-            if phase == "liquid":
-                return b.flow_mol * b.mole_frac_comp[component]
-            else:
-                return 0 * pyunits.mol / pyunits.s
+            return b.get_material_flow_terms(phase, component)
         
         self.flow_mol_phase_comp = Expression(
             self.phase_list,
@@ -736,6 +1167,10 @@ class ThermoStateBlockData(StateBlockData):
         non-liquid phase fractions to zero.
         """
         def mole_frac_phase_comp_rule(b, phase, component):
+            if b.params.config.vle and phase == "liquid":
+                return b.vle.mole_frac_liq[component]
+            if b.params.config.vle and phase == "vapor":
+                return b.vle.mole_frac_vap[component]
             if phase == "liquid":
                 return b.mole_frac_comp[component]
             else:
@@ -756,6 +1191,10 @@ class ThermoStateBlockData(StateBlockData):
         to zero.
         """
         def phase_frac_rule(b, phase):
+            if b.params.config.vle and phase == "liquid":
+                return 1 - b.vle.vapor_frac
+            if b.params.config.vle and phase == "vapor":
+                return b.vle.vapor_frac
             if phase == "liquid":
                 return 1.0
             else:
@@ -770,53 +1209,32 @@ class ThermoStateBlockData(StateBlockData):
     def _act_coeff_liq_comp(self):
         """Build NRTL liquid-phase activity coefficients.
 
+        Only the listed pairs ``nz`` of ``nrtl_pair_set`` have tau_ij != 0 and
+        G_ij != 1; with U_j = x_j / Q_j and R_j = P_j / Q_j the NRTL sums
+        reduce to sums over those pairs plus shared O(N) sums, so the
+        expression size grows with N + |nz| instead of N^2.
+
         LaTeX form:
-            G_{ij} = \exp(-\alpha_{ij}\tau_{ij}) \\\\
-            S_i = \sum_k x_k G_{ki} \\\\
-            N_i = \sum_j x_j \tau_{ji} G_{ji} \\\\
-            Q_j = \sum_k x_k G_{kj} \\\\
-            P_j = \sum_m x_m \tau_{mj} G_{mj} \\\\
-            W_{ij} = x_j G_{ij} / Q_j \\\\
-            D_{ij} = \tau_{ij} - P_j / Q_j \\\\
-            \ln(\gamma_i) = N_i / S_i + \sum_j W_{ij} D_{ij} \\\\
+            X = \sum_k x_k \\
+            Q_j = X + \sum_{(k,j) \in nz} x_k (G_{kj} - 1) \\
+            P_j = \sum_{(k,j) \in nz} x_k \tau_{kj} G_{kj} \\
+            R_j = P_j / Q_j, \quad U_j = x_j / Q_j, \quad T = \sum_j U_j R_j \\
+            \ln(\gamma_i) = R_i - T + \sum_{(i,j) \in nz} U_j (\tau_{ij} G_{ij} - (G_{ij} - 1) R_j) \\
             \gamma_i = \exp(\ln(\gamma_i))
         """
         eps = 1e-12
+        params = self.params
         
-        self.G_nrtl = Expression(
-            self.component_list,
-            self.component_list,
-            rule=lambda b, i, j: exp(
-                -b.params.alpha_nrtl[i, j] * b.params.tau_nrtl[i, j]
-            ),
-            doc="NRTL G_ij = exp(-alpha_ij * tau_ij)",
-        )
-        
-        self.S_nrtl = Expression(
-            self.component_list,
-            rule=lambda b, i: sum(
-                b.mole_frac_comp[k] * b.G_nrtl[k, i]
-                for k in b.component_list
-            ) + eps,
-            doc="NRTL S_i = sum_k x_k G_ki",
-        )
-        
-        self.N_nrtl = Expression(
-            self.component_list,
-            rule=lambda b, i: sum(
-                b.mole_frac_comp[j]
-                * b.params.tau_nrtl[j, i]
-                * b.G_nrtl[j, i]
-                for j in b.component_list
-            ),
-            doc="NRTL N_i = sum_j x_j tau_ji G_ji",
+        self.X_nrtl = Expression(
+            expr=sum(self.mole_frac_comp[k] for k in self.component_list),
+            doc="NRTL X = sum_k x_k",
         )
         
         self.Q_nrtl = Expression(
             self.component_list,
-            rule=lambda b, j: sum(
-                b.mole_frac_comp[k] * b.G_nrtl[k, j]
-                for k in b.component_list
+            rule=lambda b, j: b.X_nrtl + sum(
+                b.mole_frac_comp[k] * (params.G_nrtl[k, j] - 1)
+                for k in params.nrtl_pairs_into[j]
             ) + eps,
             doc="NRTL Q_j = sum_k x_k G_kj",
         )
@@ -824,37 +1242,38 @@ class ThermoStateBlockData(StateBlockData):
         self.P_nrtl = Expression(
             self.component_list,
             rule=lambda b, j: sum(
-                b.mole_frac_comp[m]
-                * b.params.tau_nrtl[m, j]
-                * b.G_nrtl[m, j]
-                for m in b.component_list
+                b.mole_frac_comp[k] * params.tau_nrtl[k, j] * params.G_nrtl[k, j]
+                for k in params.nrtl_pairs_into[j]
             ),
-            doc="NRTL P_j = sum_m x_m tau_mj G_mj",
+            doc="NRTL P_j = sum_k x_k tau_kj G_kj",
         )
         
-        self.W_nrtl = Expression(
+        self.R_nrtl = Expression(
             self.component_list,
-            self.component_list,
-            rule=lambda b, i, j: (
-                b.mole_frac_comp[j] * b.G_nrtl[i, j] / b.Q_nrtl[j]
-            ),
-            doc="NRTL W_ij = x_j G_ij / Q_j",
+            rule=lambda b, j: b.P_nrtl[j] / b.Q_nrtl[j],
+            doc="NRTL R_j = P_j / Q_j",
         )
         
-        self.D_nrtl = Expression(
-            self.component_list,
+        self.U_nrtl = Expression(
             self.component_list,
-            rule=lambda b, i, j: (
-                b.params.tau_nrtl[i, j] - b.P_nrtl[j] / b.Q_nrtl[j]
-            ),
-            doc="NRTL D_ij = tau_ij - P_j/Q_j",
+            rule=lambda b, j: b.mole_frac_comp[j] / b.Q_nrtl[j],
+            doc="NRTL U_j = x_j / Q_j",
+        )
+        
+        self.T_nrtl = Expression(
+            expr=sum(self.U_nrtl[j] * self.R_nrtl[j] for j in self.component_list),
+            doc="NRTL T = sum_j U_j R_j",
         )
         
         self.log_gamma_liq_comp = Expression(
             self.component_list,
-            rule=lambda b, i: (
-                b.N_nrtl[i] / b.S_nrtl[i]
-                + sum(b.W_nrtl[i, j] * b.D_nrtl[i, j] for j in b.component_list)
+            rule=lambda b, i: b.R_nrtl[i] - b.T_nrtl + sum(
+                b.U_nrtl[j]
+                * (
+                    params.tau_nrtl[i, j] * params.G_nrtl[i, j]
+                    - (params.G_nrtl[i, j] - 1) * b.R_nrtl[j]
+                )
+                for j in params.nrtl_pairs_from[i]
             ),
             doc="NRTL ln(gamma_i)",
         )
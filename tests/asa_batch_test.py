@@ -0,0 +1,111 @@
+"""Tests of shard claiming, run preparation and poison-case isolation."""
+
+import json
+import os
+import time
+
+import pytest
+
+from asa_cm_control import asa_batch
+from asa_cm_control.asa_batch import (
+    MAX_ATTEMPTS,
+    claim_shard,
+    grid_cases,
+    merge_shards,
+    prepare_run,
+    read_records,
+    run_worker,
+)
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_prepare_refuses_non_empty_run_dir(tmp_path):
+    cases = grid_cases(temperature=[320.0, 330.0])
+    prepare_run(tmp_path, cases)
+    (tmp_path / "results" / "shard-0000.done").touch()
+    with pytest.raises(FileExistsError):
+        prepare_run(tmp_path, cases)
+    
+    prepare_run(tmp_path, cases, overwrite=True)
+    assert not (tmp_path / "results" / "shard-0000.done").exists()
+
+
+def test_claim_takes_over_stale_lock_only(tmp_path):
+    lock_path = tmp_path / "shard-0000.lock"
+    assert claim_shard(lock_path, "a", stale_after=60)
+    assert not claim_shard(lock_path, "b", stale_after=60)
+    
+    _age(lock_path, 120)
+    assert claim_shard(lock_path, "b", stale_after=60)
+    assert json.loads(lock_path.read_text())["worker"] == "b"
+    assert list(tmp_path.iterdir()) == [lock_path]
+
+
+def test_claim_restores_lock_refreshed_during_takeover(tmp_path, monkeypatch):
+    lock_path = tmp_path / "shard-0000.lock"
+    claim_shard(lock_path, "a", stale_after=60)
+    _age(lock_path, 120)
+    
+    # The owner's heartbeat lands between the staleness check and the rename
+    read_lock = asa_batch._read_lock
+    
+    def read_then_heartbeat(path):
+        lock = read_lock(path)
+        if str(path) == str(lock_path):
+            os.utime(lock_path)
+        return lock
+    
+    monkeypatch.setattr(asa_batch, "_read_lock", read_then_heartbeat)
+    assert not claim_shard(lock_path, "b", stale_after=60)
+    assert json.loads(lock_path.read_text())["worker"] == "a"
+    assert list(tmp_path.iterdir()) == [lock_path]
+
+
+@pytest.fixture
+def fake_flowsheet(monkeypatch):
+    """Replace the flowsheet with a stub whose solve fails for one case."""
+    
+    class Model:
+        class fs:
+            class cstr:
+                @staticmethod
+                def initialize():
+                    pass
+    
+    def solve_case(model, conditions):
+        if conditions["temperature"] == 325.0:
+            raise ValueError("poison")
+        return {"status": "optimal", "solve_s": 0.0, "outputs": {"temperature": conditions["temperature"]}}
+    
+    monkeypatch.setattr(asa_batch, "build_flowsheet", Model)
+    monkeypatch.setattr(asa_batch, "set_operating_conditions", lambda model, **kwargs: None)
+    monkeypatch.setattr(asa_batch, "solve_case", solve_case)
+
+
+def test_failing_case_is_recorded_and_run_continues(tmp_path, fake_flowsheet):
+    prepare_run(tmp_path, grid_cases(temperature=[320.0, 325.0, 330.0]))
+    assert run_worker(tmp_path, worker="w") == 3
+    
+    records, missing = merge_shards(tmp_path)
+    assert not missing
+    assert [record["status"] for record in records] == ["optimal", "error", "optimal"]
+    assert records[1]["error"] == "ValueError: poison"
+    assert (tmp_path / "results" / "shard-0000.done").exists()
+    assert not (tmp_path / "locks" / "shard-0000.lock").exists()
+
+
+def test_case_that_kills_worker_is_recorded_as_crashed(tmp_path, fake_flowsheet):
+    cases = grid_cases(temperature=[320.0, 330.0])
+    prepare_run(tmp_path, cases)
+    # Earlier workers started the first case and died without a record
+    attempts_path = tmp_path / "results" / "shard-0000.attempts"
+    for _ in range(MAX_ATTEMPTS):
+        asa_batch._append_record(attempts_path, {"case_id": cases[0]["case_id"], "worker": "dead"})
+    
+    run_worker(tmp_path, worker="w")
+    records = read_records(tmp_path / "results" / "shard-0000.jsonl")
+    assert [record["status"] for record in records] == ["crashed", "optimal"]
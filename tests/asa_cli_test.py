@@ -0,0 +1,43 @@
+"""Tests of the command-line case and table checks."""
+
+import json
+
+from asa_cm_control.asa_cli import check_component_table, default_components, main
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_run_rejects_empty_and_multi_case_files(tmp_path, capsys):
+    empty = _write(tmp_path / "empty.json", {"cases": []})
+    assert main(["run", "--case", empty]) == 1
+    assert "holds 0 cases" in capsys.readouterr().err
+    several = _write(tmp_path / "several.json", [{"temperature": 325.0}, {"temperature": 330.0}])
+    assert main(["run", "--case", several]) == 1
+    assert "holds 2 cases" in capsys.readouterr().err
+    assert main(["validate", empty]) == 1
+    assert "no cases" in capsys.readouterr().out
+
+
+def test_component_table_must_cover_reactions_and_nrtl(tmp_path, capsys):
+    assert check_component_table(default_components()) == []
+    
+    without_water = [name for name in default_components() if name != "water"]
+    errors = check_component_table(without_water)
+    assert len(errors) == 2 and "reaction species ['water']" in errors[0]
+    assert "--nrtl" in errors[1]
+    
+    table = _write(tmp_path / "table.json", {name: {} for name in without_water})
+    case = _write(tmp_path / "case.json", {"temperature": 325.0})
+    assert main(["validate", "--components", table, case]) == 1
+    assert "reaction species" in capsys.readouterr().out
+    
+    # An NRTL table over the table's own components clears the NRTL error
+    nrtl = {("aspirin", "acetic_acid"): {"tau": 0.5, "alpha": 0.3}}
+    assert len(check_component_table(without_water, nrtl)) == 1
+    assert "the NRTL table" in check_component_table(["aspirin"], nrtl)[1]
+    
+    pairs = _write(tmp_path / "nrtl.json", [{"pair": ["aspirin", "water"], "tau": 0.5}])
+    assert main(["validate", "--nrtl", pairs, case]) == 0
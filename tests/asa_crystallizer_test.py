@@ -0,0 +1,35 @@
+"""Tests of the moment-based crystallizer on the reactor outlet."""
+
+import pytest
+from pyomo.environ import check_optimal_termination, value
+
+from asa_cm_control.asa_crystallizer import (
+    build_crystallization_flowsheet,
+    initialize_crystallization_flowsheet,
+    set_crystallizer_conditions,
+)
+from asa_cm_control.asa_process_flowsheet import set_operating_conditions, solve_model
+
+
+@pytest.fixture(scope="module")
+def model():
+    model = build_crystallization_flowsheet()
+    set_operating_conditions(model)
+    set_crystallizer_conditions(model, temperature=290.0)
+    initialize_crystallization_flowsheet(model)
+    assert check_optimal_termination(solve_model(model, tee=False))
+    return model
+
+
+def test_solute_balance_closes(model):
+    crystallizer = model.fs.crystallizer
+    solute = crystallizer.config.solute
+    fed = value(crystallizer.properties_in[0].get_material_flow_terms("liquid", solute))
+    left = value(crystallizer.properties_out[0].get_material_flow_terms("liquid", solute))
+    crystals = value(crystallizer.crystal_flow_mol[0])
+    assert crystals > 0
+    assert fed == pytest.approx(left + crystals, rel=1e-8)
+    assert value(crystallizer.crystal_yield(0)) == pytest.approx(crystals / fed)
+    # Crystals only form from a supersaturated mother liquor
+    assert value(crystallizer.supersaturation_ratio[0]) > 1
+    assert value(crystallizer.sauter_mean_size(0)) > value(crystallizer.mean_size(0)) > 0
@@ -0,0 +1,39 @@
+"""Tests of the CSTR-in-series train."""
+
+import pytest
+from idaes.core.util.model_statistics import degrees_of_freedom
+from pyomo.environ import check_optimal_termination, value
+
+from asa_cm_control.asa_cstr_train import (
+    build_cstr_train,
+    initialize_cstr_train,
+    set_train_operating_conditions,
+)
+from asa_cm_control.asa_process_flowsheet import solve_model
+
+
+def _solved_train(n_units):
+    model = build_cstr_train(n_units)
+    set_train_operating_conditions(model)
+    assert degrees_of_freedom(model) == 0
+    initialize_cstr_train(model)
+    assert check_optimal_termination(solve_model(model, tee=False))
+    return model
+
+
+def _salicylic_flows(model):
+    outlets = [model.fs.cstr_train[i].outlet for i in model.fs.units]
+    inlet = model.fs.cstr_train[model.fs.units.first()].inlet
+    return [
+        value(port.flow_mol[0] * port.mole_frac_comp[0, "salicylic_acid"])
+        for port in [inlet] + outlets
+    ]
+
+
+def test_train_converts_further_than_one_tank():
+    train = _salicylic_flows(_solved_train(3))
+    single = _salicylic_flows(_solved_train(1))
+    assert train[0] == pytest.approx(single[0])
+    # Each tank converts more; in series the same volume converts more than one tank
+    assert all(downstream < upstream for upstream, downstream in zip(train, train[1:]))
+    assert train[-1] < single[-1]
@@ -0,0 +1,35 @@
+"""Tests of the pre-solve model checks and their structure cache."""
+
+import pytest
+from pyomo.environ import Constraint
+
+from asa_cm_control.asa_model_checks import StructuralValidationError, check_model
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions, solve_model
+
+
+@pytest.fixture
+def model():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    return model
+
+
+def test_cache_follows_structure(model):
+    assert not check_model(model)["cached"]
+    assert check_model(model)["cached"]
+    
+    x = model.fs.cstr.control_volume.properties_out[0].mole_frac_comp
+    model.extra_closure = Constraint(expr=sum(x.values()) == 1)
+    report = check_model(model, raise_on_error=False)
+    assert not report["cached"] and report["errors"]
+    
+    model.del_component(model.extra_closure)
+    assert check_model(model)["cached"]
+
+
+def test_solve_model_checks_on_request(model):
+    model.fs.cstr.control_volume.properties_in[0].temperature.unfix()
+    with pytest.raises(StructuralValidationError, match="degrees of freedom"):
+        solve_model(model, tee=False, check=True)
+    # Unchecked by default: IPOPT gets the model as posed
+    solve_model(model, tee=False)
@@ -0,0 +1,64 @@
+"""Tests of the direct Newton solver against IPOPT."""
+
+import pytest
+from pyomo.environ import value
+from idaes.core.util.exceptions import ConfigurationError
+
+from asa_cm_control import asa_newton
+from asa_cm_control.asa_newton import NewtonSolver, casadi_available, pynumero_available
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions, solve_model
+
+
+STEP = {"flow_mol": 0.55, "temperature": 328.0}
+
+
+@pytest.fixture
+def model():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    solve_model(model, tee=False)
+    return model
+
+
+def _outlet(model):
+    outlet = model.fs.cstr.outlet
+    return [value(outlet.temperature[0])] + [
+        value(outlet.mole_frac_comp[0, j]) for j in model.fs.thermo_params.component_list
+    ]
+
+
+@pytest.mark.parametrize("evaluator", ["pynumero", "casadi", "pyomo"])
+def test_newton_matches_ipopt(model, evaluator):
+    if evaluator == "pynumero" and not pynumero_available():
+        pytest.skip("the PyNumero ASL library is not installed")
+    if evaluator == "casadi" and not casadi_available:
+        pytest.skip("CasADi is not installed")
+    solver = NewtonSolver(model, evaluator=evaluator, fallback=False)
+    set_operating_conditions(model, **STEP)
+    stats = solver.solve()
+    assert stats["method"] == "newton" and stats["converged"]
+    newton = _outlet(model)
+    
+    solve_model(model, tee=False)
+    assert newton == pytest.approx(_outlet(model), rel=1e-7, abs=1e-9)
+
+
+def test_failed_newton_falls_back_to_ipopt(model):
+    solver = NewtonSolver(model, max_iter=0)
+    set_operating_conditions(model, **STEP)
+    stats = solver.solve()
+    assert stats["method"] == "newton>ipopt" and stats["converged"]
+    assert stats["status"] == "optimal"
+    assert value(model.fs.cstr.inlet.temperature[0]) == STEP["temperature"]
+
+
+def test_auto_prefers_pynumero_then_casadi(model, monkeypatch):
+    monkeypatch.setattr(asa_newton, "pynumero_available", lambda: False)
+    expected = "casadi" if casadi_available else "pyomo"
+    assert NewtonSolver(model).evaluator == expected
+    monkeypatch.setattr(asa_newton, "casadi_available", False)
+    assert NewtonSolver(model).evaluator == "pyomo"
+    if not pynumero_available():
+        with pytest.raises(ConfigurationError, match="get-extensions"):
+            NewtonSolver(model, evaluator="pynumero")
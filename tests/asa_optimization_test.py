@@ -0,0 +1,38 @@
+"""Tests of the steady-state operating-point optimization."""
+
+import pytest
+from pyomo.environ import check_optimal_termination, value
+
+from asa_cm_control.asa_optimization import (
+    DEFAULT_DECISION_BOUNDS,
+    DEFAULT_SPECS,
+    add_rto_block,
+    optimize_operating_point,
+)
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions, solve_model
+
+
+# IPOPT relaxes bounds by about 1e-8 relative
+TOL = 1e-5
+
+
+def _nominal_profit():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    add_rto_block(model, decisions=())
+    assert check_optimal_termination(solve_model(model, tee=False))
+    return value(model.fs.rto.objective)
+
+
+def test_optimum_meets_specs_and_beats_nominal():
+    solution = optimize_operating_point()
+    assert solution["status"] == "optimal"
+    for name, (lower, upper) in DEFAULT_DECISION_BOUNDS.items():
+        assert lower - TOL <= solution[name] <= upper + TOL
+    assert solution["outlet_x_salicylic_acid"] <= DEFAULT_SPECS["x_salicylic_acid_max"] + TOL
+    assert solution["outlet_x_acetic_acid"] <= DEFAULT_SPECS["x_acetic_acid_max"] + TOL
+    assert solution["outlet_temperature"] <= DEFAULT_SPECS["temperature_max"] + TOL
+    assert solution["objective"] > _nominal_profit()
+    # Same start, same optimum
+    assert optimize_operating_point()["objective"] == pytest.approx(solution["objective"], rel=1e-6)
@@ -0,0 +1,61 @@
+"""Tests of the bubble-point screened VLE solve."""
+
+import logging
+
+import pytest
+from pyomo.environ import value
+from pyomo.opt import check_optimal_termination
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    set_operating_conditions,
+    solve_model,
+    solve_with_phase_screen,
+)
+
+
+BOILING = {"temperature": 345.0, "pressure": 20000.0}
+
+
+def _model(**conditions):
+    model = build_flowsheet(vle=True)
+    set_operating_conditions(model, **conditions)
+    model.fs.cstr.initialize()
+    return model
+
+
+def _flags(model):
+    control_volume = model.fs.cstr.control_volume
+    return {
+        state.name: state.vle.active
+        for block in (control_volume.properties_in, control_volume.properties_out)
+        for state in block.values()
+    }
+
+
+def _vapor_frac(model):
+    return value(model.fs.cstr.control_volume.properties_out[0].vle.vapor_frac)
+
+
+def test_screened_solve_matches_rigorous_and_model_flags():
+    rigorous = _model(**BOILING)
+    assert check_optimal_termination(solve_model(rigorous, tee=False))
+    
+    model = _model(**BOILING)
+    results, active = solve_with_phase_screen(model)
+    assert check_optimal_termination(results)
+    assert active == _flags(model)
+    assert _vapor_frac(model) == pytest.approx(_vapor_frac(rigorous), abs=1e-6)
+
+
+def test_exhausted_screen_keeps_flags_of_last_solve(caplog):
+    model = _model(**BOILING)
+    # Screen the outlet out at a subcooled guess; the solution boils
+    model.fs.cstr.control_volume.properties_out[0].temperature.set_value(300.0)
+    with caplog.at_level(logging.WARNING):
+        results, active = solve_with_phase_screen(model, max_passes=1)
+    assert "did not settle" in caplog.text
+    outlet = model.fs.cstr.control_volume.properties_out[0]
+    assert not active[outlet.name]
+    assert active == _flags(model)
+    assert outlet.vle.vapor_frac.fixed and value(outlet.vle.vapor_frac) == 0.0
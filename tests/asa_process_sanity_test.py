@@ -0,0 +1,44 @@
+"""Sanity checks of the steady-state flowsheet solves."""
+
+import pytest
+from pyomo.environ import value
+from pyomo.opt import check_optimal_termination
+
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    initialize_pfr,
+    set_operating_conditions,
+    solve_model,
+)
+
+
+def _pfr(nfe=5, ncp=3):
+    model = build_flowsheet("pfr", finite_elements=nfe, collocation_points=ncp)
+    set_operating_conditions(model)
+    return model
+
+
+def _salicylic_flows(port):
+    flow = port.flow_mol[0]
+    return value(flow * port.mole_frac_comp[0, "salicylic_acid"]), value(
+        flow * port.mole_frac_comp[0, "aspirin"]
+    )
+
+
+def test_small_pfr_solves_optimally():
+    model = _pfr()
+    initialize_pfr(model)
+    assert check_optimal_termination(solve_model(model, tee=False))
+    
+    pfr = model.fs.pfr
+    salicylic_in, aspirin_in = _salicylic_flows(pfr.inlet)
+    salicylic_out, aspirin_out = _salicylic_flows(pfr.outlet)
+    assert aspirin_in < 1e-8 < aspirin_out < salicylic_in
+    assert salicylic_out + aspirin_out == pytest.approx(salicylic_in, rel=1e-7)
+    
+    # The march only changes the starting point, not the solution
+    cold = _pfr()
+    assert check_optimal_termination(solve_model(cold, tee=False))
+    assert value(cold.fs.pfr.outlet.mole_frac_comp[0, "aspirin"]) == pytest.approx(
+        value(pfr.outlet.mole_frac_comp[0, "aspirin"]), rel=1e-5
+    )
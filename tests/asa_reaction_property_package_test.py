@@ -0,0 +1,77 @@
+"""Tests of the table-generated reaction package against the hand-written rates."""
+
+import math
+
+import pytest
+from pyomo.environ import value
+
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions, solve_model
+
+
+R = 8.314462618
+EPS = 1e-12
+
+# The hand-written reactions the table replaced: stoichiometry, rate-determining
+# components and (A0, Ea0, Acat, Ea_cat, m)
+HAND_WRITTEN = {
+    "r1_aspirin_synthesis": (
+        {"salicylic_acid": -1, "acetic_anhydride": -1, "aspirin": 1, "acetic_acid": 1},
+        ("salicylic_acid", "acetic_anhydride"),
+        (0.0, 0.0, 1.1e12, 6.44e4, 0.0),
+    ),
+    "r2_acetic_anhydride_hydrolysis": (
+        {"acetic_anhydride": -1, "water": -1, "acetic_acid": 2},
+        ("acetic_anhydride", "water"),
+        (1.5e9, 5.01e4, 1.0e13, 5.78e4, 1.0),
+    ),
+    "r3_aspirin_hydrolysis": (
+        {"aspirin": -1, "water": -1, "salicylic_acid": 1, "acetic_acid": 1},
+        ("aspirin", "water"),
+        (1.5e9, 5.01e4, 1.0e13, 5.78e4, 1.0),
+    ),
+}
+
+
+def _hand_written_rate(block, reaction):
+    state = block.state_ref
+    
+    def activity(j):
+        return value(state.act_coeff_liq_comp[j] * state.mole_frac_comp[j]) + EPS
+    
+    _, (first, second), (A0, Ea0, Acat, Ea_cat, m) = HAND_WRITTEN[reaction]
+    T = value(state.temperature)
+    k0 = A0 * math.exp(-Ea0 / (R * T))
+    kcat = Acat * math.exp(-Ea_cat / (R * T))
+    return (k0 + kcat * activity("sulfuric_acid") ** m) * activity(first) * activity(second)
+
+
+@pytest.fixture(scope="module")
+def model():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    solve_model(model, tee=False)
+    return model
+
+
+def test_stoichiometry_matches_hand_written(model):
+    params = model.fs.reaction_params
+    for reaction, (stoichiometry, _, _) in HAND_WRITTEN.items():
+        for phase in ("liquid", "vapor", "solid"):
+            for j in model.fs.thermo_params.component_list:
+                expected = stoichiometry.get(j, 0) if phase == "liquid" else 0
+                assert params.rate_reaction_stoichiometry[reaction, phase, j] == expected
+
+
+@pytest.mark.parametrize("temperature_shift", [0.0, 15.0])
+def test_rates_match_hand_written(model, temperature_shift):
+    block = model.fs.cstr.control_volume.reactions[0]
+    temperature = block.state_ref.temperature
+    solved = temperature.value
+    temperature.set_value(solved + temperature_shift)
+    try:
+        for reaction in HAND_WRITTEN:
+            rate = value(block.reaction_rate[reaction])
+            assert rate == pytest.approx(_hand_written_rate(block, reaction), rel=1e-12)
+    finally:
+        temperature.set_value(solved)
@@ -0,0 +1,66 @@
+"""Tests of the recycle flowsheet solve and its tear initializers."""
+
+import pytest
+from pyomo.environ import value
+
+from asa_cm_control import asa_recycle_flowsheet
+from asa_cm_control.asa_recycle_flowsheet import (
+    build_recycle_flowsheet,
+    set_recycle_operating_conditions,
+    solve_recycle_flowsheet,
+    tear_residual,
+)
+
+
+def _model(**conditions):
+    model = build_recycle_flowsheet()
+    set_recycle_operating_conditions(model, **conditions)
+    return model
+
+
+def _product_aspirin(model):
+    return value(model.fs.separator.product.mole_frac_comp[0, "aspirin"])
+
+
+@pytest.fixture(scope="module")
+def solved():
+    model = _model()
+    return model, solve_recycle_flowsheet(model)
+
+
+def test_simultaneous_solve_closes_the_loop(solved):
+    model, stats = solved
+    assert stats["converged"] and stats["status"] == "optimal"
+    assert stats["tear_method"] is None and stats["passes"] == 0
+    assert tear_residual(model) < 1e-8
+    # Salicylic acid is conserved as salicylic acid or aspirin
+    feed, product = model.fs.mixer.feed, model.fs.separator.product
+    fed = value(feed.flow_mol[0] * feed.mole_frac_comp[0, "salicylic_acid"])
+    out = value(
+        product.flow_mol[0]
+        * (product.mole_frac_comp[0, "salicylic_acid"] + product.mole_frac_comp[0, "aspirin"])
+    )
+    assert out == pytest.approx(fed, rel=1e-7)
+
+
+def test_failed_solve_falls_back_to_tearing(solved, monkeypatch):
+    solve_model = asa_recycle_flowsheet.solve_model
+    calls = []
+    
+    def fail_first(model, tee=False):
+        calls.append(model)
+        if len(calls) == 1:
+            raise ValueError("injected failure")
+        return solve_model(model, tee=tee)
+    
+    monkeypatch.setattr(asa_recycle_flowsheet, "solve_model", fail_first)
+    model = _model()
+    stats = solve_recycle_flowsheet(model, fallback="Broyden", iter_lim=3)
+    assert len(calls) == 2
+    assert stats["tear_method"] == "Broyden" and stats["passes"] == 3
+    assert stats["converged"]
+    assert _product_aspirin(model) == pytest.approx(_product_aspirin(solved[0]), rel=1e-6)
+    
+    calls.clear()
+    stats = solve_recycle_flowsheet(_model(), fallback=None)
+    assert len(calls) == 1 and not stats["converged"] and stats["status"] == "error"
@@ -0,0 +1,76 @@
+"""Tests of the columnar results writer."""
+
+import pytest
+
+from asa_cm_control.asa_batch import solve_case
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions
+from asa_cm_control.asa_results_export import (
+    ResultsWriter,
+    collect_results,
+    read_results,
+    results_schema,
+)
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather", ".csv"])
+def test_integer_first_row_keeps_later_fractions(tmp_path, suffix):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / f"results{suffix}"
+    rows = [
+        {"case": "a", "temperature": 322, "converged": True, "note": None},
+        {"case": "b", "temperature": 322.5, "converged": False, "note": "retry"},
+        {"case": "c", "temperature": 330.25, "converged": True, "note": None},
+    ]
+    # One row per batch, so the schema is fixed by the integer row alone
+    with ResultsWriter(path, batch_size=1) as writer:
+        for row in rows:
+            writer.append(row)
+    
+    frame = read_results(path)
+    assert list(frame["temperature"]) == [322.0, 322.5, 330.25]
+    assert list(frame["converged"]) == [True, False, True]
+    assert frame["note"][1] == "retry"
+
+
+SCHEMA = {"case": "str", "temperature": "float", "converged": "bool", "residual": "float"}
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather", ".csv"])
+def test_declared_schema_fixes_types_and_columns(tmp_path, suffix):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / f"results{suffix}"
+    with ResultsWriter(path, schema=SCHEMA, batch_size=1) as writer:
+        # The residual is missing from the whole first batch
+        writer.append({"case": "a", "temperature": 322, "converged": True})
+        writer.append({"case": "b", "temperature": 322.5, "converged": False, "residual": 1e-9})
+        with pytest.raises(ValueError, match="not in the schema"):
+            writer.append({"case": "c", "extra": 1.0})
+    
+    frame = read_results(path)
+    assert list(frame.columns) == list(SCHEMA)
+    assert frame["residual"].dtype == float
+    assert frame["residual"][1] == pytest.approx(1e-9)
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather", ".csv"])
+def test_existing_file_needs_overwrite(tmp_path, suffix):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / f"results{suffix}"
+    for case in ("first", "second"):
+        with ResultsWriter(path, schema=SCHEMA, overwrite=True) as writer:
+            writer.append({"case": case, "temperature": 320.0})
+    assert list(read_results(path)["case"]) == ["second"]
+    with pytest.raises(FileExistsError):
+        ResultsWriter(path, schema=SCHEMA)
+
+
+def test_schema_matches_collected_row():
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    record, results = solve_case(model, {"temperature": 325.0}, return_results=True)
+    row = collect_results(model, results, case_id="a", temperature=325.0)
+    schema = results_schema(model, case_id="str", temperature="float")
+    assert list(row) == list(schema)
+    assert row["iterations"] == record["iterations"] > 0
+    assert all(isinstance(row[name], (int, float)) for name, t in schema.items() if t == "float")
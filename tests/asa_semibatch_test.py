@@ -0,0 +1,20 @@
+"""Tests of the semi-batch dosing optimization on a short horizon."""
+
+import pytest
+
+from asa_cm_control.asa_semibatch import DEFAULT_TEMPERATURE_MAX, optimize_dosing
+
+
+@pytest.fixture(scope="module")
+def result():
+    return optimize_dosing(horizon=1800.0, nfe=6, n_dosing_intervals=3)
+
+
+def test_optimal_dosing_respects_temperature_limit(result):
+    assert result["status"] == "optimal"
+    nominal, optimal = result["nominal"], result["optimal"]
+    # Even dosing overshoots the limit, so the limit shapes the profile
+    assert nominal["peak_temperature"] > DEFAULT_TEMPERATURE_MAX
+    assert max(optimal["temperature"]) <= DEFAULT_TEMPERATURE_MAX + 1e-4
+    assert all(rate >= -1e-8 for rate in optimal["dosing_rate"])
+    assert 0 < optimal["aspirin_yield"] < 1
@@ -0,0 +1,87 @@
+"""Tests of the solve service through ``SolveClient``."""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from asa_cm_control import asa_solve_service
+from asa_cm_control.asa_solve_service import SolveClient, SolveService, _batch_size
+
+
+CASE = {"temperature": 325.0, "flow_mol": 0.5}
+
+# Cases the patched workers raise on or hang on
+RAISING_CASE = {"temperature": 321.0, "flow_mol": 0.5}
+HANGING_CASE = {"temperature": 322.0, "flow_mol": 0.5}
+
+SOLVE_TIMEOUT = 2.0
+
+
+def _patched_solve_case(solve_case):
+    def patched(model, conditions, options=None):
+        if conditions == RAISING_CASE:
+            raise RuntimeError("injected failure")
+        if conditions == HANGING_CASE:
+            time.sleep(60.0)
+        return solve_case(model, conditions, options)
+    return patched
+
+
+@pytest.fixture(scope="module")
+def client():
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("the injected failures reach the workers only through fork")
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    service = SolveService(n_workers=2, solve_timeout=SOLVE_TIMEOUT)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(
+            asa_solve_service, "solve_case", _patched_solve_case(asa_solve_service.solve_case)
+        )
+        port = asyncio.run_coroutine_threadsafe(service.start(port=0), loop).result()
+        yield SolveClient(port=port, timeout=120.0)
+        asyncio.run_coroutine_threadsafe(service.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_batch_size_splits_queue_over_idle_workers():
+    assert _batch_size(1, 4, 8) == 1
+    assert _batch_size(4, 4, 8) == 1
+    assert _batch_size(10, 4, 8) == 3
+    assert _batch_size(100, 1, 8) == 8
+
+
+def test_solve_and_health(client):
+    assert client.health()["status"] == "ok"
+    result = client.solve(CASE)
+    assert result["status"] == "optimal"
+    assert result["outputs"]["temperature"] > 0
+    results = client.solve_many([CASE, {**CASE, "flow_mol": 0.6}, {**CASE, "temperature": 330.0}])
+    assert [r["status"] for r in results] == ["optimal"] * 3
+    assert client.stats()["completed"] == 4
+
+
+def test_invalid_case_is_rejected(client):
+    with pytest.raises(ValueError, match="400"):
+        client.solve({"temperature": "hot"})
+
+
+def test_raising_case_fails_alone(client):
+    results = client.solve_many([CASE, RAISING_CASE, {**CASE, "flow_mol": 0.6}])
+    assert [r["status"] for r in results] == ["optimal", "error", "optimal"]
+    assert "injected failure" in results[1]["error"]
+    assert client.solve(CASE)["status"] == "optimal"
+
+
+def test_hung_worker_is_replaced(client):
+    result = client.solve(HANGING_CASE)
+    assert result["status"] == "timeout"
+    health = client.health()
+    assert health["status"] == "degraded"
+    assert health["pool_restarts"] == 1
+    assert client.solve(CASE)["status"] == "optimal"
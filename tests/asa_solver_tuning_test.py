@@ -0,0 +1,48 @@
+"""Tests of the IPOPT option tuner and its saved profiles."""
+
+import json
+
+import pytest
+from pyomo.opt import check_optimal_termination
+
+from asa_cm_control import asa_process_flowsheet
+from asa_cm_control.asa_process_flowsheet import (
+    build_flowsheet,
+    load_solver_profile,
+    set_operating_conditions,
+    solve_model,
+)
+from asa_cm_control.asa_solver_tuning import save_tuned_profile, tune_solver_options
+
+
+CASES = ({"reactor": "cstr"}, {"reactor": "cstr", "temperature": 340.0})
+
+# Three iterations are too few for either case, so those sets always fail
+GRID = {"max_iter": [3, 200], "mu_strategy": ["monotone", "adaptive"]}
+
+
+@pytest.mark.parametrize("search", ["grid", "halving"])
+def test_tiny_grid_ranks_robust_sets_first(search):
+    rows = tune_solver_options(CASES, GRID, search=search, repeats=1, keep=1, n_workers=1)
+    assert len(rows) == 4
+    assert [row["options"]["max_iter"] for row in rows[:2]] == [200, 200]
+    assert [row["success_rate"] for row in rows] == [1.0, 1.0, 0.0, 0.0]
+    assert rows[2]["median_s"] == float("inf")
+    if search == "grid":
+        assert rows[0]["median_s"] <= rows[1]["median_s"]
+    else:
+        # The survivor is solved in every round, the eliminated sets in fewer
+        assert rows[0]["trials"] > rows[1]["trials"] > rows[2]["trials"]
+
+
+def test_saved_profile_loads_and_solves(tmp_path, monkeypatch):
+    rows = tune_solver_options(CASES[:1], GRID, repeats=1, n_workers=1)
+    path = save_tuned_profile("tiny", rows, directory=tmp_path)
+    assert json.loads(path.read_text())["success_rate"] == 1.0
+    assert load_solver_profile("tiny", directory=tmp_path) == rows[0]["options"]
+    
+    monkeypatch.setattr(asa_process_flowsheet, "SOLVER_PROFILE_DIR", tmp_path)
+    model = build_flowsheet()
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    assert check_optimal_termination(solve_model(model, tee=False, profile="tiny"))
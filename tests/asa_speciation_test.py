@@ -0,0 +1,110 @@
+"""Tests of the H+ speciation routes of the reaction package."""
+
+import numpy as np
+import pytest
+from pyomo.environ import value
+from pyomo.opt import check_optimal_termination
+from idaes.core.util.model_statistics import large_residuals_set
+
+from asa_cm_control.asa_process_flowsheet import build_flowsheet, set_operating_conditions, solve_model
+from asa_cm_control.asa_speciation import (
+    initialize_speciated_model,
+    simultaneous_available,
+    solve_speciated_model,
+)
+from asa_cm_control.props.asa_electrolyte_speciation import SulfuricAcidSpeciation
+
+
+def _a_hplus(model):
+    return value(model.fs.cstr.control_volume.reactions[0].a_hplus_speciation)
+
+
+@pytest.fixture(scope="module")
+def algebraic():
+    model = build_flowsheet(hplus_activity="speciation")
+    set_operating_conditions(model)
+    model.fs.cstr.initialize()
+    assert check_optimal_termination(solve_model(model, tee=False))
+    return model
+
+
+def _greybox():
+    model = build_flowsheet(hplus_activity="greybox")
+    set_operating_conditions(model)
+    initialize_speciated_model(model)
+    return model
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        "compact",
+        "substitution",
+        pytest.param(
+            "simultaneous",
+            marks=pytest.mark.skipif(
+                not simultaneous_available(), reason="needs cyipopt and the PyNumero ASL library"
+            ),
+        ),
+    ],
+)
+def test_greybox_methods_match_algebraic_speciation(algebraic, method):
+    model = _greybox()
+    stats = solve_speciated_model(model, method=method)
+    assert stats["status"] == "optimal"
+    assert _a_hplus(model) == pytest.approx(_a_hplus(algebraic), rel=1e-6)
+    # The grey-box blocks are restored for the next solve
+    block = model.fs.cstr.control_volume.reactions[0]
+    assert block.speciation.active and not block.speciation_cubic.active
+
+
+def test_substitution_leaves_model_at_last_solve(algebraic):
+    model = _greybox()
+    block = model.fs.cstr.control_volume.reactions[0]
+    start = block.initialize_speciation()
+    stats = solve_speciated_model(model, method="substitution", max_iter=1)
+    assert stats["status"] == "optimal" and stats["iterations"] == 1
+    assert not stats["converged"] and stats["a_hplus_change"] > 1e-8
+    # a_hplus is the value the last solve used, and the state solves with it
+    assert _a_hplus(model) == start
+    assert not large_residuals_set(model, 1e-6)
+    
+    stats = solve_speciated_model(model, method="substitution")
+    assert stats["converged"] and stats["a_hplus_change"] < 1e-8
+    assert not large_residuals_set(model, 1e-6)
+    assert block.initialize_speciation() == pytest.approx(_a_hplus(algebraic), rel=1e-6)
+
+
+def test_greybox_jacobian_matches_finite_differences():
+    model = SulfuricAcidSpeciation(1e-3, 1e-6, -2.0e4, -2.2e4)
+    inputs = np.array([325.0, 0.01, 0.9])
+    model.set_input_values(inputs)
+    jacobian = model.evaluate_jacobian_outputs().toarray()[0]
+    for k, step in enumerate((1e-3, 1e-7, 1e-6)):
+        shifted = []
+        for sign in (1, -1):
+            trial = inputs.copy()
+            trial[k] += sign * step
+            model.set_input_values(trial)
+            shifted.append(model.evaluate_outputs()[0])
+        assert jacobian[k] == pytest.approx((shifted[0] - shifted[1]) / (2 * step), rel=1e-5)
+
+
+def test_parameter_updates_reach_every_route():
+    algebraic = build_flowsheet(hplus_activity="speciation")
+    set_operating_conditions(algebraic)
+    algebraic.fs.cstr.initialize()
+    greybox = _greybox()
+    for model in (algebraic, greybox):
+        model.fs.reaction_params.K_diss_1.set_value(1e-2)
+    
+    solve_model(algebraic, tee=False)
+    block = greybox.fs.cstr.control_volume.reactions[0]
+    for method in ("compact", "substitution"):
+        assert solve_speciated_model(greybox, method=method)["status"] == "optimal"
+        assert _a_hplus(greybox) == pytest.approx(_a_hplus(algebraic), rel=1e-6)
+    
+    # The grey-box model itself reads the updated constant
+    external = block.speciation.get_external_model()
+    external.set_input_values([value(v) for v in block._speciation_inputs()])
+    assert external.evaluate_outputs()[0] == pytest.approx(_a_hplus(algebraic), rel=1e-6)
@@ -0,0 +1,58 @@
+"""Tests of the CSTR surrogates, their JSON files and their Pyomo form."""
+
+import numpy as np
+import pytest
+from pyomo.environ import value
+from pyomo.opt import check_optimal_termination
+
+from asa_cm_control.asa_process_flowsheet import solve_model
+from asa_cm_control.asa_surrogate import (
+    DEFAULT_INPUT_BOUNDS,
+    DEFAULT_OUTPUTS,
+    MLPSurrogate,
+    PolynomialSurrogate,
+    build_surrogate_flowsheet,
+    latin_hypercube,
+    load_surrogate,
+    save_surrogate,
+    solve_samples,
+)
+
+
+@pytest.fixture(scope="module")
+def samples():
+    names, X = latin_hypercube(12, seed=1)
+    Y, ok = solve_samples(names, X)
+    assert ok.all()
+    return names, X, Y
+
+
+@pytest.fixture(scope="module", params=["polynomial", "mlp"])
+def surrogate(request, samples):
+    names, X, Y = samples
+    bounds = [DEFAULT_INPUT_BOUNDS[name] for name in names]
+    if request.param == "polynomial":
+        return PolynomialSurrogate(names, DEFAULT_OUTPUTS, degree=2).fit(X, Y, bounds)
+    return MLPSurrogate(names, DEFAULT_OUTPUTS, hidden=4).fit(X, Y, bounds, maxiter=200)
+
+
+def test_json_round_trip(surrogate, samples, tmp_path):
+    path = tmp_path / "surrogate.json"
+    save_surrogate(surrogate, path)
+    loaded = load_surrogate(path)
+    assert type(loaded) is type(surrogate)
+    assert loaded.input_names == surrogate.input_names
+    assert loaded.output_names == surrogate.output_names
+    X = samples[1]
+    np.testing.assert_array_equal(loaded.predict(X), surrogate.predict(X))
+
+
+def test_pyomo_form_matches_predictions(surrogate, samples):
+    names, X, _ = samples
+    point = dict(zip(names, X[3]))
+    model = build_surrogate_flowsheet(surrogate, **point)
+    assert not model.fs.config.dynamic
+    assert check_optimal_termination(solve_model(model, tee=False))
+    unit = model.fs.surrogate_cstr
+    outputs = [value(unit.outputs[name]) for name in surrogate.output_names]
+    np.testing.assert_allclose(outputs, surrogate.predict(X[3])[0], rtol=1e-8, atol=1e-10)
@@ -0,0 +1,72 @@
+"""Tests of the sparse NRTL activity coefficients against the dense NRTL."""
+
+import itertools
+import math
+
+import numpy as np
+import pytest
+from pyomo.environ import value
+
+from asa_cm_control.asa_process_flowsheet import build_flowsheet
+from asa_cm_control.props.asa_thermo_property_package import (
+    ASA_COMPONENTS,
+    ASA_NRTL,
+    NRTL_DEFAULT_ALPHA,
+    nrtl_activity_coefficients,
+)
+
+
+COMPOSITION = {
+    "salicylic_acid": 0.12,
+    "acetic_anhydride": 0.41,
+    "sulfuric_acid": 0.01,
+    "aspirin": 0.17,
+    "acetic_acid": 0.26,
+    "water": 0.03,
+}
+
+# Only the pairs with water listed; the rest are ideal
+WATER_NRTL = {
+    pair: {"tau": 0.1 * (k % 7) - 0.3, "alpha": 0.2 + 0.02 * (k % 5)}
+    for k, pair in enumerate(itertools.permutations(ASA_COMPONENTS, 2))
+    if "water" in pair
+}
+
+
+def _dense_log_gamma(x, tau, G):
+    """Textbook NRTL with full double sums."""
+    n = len(x)
+    log_gamma = []
+    for i in range(n):
+        q_i = sum(x[k] * G[k][i] for k in range(n))
+        term = sum(x[j] * tau[j][i] * G[j][i] for j in range(n)) / q_i
+        for j in range(n):
+            q_j = sum(x[k] * G[k][j] for k in range(n))
+            p_j = sum(x[m] * tau[m][j] * G[m][j] for m in range(n))
+            term += x[j] * G[i][j] / q_j * (tau[i][j] - p_j / q_j)
+        log_gamma.append(term)
+    return log_gamma
+
+
+@pytest.mark.parametrize("nrtl", [None, WATER_NRTL], ids=["asa", "water-pairs"])
+def test_sparse_nrtl_equals_dense(nrtl):
+    model = build_flowsheet(nrtl=nrtl)
+    state = model.fs.cstr.control_volume.properties_in[0]
+    for j, x in COMPOSITION.items():
+        state.mole_frac_comp[j].set_value(x)
+    
+    table = ASA_NRTL if nrtl is None else nrtl
+    assert len(model.fs.thermo_params.nrtl_pair_set) == len(table)
+    names = list(ASA_COMPONENTS)
+    tau = [[table.get((i, j), {}).get("tau", 0.0) for j in names] for i in names]
+    alpha = [
+        [table.get((i, j), {}).get("alpha", NRTL_DEFAULT_ALPHA) for j in names] for i in names
+    ]
+    G = [[math.exp(-a * t) for a, t in zip(row_a, row_t)] for row_a, row_t in zip(alpha, tau)]
+    x = [COMPOSITION[j] for j in names]
+    expected = np.exp(_dense_log_gamma(x, tau, G))
+    
+    gamma = [value(state.act_coeff_liq_comp[j]) for j in names]
+    np.testing.assert_allclose(gamma, expected, rtol=1e-10)
+    vectorized = nrtl_activity_coefficients([x], np.array(tau), np.array(alpha))[0]
+    np.testing.assert_allclose(vectorized, expected, rtol=1e-10)
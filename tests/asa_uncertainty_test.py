@@ -0,0 +1,82 @@
+"""Seeded tests of the uncertainty sampling, statistics and Monte Carlo run."""
+
+import itertools
+
+import numpy as np
+import pytest
+from scipy.stats import qmc
+
+from asa_cm_control.asa_surrogate import nearest_neighbour_order
+from asa_cm_control.asa_uncertainty import (
+    RunningStatistics,
+    run_monte_carlo,
+    transform_samples,
+    unit_sample_batches,
+)
+
+
+def _take(stream, n_batches):
+    return np.vstack(list(itertools.islice(stream, n_batches)))
+
+
+@pytest.mark.parametrize("method", ["lhs", "sobol", "halton", "random"])
+def test_batches_are_seeded(method):
+    first = _take(unit_sample_batches(3, 8, method, seed=4), 2)
+    assert first.shape == (16, 3) and np.all((first >= 0) & (first < 1))
+    np.testing.assert_array_equal(first, _take(unit_sample_batches(3, 8, method, seed=4), 2))
+    assert not np.array_equal(first, _take(unit_sample_batches(3, 8, method, seed=5), 2))
+
+
+def test_sobol_batches_continue_one_sequence():
+    stream = _take(unit_sample_batches(2, 8, "sobol", seed=1), 4)
+    np.testing.assert_array_equal(stream, qmc.Sobol(d=2, scramble=True, seed=1).random(32))
+    # Every power-of-two prefix is balanced: one point per stratum of 1/n
+    for n in (8, 16, 32):
+        counts = np.bincount((stream[:n, 0] * n).astype(int), minlength=n)
+        assert np.all(counts == 1)
+
+
+def test_lhs_batches_are_stratified():
+    for batch in itertools.islice(unit_sample_batches(2, 10, "lhs", seed=0), 3):
+        for column in batch.T:
+            assert sorted((column * 10).astype(int)) == list(range(10))
+
+
+def test_transform_samples_hits_distribution_quantiles():
+    U = np.array([[0.5, 0.5, 0.5, 0.0], [0.8413447460685429, 0.8413447460685429, 0.5, 1.0]])
+    P = transform_samples(
+        U,
+        [("lognormal", 0.3), ("relative_normal", 0.1), ("normal", 2.0), ("uniform", 1.0)],
+        [2.0, 10.0, 5.0, 3.0],
+    )
+    np.testing.assert_allclose(P[0], [2.0, 10.0, 5.0, 2.0], atol=1e-9)
+    np.testing.assert_allclose(P[1], [2.0 * np.exp(0.3), 11.0, 5.0, 4.0], atol=1e-9)
+
+
+def test_running_statistics_match_numpy():
+    Y = np.random.default_rng(0).normal(size=(50, 2))
+    ok = np.ones(50, dtype=bool)
+    ok[::10] = False
+    stats = RunningStatistics(["a", "b"], reservoir_size=64)
+    for rows in np.array_split(np.arange(50), 7):
+        stats.update(Y[rows], ok[rows])
+    kept = Y[ok]
+    assert stats.count == 45 and stats.failures == 5
+    np.testing.assert_allclose(stats.mean, kept.mean(axis=0))
+    np.testing.assert_allclose(stats.std, kept.std(axis=0, ddof=1))
+    np.testing.assert_allclose(stats.quantiles((0.5,))[0], np.median(kept, axis=0))
+
+
+def test_nearest_neighbour_order_visits_each_point_once():
+    X = np.array([[0.0, 0.0], [1.0, 1.0], [0.1, 0.0], [0.9, 1.0], [0.5, 0.5]])
+    assert nearest_neighbour_order(X) == [0, 2, 4, 3, 1]
+
+
+def test_seeded_monte_carlo_is_reproducible():
+    kwargs = dict(n_samples=6, method="sobol", batch_size=4, n_workers=1, seed=3)
+    stats, info = run_monte_carlo(**kwargs)
+    assert info["n_solved"] == 6 and info["n_failed"] == 0
+    summary = stats.summary()
+    assert 0 < summary["aspirin_yield"]["min"] <= summary["aspirin_yield"]["max"] <= 1
+    again, _ = run_monte_carlo(**kwargs)
+    np.testing.assert_allclose(again.mean, stats.mean, rtol=1e-6)